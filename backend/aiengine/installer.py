@@ -153,8 +153,11 @@ def start_install(socketio, variant=None):
 
     def run():
         global _installing
+        from aiengine import runner
         state = read_state()
         try:
+            # a keep-warm worker holds torch and the model open from this venv
+            runner.shutdown()
             _write_state(torchVariant=variant, error=None, finishedAt=None)
 
             _download_python(emit)
@@ -176,7 +179,6 @@ def start_install(socketio, variant=None):
             _write_state(phase='deps')
 
             emit('verify', 'verifying the engine…', None)
-            from aiengine import runner
             report = runner.check(force=True)
             if not report or not report.get('ok'):
                 raise RuntimeError('verification failed: '
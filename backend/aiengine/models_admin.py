@@ -11,6 +11,7 @@ import time
 from huggingface_hub import scan_cache_dir, snapshot_download
 from tqdm import tqdm as _tqdm_base
 
+from aiengine import runner
 from aiengine.registry import MODELS, find
 
 
@@ -191,6 +192,8 @@ def delete_model_cache(model_id):
     if spec is None or spec.kind != 'local':
         raise ValueError(f'unknown local model: {model_id}')
 
+    # the keep-warm worker may have these weights open (Windows can't delete them)
+    runner.shutdown()
     kwargs = {}
     cache_dir = _cache_dir_arg()
     if cache_dir:
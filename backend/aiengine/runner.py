@@ -1,9 +1,13 @@
 """Spawn the generate worker and speak its NDJSON protocol.
 
-One job per process (cold model load each call — parity with the old
-assetFarm bridge; the protocol permits a keep-warm loop later). Local
-generations are serialized with a module lock: one GPU.
+By default one `generate_worker.py --serve` process stays up between jobs
+and keeps the last pipeline loaded, so a batch of swatches pays the model
+load once; it exits by itself after NUCLEUS_AIENGINE_IDLE_S (default 300)
+without a job, handing the VRAM back. NUCLEUS_AIENGINE_KEEP_WARM=0 restores
+one process per image (cold load each call). Local generations are
+serialized with a module lock: one GPU.
 """
+import atexit
 import json
 import logging
 import os
@@ -20,6 +24,13 @@ logger = logging.getLogger(__name__)
 _gen_lock = threading.Lock()
 _check_cache = {'python': None, 'report': None}
 
+KEEP_WARM = os.environ.get('NUCLEUS_AIENGINE_KEEP_WARM', '').strip().lower() \
+    not in ('0', 'false', 'no', 'off')
+IDLE_TIMEOUT_S = float(os.environ.get('NUCLEUS_AIENGINE_IDLE_S', '') or 300)
+_SERVE_PROTOCOL = 1
+# --serve defers the torch import to the first job, so the greeting is quick
+_READY_TIMEOUT_S = 60.0
+
 
 class EngineError(RuntimeError):
     pass
@@ -68,7 +79,9 @@ def check(force=False):
 
 def generate(prompt, model_id, out_path, style=None, seed=None,
              width=None, height=None, on_progress=None, timeout=1800):
-    """Generate an image with a local model. Returns (out_path, seconds).
+    """Generate an image with a local model. Returns (out_path, seconds,
+    timings) — timings {load_seconds, gen_seconds} split the total into model
+    load (~0 on a warm worker) and the run itself, for telemetry.record_run.
     Raises EngineError with a readable message on any failure."""
     spec = find(model_id)
     if spec is None or spec.kind != 'local':
@@ -96,58 +109,237 @@ def generate(prompt, model_id, out_path, style=None, seed=None,
 
     with _gen_lock:
         logger.info(f'[ai-engine] generate ({model_id}): {prompt!r}')
-        proc = subprocess.Popen(
-            [str(python), str(WORKER_SCRIPT)],
-            stdin=subprocess.PIPE, stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE, text=True, encoding='utf-8',
-            env=_worker_env(), **get_subprocess_args())
+        if KEEP_WARM:
+            result = _warm.run(python, job, on_progress, timeout)
+        else:
+            result = _run_once(python, job, on_progress, timeout)
 
-        def _kill_on_timeout():
-            try:
-                proc.wait(timeout=timeout)
-            except subprocess.TimeoutExpired:
-                proc.kill()
+    if not result.get('ok'):
+        raise EngineError(f'generation failed: {result.get("error")}')
+    logger.info(f'[ai-engine] {model_id}: load {result.get("load_seconds")}s '
+                f'({"warm" if result.get("warm") else "cold"}), '
+                f'generate {result.get("gen_seconds")}s')
+    timings = {'load_seconds': result.get('load_seconds'),
+               'gen_seconds': result.get('gen_seconds')}
+    return result['path'], result.get('seconds') or 0.0, timings
+
+
+def _forward_progress(event, on_progress):
+    if on_progress:
+        try:
+            on_progress(event.get('pct'), event.get('desc') or '')
+        except Exception:
+            pass
 
-        watchdog = threading.Thread(target=_kill_on_timeout, daemon=True)
-        watchdog.start()
 
-        # Drain stderr concurrently: diffusers/HF write tqdm bars there, and
-        # an undrained pipe fills its buffer and DEADLOCKS the worker.
-        stderr_tail = []
+def _drain(stream, tail):
+    # diffusers/HF write tqdm bars to stderr; an undrained pipe fills its
+    # buffer and DEADLOCKS the worker
+    for line in stream:
+        tail.append(line.rstrip())
+        del tail[:-30]
 
-        def _drain_stderr():
-            for line in proc.stderr:
-                stderr_tail.append(line.rstrip())
-                del stderr_tail[:-30]
 
-        threading.Thread(target=_drain_stderr, daemon=True).start()
+def _died(tail):
+    stderr = ' | '.join(tail[-5:])
+    return EngineError('generate worker died without a result'
+                       + (f': {stderr}' if stderr else ''))
 
+
+def _run_once(python, job, on_progress, timeout):
+    """One worker process for one job (cold model load). Returns the result
+    event."""
+    proc = subprocess.Popen(
+        [str(python), str(WORKER_SCRIPT)],
+        stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE, text=True, encoding='utf-8',
+        env=_worker_env(), **get_subprocess_args())
+
+    def _kill_on_timeout():
         try:
-            proc.stdin.write(json.dumps(job) + '\n')
-            proc.stdin.close()
-        except OSError as e:
+            proc.wait(timeout=timeout)
+        except subprocess.TimeoutExpired:
             proc.kill()
+
+    watchdog = threading.Thread(target=_kill_on_timeout, daemon=True)
+    watchdog.start()
+
+    stderr_tail = []
+    threading.Thread(target=_drain, args=(proc.stderr, stderr_tail),
+                     daemon=True).start()
+
+    try:
+        proc.stdin.write(json.dumps(job) + '\n')
+        proc.stdin.close()
+    except OSError as e:
+        proc.kill()
+        raise EngineError(f'could not start the generate worker: {e}')
+
+    result = None
+    for line in proc.stdout:
+        try:
+            event = json.loads(line)
+        except json.JSONDecodeError:
+            continue
+        if event.get('event') == 'progress':
+            _forward_progress(event, on_progress)
+        elif event.get('event') == 'result':
+            result = event
+    proc.wait()
+
+    if result is None:
+        raise _died(stderr_tail)
+    return result
+
+
+class _WarmWorker:
+    """Client for the long-lived `generate_worker.py --serve` process.
+
+    Jobs carry an id the worker echoes on every event. A job that never
+    reached the worker (it idled out — {"event": "bye"} — or died between
+    jobs) is resent once to a fresh process; one that was taken and then
+    lost raises, like a one-shot worker dying mid-run. Callers serialize
+    on _gen_lock.
+    """
+
+    def __init__(self):
+        self.proc = None
+        self.python = None
+        self.stderr_tail = []
+        self.spawns = 0
+        self._next_id = 0
+        self._timed_out = False
+
+    def alive(self):
+        return self.proc is not None and self.proc.poll() is None
+
+    def _spawn(self, python):
+        self.stderr_tail = []
+        self._timed_out = False
+        try:
+            self.proc = subprocess.Popen(
+                [str(python), str(WORKER_SCRIPT), '--serve',
+                 '--idle-timeout', str(IDLE_TIMEOUT_S)],
+                stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE, text=True, encoding='utf-8',
+                bufsize=1, env=_worker_env(), **get_subprocess_args())
+        except OSError as e:
             raise EngineError(f'could not start the generate worker: {e}')
+        self.python = str(python)
+        threading.Thread(target=_drain, args=(self.proc.stderr, self.stderr_tail),
+                         daemon=True).start()
+        hello = self._read_event(_READY_TIMEOUT_S)
+        if not hello or hello.get('event') != 'ready' \
+                or hello.get('protocol') != _SERVE_PROTOCOL:
+            tail = list(self.stderr_tail)
+            self.close()
+            raise EngineError(f'generate worker did not start: {hello!r}'
+                              + (f' ({" | ".join(tail[-5:])})' if tail else ''))
+        self.spawns += 1
+        logger.info(f'[ai-engine] keep-warm worker started (pid {self.proc.pid})')
+
+    def _kill(self):
+        self._timed_out = True
+        try:
+            self.proc.kill()
+        except Exception:
+            pass
+
+    def _read_event(self, timeout=None):
+        """Next JSON event, or None once the worker exits. A `timeout` kills
+        the worker (readline would otherwise block forever)."""
+        watchdog = None
+        if timeout:
+            watchdog = threading.Timer(timeout, self._kill)
+            watchdog.daemon = True
+            watchdog.start()
+        try:
+            for line in self.proc.stdout:
+                try:
+                    return json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+            return None
+        finally:
+            if watchdog is not None:
+                watchdog.cancel()
 
-        result = None
-        for line in proc.stdout:
+    def run(self, python, job, on_progress, timeout):
+        """Run one job; returns its result event."""
+        tail = []
+        for _attempt in range(2):
+            if not self.alive() or self.python != str(python):
+                self.close()
+                self._spawn(python)
+            self._next_id += 1
+            job_id = self._next_id
             try:
-                event = json.loads(line)
-            except json.JSONDecodeError:
+                self.proc.stdin.write(json.dumps({**job, 'id': job_id}) + '\n')
+                self.proc.stdin.flush()
+            except OSError:
+                self.close()
                 continue
-            if event.get('event') == 'progress' and on_progress:
+
+            taken = False
+            watchdog = threading.Timer(timeout, self._kill)
+            watchdog.daemon = True
+            watchdog.start()
+            try:
+                while True:
+                    event = self._read_event()
+                    if event is None or event.get('event') == 'bye':
+                        break
+                    if event.get('id') != job_id:
+                        continue
+                    taken = True
+                    if event.get('event') == 'progress':
+                        _forward_progress(event, on_progress)
+                    elif event.get('event') == 'result':
+                        return event
+            finally:
+                watchdog.cancel()
+
+            timed_out, tail = self._timed_out, list(self.stderr_tail)
+            self.close()
+            if timed_out:
+                raise EngineError(f'generation timed out after {timeout}s')
+            if taken:
+                raise _died(tail)
+        raise _died(tail)
+
+    def close(self):
+        """Stop the worker (releasing its model)."""
+        proc, self.proc = self.proc, None
+        if proc is None:
+            return
+        try:
+            if proc.poll() is None:
                 try:
-                    on_progress(event.get('pct'), event.get('desc') or '')
-                except Exception:
+                    proc.stdin.write(json.dumps({'cmd': 'quit'}) + '\n')
+                    proc.stdin.flush()
+                except OSError:
                     pass
-            elif event.get('event') == 'result':
-                result = event
-        proc.wait()
+                try:
+                    proc.wait(timeout=5)
+                except subprocess.TimeoutExpired:
+                    proc.kill()
+                    proc.wait(timeout=5)
+        except Exception:
+            pass
+        for stream in (proc.stdin, proc.stdout):
+            try:
+                stream.close()
+            except Exception:
+                pass
 
-    if result is None:
-        stderr = ' | '.join(stderr_tail[-5:])
-        raise EngineError('generate worker died without a result'
-                          + (f': {stderr}' if stderr else ''))
-    if not result.get('ok'):
-        raise EngineError(f'generation failed: {result.get("error")}')
-    return result['path'], result.get('seconds') or 0.0
+
+_warm = _WarmWorker()
+
+
+def shutdown():
+    """Stop the keep-warm worker, if one is running."""
+    with _gen_lock:
+        _warm.close()
+
+
+atexit.register(shutdown)
@@ -2,9 +2,12 @@
 
   {"ts": 1760000000.1, "provider": "local", "model": "sd-turbo",
    "tier": "standard", "kind": "material" | "ailab" | "stage",
-   "seconds": 14.2, "success": true, "cached": false, "est_cost_usd": 0.0}
+   "seconds": 14.2, "success": true, "cached": false, "est_cost_usd": 0.0,
+   "load_seconds": 9.8, "gen_seconds": 4.4}
 
-Append-only; aggregation reads the whole file (a few KB per hundred runs).
+load_seconds/gen_seconds are present only for local runs, which split the
+total into model load (~0 when the keep-warm worker already had it) and the
+generation itself. Append-only; aggregation reads the whole file (a few KB per hundred runs).
 """
 import json
 import statistics
@@ -17,7 +20,8 @@ _lock = threading.Lock()
 
 
 def record_run(provider, model, tier, kind, seconds, success,
-               cached=False, est_cost_usd=0.0):
+               cached=False, est_cost_usd=0.0, load_seconds=None,
+               gen_seconds=None):
     entry = {
         'ts': round(time.time(), 1),
         'provider': provider,
@@ -29,6 +33,10 @@ def record_run(provider, model, tier, kind, seconds, success,
         'cached': bool(cached),
         'est_cost_usd': round(float(est_cost_usd or 0.0), 4),
     }
+    if load_seconds is not None:
+        entry['load_seconds'] = round(float(load_seconds), 2)
+    if gen_seconds is not None:
+        entry['gen_seconds'] = round(float(gen_seconds), 2)
     line = json.dumps(entry)
     with _lock:
         RUNS_LEDGER.parent.mkdir(parents=True, exist_ok=True)
@@ -81,6 +89,10 @@ def aggregate(days=None):
         attempts = [r for r in items if not r.get('cached')]
         timed = [r['seconds'] for r in attempts if r.get('success')]
         costed = [r.get('est_cost_usd', 0) for r in attempts if r.get('success')]
+        loads = [r['load_seconds'] for r in attempts
+                 if r.get('success') and 'load_seconds' in r]
+        gens = [r['gen_seconds'] for r in attempts
+                if r.get('success') and 'gen_seconds' in r]
         per_model.append({
             'provider': provider,
             'model': model,
@@ -89,6 +101,8 @@ def aggregate(days=None):
                             / len(attempts)) if attempts else None,
             'avgSeconds': round(sum(timed) / len(timed), 1) if timed else None,
             'medianSeconds': round(statistics.median(timed), 1) if timed else None,
+            'avgLoadSeconds': round(sum(loads) / len(loads), 1) if loads else None,
+            'avgGenSeconds': round(sum(gens) / len(gens), 1) if gens else None,
             'avgCostUsd': round(sum(costed) / len(costed), 4) if costed else None,
             'cachedHits': sum(1 for r in items if r.get('cached')),
             'lastTs': max(r['ts'] for r in items),
@@ -108,10 +122,13 @@ def aggregate(days=None):
 
 
 def model_stats(days=None):
-    """{model: {runs, avgSeconds, medianSeconds, avgCostUsd, lastTs}} keyed by
-    the model string recorded in the ledger (all-time by default) —
-    convenience for the catalog endpoint."""
+    """{model: {runs, avgSeconds, medianSeconds, avgLoadSeconds,
+    avgGenSeconds, avgCostUsd, lastTs}} keyed by the model string recorded
+    in the ledger (all-time by default) — convenience for the catalog
+    endpoint."""
     return {m['model']: {'runs': m['runs'], 'avgSeconds': m['avgSeconds'],
                          'medianSeconds': m['medianSeconds'],
+                         'avgLoadSeconds': m['avgLoadSeconds'],
+                         'avgGenSeconds': m['avgGenSeconds'],
                          'avgCostUsd': m['avgCostUsd'], 'lastTs': m['lastTs']}
             for m in aggregate(days)['perModel']}
@@ -7,20 +7,31 @@ imports nothing from backend/: the full model spec travels inside the job.
 Modes:
   --check                  print a JSON capability report and exit
   (default)                read ONE json job line from stdin, generate, exit
+  --serve [--idle-timeout S]
+                           keep-warm: print {"event": "ready", "protocol": 1},
+                           then run job lines until stdin closes, a
+                           {"cmd": "quit"} line, or S seconds without a job
+                           ({"event": "bye", "reason": "idle"}). The last
+                           pipeline stays loaded between jobs; a job for a
+                           different model replaces it (one GPU).
 
 Job line:
   {"prompt": str, "style": "tile"|"scene"|null, "width": int, "height": int,
-   "seed": int|null, "out_path": str,
+   "seed": int|null, "out_path": str, "id": any (optional, echoed),
    "spec": {"repo_id": str, "pipeline_class": str, "dtype": str,
             "num_inference_steps": int, "guidance_scale": float}}
 
-Output (NDJSON on stdout):
+Output (NDJSON on stdout; every event carries the job's "id" when it had one):
   {"event": "progress", "pct": 0.0-1.0, "desc": str}
-  {"event": "result", "ok": true, "path": str, "seconds": float}
+  {"event": "result", "ok": true, "path": str, "seconds": float,
+   "load_seconds": float, "gen_seconds": float, "warm": bool}
   {"event": "result", "ok": false, "error": str}
 """
+import gc
 import json
+import queue
 import sys
+import threading
 import time
 
 # Baked style presets — the only two behaviors the skin lab uses (vendored
@@ -79,41 +90,33 @@ def check():
     emit(report)
 
 
-def generate(job):
+def load_pipeline(spec):
     import torch
     import diffusers
 
-    spec = job['spec']
-    style = STYLES.get(job.get('style') or '')
-    prompt = job['prompt']
-    if style:
-        prompt = style['prefix'] + prompt
-    width = int(job.get('width') or (style or STYLES['tile'])['width'])
-    height = int(job.get('height') or (style or STYLES['tile'])['height'])
-    steps = int(spec.get('num_inference_steps') or 4)
-
-    emit({'event': 'progress', 'pct': 0.0,
-          'desc': f'loading {spec["repo_id"]}…'})
-    t0 = time.perf_counter()
-
     pipeline_cls = getattr(diffusers, spec['pipeline_class'])
     dtype = getattr(torch, spec.get('dtype') or 'float16', torch.float16)
     pipe = pipeline_cls.from_pretrained(spec['repo_id'], torch_dtype=dtype)
     if torch.cuda.is_available():
         pipe.enable_model_cpu_offload()
     pipe.set_progress_bar_config(disable=True)
+    return pipe
 
-    load_s = time.perf_counter() - t0
-    emit({'event': 'progress', 'pct': 0.05,
-          'desc': f'model loaded in {load_s:.1f}s'})
-    gen_t0 = time.perf_counter()
 
-    def on_step(_pipeline, step_index, _timestep, callback_kwargs):
-        done = step_index + 1
-        elapsed = time.perf_counter() - gen_t0
-        eta = elapsed / done * (steps - done)
-        emit({'event': 'progress', 'pct': 0.05 + 0.9 * done / steps,
-              'desc': f'step {done}/{steps} | {elapsed:.1f}s / ~{elapsed + eta:.1f}s'})
+def release_memory():
+    import torch
+
+    gc.collect()
+    if torch.cuda.is_available():
+        torch.cuda.empty_cache()
+
+
+def render(pipe, job, prompt, width, height, steps, on_step):
+    """Run the pipeline and save the PNG; on_step(done) after each step."""
+    import torch
+
+    def step_end(_pipeline, step_index, _timestep, callback_kwargs):
+        on_step(step_index + 1)
         return callback_kwargs
 
     generator = None
@@ -124,22 +127,126 @@ def generate(job):
         prompt=prompt,
         width=width,
         height=height,
-        guidance_scale=float(spec.get('guidance_scale') or 0.0),
+        guidance_scale=float(job['spec'].get('guidance_scale') or 0.0),
         num_inference_steps=steps,
         generator=generator,
-        callback_on_step_end=on_step,
+        callback_on_step_end=step_end,
     )
-    image = result.images[0]
-    out_path = job['out_path']
-    image.save(out_path, format='PNG')
-    emit({'event': 'result', 'ok': True, 'path': out_path,
-          'seconds': round(time.perf_counter() - t0, 1)})
+    result.images[0].save(job['out_path'], format='PNG')
+
+
+def _pipeline_key(spec):
+    return (spec['repo_id'], spec['pipeline_class'], spec.get('dtype'))
+
+
+def drop_pipeline(loaded):
+    had_pipe = loaded.get('pipe') is not None
+    loaded.clear()
+    if had_pipe:
+        release_memory()
+
+
+def generate(job, loaded=None):
+    """Run one job. `loaded` ({'key', 'pipe'}) is the serve loop's warm
+    pipeline: reused when the job's model matches, replaced when not."""
+    tag = {'id': job['id']} if 'id' in job else {}
+    spec = job['spec']
+    style = STYLES.get(job.get('style') or '')
+    prompt = job['prompt']
+    if style:
+        prompt = style['prefix'] + prompt
+    width = int(job.get('width') or (style or STYLES['tile'])['width'])
+    height = int(job.get('height') or (style or STYLES['tile'])['height'])
+    steps = int(spec.get('num_inference_steps') or 4)
+
+    t0 = time.perf_counter()
+    key = _pipeline_key(spec)
+    warm = loaded is not None and loaded.get('key') == key
+    if warm:
+        pipe = loaded['pipe']
+        emit({'event': 'progress', 'pct': 0.05,
+              'desc': f'{spec["repo_id"]} already loaded', **tag})
+    else:
+        if loaded:
+            drop_pipeline(loaded)
+        emit({'event': 'progress', 'pct': 0.0,
+              'desc': f'loading {spec["repo_id"]}…', **tag})
+        pipe = load_pipeline(spec)
+        if loaded is not None:
+            loaded.update(key=key, pipe=pipe)
+        emit({'event': 'progress', 'pct': 0.05,
+              'desc': f'model loaded in {time.perf_counter() - t0:.1f}s', **tag})
+
+    load_s = time.perf_counter() - t0
+    gen_t0 = time.perf_counter()
+
+    def on_step(done):
+        elapsed = time.perf_counter() - gen_t0
+        eta = elapsed / done * (steps - done)
+        emit({'event': 'progress', 'pct': 0.05 + 0.9 * done / steps,
+              'desc': f'step {done}/{steps} | {elapsed:.1f}s / ~{elapsed + eta:.1f}s',
+              **tag})
+
+    render(pipe, job, prompt, width, height, steps, on_step)
+    emit({'event': 'result', 'ok': True, 'path': job['out_path'],
+          'seconds': round(time.perf_counter() - t0, 1),
+          'load_seconds': round(load_s, 2),
+          'gen_seconds': round(time.perf_counter() - gen_t0, 2),
+          'warm': warm, **tag})
+
+
+def serve(idle_timeout):
+    # stdin is read on a thread so the idle timeout works on Windows pipes
+    # too (select() there only takes sockets)
+    lines = queue.Queue()
+
+    def _read():
+        for line in sys.stdin:
+            lines.put(line)
+        lines.put(None)
+
+    threading.Thread(target=_read, daemon=True).start()
+    emit({'event': 'ready', 'protocol': 1})
+    loaded = {}
+    while True:
+        try:
+            line = lines.get(timeout=idle_timeout or None)
+        except queue.Empty:
+            emit({'event': 'bye', 'reason': 'idle'})
+            return
+        if line is None:          # the backend went away
+            return
+        if not line.strip():
+            continue
+        try:
+            job = json.loads(line)
+        except json.JSONDecodeError as e:
+            emit({'event': 'result', 'ok': False, 'error': f'bad job line: {e}'})
+            continue
+        if job.get('cmd') == 'quit':
+            return
+        try:
+            generate(job, loaded)
+            continue
+        except Exception as e:
+            error = f'{type(e).__name__}: {e}'
+        # a failed run (OOM, CUDA error) may leave the pipeline unusable;
+        # dropped outside the handler so the traceback no longer pins it
+        drop_pipeline(loaded)
+        emit({'event': 'result', 'ok': False, 'error': error,
+              **({'id': job['id']} if 'id' in job else {})})
 
 
 def main():
     if '--check' in sys.argv:
         check()
         return
+    if '--serve' in sys.argv:
+        idle_timeout = 0.0
+        if '--idle-timeout' in sys.argv:
+            idle_timeout = float(sys.argv[sys.argv.index('--idle-timeout') + 1])
+        serve(idle_timeout)
+        return
     try:
         job = json.loads(sys.stdin.readline())
     except (json.JSONDecodeError, ValueError) as e:
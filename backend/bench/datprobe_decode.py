@@ -0,0 +1,74 @@
+"""
+datprobe_decode.py -- microbenchmark: tuple decode_image vs the vectorized
+decode_image_array for every decodable GX format, on synthetic textures the
+size of a typical costume body texture. With a DAT argument it also times
+decoding every texture of that file (decode_textures vs a per-TOBJ loop).
+
+Run from backend/:
+  python bench/datprobe_decode.py [--size 256] [--repeat 5] [PlFxNr.dat]
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from skinlab import datprobe  # noqa: E402
+from skinlab.datprobe import (  # noqa: E402
+    TEX_FMT, Image, Tlut, decode_image, decode_image_array, gx_image_size)
+
+
+def best_of(fn, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('dat', nargs='?')
+    ap.add_argument('--size', type=int, default=256)
+    ap.add_argument('--repeat', type=int, default=5)
+    args = ap.parse_args()
+
+    rng = np.random.default_rng(0)
+    tlut = Tlut(0, 0, 2, 256, rng.integers(0, 256, 512, np.uint8).tobytes())
+    print(f'{"format":<8} {"tuple ms":>10} {"array ms":>10} {"speedup":>8}')
+    for fmt, name in sorted(TEX_FMT.items()):
+        if fmt == 10:
+            continue
+        n = args.size
+        img = Image(0, 0, n, n, fmt, rng.integers(
+            0, 256, gx_image_size(fmt, n, n), np.uint8).tobytes())
+        pal = tlut if fmt in (8, 9) else None
+        slow = best_of(lambda: decode_image(img, pal), args.repeat)
+        fast = best_of(lambda: decode_image_array(img, pal), args.repeat)
+        print(f'{name:<8} {slow * 1e3:>10.2f} {fast * 1e3:>10.3f} '
+              f'{slow / fast:>7.0f}x')
+
+    if args.dat:
+        dat = datprobe.DatFile(args.dat)
+        tobjs = [t for _n, off in dat.jobj_roots()
+                 for t in dat.jobj_textures(off)]
+
+        def per_tobj():
+            for t in tobjs:
+                try:
+                    decode_image(t.image, t.tlut)
+                except Exception:
+                    pass
+        slow = best_of(per_tobj, args.repeat)
+        fast = best_of(lambda: datprobe.decode_textures(dat, matanim=True),
+                       args.repeat)
+        print(f'\n{Path(args.dat).name}: {len(tobjs)} TOBJs  '
+              f'tuple {slow * 1e3:.1f} ms  batch {fast * 1e3:.1f} ms '
+              f'(+matanim)  {slow / fast:.0f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+"""
+dsp_decode.py -- benchmark: dsp_audio's in-process DSP-ADPCM decode vs the
+MexCLI path it replaced for audio previews. On a synthetic stereo .hps-style
+stream (0x8000-byte blocks per channel, like Melee's music) it times the
+scalar loop against the block-lane decode; with .hps/.ssm arguments it times
+each file through dsp_audio.preview_wav (cold) and, if MexCLI is built,
+through `mexcli hps-to-wav` / `ssm-to-wav` (one process + temp wav each).
+
+Run from backend/:
+  python bench/dsp_decode.py [--seconds 120] [--repeat 3] [track.hps] [bank.ssm]
+"""
+import argparse
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import dsp_audio  # noqa: E402
+from core.config import MEXCLI_PATH, get_subprocess_args  # noqa: E402
+
+BLOCK_BYTES = 0x8000
+COEFS = (0, 0, 2048, 0, 0, 2048, 1024, 1024, 4096, -2048, 3584, -1536, 3072, -1024, 4032, -1990)
+
+
+def best_of(fn, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def synthetic_channel(rng, seconds):
+    nframes = int(seconds * 32000) // 14
+    frames = rng.integers(0, 256, (nframes, 8), np.uint8)
+    frames[:, 0] = (rng.integers(0, 8, nframes) << 4) | rng.integers(0, 10, nframes)
+    data = frames.tobytes()
+    # true block-start histories, as an encoder would record them
+    pcm = dsp_audio.decode_channel(dsp_audio.DspChannel(COEFS, data))
+    hints = []
+    for off in range(0, len(data), BLOCK_BYTES):
+        s = off // 8 * 14
+        hints.append((off, int(pcm[s - 1]) if s else 0, int(pcm[s - 2]) if s > 1 else 0))
+    return dsp_audio.DspChannel(COEFS, data, tuple(hints))
+
+
+def mexcli_wav(path):
+    with tempfile.TemporaryDirectory() as tmp:
+        out = Path(tmp) / 'out.wav'
+        if path.suffix.lower() == '.ssm':
+            cmd = [str(MEXCLI_PATH), 'ssm-to-wav', str(path), '0', str(out)]
+        else:
+            cmd = [str(MEXCLI_PATH), 'hps-to-wav', str(path), str(out)]
+        subprocess.run(cmd, capture_output=True, **get_subprocess_args())
+        return out.read_bytes() if out.exists() else b''
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('files', nargs='*')
+    ap.add_argument('--seconds', type=float, default=120)
+    ap.add_argument('--repeat', type=int, default=3)
+    args = ap.parse_args()
+
+    rng = np.random.default_rng(0)
+    chans = [synthetic_channel(rng, args.seconds) for _ in range(2)]
+    nsamples = 2 * dsp_audio.sample_count(len(chans[0].data))
+    flat = [c._replace(hints=()) for c in chans]
+    scalar = best_of(lambda: dsp_audio.decode_channels(flat), args.repeat)
+    lanes = best_of(lambda: dsp_audio.decode_channels(chans), args.repeat)
+    print(f'synthetic {args.seconds:.0f}s stereo, {2 * len(chans[0].hints)} block lanes, '
+          f'{nsamples} samples')
+    print(f'  scalar {scalar * 1e3:8.1f} ms  ({scalar / nsamples * 1e9:.0f} ns/sample)')
+    print(f'  lanes  {lanes * 1e3:8.1f} ms  ({scalar / lanes:.1f}x)')
+
+    for f in map(Path, args.files):
+        index = 0 if f.suffix.lower() == '.ssm' else None
+
+        def native():
+            dsp_audio.clear_cache()
+            return dsp_audio.preview_wav(f, index)
+        t = best_of(native, args.repeat)
+        line = f'{f.name}: native {t * 1e3:.1f} ms'
+        if MEXCLI_PATH.exists():
+            m = best_of(lambda: mexcli_wav(f), args.repeat)
+            same = mexcli_wav(f)[44:] == native()[44:]
+            line += f'  mexcli {m * 1e3:.1f} ms  ({m / t:.1f}x, identical pcm: {same})'
+        print(line)
+
+
+if __name__ == '__main__':
+    main()
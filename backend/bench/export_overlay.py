@@ -0,0 +1,77 @@
+"""
+export_overlay.py -- benchmark: texture-pack export setup, i.e. preparing the
+isolated project the placeholder swap / recompile / ISO build run against:
+the old full shutil.copytree vs core.project_overlay.build_overlay.
+
+The synthetic project mimics an extracted m-ex disc: --files fighter/stage
+DATs totalling --mb MiB under files/, plus --csps CSP png/tex pairs, the
+generated menu files and project data.
+
+Run from backend/:
+  python bench/export_overlay.py [--mb 1024] [--files 600] [--csps 300] [--repeat 3]
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from core.project_overlay import REWRITTEN_FILES, build_overlay  # noqa: E402
+
+
+def make_project(root, total_mb, n_files, n_csps):
+    for sub in ('files/audio/us', 'sys', 'data/fighters', 'assets/csp', 'assets/icons'):
+        (root / sub).mkdir(parents=True, exist_ok=True)
+    (root / 'project.mexproj').write_bytes(b'{}' * 2048)
+    (root / 'sys' / 'main.dol').write_bytes(os.urandom(4 << 20))
+    for name in REWRITTEN_FILES:
+        (root / 'files' / name).write_bytes(os.urandom(256 << 10))
+    chunk = os.urandom(1 << 20)
+    per_file = max(1, (total_mb << 20) // n_files)
+    for i in range(n_files):
+        with open(root / 'files' / f"Pl{i:04d}.dat", 'wb') as f:
+            left = per_file
+            while left > 0:
+                f.write(chunk[:min(left, len(chunk))])
+                left -= len(chunk)
+    for i in range(n_csps):
+        (root / 'assets' / 'csp' / f"csp_{i:03d}.png").write_bytes(os.urandom(40 << 10))
+        (root / 'assets' / 'csp' / f"csp_{i:03d}.tex").write_bytes(os.urandom(50 << 10))
+        (root / 'data' / 'fighters' / f"f{i:03d}.json").write_bytes(b'{}' * 512)
+
+
+def timed(label, fn, repeat, work):
+    best = float('inf')
+    for _ in range(repeat):
+        with tempfile.TemporaryDirectory(dir=work) as tmp:
+            t0 = time.perf_counter()
+            fn(Path(tmp) / 'project')
+            best = min(best, time.perf_counter() - t0)
+    print(f'  {label:<14} {best:8.3f} s')
+    return best
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--mb', type=int, default=1024)
+    ap.add_argument('--files', type=int, default=600)
+    ap.add_argument('--csps', type=int, default=300)
+    ap.add_argument('--repeat', type=int, default=3)
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix='overlay_bench_') as work:
+        live = Path(work) / 'live'
+        make_project(live, args.mb, args.files, args.csps)
+        print(f'project: {args.mb} MiB in {args.files} disc files, {args.csps} CSPs')
+        before = timed('copytree', lambda dst: shutil.copytree(live, dst), args.repeat, work)
+        after = timed('build_overlay', lambda dst: build_overlay(live, dst), args.repeat, work)
+        print(f'  speedup        {before / after:8.1f}x')
+        with tempfile.TemporaryDirectory(dir=work) as tmp:
+            print(f'  placement      {build_overlay(live, Path(tmp) / "project")}')
+
+
+if __name__ == '__main__':
+    main()
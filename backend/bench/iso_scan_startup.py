@@ -0,0 +1,64 @@
+"""
+iso_scan_startup.py -- benchmark the "Loading vault & vanilla hashes" step of an
+ISO scan: a cold start (no hash_index.json) vs a warm one (index on disk, fresh
+process state), on a synthetic vault of N costume zips in a temp dir.
+
+Run from backend/:
+  python bench/iso_scan_startup.py [--skins 3000] [--dat-kb 600]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import zipfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from core import config, hash_index  # noqa: E402
+from core import metadata as core_metadata  # noqa: E402
+
+
+def build_vault(storage: Path, skins: int, dat_kb: int):
+    chars = ['Fox', 'Falco', 'Marth', 'Sheik', 'Peach', 'C. Falcon']
+    meta = {'characters': {c: {'skins': []} for c in chars}}
+    for i in range(skins):
+        char = chars[i % len(chars)]
+        (storage / char).mkdir(parents=True, exist_ok=True)
+        dat = os.urandom(1024) * dat_kb
+        skin_id = f'skin-{i:05d}'
+        with zipfile.ZipFile(storage / char / f'{skin_id}.zip', 'w',
+                             zipfile.ZIP_DEFLATED) as zf:
+            zf.writestr('PlXxNrMod.dat', dat)
+        meta['characters'][char]['skins'].append(
+            {'id': skin_id, 'filename': f'{skin_id}.zip', 'dat_hash': f'{i:032x}'})
+    core_metadata.save_metadata(meta)
+
+
+def timed(label, fn):
+    t0 = time.perf_counter()
+    n = len(fn())
+    print(f'{label:<6} {time.perf_counter() - t0:8.3f}s  ({n} hashes)')
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--skins', type=int, default=3000)
+    ap.add_argument('--dat-kb', type=int, default=600)
+    args = ap.parse_args()
+    with tempfile.TemporaryDirectory() as tmp:
+        storage = Path(tmp) / 'storage'
+        storage.mkdir()
+        config.STORAGE_PATH = storage
+        core_metadata.METADATA_FILE = storage / 'metadata.json'
+        print(f'building {args.skins} costume zips...')
+        build_vault(storage, args.skins, args.dat_kb)
+
+        timed('cold', lambda: hash_index.vault_hashes(storage))
+        hash_index._cache.clear()          # new backend process
+        timed('warm', lambda: hash_index.vault_hashes(storage))
+        timed('hot', lambda: hash_index.vault_hashes(storage))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,120 @@
+"""
+rig_weights.py -- benchmark: modellab.rig weight transfer, smoothing and the
+part/segment deforms on a synthetic tube humanoid of roughly --tris foreign
+triangles (the rig kit is a fixed ~2k-triangle body, like a vanilla costume).
+
+Run from backend/:
+  python bench/rig_weights.py [--tris 30000] [--repeat 1]
+"""
+import argparse
+import math
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from modellab import rig, smd  # noqa: E402
+
+# id, parent, local offset, part
+JOINTS = [
+    (0, -1, (0, 0, 0), 'util'), (1, 0, (0, 10, 0), 'torso'),
+    (2, 1, (0, 4, 0), 'torso'), (3, 2, (0, 4, 0), 'head'),
+    (4, 3, (0, 2.5, 0), 'head'), (5, 2, (2, 0, 0), 'l_arm'),
+    (6, 5, (3, -0.5, 0), 'l_arm'), (7, 2, (-2, 0, 0), 'r_arm'),
+    (8, 7, (-3, -0.5, 0), 'r_arm'), (9, 1, (1.5, -1, 0), 'l_leg'),
+    (10, 9, (0, -4.5, 0), 'l_leg'), (11, 1, (-1.5, -1, 0), 'r_leg'),
+    (12, 11, (0, -4.5, 0), 'r_leg'),
+]
+
+
+def humanoid(scale, around, along, radius, rng):
+    bones = [smd.Bone(j, f'JOBJ_{j}', p, tuple(c * scale for c in off))
+             for j, p, off, _ in JOINTS]
+    bones.append(smd.Bone(13, 'Joint_0_Object_0', -1))
+    kit = smd.SMD(bones=bones)
+    world = rig.joint_world_positions(kit)
+    for j, p, _, _ in JOINTS:
+        if p <= 0:
+            continue
+        a, b = world[p], world[j]
+        axis = (b - a) / np.linalg.norm(b - a)
+        side = np.cross(axis, [0, 0, 1.0])
+        if np.linalg.norm(side) < 1e-6:
+            side = np.cross(axis, [1.0, 0, 0])
+        side /= np.linalg.norm(side)
+        up = np.cross(axis, side)
+
+        def vert(i, k):
+            t = i / along
+            ang = 2 * math.pi * k / around
+            n = math.cos(ang) * side + math.sin(ang) * up
+            wp = min(1.0, max(0.0, 1.0 - t + rng.uniform(-0.15, 0.15)))
+            w = [(p, wp), (j, 1.0 - wp)] if 0 < wp < 1 else [(p if wp else j, 1.0)]
+            return smd.Vertex(tuple(a + t * (b - a) + radius * n), tuple(n),
+                              (k / around, t), w, 13)
+
+        for i in range(along):
+            for k in range(around):
+                v00, v01 = vert(i, k), vert(i, (k + 1) % around)
+                v10, v11 = vert(i + 1, k), vert(i + 1, (k + 1) % around)
+                kit.triangles.append(smd.Triangle('body', (v00, v10, v11)))
+                kit.triangles.append(smd.Triangle('body', (v00, v11, v01)))
+    return kit
+
+
+def timed(label, fn, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    print(f'  {label:<16} {best:8.2f} s')
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--tris', type=int, default=30000)
+    ap.add_argument('--repeat', type=int, default=1)
+    args = ap.parse_args()
+
+    rng = np.random.default_rng(0)
+    side = max(4, int(math.sqrt(args.tris / 22)))
+    rigkit = humanoid(1.0, 16, 6, 0.8, rng)
+    src = humanoid(1.15, side, side, 0.95, rng)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / 'foreign.smd'
+        smd.save(src, path)
+        foreign = rig.load_foreign_smd(path)
+    print(f'foreign {len(foreign.tri_pos)} tris, rig kit {len(rigkit.triangles)} tris')
+
+    part_of = {j: part for j, _, _, part in JOINTS}
+    parents = {j: p for j, p, _, _ in JOINTS}
+    pts = foreign.tri_pos.reshape(-1, 3)
+    src_world = rig.joint_world_positions(src)
+    tgt_world = rig.joint_world_positions(rigkit)
+    ids = sorted(src_world)
+    nearest = np.array(ids)[np.linalg.norm(
+        pts[:, None] - np.array([src_world[b] for b in ids])[None], axis=2).argmin(1)]
+    vert_parts = [part_of[int(b)] if part_of[int(b)] != 'util' else 'torso' for b in nearest]
+    geom = {p: pts[[vp == p for vp in vert_parts]] for p in set(vert_parts)}
+    tgt_geom = {p: g / 1.15 for p, g in geom.items()}
+    raw = [dict(wl) for tw in foreign.tri_src_w for wl in tw]
+    quiet = lambda *a: None  # noqa: E731
+
+    timed('transfer_weights', lambda: rig.transfer_weights(
+        rigkit, foreign, max_weights=2, part_of=part_of, vert_parts=vert_parts), args.repeat)
+    timed('smooth_weights', lambda: rig.smooth_weights(pts, raw, iterations=10), args.repeat)
+    timed('part_deform', lambda: rig.part_deform(
+        foreign, vert_parts, part_of, src_world, part_of, tgt_world,
+        src_geom=geom, tgt_geom=tgt_geom, log=quiet), args.repeat)
+    foreign.tri_pos = pts.reshape(-1, 3, 3).copy()
+    timed('segment_deform', lambda: rig.segment_deform(
+        foreign, part_of, parents, src_world, part_of, parents, tgt_world,
+        src_geom=geom, tgt_geom=tgt_geom, log=quiet), args.repeat)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+"""
+rigkit_load.py -- benchmark: loading a rig kit by parsing its text SMD
+(smd.load + the per-call world matrices / sane surface / surface KD-tree)
+vs the compiled, memory-mapped archive from modellab.rigkit_cache, first
+load in a process and repeat load (in-process kit, hash check only). Uses the
+given rig-kit SMD, or a synthetic tube humanoid of roughly --tris triangles.
+
+Run from backend/:
+  python bench/rigkit_load.py [--tris 20000] [--repeat 3] [rigkit.smd]
+"""
+import argparse
+import math
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from bench.rig_weights import humanoid  # noqa: E402
+from modellab import rig, rigkit_cache, smd  # noqa: E402
+
+
+def best_of(fn, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def prepare(kit):
+    """What every rig pass derives from the kit before matching."""
+    rig.joint_world_matrices(kit)
+    surface = rig.sane_surface(kit)
+    pts = np.array([[v.pos for v in t.verts] for t in surface]).reshape(-1, 3)
+    tree = getattr(kit, 'surface_tree', None)
+    if tree is None:
+        rig.surface_tree(rig.surface_points(pts))
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('smd', nargs='?')
+    ap.add_argument('--tris', type=int, default=20000)
+    ap.add_argument('--repeat', type=int, default=3)
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / 'rigkit.smd'
+        if args.smd:
+            shutil.copyfile(args.smd, path)
+        else:
+            side = max(4, int(math.sqrt(args.tris / 22)))
+            smd.save(humanoid(1.0, side, side, 0.8, np.random.default_rng(0)), path)
+        npz = rigkit_cache.cache_path(path)
+
+        parsed = best_of(lambda: prepare(smd.load(path)), args.repeat)
+
+        def cold():
+            npz.unlink(missing_ok=True)
+            rigkit_cache.load(path)
+        compile_t = best_of(cold, 1)
+
+        def compiled():
+            rigkit_cache.clear_cache()
+            prepare(rigkit_cache.load(path))
+        warm = best_of(compiled, args.repeat)
+        again = best_of(lambda: prepare(rigkit_cache.load(path)), args.repeat)
+
+        kit = rigkit_cache.load(path)
+        print(f'rig kit {len(kit.triangles)} tris, {len(kit.bones)} bones, '
+              f'smd {path.stat().st_size / 1e6:.1f} MB, npz {npz.stat().st_size / 1e6:.1f} MB')
+        print(f'  parse + derive   {parsed * 1e3:8.1f} ms')
+        print(f'  compile (once)   {compile_t * 1e3:8.1f} ms')
+        print(f'  compiled load    {warm * 1e3:8.1f} ms  ({parsed / warm:.1f}x)')
+        print(f'  repeat (in-proc) {again * 1e3:8.1f} ms  ({parsed / again:.1f}x)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+"""
+smd_io.py -- benchmark: modellab.smd reading and writing a high-poly SMD.
+Times the dataclass interface (load / save), the array path (load_arrays /
+save_arrays) and a re-read through the binary sidecar, on the given SMD or
+a synthetic indexed mesh (shared corners, two bone links per vertex, like an
+HSDRawViewer export) of roughly --tris triangles.
+
+Run from backend/:
+  python bench/smd_io.py [--tris 100000] [--repeat 3] [mesh.smd]
+"""
+import argparse
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from modellab import smd  # noqa: E402
+
+
+def best_of(fn, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def grid_mesh(tris, rng):
+    """A wavy sheet, 2 triangles per grid cell, corners indexing shared verts."""
+    side = max(2, int(np.sqrt(tris / 2)))
+    u, v = np.meshgrid(np.linspace(0, 1, side + 1), np.linspace(0, 1, side + 1))
+    pos = np.stack([u * 20, np.sin(u * 9) + np.cos(v * 7), v * 20], -1).reshape(-1, 3)
+    nrm = np.tile([0.0, 1.0, 0.0], (len(pos), 1))
+    uvs = np.stack([u, v], -1).reshape(-1, 2)
+    bone = rng.integers(1, 40, len(pos))
+    w = rng.uniform(0.3, 1.0, len(pos))
+    weights = [[(int(b), float(x)), (int(b) + 1, 1.0 - float(x))] for b, x in zip(bone, w)]
+    cell = (np.arange(side)[:, None] * (side + 1) + np.arange(side)[None]).ravel()
+    quads = np.stack([cell, cell + 1, cell + side + 1, cell + side + 2], 1)
+    corners = np.concatenate([quads[:, [0, 2, 3]], quads[:, [0, 3, 1]]]).ravel()
+    bones = [smd.Bone(i, f'JOBJ_{i}', i - 1, (0.0, 0.5, 0.0)) for i in range(42)]
+    bones.append(smd.Bone(42, 'Joint_0_Object_0', -1))
+    return smd.SMDArrays.from_corners(
+        bones, ['body'] * (len(corners) // 3), pos[corners], nrm[corners], uvs[corners],
+        [42] * len(corners), [weights[i] for i in corners.tolist()])
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('smd', nargs='?')
+    ap.add_argument('--tris', type=int, default=100000)
+    ap.add_argument('--repeat', type=int, default=3)
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / 'mesh.smd'
+        if args.smd:
+            shutil.copyfile(args.smd, path)
+        else:
+            smd.save_arrays(grid_mesh(args.tris, np.random.default_rng(0)), path)
+        arrays = smd.load_arrays(path)
+        mesh = smd.load(path)
+        out = Path(tmp) / 'out.smd'
+        print(f'{arrays.n_triangles} tris, {path.stat().st_size / 1e6:.1f} MB')
+
+        rows = [
+            ('load', lambda: smd.load(path)),
+            ('load_arrays', lambda: smd.load_arrays(path)),
+            ('sidecar re-read', lambda: smd.load_arrays(path, sidecar=True)),
+            ('save', lambda: smd.save(mesh, out)),
+            ('save_arrays', lambda: smd.save_arrays(arrays, out)),
+        ]
+        smd.load_arrays(path, sidecar=True)
+        for label, fn in rows:
+            print(f'  {label:<16} {best_of(fn, args.repeat) * 1e3:8.1f} ms')
+
+
+if __name__ == '__main__':
+    main()
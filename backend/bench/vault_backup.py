@@ -0,0 +1,120 @@
+"""
+vault_backup.py -- benchmark: vault backup and restore, serial vs pooled, on a
+synthetic vault (default 5 GB) shaped like a real one: costume/patch zips and
+PNGs that don't compress, plus DAT/JSON-like data that does.
+
+Backup side: cold snapshot (everything hashed + stored), warm snapshot of the
+unchanged vault, and export_zip. Restore side: extracting the exported zip
+(the upload path) and restoring the snapshot straight from the store. Each
+pooled step is timed at 1 worker and at --workers.
+
+Run from backend/:
+  python bench/vault_backup.py [--size-gb 5] [--workers 8] [--dir /fast/disk/tmp]
+"""
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+import zipfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from core import backup_store  # noqa: E402
+from core.backup_store import BackupStore  # noqa: E402
+
+# 256 -> 16 symbols: unique per file but deflates to roughly half, like DATs.
+_LOW_ENTROPY = bytes.maketrans(bytes(range(256)), bytes(b'0123456789abcdef'[i % 16]
+                                                        for i in range(256)))
+_KINDS = (  # (suffix, share of bytes, min size, max size, compressible)
+    ('.zip', 0.45, 2 << 20, 8 << 20, False),
+    ('.png', 0.15, 100 << 10, 1 << 20, False),
+    ('.dat', 0.35, 512 << 10, 24 << 20, True),
+    ('.json', 0.05, 4 << 10, 256 << 10, True),
+)
+
+
+def build_vault(root, total_bytes, seed=0):
+    rng = random.Random(seed)
+    count = 0
+    for suffix, share, lo, hi, compressible in _KINDS:
+        budget = int(total_bytes * share)
+        while budget > 0:
+            size = min(budget, rng.randint(lo, hi))
+            data = os.urandom(size)
+            if compressible:
+                data = data.translate(_LOW_ENTROPY)
+            folder = root / f'Char{count % 26:02d}'
+            folder.mkdir(parents=True, exist_ok=True)
+            (folder / f'item{count:05d}{suffix}').write_bytes(data)
+            budget -= size
+            count += 1
+    return count
+
+
+def timed(label, fn, nbytes):
+    t0 = time.perf_counter()
+    result = fn()
+    dt = time.perf_counter() - t0
+    print(f'{label:<34} {dt:>8.2f} s {nbytes / dt / 2**20:>9.0f} MiB/s')
+    return result
+
+
+def with_workers(n, fn):
+    saved = backup_store.BACKUP_WORKERS
+    backup_store.BACKUP_WORKERS = n
+    try:
+        return fn()
+    finally:
+        backup_store.BACKUP_WORKERS = saved
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--size-gb', type=float, default=5)
+    ap.add_argument('--workers', type=int, default=backup_store.BACKUP_WORKERS)
+    ap.add_argument('--dir', help='scratch directory (needs ~3.5x --size-gb free)')
+    args = ap.parse_args()
+
+    from blueprints import vault_backup  # after sys.path; imports Flask
+
+    total = int(args.size_gb * 2**30)
+    scratch = Path(tempfile.mkdtemp(prefix='vault-bench-', dir=args.dir))
+    try:
+        vault = scratch / 'storage'
+        t0 = time.perf_counter()
+        files = build_vault(vault, total)
+        print(f'synthetic vault: {files} files, {total / 2**30:.1f} GiB '
+              f'({time.perf_counter() - t0:.0f} s to build)\n')
+
+        for n in sorted({1, args.workers}):
+            print(f'-- {n} worker(s) --')
+            run = scratch / f'run{n}'
+            store = BackupStore(run / 'store')
+            snap = with_workers(n, lambda: timed(
+                'snapshot (cold)', lambda: store.create_snapshot(vault), total))
+            with_workers(n, lambda: timed(
+                'snapshot (unchanged vault)', lambda: store.create_snapshot(vault), total))
+            zip_path = run / 'backup.zip'
+            with_workers(n, lambda: timed(
+                'export_zip', lambda: store.export_zip(snap['id'], zip_path), total))
+            print(f'{"  zip size":<34} {zip_path.stat().st_size / 2**30:>8.2f} GiB')
+
+            def extract():
+                with zipfile.ZipFile(zip_path) as zf:
+                    vault_backup._extract_zip_with_progress(zf, run / 'from_zip', None, 0, 100)
+            with_workers(n, lambda: timed('restore: extract zip', extract, total))
+            shutil.rmtree(run / 'from_zip')
+            with_workers(n, lambda: timed(
+                'restore: from snapshot',
+                lambda: store.restore(snap['id'], run / 'from_store'), total))
+            shutil.rmtree(run)
+            print()
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
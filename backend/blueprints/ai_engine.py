@@ -259,10 +259,13 @@ def resolve_tasks():
                 tier,
                 override_model=(task or {}).get('model'),
                 client_key=client_key)
-            # measured speed feeds the modals' time prediction
+            # measured speed feeds the modals' time prediction (a warm local
+            # worker pays avgLoadSeconds once per batch, not per image)
             model_stats = stats.get(resolved['model']) or {}
             out.append({'kind': kind, 'tier': tier,
                         'avgSeconds': model_stats.get('avgSeconds'),
+                        'avgLoadSeconds': model_stats.get('avgLoadSeconds'),
+                        'avgGenSeconds': model_stats.get('avgGenSeconds'),
                         **resolved})
         except routing.RoutingError as e:
             out.append({'kind': kind, 'tier': tier, 'error': str(e)})
@@ -13,7 +13,8 @@ each pack is a full copy of the character's voice/SFX bank
             pack.json       ({"name": ..., "created": ...})
             sound_mods.json (per-sound manifest: which indices were replaced)
             bank.ssm        (original + this pack's replacements)
-            cache/          (decoded wav previews)
+            cache/          (wav previews written by older versions; previews
+                             now decode in memory via dsp_audio)
 
 Packs are NOT applied automatically — installation is an explicit per-
 project action (like importing a costume): the pack's bank is imported
@@ -35,7 +36,7 @@ import tempfile
 import logging
 from pathlib import Path
 from datetime import datetime
-from flask import Blueprint, request, jsonify, send_file
+from flask import Blueprint, request, jsonify
 
 from core.config import STORAGE_PATH
 from core.state import get_current_project_path
@@ -387,13 +388,8 @@ def get_pack_sound(character, pack_id, index):
     pdir = _pack_dir(canonical, pack_id) if canonical else None
     if pdir is None:
         return jsonify({'success': False, 'error': 'Sound pack not found'}), 404
-    cache = pdir / 'cache' / f'sound_{index}.wav'
-    if not cache.exists():
-        cache.parent.mkdir(exist_ok=True)
-        out = _run_mexcli('ssm-to-wav', pdir / 'bank.ssm', index, cache)
-        if not out.get('success') or not cache.exists():
-            return jsonify({'success': False, 'error': out.get('error', 'SSM decode failed')}), 500
-    return send_file(cache, mimetype='audio/wav')
+    from blueprints.custom_characters import _wav_preview
+    return _wav_preview(pdir / 'bank.ssm', index)
 
 
 @character_sounds_bp.route('/api/mex/storage/characters/<path:character>/sound-packs/<pack_id>/audio/sound/<int:index>/replace', methods=['POST'])
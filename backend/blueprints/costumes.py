@@ -9,8 +9,9 @@ import time
 import logging
 from flask import Blueprint, request, jsonify
 
+from core import costume_ops
 from core.config import PROJECT_ROOT
-from core.state import get_mex_manager, reload_mex_manager, mexcli_lock
+from core.state import get_mex_manager, reload_mex_manager, mexcli_lock, get_current_project_path
 
 # Import MexManagerError for proper exception handling
 import sys
@@ -22,6 +23,22 @@ logger = logging.getLogger(__name__)
 costumes_bp = Blueprint('costumes', __name__)
 
 
+def _queue_costume_op(kind, fighter_name, **fields):
+    """Append one op to the current project's costume journal and build the
+    response: normally {'queued': True, 'queueDepth': n}; with the idle flush
+    disabled (MEX_COSTUME_OPS_IDLE=0) the op is applied before returning."""
+    project_path = get_current_project_path()
+    if project_path is None:
+        raise MexManagerError("No MEX project loaded. Please open a project first.")
+    depth = costume_ops.enqueue(project_path, kind, fighter_name, **fields)
+    if costume_ops.IDLE_FLUSH_S > 0:
+        return jsonify({'success': True, 'queued': True, 'queueDepth': depth})
+    result = costume_ops.flush(project_path)
+    if not result['success']:
+        return jsonify({'success': False, 'error': result['error']}), 500
+    return jsonify({'success': True, 'result': result})
+
+
 @costumes_bp.route('/api/mex/import', methods=['POST'])
 def import_costume():
     """
@@ -30,7 +47,8 @@ def import_costume():
     Body:
     {
         "fighter": "Fox",
-        "costumePath": "storage/Fox/PlFxNr_custom/PlFxNr_custom.zip"
+        "costumePath": "storage/Fox/PlFxNr_custom/PlFxNr_custom.zip",
+        "defer": false      // optional: queue it in the costume journal instead
     }
     """
     try:
@@ -73,6 +91,11 @@ def import_costume():
         # making two separate calls: Popo zip → fighter "Ice Climbers",
         # Nana zip → fighter "Nana" (internalId 11, which is MexCLI's view
         # onto the Nana half of the IC slot). That's the correct path.
+        if data.get('defer'):
+            logger.info("Queueing costume import")
+            return _queue_costume_op(costume_ops.IMPORT, fighter_name,
+                                     zip=str(full_costume_path))
+
         logger.info(f"Calling MexCLI to import costume...")
         with mexcli_lock:
             mex = get_mex_manager()
@@ -160,7 +183,8 @@ def import_costumes_batch():
 @costumes_bp.route('/api/mex/remove', methods=['POST'])
 def remove_costume():
     """
-    Remove costume from MEX project
+    Remove costume from MEX project. Queued in the costume journal and applied
+    on idle (or before the next read/export), so the response is immediate.
 
     Body:
     {
@@ -192,23 +216,9 @@ def remove_costume():
                 'error': 'costumeIndex must be a non-negative integer'
             }), 400
 
-        logger.info(f"Calling MexCLI to remove costume...")
-        with mexcli_lock:
-            mex = get_mex_manager()
-            result = mex.remove_costume(fighter_name, costume_index)
-
-            logger.info(f"Remove result: {json.dumps(result, indent=2)}")
-
-            # Force reload to pick up file changes for subsequent requests
-            reload_mex_manager()
-            logger.info(f"Reloaded MEX manager to pick up changes")
-
-        logger.info(f"=== REMOVE COMPLETE ===")
-
-        return jsonify({
-            'success': True,
-            'result': result
-        })
+        # Queued in the costume journal: back-to-back removes (e.g. Popo then
+        # Nana) are applied together as one remove-costumes Save.
+        return _queue_costume_op(costume_ops.REMOVE, fighter_name, index=costume_index)
     except MexManagerError as e:
         logger.error(f"MexManagerError: {str(e)}", exc_info=True)
         return jsonify({
@@ -285,6 +295,9 @@ def reorder_costume():
         "toIndex": 0
     }
 
+    Queued in the costume journal and applied on idle (or before the next
+    read/export), so the response is immediate.
+
     Note: For Ice Climbers (Popo), paired Nana costumes are automatically reordered
     """
     try:
@@ -320,25 +333,10 @@ def reorder_costume():
                 'error': 'toIndex must be a non-negative integer'
             }), 400
 
-        logger.info(f"Calling MexCLI to reorder costume...")
-        # Hold the workspace lock for the whole open+save+reload so a concurrent
-        # export/import/remove can't run a second MexCLI process on the project.
-        with mexcli_lock:
-            mex = get_mex_manager()
-            result = mex.reorder_costume(fighter_name, from_index, to_index)
-
-            logger.info(f"Reorder result: {json.dumps(result, indent=2)}")
-
-            # Force reload to pick up file changes for subsequent requests
-            reload_mex_manager()
-            logger.info(f"Reloaded MEX manager to pick up changes")
-
-        logger.info(f"=== REORDER COMPLETE ===")
-
-        return jsonify({
-            'success': True,
-            'result': result
-        })
+        # Queued in the costume journal: a drag arrives as a run of adjacent
+        # swaps, which the journal collapses into one reorder-costumes Save.
+        return _queue_costume_op(costume_ops.REORDER, fighter_name,
+                                 **{'from': from_index, 'to': to_index})
     except MexManagerError as e:
         logger.error(f"MexManagerError: {str(e)}", exc_info=True)
         return jsonify({
@@ -351,3 +349,23 @@ def reorder_costume():
             'success': False,
             'error': f'Unexpected error: {str(e)}'
         }), 500
+
+
+@costumes_bp.route('/api/mex/costume-ops', methods=['GET'])
+def costume_ops_status():
+    """Number of costume ops queued for the current project."""
+    project_path = get_current_project_path()
+    depth = costume_ops.pending(project_path) if project_path is not None else 0
+    return jsonify({'success': True, 'queueDepth': depth})
+
+
+@costumes_bp.route('/api/mex/costume-ops/flush', methods=['POST'])
+def flush_costume_ops():
+    """Apply the current project's queued costume ops now."""
+    project_path = get_current_project_path()
+    if project_path is None:
+        return jsonify({'success': False, 'error': 'No MEX project loaded'}), 400
+    result = costume_ops.flush(project_path)
+    if not result['success']:
+        return jsonify({'success': False, 'error': result['error'], 'result': result}), 500
+    return jsonify({'success': True, 'result': result})
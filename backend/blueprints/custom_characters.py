@@ -24,8 +24,9 @@ import zipfile
 import logging
 from pathlib import Path
 from datetime import datetime
-from flask import Blueprint, request, jsonify, send_file
+from flask import Blueprint, Response, request, jsonify, send_file
 
+import dsp_audio
 from core.config import STORAGE_PATH, MEXCLI_PATH, PROJECT_ROOT, BACKEND_ASSETS_DIR, get_subprocess_args
 from core.helpers import friendly_iso_open_error, is_incompatible_iso_error
 from core.metadata import load_metadata, save_metadata, metadata_transaction
@@ -479,6 +480,20 @@ def _run_mexcli(*cli_args):
     return _exec()
 
 
+def _wav_preview(path, index=None):
+    """Serve an .hps (index None) or one .ssm sound as WAV, decoded in-process
+    by dsp_audio (no MexCLI run, no wav on disk). Honours Range requests so
+    the player can seek without re-fetching the whole track."""
+    try:
+        wav = dsp_audio.preview_wav(path, index)
+    except FileNotFoundError:
+        return jsonify({'success': False, 'error': 'Audio file missing'}), 404
+    except (dsp_audio.AudioFormatError, OSError) as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+    resp = Response(wav, mimetype='audio/wav')
+    return resp.make_conditional(request, accept_ranges=True, complete_length=len(wav))
+
+
 def _find_existing_fighter_with_announcer_call(project_path, announcer_call, skip_internal_id=None):
     """Return another project fighter using announcer_call, if one exists."""
     fighters_dir = Path(project_path).parent / 'data' / 'fighters'
@@ -2897,17 +2912,10 @@ def set_custom_character_default_pose(slug):
 @custom_characters_bp.route('/api/mex/custom-characters/<slug>/audio/victory-theme', methods=['GET'])
 def get_victory_theme_audio(slug):
     """Decode the character's victory theme (extracted at scan) to WAV."""
-    char_dir = CUSTOM_CHARACTERS_PATH / slug
-    cache = char_dir / 'audio_cache' / 'victory_theme.wav'
-    if not cache.exists():
-        hps = char_dir / 'victory_theme.hps'
-        if not hps.exists():
-            return jsonify({'success': False, 'error': 'No victory theme extracted — rescan the source ISO'}), 404
-        cache.parent.mkdir(exist_ok=True)
-        out = _run_mexcli('hps-to-wav', hps, cache)
-        if not out.get('success') or not cache.exists():
-            return jsonify({'success': False, 'error': out.get('error', 'HPS decode failed')}), 500
-    return send_file(cache, mimetype='audio/wav')
+    hps = CUSTOM_CHARACTERS_PATH / slug / 'victory_theme.hps'
+    if not hps.exists():
+        return jsonify({'success': False, 'error': 'No victory theme extracted — rescan the source ISO'}), 404
+    return _wav_preview(hps)
 
 
 @custom_characters_bp.route('/api/mex/custom-characters/<slug>/audio/announcer', methods=['GET'])
@@ -2975,16 +2983,10 @@ def list_fighter_sounds(slug):
 
 @custom_characters_bp.route('/api/mex/custom-characters/<slug>/audio/sound/<int:index>', methods=['GET'])
 def get_fighter_sound(slug, index):
-    char_dir = CUSTOM_CHARACTERS_PATH / slug
-    cache = char_dir / 'audio_cache' / f'sound_{index}.wav'
-    if not cache.exists():
-        bank = _extract_fighter_ssm(char_dir)
-        if bank is None:
-            return jsonify({'success': False, 'error': 'No sound bank in fighter.zip'}), 404
-        out = _run_mexcli('ssm-to-wav', bank, index, cache)
-        if not out.get('success') or not cache.exists():
-            return jsonify({'success': False, 'error': out.get('error', 'SSM decode failed')}), 500
-    return send_file(cache, mimetype='audio/wav')
+    bank = _extract_fighter_ssm(CUSTOM_CHARACTERS_PATH / slug)
+    if bank is None:
+        return jsonify({'success': False, 'error': 'No sound bank in fighter.zip'}), 404
+    return _wav_preview(bank, index)
 
 
 # formats MeleeMedia's DSP.FromFile actually reads — the viewer converts
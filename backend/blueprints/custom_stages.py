@@ -566,18 +566,11 @@ def get_custom_stage_banner(slug):
 @custom_stages_bp.route('/api/mex/custom-stages/<slug>/audio/track/<int:index>', methods=['GET'])
 def get_stage_track_audio(slug, index):
     """Decode a stage playlist track (extracted at scan) to WAV."""
-    stage_dir = CUSTOM_STAGES_PATH / slug
-    cache = stage_dir / 'audio_cache' / f'track_{index}.wav'
-    if not cache.exists():
-        hps = stage_dir / f'music_{index}.hps'
-        if not hps.exists():
-            return jsonify({'success': False, 'error': 'Track not extracted — rescan the source ISO'}), 404
-        from blueprints.custom_characters import _run_mexcli
-        cache.parent.mkdir(exist_ok=True)
-        out = _run_mexcli('hps-to-wav', hps, cache)
-        if not out.get('success') or not cache.exists():
-            return jsonify({'success': False, 'error': out.get('error', 'HPS decode failed')}), 500
-    return send_file(cache, mimetype='audio/wav')
+    hps = CUSTOM_STAGES_PATH / slug / f'music_{index}.hps'
+    if not hps.exists():
+        return jsonify({'success': False, 'error': 'Track not extracted — rescan the source ISO'}), 404
+    from blueprints.custom_characters import _wav_preview
+    return _wav_preview(hps)
 
 
 # ============= Playlist editing (vault-level; ported on install) =============
@@ -12,6 +12,7 @@ from datetime import datetime
 from flask import Blueprint, request, jsonify, send_file, after_this_request
 
 from core.config import OUTPUT_PATH, STORAGE_PATH
+from core import costume_ops
 from core.state import get_mex_manager, get_socketio, get_current_project_path, mexcli_lock
 
 logger = logging.getLogger(__name__)
@@ -106,8 +107,10 @@ def start_export():
             """Export ISO in background thread with WebSocket progress updates"""
             from pathlib import Path
             import tempfile
+            import time
             mapping = None
             temp_root = None   # isolated temp copy of the project (texture-pack mode)
+            mex = work_mex = None
             socketio = get_socketio()
             current_project_path = get_current_project_path()
 
@@ -124,6 +127,16 @@ def start_export():
                         'message': message
                     })
 
+                # Reorders/removes still queued in the costume journal (waiting
+                # for the idle flush) go into the project before the build.
+                if costume_ops.pending(current_project_path):
+                    progress_callback(0, 'Applying queued costume changes...')
+                    flushed = costume_ops.flush(current_project_path)
+                    if not flushed['success']:
+                        # building anyway would ship the old costume order
+                        raise RuntimeError(
+                            f"Could not apply queued costume changes: {flushed.get('error')}")
+
                 mex = get_mex_manager()
                 work_mex = mex   # what we export from; a TEMP copy in texture-pack mode
 
@@ -157,10 +170,15 @@ def start_export():
                     from skinlab.hd_csp_cache import (
                         get_or_render_hd, hash_dat, get_cached, effective_key_hash)
                     from skinlab.csp_concurrency import csp_workers
-                    from skinlab.csp_pool import active_pool
+                    from skinlab.csp_pool import active_pool, bulk
                     from concurrent.futures import ThreadPoolExecutor, as_completed
                     from mex_bridge import MexManager
                     from core.config import MEXCLI_PATH
+                    from core.project_overlay import build_overlay
+                    from core.metadata import flush_mirror
+
+                    # CSP lookups read storage/metadata.json: bring the DB mirror current
+                    flush_mirror()
 
                     # Clear the DUMP folder to prevent old placeholders from confusing the scanner
                     if slippi_dolphin_path:
@@ -170,16 +188,23 @@ def start_export():
                             dump_path.mkdir(parents=True)
                             logger.info(f"Cleared dump folder: {dump_path}")
 
-                    # Copy the live project into a throwaway temp dir and run everything
-                    # against that copy via its own MexManager.
+                    # Lay the live project out as a copy-on-write overlay in a throwaway
+                    # dir (own bytes for the CSPs and whatever MexCLI rewrites, links to
+                    # everything else) and run everything against it via its own
+                    # MexManager. The overlay lives under output/ -- the same volume as
+                    # the install, so the links are hardlinks -- and a leftover from a
+                    # crashed export is swept by the startup output cleanup.
                     progress_callback(1, 'Preparing an isolated copy of the project…')
                     live_project_dir = current_project_path.parent
-                    temp_root = Path(tempfile.mkdtemp(prefix='nucleus_texexport_'))
+                    temp_root = Path(tempfile.mkdtemp(prefix='nucleus_texexport_', dir=OUTPUT_PATH))
                     temp_project_dir = temp_root / live_project_dir.name
-                    shutil.copytree(live_project_dir, temp_project_dir)
+                    setup_start = time.perf_counter()
+                    overlay_stats = build_overlay(live_project_dir, temp_project_dir)
                     temp_mexproj = temp_project_dir / current_project_path.name
                     work_mex = MexManager(cli_path=str(MEXCLI_PATH), project_path=str(temp_mexproj))
-                    logger.info(f"Texture-pack export isolated to temp project: {temp_project_dir}")
+                    logger.info(
+                        f"Texture-pack export isolated to temp project overlay: {temp_project_dir} "
+                        f"(set up in {time.perf_counter() - setup_start:.2f}s: {overlay_stats})")
 
                     live_csp_dir = live_project_dir / "assets" / "csp"   # originals (untouched)
                     temp_csp_dir = temp_project_dir / "assets" / "csp"   # placeholders go here
@@ -196,14 +221,9 @@ def start_export():
 
                     # Pass 1: enumerate every costume slot that has a CSP, so HD
                     # render progress can be reported against a known total.
-                    fighters = work_mex.list_fighters()
+                    # One get-all-costumes call lists every fighter.
                     slots = []  # ordered; global index = position in this list
-                    for fighter in fighters:
-                        try:
-                            result = work_mex._run_command("get-costumes", str(work_mex.project_path), fighter['name'])
-                        except Exception as e:
-                            logger.warning(f"Error listing costumes for {fighter['name']}: {e}")
-                            continue
+                    for result in work_mex.get_all_costumes():
                         for costume_idx, costume in enumerate(result.get('costumes', [])):
                             if not costume.get('csp'):
                                 continue
@@ -212,7 +232,7 @@ def start_export():
                             if not (temp_csp_dir / csp_name).exists():
                                 continue
                             slots.append({
-                                'character': fighter['name'],
+                                'character': result['fighter'],
                                 'costume_index': costume_idx,
                                 'skin_id': costume.get('name', f"costume_{costume_idx}"),
                                 'csp_name': csp_name,
@@ -290,7 +310,7 @@ def start_export():
                     # per slot on any failure. Kill switch: MEX_CSP_SERVER=0.
                     with active_pool(workers=workers), \
                             ThreadPoolExecutor(max_workers=workers) as pool:
-                        futs = {pool.submit(_resolve_slot_hd, s): i
+                        futs = {pool.submit(bulk(_resolve_slot_hd), s): i
                                 for i, s in enumerate(slots)}
                         for fut in as_completed(futs):
                             gi = futs[fut]
@@ -392,7 +412,10 @@ def start_export():
                     'error': str(e)
                 })
             finally:
-                # Always clean up the isolated temp project copy.
+                # Always clean up the isolated temp project copy (stopping its
+                # mexcli serve process first -- it holds the dir as its cwd).
+                if work_mex is not None and work_mex is not mex:
+                    work_mex.close()
                 if temp_root and Path(temp_root).exists():
                     shutil.rmtree(temp_root, ignore_errors=True)
                     logger.info("Cleaned up temp texture-pack project copy")
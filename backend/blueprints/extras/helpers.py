@@ -3,8 +3,15 @@ Shared internals for the extras blueprint: module-level state set by
 init_extras_api(), dynamic offset detection, and DAT color patching helpers.
 """
 
+import copy
+import hashlib
+import json
 import os
 import logging
+import threading
+from pathlib import Path
+
+import numpy as np
 
 logger = logging.getLogger(__name__)
 
@@ -25,45 +32,58 @@ def init_extras_api(storage_path, project_files_dir_func, hsdraw_viewer_path=Non
 # =============================================================================
 # DYNAMIC OFFSET DETECTION
 # =============================================================================
-
-# Cache for dynamic offsets: (file_path, mtime) -> offsets dict
+#
+# All five detectors look for a handful of byte signatures, so a DAT is read
+# once and scanned once (scan_signatures) and every extra type's offsets are
+# derived from that scan together (detect_all_offsets). The results depend
+# only on the DAT's bytes: they persist as <md5>.json under
+# STORAGE_PATH/_extras_offsets, and in-process by (path, mtime, size) so a
+# repeat lookup does not even re-hash the file.
+
+# Matrix headers the detectors use: 98 00 NN, NN = entry count
+_MATRIX_COUNTS = (0x0A, 0x0F, 0x17, 0x1B, 0x20, 0x2B)
+# Follows the side-B colors (Fox/Falco DAT) and the shine bubble (EfFxData)
+_COLOR_MARKER = bytes.fromhex('3E99999A42480000')
+# Precedes the laser ring colors
+_LASER_RING_PREFIX = bytes([0x85, 0x80, 0x08, 0x0f, 0x07, 0x07, 0x07, 0x07])
+
+OFFSETS_CACHE_VERSION = 1
+# persisted entries kept (each a few hundred bytes; every color patch of a
+# project DAT yields a new content hash)
+_OFFSETS_CACHE_MAX = 512
+
+# (path, mtime_ns, size) -> {extra type: offsets or None}, oldest first
 _dynamic_offset_cache = {}
+_MEMO_MAX = 64
+_offset_cache_lock = threading.Lock()
 
 
-def find_laser_offsets(dat_path):
-    """Dynamically find laser color matrix offsets in a DAT file.
-
-    Searches for three consecutive 98 00 17 matrices (23 entries each)
-    that are exactly 0xA0 (160 bytes) apart. This pattern is consistent
-    even when file structure changes due to model imports.
-
-    Args:
-        dat_path: Path to the .dat file (PlFc.dat or PlFx.dat)
+def scan_signatures(data):
+    """Every signature the extras detectors use, from one pass over the DAT.
 
     Returns:
-        Dict with wide/thin/outline offset info, or None if not found
+        Dict with:
+            - matrices: {NN: ascending positions of 98 00 NN} for _MATRIX_COUNTS
+            - rings: ascending positions of 07 07 07 04
+            - marker: first 3E 99 99 9A 42 48 00 00, or -1
+            - ring_prefix: first 85 80 08 0F 07 07 07 07, or -1
     """
-    try:
-        with open(dat_path, 'rb') as f:
-            data = f.read()
-    except Exception as e:
-        logger.error(f"Failed to read {dat_path} for laser detection: {e}")
-        return None
-
-    # Find all 98 00 17 matrices (23 entries = 0x17)
-    candidates = []
-    pattern = bytes([0x98, 0x00, 0x17])
-    pos = 0
-    while True:
-        pos = data.find(pattern, pos)
-        if pos == -1:
-            break
-        candidates.append(pos)
-        pos += 1
+    a = np.frombuffer(data, dtype=np.uint8)
+    heads = np.flatnonzero((a[:-2] == 0x98) & (a[1:-1] == 0x00))
+    counts = a[heads + 2]
+    rings = np.flatnonzero((a[:-3] == 0x07) & (a[1:-2] == 0x07)
+                           & (a[2:-1] == 0x07) & (a[3:] == 0x04))
+    return {
+        'matrices': {n: heads[counts == n].tolist() for n in _MATRIX_COUNTS},
+        'rings': rings.tolist(),
+        'marker': data.find(_COLOR_MARKER),
+        'ring_prefix': data.find(_LASER_RING_PREFIX),
+    }
 
-    logger.debug(f"Found {len(candidates)} potential 98 00 17 matrices in {dat_path}")
 
-    # Look for three consecutive matrices exactly 0xA0 apart
+def _detect_laser(data, sig):
+    # Look for three consecutive 98 00 17 matrices exactly 0xA0 apart
+    candidates = sig['matrices'][0x17]
     candidate_set = set(candidates)
     for start in candidates:
         second = start + 0xA0
@@ -88,42 +108,17 @@ def find_laser_offsets(dat_path):
                     break
 
             if valid:
-                logger.info(f"Found laser offsets at 0x{start:X} (wide), 0x{second:X} (thin), 0x{third:X} (outline)")
+                logger.debug(f"Found laser offsets at 0x{start:X} (wide), 0x{second:X} (thin), 0x{third:X} (outline)")
                 return {
                     'wide': {'start': start, 'end': start + 0x60, 'format': 'RGBY'},
                     'thin': {'start': second, 'end': second + 0x60, 'format': 'RGBY'},
                     'outline': {'start': third, 'end': third + 0x60, 'format': 'RGBY'}
                 }
-
-    logger.warning(f"Could not find laser pattern in {dat_path}")
     return None
 
 
-def find_sideb_offsets(dat_path):
-    """Dynamically find side-B RGBA color offsets in a DAT file.
-
-    Searches for the unique marker pattern 3E 99 99 9A 42 48 00 00 that follows
-    the side-B color data. The three 4-byte RGBA values are located
-    12 bytes before this marker.
-
-    Args:
-        dat_path: Path to the .dat file (PlFc.dat or PlFx.dat)
-
-    Returns:
-        Dict with primary/secondary/tertiary offset info, or None if not found
-    """
-    try:
-        with open(dat_path, 'rb') as f:
-            data = f.read()
-    except Exception as e:
-        logger.error(f"Failed to read {dat_path} for side-B detection: {e}")
-        return None
-
-    # Search for the unique marker that follows side-B colors
-    # This pattern (3E99999A42480000) appears right after the 12 color bytes
-    marker = bytes.fromhex('3E99999A42480000')
-    pos = data.find(marker)
-
+def _detect_sideb(data, sig):
+    pos = sig['marker']
     if pos > 12:
         # Colors are 12 bytes before the marker
         color_start = pos - 12
@@ -131,68 +126,33 @@ def find_sideb_offsets(dat_path):
         if (data[color_start + 3] == 0xFF and
             data[color_start + 7] == 0xFF and
             data[color_start + 11] == 0xFF):
-            logger.info(f"Found side-B offsets at 0x{color_start:X} (marker at 0x{pos:X})")
+            logger.debug(f"Found side-B offsets at 0x{color_start:X} (marker at 0x{pos:X})")
             return {
                 'primary': {'start': color_start, 'size': 4, 'format': 'RGBA'},
                 'secondary': {'start': color_start + 4, 'size': 4, 'format': 'RGBA'},
                 'tertiary': {'start': color_start + 8, 'size': 4, 'format': 'RGBA'}
             }
-
-    logger.warning(f"Could not find side-B pattern in {dat_path}")
     return None
 
 
-def find_upb_offsets(dat_path):
-    """Dynamically find Up-B (Firefox/Firebird) color offsets in EfFxData.dat.
-
-    Searches for unique patterns to locate:
-    - tip: 98 00 20 (32 entries, unique count)
-    - body: cluster of 98 00 0A (10-entry matrices)
-    - rings: 07 07 07 04 markers (after tip region)
-    - trail: kept hardcoded (CF format, complex, early in file)
-
-    Args:
-        dat_path: Path to EfFxData.dat
-
-    Returns:
-        Dict with detected offsets, or None if not found
-    """
-    try:
-        with open(dat_path, 'rb') as f:
-            data = f.read()
-    except Exception as e:
-        logger.error(f"Failed to read {dat_path} for Up-B detection: {e}")
-        return None
-
+def _detect_upb(data, sig):
     result = {}
 
     # Find tip: unique 98 00 20 pattern (32 entries)
-    tip_pattern = bytes([0x98, 0x00, 0x20])
-    tip_pos = data.find(tip_pattern)
-    if tip_pos != -1:
-        # Tip matrix is 0x80 bytes (128 bytes): 3 header + 32 * 4 entries - 3 = 128
-        result['tip'] = {
-            'start': tip_pos,
-            'end': tip_pos + 0x80,
-            'format': 'RGBY',
-            'vanilla': 'FE60'
-        }
-        logger.debug(f"Found Up-B tip at 0x{tip_pos:X}")
-    else:
-        logger.warning("Could not find Up-B tip pattern (98 00 20)")
+    tips = sig['matrices'][0x20]
+    if not tips:
         return None
+    tip_pos = tips[0]
+    # Tip matrix is 0x80 bytes (128 bytes): 3 header + 32 * 4 entries - 3 = 128
+    result['tip'] = {
+        'start': tip_pos,
+        'end': tip_pos + 0x80,
+        'format': 'RGBY',
+        'vanilla': 'FE60'
+    }
 
-    # Find body: cluster of 98 00 0A matrices (10 entries each)
-    # Look for multiple 98 00 0A patterns close together, before the tip
-    body_pattern = bytes([0x98, 0x00, 0x0A])
-    body_candidates = []
-    pos = 0
-    while pos < tip_pos:  # Body is before tip
-        pos = data.find(body_pattern, pos)
-        if pos == -1 or pos >= tip_pos:
-            break
-        body_candidates.append(pos)
-        pos += 1
+    # Find body: cluster of 98 00 0A matrices (10 entries each), before the tip
+    body_candidates = [p for p in sig['matrices'][0x0A] if p < tip_pos]
 
     # Find a cluster of 98 00 0A matrices (RGB format, close together)
     # Body region spans multiple matrices with consistent spacing
@@ -230,26 +190,14 @@ def find_upb_offsets(dat_path):
                 'format': 'RGB',
                 'vanilla': 'FFFFFF'
             }
-            logger.debug(f"Found Up-B body cluster at 0x{cluster_start:X}-0x{cluster_end:X}")
-
-    # Find rings: 07 07 07 04 markers (after tip region)
-    rings_pattern = bytes([0x07, 0x07, 0x07, 0x04])
-    rings_offsets = []
-    pos = tip_pos  # Rings are after tip
-    while True:
-        pos = data.find(rings_pattern, pos)
-        if pos == -1:
-            break
-        rings_offsets.append(pos)
-        pos += 1
 
+    # Find rings: first two 07 07 07 04 markers after the tip
+    rings_offsets = [p for p in sig['rings'] if p >= tip_pos][:2]
     if len(rings_offsets) >= 2:
-        # Use first two 07 07 07 04 markers after tip
         result['rings'] = {
             'format': '070707',
-            'offsets': rings_offsets[:2]
+            'offsets': rings_offsets
         }
-        logger.debug(f"Found Up-B rings at {[hex(o) for o in rings_offsets[:2]]}")
 
     # Trail: keep hardcoded (CF format early in file, complex structure)
     # These offsets are stable because they're at the beginning of the file
@@ -258,77 +206,37 @@ def find_upb_offsets(dat_path):
         'offsets': [0x2EE, 0x2F4, 0x324, 0x32B, 0x52E, 0x534]
     }
 
-    if 'tip' in result:
-        logger.info(f"Found Up-B offsets: tip=0x{result['tip']['start']:X}")
-        return result
-
-    return None
-
-
-def find_shine_offsets(dat_path):
-    """Dynamically find Shine (Reflector) color offsets in EfFxData.dat.
-
-    Searches for unique patterns to locate:
-    - hex: 98 00 2B (43 entries, unique count)
-    - inner: 98 00 1B (27 entries, unique count)
-    - outer: 3 consecutive 98 00 0F (15-entry matrices)
-    - bubble: 12 bytes before 3E99999A42480000 marker
+    logger.debug(f"Found Up-B offsets: tip=0x{tip_pos:X}")
+    return result
 
-    Args:
-        dat_path: Path to EfFxData.dat
-
-    Returns:
-        Dict with detected offsets, or None if not found
-    """
-    try:
-        with open(dat_path, 'rb') as f:
-            data = f.read()
-    except Exception as e:
-        logger.error(f"Failed to read {dat_path} for Shine detection: {e}")
-        return None
 
+def _detect_shine(data, sig):
     result = {}
 
     # Find hex: unique 98 00 2B pattern (43 entries)
-    hex_pattern = bytes([0x98, 0x00, 0x2B])
-    hex_pos = data.find(hex_pattern)
-    if hex_pos != -1:
-        # 43 entries * 4 bytes each + 3 header = 175 bytes, round to 0xB0
-        result['hex'] = {
-            'start': hex_pos,
-            'end': hex_pos + 0xB0,
-            'format': 'RGBY'
-        }
-        logger.debug(f"Found Shine hex at 0x{hex_pos:X}")
-    else:
-        logger.warning("Could not find Shine hex pattern (98 00 2B)")
+    hexes = sig['matrices'][0x2B]
+    if not hexes:
         return None
+    hex_pos = hexes[0]
+    # 43 entries * 4 bytes each + 3 header = 175 bytes, round to 0xB0
+    result['hex'] = {
+        'start': hex_pos,
+        'end': hex_pos + 0xB0,
+        'format': 'RGBY'
+    }
 
-    # Find inner: 98 00 1B pattern (27 entries) - search AFTER hex
-    # There are multiple 98 00 1B in the file, inner is the one after hex
-    inner_pattern = bytes([0x98, 0x00, 0x1B])
-    inner_pos = data.find(inner_pattern, hex_pos + 0xB0)  # Start after hex region
-    if inner_pos != -1:
+    # Find inner: 98 00 1B pattern (27 entries) - the first one AFTER the hex region
+    inner = [p for p in sig['matrices'][0x1B] if p >= hex_pos + 0xB0]
+    if inner:
         # 27 entries * 4 bytes + 3 header = 111 bytes, round to 0x70
         result['inner'] = {
-            'start': inner_pos,
-            'end': inner_pos + 0x70,
+            'start': inner[0],
+            'end': inner[0] + 0x70,
             'format': 'RGBY'
         }
-        logger.debug(f"Found Shine inner at 0x{inner_pos:X}")
-
-    # Find outer: 3 consecutive 98 00 0F matrices (15 entries each)
-    outer_pattern = bytes([0x98, 0x00, 0x0F])
-    outer_candidates = []
-    pos = hex_pos if hex_pos != -1 else 0  # Search after hex
-    while True:
-        pos = data.find(outer_pattern, pos)
-        if pos == -1:
-            break
-        outer_candidates.append(pos)
-        pos += 1
 
-    # Look for 3 consecutive 98 00 0F matrices close together
+    # Find outer: 3 consecutive 98 00 0F matrices (15 entries each) after hex
+    outer_candidates = [p for p in sig['matrices'][0x0F] if p >= hex_pos]
     for i in range(len(outer_candidates) - 2):
         first = outer_candidates[i]
         second = outer_candidates[i + 1]
@@ -344,27 +252,146 @@ def find_shine_offsets(dat_path):
                     {'start': third, 'end': third + 0x42}
                 ]
             }
-            logger.debug(f"Found Shine outer at 0x{first:X}, 0x{second:X}, 0x{third:X}")
             break
 
     # Find bubble: 12 bytes before 3E99999A42480000 marker (same as side-B)
-    bubble_marker = bytes.fromhex('3E99999A42480000')
-    bubble_pos = data.find(bubble_marker)
-    if bubble_pos > 12:
-        # The bubble colors are 12 bytes before the marker
-        bubble_start = bubble_pos - 12
+    if sig['marker'] > 12:
         result['bubble'] = {
-            'start': bubble_start,
+            'start': sig['marker'] - 12,
             'format': '42_48',
             'size': 12
         }
-        logger.debug(f"Found Shine bubble at 0x{bubble_start:X}")
 
-    if 'hex' in result:
-        logger.info(f"Found Shine offsets: hex=0x{result['hex']['start']:X}")
-        return result
+    logger.debug(f"Found Shine offsets: hex=0x{hex_pos:X}")
+    return result
 
-    return None
+
+def _detect_laser_ring(data, sig):
+    prefix_pos = sig['ring_prefix']
+    if prefix_pos == -1:
+        return None
+
+    # Color positions relative to prefix
+    color1_pos = prefix_pos + 8   # After 85 80 08 0f 07 07 07 07
+    color2_pos = prefix_pos + 12  # After color1 + separator
+
+    # Hue byte offsets relative to color1
+    hue_offsets = [0x678, 0x68C, 0x6A0, 0x6B4, 0x6C8, 0x6DC]
+
+    result = {
+        'color1': {'start': color1_pos, 'size': 3, 'format': 'RGB'},
+        'color2': {'start': color2_pos, 'size': 3, 'format': 'RGB'},
+    }
+
+    for i, offset in enumerate(hue_offsets, 1):
+        result[f'hue{i}'] = {'start': color1_pos + offset, 'size': 1, 'format': 'BYTE'}
+
+    logger.debug(f"Found laser ring: color1=0x{color1_pos:X}, color2=0x{color2_pos:X}")
+    return result
+
+
+# extra type id -> detector(data, signatures)
+_DETECTORS = {
+    'laser': _detect_laser,
+    'sideb': _detect_sideb,
+    'upb': _detect_upb,
+    'shine': _detect_shine,
+    'laser_ring': _detect_laser_ring,
+}
+
+
+def detect_all_offsets(data):
+    """Every dynamically detected extra type's offsets in a DAT's bytes, from
+    one signature scan: {extra type id: offsets dict, or None if not found}."""
+    sig = scan_signatures(data)
+    return {type_id: detect(data, sig) for type_id, detect in _DETECTORS.items()}
+
+
+def _read_dat(dat_path, what):
+    try:
+        with open(dat_path, 'rb') as f:
+            return f.read()
+    except Exception as e:
+        logger.error(f"Failed to read {dat_path} for {what} detection: {e}")
+        return None
+
+
+def _detect_one(dat_path, type_id, what):
+    data = _read_dat(dat_path, what)
+    if data is None:
+        return None
+    detected = _DETECTORS[type_id](data, scan_signatures(data))
+    if detected is None:
+        logger.warning(f"Could not find {what} pattern in {dat_path}")
+    return detected
+
+
+def find_laser_offsets(dat_path):
+    """Dynamically find laser color matrix offsets in a DAT file.
+
+    Searches for three consecutive 98 00 17 matrices (23 entries each)
+    that are exactly 0xA0 (160 bytes) apart. This pattern is consistent
+    even when file structure changes due to model imports.
+
+    Args:
+        dat_path: Path to the .dat file (PlFc.dat or PlFx.dat)
+
+    Returns:
+        Dict with wide/thin/outline offset info, or None if not found
+    """
+    return _detect_one(dat_path, 'laser', 'laser')
+
+
+def find_sideb_offsets(dat_path):
+    """Dynamically find side-B RGBA color offsets in a DAT file.
+
+    Searches for the unique marker pattern 3E 99 99 9A 42 48 00 00 that follows
+    the side-B color data. The three 4-byte RGBA values are located
+    12 bytes before this marker.
+
+    Args:
+        dat_path: Path to the .dat file (PlFc.dat or PlFx.dat)
+
+    Returns:
+        Dict with primary/secondary/tertiary offset info, or None if not found
+    """
+    return _detect_one(dat_path, 'sideb', 'side-B')
+
+
+def find_upb_offsets(dat_path):
+    """Dynamically find Up-B (Firefox/Firebird) color offsets in EfFxData.dat.
+
+    Searches for unique patterns to locate:
+    - tip: 98 00 20 (32 entries, unique count)
+    - body: cluster of 98 00 0A (10-entry matrices)
+    - rings: 07 07 07 04 markers (after tip region)
+    - trail: kept hardcoded (CF format, complex, early in file)
+
+    Args:
+        dat_path: Path to EfFxData.dat
+
+    Returns:
+        Dict with detected offsets, or None if not found
+    """
+    return _detect_one(dat_path, 'upb', 'Up-B')
+
+
+def find_shine_offsets(dat_path):
+    """Dynamically find Shine (Reflector) color offsets in EfFxData.dat.
+
+    Searches for unique patterns to locate:
+    - hex: 98 00 2B (43 entries, unique count)
+    - inner: 98 00 1B (27 entries, unique count)
+    - outer: 3 consecutive 98 00 0F (15-entry matrices)
+    - bubble: 12 bytes before 3E99999A42480000 marker
+
+    Args:
+        dat_path: Path to EfFxData.dat
+
+    Returns:
+        Dict with detected offsets, or None if not found
+    """
+    return _detect_one(dat_path, 'shine', 'Shine')
 
 
 def find_laser_ring_offsets(dat_path):
@@ -393,41 +420,87 @@ def find_laser_ring_offsets(dat_path):
     Returns:
         Dict with detected offsets, or None if not found
     """
-    try:
-        with open(dat_path, 'rb') as f:
-            data = f.read()
-    except Exception as e:
-        logger.error(f"Failed to read {dat_path} for laser ring detection: {e}")
-        return None
+    return _detect_one(dat_path, 'laser_ring', 'laser ring')
 
-    # Search for unique prefix pattern 85 80 08 0f 07 07 07 07
-    prefix = bytes([0x85, 0x80, 0x08, 0x0f, 0x07, 0x07, 0x07, 0x07])
-    prefix_pos = data.find(prefix)
 
-    if prefix_pos == -1:
-        logger.warning("Could not find laser ring pattern (85 80 08 0f 07 07 07 07)")
-        return None
+def _offsets_cache_dir():
+    return Path(STORAGE_PATH) / "_extras_offsets" if STORAGE_PATH else None
 
-    # Color positions relative to prefix
-    color1_pos = prefix_pos + 8   # After 85 80 08 0f 07 07 07 07
-    color2_pos = prefix_pos + 12  # After color1 + separator
-
-    logger.info(f"Found laser ring: color1=0x{color1_pos:X}, color2=0x{color2_pos:X}")
-
-    # Hue byte offsets relative to color1
-    hue_offsets = [0x678, 0x68C, 0x6A0, 0x6B4, 0x6C8, 0x6DC]
-
-    result = {
-        'color1': {'start': color1_pos, 'size': 3, 'format': 'RGB'},
-        'color2': {'start': color2_pos, 'size': 3, 'format': 'RGB'},
-    }
 
-    for i, offset in enumerate(hue_offsets, 1):
-        result[f'hue{i}'] = {'start': color1_pos + offset, 'size': 1, 'format': 'BYTE'}
+def _load_persisted_offsets(digest):
+    cache_dir = _offsets_cache_dir()
+    if cache_dir is None:
+        return None
+    path = cache_dir / f"{digest}.json"
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            entry = json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        logger.warning(f"Unreadable extras offsets cache entry {path.name}: {e}")
+        return None
+    if entry.get('version') != OFFSETS_CACHE_VERSION:
+        return None
+    offsets = entry.get('offsets') or {}
+    if set(offsets) != set(_DETECTORS):
+        return None
+    try:
+        os.utime(path, None)   # mtime orders eviction
+    except OSError:
+        pass
+    return offsets
 
-    logger.info(f"Laser ring hue1 at 0x{color1_pos + 0x678:X}")
 
-    return result
+def _persist_offsets(digest, offsets):
+    cache_dir = _offsets_cache_dir()
+    if cache_dir is None:
+        return
+    dest = cache_dir / f"{digest}.json"
+    try:
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        tmp = dest.with_name(f".{dest.stem}.{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({'version': OFFSETS_CACHE_VERSION, 'offsets': offsets}, f)
+        os.replace(tmp, dest)
+        entries = sorted(cache_dir.glob('*.json'), key=lambda p: p.stat().st_mtime)
+        for stale in entries[:max(0, len(entries) - _OFFSETS_CACHE_MAX)]:
+            stale.unlink()
+    except OSError as e:
+        logger.warning(f"Could not persist extras offsets for DAT {digest[:12]}: {e}")
+
+
+def dat_extras_offsets(dat_path):
+    """Detected offsets of every dynamic extra type in a DAT ({type id:
+    offsets or None}), or None if the file can't be read. Scanned once per
+    distinct DAT content; callers get their own copy."""
+    try:
+        st = os.stat(dat_path)
+        key = (str(dat_path), st.st_mtime_ns, st.st_size)
+    except OSError:
+        key = None
+    if key is not None:
+        with _offset_cache_lock:
+            hit = _dynamic_offset_cache.get(key)
+        if hit is not None:
+            return copy.deepcopy(hit)
+
+    data = _read_dat(dat_path, 'extras offset')
+    if data is None:
+        return None
+    digest = hashlib.md5(data).hexdigest()
+    offsets = _load_persisted_offsets(digest)
+    if offsets is None:
+        offsets = detect_all_offsets(data)
+        _persist_offsets(digest, offsets)
+        logger.info(f"Scanned {dat_path} for extras offsets: "
+                    f"{sorted(t for t, o in offsets.items() if o)} found")
+    if key is not None:
+        with _offset_cache_lock:
+            _dynamic_offset_cache[key] = offsets
+            while len(_dynamic_offset_cache) > _MEMO_MAX:
+                del _dynamic_offset_cache[next(iter(_dynamic_offset_cache))]
+    return copy.deepcopy(offsets)
 
 
 def get_dynamic_offsets(dat_path, extra_type_id, fallback_offsets):
@@ -436,7 +509,9 @@ def get_dynamic_offsets(dat_path, extra_type_id, fallback_offsets):
     For laser, sideb, upb, shine, and laser_ring types, attempts dynamic detection first,
     falling back to hardcoded offsets if detection fails.
 
-    Results are cached by (file_path, mtime) to avoid re-scanning.
+    All five types are detected together and cached by DAT content (see
+    dat_extras_offsets), so switching extra types or restarting the backend
+    does not re-scan the file.
 
     Args:
         dat_path: Path to the .dat file
@@ -447,39 +522,12 @@ def get_dynamic_offsets(dat_path, extra_type_id, fallback_offsets):
         Dict of offset info for each layer
     """
     # Check if this type needs dynamic detection
-    if extra_type_id not in ('laser', 'sideb', 'upb', 'shine', 'laser_ring'):
+    if extra_type_id not in _DETECTORS:
         return fallback_offsets
 
-    # Check cache
-    try:
-        mtime = os.path.getmtime(dat_path)
-        cache_key = (str(dat_path), mtime, extra_type_id)
-        if cache_key in _dynamic_offset_cache:
-            logger.debug(f"Using cached offsets for {extra_type_id} in {dat_path}")
-            return _dynamic_offset_cache[cache_key]
-    except Exception:
-        pass
-
-    # Attempt dynamic detection
-    detected = None
-    if extra_type_id == 'laser':
-        detected = find_laser_offsets(dat_path)
-    elif extra_type_id == 'sideb':
-        detected = find_sideb_offsets(dat_path)
-    elif extra_type_id == 'upb':
-        detected = find_upb_offsets(dat_path)
-    elif extra_type_id == 'shine':
-        detected = find_shine_offsets(dat_path)
-    elif extra_type_id == 'laser_ring':
-        detected = find_laser_ring_offsets(dat_path)
-
+    detected = (dat_extras_offsets(dat_path) or {}).get(extra_type_id)
     if detected:
         logger.info(f"Using dynamically detected offsets for {extra_type_id}")
-        # Cache the result
-        try:
-            _dynamic_offset_cache[cache_key] = detected
-        except Exception:
-            pass
         return detected
     else:
         logger.info(f"Dynamic detection failed for {extra_type_id}, using hardcoded offsets")
@@ -10,6 +10,7 @@ import tempfile
 import logging
 from datetime import datetime
 
+from core import hash_index
 from core.config import STORAGE_PATH
 from core.costume_files import get_costume_archive_extension
 from core.metadata import load_metadata, save_metadata
@@ -285,6 +286,11 @@ def import_character_costume(zip_path: str, char_info: dict, original_filename:
 
         # Save metadata
         save_metadata(metadata)
+        # Keep the ISO-scan hash index warm: both the pre-fix hash and the
+        # stored (possibly Slippi-fixed) bytes identify this skin.
+        hash_index.record_vault_zip(final_zip, dat_hash=dat_hash,
+                                    inner_hash=compute_dat_hash(dat_data),
+                                    storage=STORAGE_PATH)
 
         logger.info(f"[OK] Saved character costume: {final_zip}")
 
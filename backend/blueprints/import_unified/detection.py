@@ -51,12 +51,10 @@ Returned dict:
 
 import json
 import logging
-import os
-import tempfile
 import zipfile
 from pathlib import Path
 
-from character_detector import detect_character_from_zip, DATParser, read_7z_member
+from character_detector import detect_character_from_zip, DATParser, map_dats, read_7z_member
 from stage_detector import detect_stage_from_zip
 
 try:
@@ -301,6 +299,27 @@ def _looks_like_dat_extension(suffix):
     return len(suffix) == 4 and suffix.endswith('at') and suffix[1].isalnum()
 
 
+def _classify_dat(member, data):
+    """Parse one dat in memory: ('renamed', entry) for a vanilla fighter's
+    costume, ('custom_fighter', entry) for Ply symbols without a character
+    match, None otherwise."""
+    if not data:
+        return None
+    try:
+        parser = DATParser(data)
+        parser.read_dat()
+        character, _symbol = parser.detect_character()
+        if not any('Ply' in node['symbol'] for node in parser.root_nodes):
+            return None
+        if character:
+            return 'renamed', {'dat': Path(member).name,
+                               'character': character,
+                               'costume_code': parser.get_character_filename()}
+        return 'custom_fighter', {'dat': Path(member).name}
+    except Exception:
+        return None
+
+
 def _classify_dats_by_content(archive_path, names):
     """Parse up to MAX_FALLBACK_DAT_PARSES dats by content. Catches costume
     dats with arbitrary filenames (lucinablack.dat → Marth) and costumes for
@@ -311,35 +330,10 @@ def _classify_dats_by_content(archive_path, names):
     dat_members = [n for n in names
                    if _looks_like_dat_extension(Path(n).suffix.lower())
                    and not n.endswith('/')][:MAX_FALLBACK_DAT_PARSES]
-    renamed = []
-    custom_fighter = []
-    for member in dat_members:
-        data = _read_member(archive_path, member)
-        if not data:
-            continue
-        with tempfile.NamedTemporaryFile(suffix='.dat', delete=False) as tmp:
-            tmp.write(data)
-            tmp_path = tmp.name
-        try:
-            parser = DATParser(tmp_path)
-            parser.read_dat()
-            character, _symbol = parser.detect_character()
-            has_ply = any('Ply' in node['symbol'] for node in parser.root_nodes)
-            if not has_ply:
-                continue
-            if character:
-                renamed.append({'dat': Path(member).name,
-                                'character': character,
-                                'costume_code': parser.get_character_filename()})
-            else:
-                custom_fighter.append({'dat': Path(member).name})
-        except Exception:
-            continue
-        finally:
-            try:
-                os.unlink(tmp_path)
-            except OSError:
-                pass
+    results = [r for r in map_dats(lambda m: _classify_dat(m, _read_member(archive_path, m)),
+                                   dat_members) if r]
+    renamed = [entry for kind, entry in results if kind == 'renamed']
+    custom_fighter = [entry for kind, entry in results if kind == 'custom_fighter']
 
     if renamed:
         return 'character_renamed', {'costumes': renamed}
@@ -49,9 +49,13 @@ def _csp_url_base(job_id: str) -> str:
 
 @iso_scan_bp.route('/api/mex/iso-scan/preflight', methods=['GET'])
 def preflight():
+    # Plain .iso/.gcm images are read natively (gc_disc); wit is only a
+    # fallback for images that reader can't open.
     return jsonify({
         'wit_available': wit_available(),
         'wit_path': str(WIT_EXE),
+        'native_reader': True,
+        'scan_available': True,
     })
 
 
@@ -678,24 +678,28 @@ def batch_generate_pose_csps():
         generated = 0
         failed = 0
 
-        for skin_id in skin_ids:
-            skin = skin_lookup.get(skin_id)
-            if not skin:
-                results.append({
-                    'skinId': skin_id,
-                    'success': False,
-                    'error': 'Skin not found'
-                })
-                failed += 1
-                continue
-
-            result = _generate_pose_csps_for_skin(
-                character, skin, pose_name, pose_path, aj_file, hd_scale)
-            results.append(result)
-            if result.get('success'):
-                generated += 1
-            else:
-                failed += 1
+        # Render through the shared CSP workers in the BULK lane, so a single
+        # Retake CSP issued meanwhile isn't stuck behind the whole batch.
+        from skinlab.csp_pool import active_pool
+        with active_pool():
+            for skin_id in skin_ids:
+                skin = skin_lookup.get(skin_id)
+                if not skin:
+                    results.append({
+                        'skinId': skin_id,
+                        'success': False,
+                        'error': 'Skin not found'
+                    })
+                    failed += 1
+                    continue
+
+                result = _generate_pose_csps_for_skin(
+                    character, skin, pose_name, pose_path, aj_file, hd_scale)
+                results.append(result)
+                if result.get('success'):
+                    generated += 1
+                else:
+                    failed += 1
 
         # Save updated metadata
         save_metadata(metadata)
@@ -843,7 +847,7 @@ def project_costume_map():
         if mex is None:
             return jsonify({'success': False, 'error': 'No MEX project loaded'}), 400
 
-        result = mex._run_command('get-costumes', str(mex.project_path), fighter)
+        result = mex.get_costumes(fighter)
         if not result.get('success', True) and 'costumes' not in result:
             return jsonify({'success': False,
                             'error': result.get('error', 'Failed to list costumes')}), 500
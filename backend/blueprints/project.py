@@ -694,7 +694,7 @@ def get_fighter_costumes(fighter_name):
     """Get costumes for a specific fighter"""
     try:
         mex = get_mex_manager()
-        result = mex._run_command("get-costumes", str(mex.project_path), fighter_name)
+        result = mex.get_costumes(fighter_name)
 
         # Add asset URLs to each costume (relative to /api/mex since frontend adds API_URL)
         # URLs carry the file mtime so the browser refetches when an asset is
@@ -643,7 +643,7 @@ def _generate_material(params):
 
     t0 = _time.time()
     try:
-        _, seconds = _runner.generate(
+        _, seconds, timings = _runner.generate(
             prompt, resolved['model'], cache, style=style,
             seed=params.get('seed'),
             width=int(params['width']) if params.get('width') else None,
@@ -653,7 +653,8 @@ def _generate_material(params):
         telemetry.record_run('local', resolved['model'], tier, kind,
                              _time.time() - t0, False)
         raise GenerationError(str(e))
-    telemetry.record_run('local', resolved['model'], tier, kind, seconds, True)
+    telemetry.record_run('local', resolved['model'], tier, kind, seconds, True,
+                         **timings)
     return cache, {'model': resolved['model'], 'tier': tier,
                    'escalated': resolved['escalated'], 'provider': 'local',
                    'label': resolved['label'], 'estCostUsd': 0.0,
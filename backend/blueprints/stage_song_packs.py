@@ -7,7 +7,8 @@ packs in the vault; a pack is a playlist of tracks:
     storage/das/<stage_folder>/song_packs/<pack-id>/
         pack.json       ({"name", "created", "tracks": [{"name", "chance"}]})
         music_N.hps     (one per track, index-aligned with tracks)
-        cache/          (decoded wav previews)
+        cache/          (wav previews written by older versions; previews
+                         now decode in memory via dsp_audio)
 
 Packs are NOT applied automatically — installation is an explicit per-
 project action: each track is added to the open project via MexCLI
@@ -26,7 +27,7 @@ import tempfile
 import logging
 from pathlib import Path
 from datetime import datetime
-from flask import Blueprint, request, jsonify, send_file
+from flask import Blueprint, request, jsonify
 
 from core.config import STORAGE_PATH, MEXCLI_PATH, PROJECT_ROOT, get_subprocess_args
 from core.state import get_current_project_path, mexcli_lock
@@ -357,16 +358,11 @@ def get_pack_track(stage, pack_id, index):
     pdir = _pack_dir(folder, pack_id) if code else None
     if pdir is None:
         return jsonify({'success': False, 'error': 'Song pack not found'}), 404
-    cache = pdir / 'cache' / f'track_{index}.wav'
-    if not cache.exists():
-        hps = pdir / f'music_{index}.hps'
-        if not hps.exists():
-            return jsonify({'success': False, 'error': 'Track file missing'}), 404
-        cache.parent.mkdir(exist_ok=True)
-        out = _run_mexcli('hps-to-wav', hps, cache)
-        if not out.get('success') or not cache.exists():
-            return jsonify({'success': False, 'error': out.get('error', 'HPS decode failed')}), 500
-    return send_file(cache, mimetype='audio/wav')
+    hps = pdir / f'music_{index}.hps'
+    if not hps.exists():
+        return jsonify({'success': False, 'error': 'Track file missing'}), 404
+    from blueprints.custom_characters import _wav_preview
+    return _wav_preview(hps)
 
 
 # ============= Per-project install =============
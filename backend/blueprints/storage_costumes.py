@@ -19,10 +19,12 @@ from datetime import datetime
 from pathlib import Path
 from flask import Blueprint, request, jsonify
 
+from core import hash_index
 from core.config import PROJECT_ROOT, STORAGE_PATH, VANILLA_ASSETS_DIR, PROCESSOR_DIR, SERVICES_DIR
 from core.constants import get_char_prefix
 from core.costume_files import find_costume_archive_name, find_extracted_costume_archive
-from core.metadata import load_metadata, save_metadata, get_char_data
+from core.metadata import (load_metadata, save_metadata, get_char_data,
+                           skin_transaction, skins_transaction)
 
 import sys
 sys.path.insert(0, str(PROCESSOR_DIR))
@@ -356,6 +358,8 @@ def delete_storage_costume():
             if f.exists():
                 f.unlink()
                 deleted_files.append(str(f))
+                if f.suffix == '.zip':
+                    hash_index.forget_vault_zip(f, storage=STORAGE_PATH)
 
         # Belt-and-suspenders: sweep any alternate CSP PNGs that match this
         # skin's id but weren't tracked in metadata. The literal `_csp_alt_`
@@ -390,27 +394,15 @@ def rename_storage_costume():
         if not character or not skin_id or not new_name:
             return jsonify({'success': False, 'error': 'Missing character, skinId, or newName parameter'}), 400
 
-        metadata = load_metadata()
-        if metadata is None:
-            return jsonify({'success': False, 'error': 'Metadata file not found'}), 404
+        with skins_transaction(character) as skins:
+            if skins is None:
+                return jsonify({'success': False, 'error': f'Character {character} not found in metadata'}), 404
 
-        char_data = get_char_data(metadata, character)
-        if char_data is None:
-            return jsonify({'success': False, 'error': f'Character {character} not found in metadata'}), 404
+            skin = next((s for s in skins if s['id'] == skin_id), None)
+            if skin is None:
+                return jsonify({'success': False, 'error': f'Skin {skin_id} not found for {character}'}), 404
 
-        skins = char_data.get('skins', [])
-        skin_found = False
-
-        for skin in skins:
-            if skin['id'] == skin_id:
-                skin['color'] = new_name
-                skin_found = True
-                break
-
-        if not skin_found:
-            return jsonify({'success': False, 'error': f'Skin {skin_id} not found for {character}'}), 404
-
-        save_metadata(metadata)
+            skin['color'] = new_name
 
         logger.info(f"[OK] Renamed costume {skin_id} to '{new_name}'")
         return jsonify({'success': True, 'message': f'Successfully renamed to {new_name}'})
@@ -488,24 +480,18 @@ def update_costume_csp():
                 with Image.open(BytesIO(hd_data)) as img:
                     hd_size = f"{img.size[0]}x{img.size[1]}"
 
-            metadata = load_metadata()
-            if metadata is not None:
-                char_data = get_char_data(metadata, character)
-                if char_data is not None:
-                    for skin in char_data.get('skins', []):
-                        if skin['id'] == skin_id:
-                            skin['has_csp'] = True
-                            skin['csp_source'] = 'custom'
-                            skin['csp_filename'] = csp_filename
-                            skin.pop('csp_pose_name', None)
-                            if hd_filename:
-                                skin['has_hd_csp'] = True
-                                skin['hd_csp_source'] = 'custom'
-                                skin['hd_csp_filename'] = hd_filename
-                                skin['hd_csp_resolution'] = 'custom'
-                                skin['hd_csp_size'] = hd_size
-                            break
-                    save_metadata(metadata)
+            with skin_transaction(character, skin_id) as skin:
+                if skin is not None:
+                    skin['has_csp'] = True
+                    skin['csp_source'] = 'custom'
+                    skin['csp_filename'] = csp_filename
+                    skin.pop('csp_pose_name', None)
+                    if hd_filename:
+                        skin['has_hd_csp'] = True
+                        skin['hd_csp_source'] = 'custom'
+                        skin['hd_csp_filename'] = hd_filename
+                        skin['hd_csp_resolution'] = 'custom'
+                        skin['hd_csp_size'] = hd_size
 
             logger.info(f"[OK] Updated CSP for {character} - {skin_id} (auto, hd={'yes' if hd_data else 'no'})")
             return jsonify({'success': True, 'message': 'CSP updated successfully', 'hasHd': bool(hd_data)})
@@ -516,18 +502,11 @@ def update_costume_csp():
             with open(standalone_hd_csp, 'wb') as f:
                 f.write(csp_data)
 
-            metadata = load_metadata()
-            if metadata is not None:
-                char_data = get_char_data(metadata, character)
-                if char_data is not None:
-                    for skin in char_data.get('skins', []):
-                        if skin['id'] == skin_id:
-                            skin['has_hd_csp'] = True
-                            skin['hd_csp_source'] = 'custom'
-                            skin['hd_csp_filename'] = hd_csp_filename
-                            break
-
-                    save_metadata(metadata)
+            with skin_transaction(character, skin_id) as skin:
+                if skin is not None:
+                    skin['has_hd_csp'] = True
+                    skin['hd_csp_source'] = 'custom'
+                    skin['hd_csp_filename'] = hd_csp_filename
 
             logger.info(f"[OK] Updated HD CSP for {character} - {skin_id}")
         else:
@@ -548,19 +527,12 @@ def update_costume_csp():
             zip_path.unlink()
             temp_zip.rename(zip_path)
 
-            metadata = load_metadata()
-            if metadata is not None:
-                char_data = get_char_data(metadata, character)
-                if char_data is not None:
-                    for skin in char_data.get('skins', []):
-                        if skin['id'] == skin_id:
-                            skin['has_csp'] = True
-                            skin['csp_source'] = 'custom'
-                            skin['csp_filename'] = csp_filename
-                            skin.pop('csp_pose_name', None)
-                            break
-
-                    save_metadata(metadata)
+            with skin_transaction(character, skin_id) as skin:
+                if skin is not None:
+                    skin['has_csp'] = True
+                    skin['csp_source'] = 'custom'
+                    skin['csp_filename'] = csp_filename
+                    skin.pop('csp_pose_name', None)
 
             logger.info(f"[OK] Updated CSP for {character} - {skin_id}")
 
@@ -610,18 +582,11 @@ def capture_hd_csp(character, skin_id):
             with Image.open(final_hd_csp) as img:
                 width, height = img.size
 
-            metadata = load_metadata()
-            if metadata is not None:
-                char_data = get_char_data(metadata, character)
-                if char_data is not None:
-                    for skin in char_data.get('skins', []):
-                        if skin['id'] == skin_id:
-                            skin['has_hd_csp'] = True
-                            skin['hd_csp_resolution'] = f"{scale}x"
-                            skin['hd_csp_size'] = f"{width}x{height}"
-                            break
-
-                    save_metadata(metadata)
+            with skin_transaction(character, skin_id) as skin:
+                if skin is not None:
+                    skin['has_hd_csp'] = True
+                    skin['hd_csp_resolution'] = f"{scale}x"
+                    skin['hd_csp_size'] = f"{width}x{height}"
 
             logger.info(f"[OK] Generated HD CSP for {character}/{skin_id} at {scale}x ({width}x{height})")
             return jsonify({'success': True, 'message': f'HD CSP generated at {scale}x', 'resolution': f"{scale}x", 'size': f"{width}x{height}"})
@@ -945,17 +910,10 @@ def update_costume_stock():
         zip_path.unlink()
         temp_zip.rename(zip_path)
 
-        metadata = load_metadata()
-        if metadata is not None:
-            char_data = get_char_data(metadata, character)
-            if char_data is not None:
-                for skin in char_data.get('skins', []):
-                    if skin['id'] == skin_id:
-                        skin['has_stock'] = True
-                        skin['stock_source'] = 'custom'
-                        break
-
-                save_metadata(metadata)
+        with skin_transaction(character, skin_id) as skin:
+            if skin is not None:
+                skin['has_stock'] = True
+                skin['stock_source'] = 'custom'
 
         logger.info(f"[OK] Updated stock icon for {character} - {skin_id}")
         return jsonify({'success': True, 'message': 'Stock icon updated successfully'})
@@ -1069,6 +1027,149 @@ def generate_costume_stock():
         return jsonify({'success': False, 'error': str(e)}), 500
 
 
+# One bulk stock regeneration at a time; it already saturates the process pool.
+_batch_stock_lock = threading.Lock()
+_batch_stock_running = False
+
+
+@storage_costumes_bp.route('/api/mex/storage/costumes/batch-generate-stock', methods=['POST'])
+def batch_generate_costume_stock():
+    """Preview generated stock icons for many costumes at once
+    (skinlab.stock_gen.generate_stocks): skins are grouped by character so the
+    vanilla textures are decoded once per character, and the recolors run on
+    a process pool. Previews only -- nothing is written; the frontend applies
+    the kept ones via /generate-stock (apply), exactly like a single preview.
+
+    Body: {character?, skinIds?}. No character = every vault character; no
+    skinIds = every costume of the character(s). Streams over socket.io:
+    `stock_gen_item` per costume ({character, skinId, ok, method, dataUri|error,
+    done, total}), then `stock_gen_complete` ({total, generated, failed});
+    `stock_gen_error` on a fatal error. Returns immediately."""
+    global _batch_stock_running
+
+    data = request.json or {}
+    only_character = data.get('character')
+    only_ids = set(data.get('skinIds') or [])
+
+    # Snapshot on the request thread: which skins, and whether each has our
+    # own stored render (only that may feed the csp-diff path).
+    metadata = load_metadata() or {}
+    characters = metadata.get('characters', {})
+    if only_character:
+        characters = {only_character: characters.get(only_character, {})}
+    jobs = [(character, skin['id'], skin.get('csp_source') == 'generated')
+            for character, char_data in characters.items()
+            for skin in (char_data or {}).get('skins', [])
+            if skin.get('type') != 'folder' and (not only_ids or skin['id'] in only_ids)]
+    if not jobs:
+        return jsonify({'success': False, 'error': 'No costumes to generate stocks for'}), 400
+
+    with _batch_stock_lock:
+        if _batch_stock_running:
+            return jsonify({'success': False,
+                            'error': 'A bulk stock generation is already running.'}), 409
+        _batch_stock_running = True
+
+    def run():
+        global _batch_stock_running
+        import base64
+        from core.state import get_socketio
+        from skinlab.costume_assets import build_stock
+        from skinlab.stock_gen import StockJob, generate_stocks
+        socketio = get_socketio()
+        total = len(jobs)
+        counts = {'done': 0, 'generated': 0, 'failed': 0}
+
+        def emit(character, skin_id, stock_data=None, method=None, error=None):
+            counts['done'] += 1
+            item = {'character': character, 'skinId': skin_id,
+                    'done': counts['done'], 'total': total}
+            if stock_data:
+                counts['generated'] += 1
+                item.update({'ok': True, 'method': method,
+                             'dataUri': 'data:image/png;base64,'
+                                        + base64.b64encode(stock_data).decode('ascii')})
+            else:
+                counts['failed'] += 1
+                item.update({'ok': False, 'error': error or 'Could not derive a stock icon '
+                                                            'for this skin'})
+            socketio.emit('stock_gen_item', item)
+
+        try:
+            with tempfile.TemporaryDirectory(prefix='stock_batch_') as tmp:
+                # Pull every costume's DAT out of its zip first...
+                staged = []     # (character, skin_id, costume_code, dat_path, csp_path)
+                for n, (character, skin_id, own_csp) in enumerate(jobs):
+                    try:
+                        zip_path = STORAGE_PATH / character / f"{skin_id}.zip"
+                        with zipfile.ZipFile(zip_path, 'r') as zf:
+                            dat_filename = find_costume_archive_name(zf.namelist())
+                            if not dat_filename:
+                                raise ValueError('No costume archive found in costume ZIP')
+                            dat_path = Path(tmp) / f"{n}.dat"
+                            dat_path.write_bytes(zf.read(dat_filename))
+                        stem = Path(dat_filename).stem
+                        csp_path = STORAGE_PATH / character / f"{skin_id}_csp.png"
+                        staged.append((character, skin_id,
+                                       stem[:-3] if stem.endswith('Mod') else stem,
+                                       dat_path, csp_path if own_csp and csp_path.exists() else None))
+                    except Exception as e:  # noqa: BLE001 - one bad costume mustn't stop the batch
+                        logger.warning(f"Stock batch: {character}/{skin_id} skipped: {e}")
+                        emit(character, skin_id, error=str(e))
+
+                def single(character, skin_id, costume_code, dat_path, csp_path):
+                    """One costume through the canonical single-preview path."""
+                    try:
+                        stock_data, _source, method = build_stock(
+                            character, costume_code, dat_path.read_bytes(),
+                            dat_path=str(dat_path),
+                            aligned_csp=csp_path.read_bytes() if csp_path else None,
+                            vanilla_fallback=False)
+                        emit(character, skin_id, stock_data, method)
+                    except Exception as e:  # noqa: BLE001
+                        logger.warning(f"Stock batch: {character}/{skin_id} failed: {e}")
+                        emit(character, skin_id, error=str(e))
+
+                # ...then recolor them all on the pool. Mr. Game & Watch is a
+                # plain slot recolor (build_stock), not a texture diff.
+                pooled = []
+                for s in staged:
+                    if s[0] in ("Mr. Game & Watch", "G&W"):
+                        single(*s)
+                    else:
+                        pooled.append(s)
+
+                renders = []
+
+                def on_result(i, res):
+                    if res.head_shot:
+                        renders.append(pooled[i])   # model import: needs a render
+                    else:
+                        emit(pooled[i][0], pooled[i][1], res.png, res.method, res.error)
+
+                generate_stocks(VANILLA_ASSETS_DIR,
+                                [StockJob(s[0], s[2], str(s[3]), str(s[4]) if s[4] else None)
+                                 for s in pooled],
+                                on_result=on_result)
+
+                # Head-shot crops render through HSDRawViewer, one at a time.
+                for s in renders:
+                    single(*s)
+
+            socketio.emit('stock_gen_complete', {'total': total,
+                                                 'generated': counts['generated'],
+                                                 'failed': counts['failed']})
+            logger.info(f"[OK] Batch stock generation: {counts['generated']}/{total} generated")
+        except Exception as e:
+            logger.error(f"Batch stock generation error: {e}", exc_info=True)
+            socketio.emit('stock_gen_error', {'error': str(e)})
+        finally:
+            _batch_stock_running = False
+
+    threading.Thread(target=run, daemon=True).start()
+    return jsonify({'success': True, 'message': f'Generating stocks for {len(jobs)} costume(s)'})
+
+
 def _resolve_active_portrait(skin_meta):
     """Resolve the costume's currently active portrait from metadata.
 
@@ -1271,8 +1372,8 @@ def generate_costume_csp():
         return jsonify({'success': False, 'error': str(e)}), 500
 
 
-# One bulk retake at a time: active_pool installs a process-global CSP pool, so
-# two concurrent batches would clobber each other's pool.
+# One bulk retake at a time: the retake grid in the UI is per character, and a
+# second batch would only queue behind the first on the shared CSP workers.
 _batch_retake_lock = threading.Lock()
 _batch_retake_running = False
 
@@ -1320,7 +1421,7 @@ def batch_retake_csp():
         total = len(jobs)
         rendered = 0
         try:
-            # One warm pool for the whole batch (bounded to the job count).
+            # Shared warm workers, BULK lane (single retakes still jump ahead).
             with active_pool(workers=max(1, min(csp_workers(), total))):
                 for i, (sid, skin_meta) in enumerate(jobs):
                     item = {'skinId': sid, 'done': i + 1, 'total': total}
@@ -1355,6 +1456,35 @@ def batch_retake_csp():
     return jsonify({'success': True, 'message': f'Retaking {len(jobs)} costume(s)'})
 
 
+@storage_costumes_bp.route('/api/mex/storage/csp-service/stats', methods=['GET'])
+def csp_service_stats():
+    """Health of the shared HSDRawViewer CSP render service: per-worker job,
+    failure, timeout and restart counts, plus per-lane queue/wait stats."""
+    from skinlab.csp_pool import get_service
+    service = get_service(create=False)
+    if service is None:
+        return jsonify({'success': True, 'running': False, 'stats': None})
+    return jsonify({'success': True, 'running': True, 'stats': service.stats()})
+
+
+def _replace_costume_dat(zip_path, dat_filename, dat_bytes):
+    """Rewrite a vault costume zip with new DAT bytes (e.g. the Slippi fix) and
+    refresh its hash-index entry."""
+    temp_zip = zip_path.with_name(f"{zip_path.stem}_temp.zip")
+    with zipfile.ZipFile(zip_path, 'r') as source_zip:
+        with zipfile.ZipFile(temp_zip, 'w', zipfile.ZIP_DEFLATED) as dest_zip:
+            for item in source_zip.infolist():
+                if item.filename == dat_filename:
+                    dest_zip.writestr(item.filename, dat_bytes)
+                else:
+                    data = source_zip.read(item.filename)
+                    dest_zip.writestr(item, data)
+
+    zip_path.unlink()
+    temp_zip.rename(zip_path)
+    hash_index.record_vault_zip(zip_path, storage=STORAGE_PATH)
+
+
 @storage_costumes_bp.route('/api/mex/storage/costumes/retest-slippi', methods=['POST'])
 def retest_costume_slippi():
     """Retest a character costume for slippi safety and optionally apply fix"""
@@ -1389,20 +1519,7 @@ def retest_costume_slippi():
 
             if auto_fix and validation.get('fix_applied'):
                 with open(tmp_dat_path, 'rb') as f:
-                    fixed_dat_data = f.read()
-
-                temp_zip = char_folder / f"{skin_id}_temp.zip"
-                with zipfile.ZipFile(zip_path, 'r') as source_zip:
-                    with zipfile.ZipFile(temp_zip, 'w', zipfile.ZIP_DEFLATED) as dest_zip:
-                        for item in source_zip.infolist():
-                            if item.filename == dat_filename:
-                                dest_zip.writestr(item.filename, fixed_dat_data)
-                            else:
-                                data = source_zip.read(item.filename)
-                                dest_zip.writestr(item, data)
-
-                zip_path.unlink()
-                temp_zip.rename(zip_path)
+                    _replace_costume_dat(zip_path, dat_filename, f.read())
 
         finally:
             try:
@@ -1410,19 +1527,12 @@ def retest_costume_slippi():
             except:
                 pass
 
-        metadata = load_metadata()
-        if metadata is not None:
-            char_data = get_char_data(metadata, character)
-            if char_data is not None:
-                for skin in char_data.get('skins', []):
-                    if skin['id'] == skin_id:
-                        skin['slippi_safe'] = validation['slippi_safe']
-                        skin['slippi_tested'] = True
-                        skin['slippi_test_date'] = datetime.now().isoformat()
-                        skin['slippi_manual_override'] = None
-                        break
-
-                save_metadata(metadata)
+        with skin_transaction(character, skin_id) as skin:
+            if skin is not None:
+                skin['slippi_safe'] = validation['slippi_safe']
+                skin['slippi_tested'] = True
+                skin['slippi_test_date'] = datetime.now().isoformat()
+                skin['slippi_manual_override'] = None
 
         logger.info(f"[OK] Retested slippi for {character} - {skin_id}: {validation['slippi_safe']}")
         return jsonify({
@@ -1435,6 +1545,119 @@ def retest_costume_slippi():
         return jsonify({'success': False, 'error': str(e)}), 500
 
 
+# One bulk Slippi re-test at a time; it already saturates the validator pool.
+_batch_slippi_lock = threading.Lock()
+_batch_slippi_running = False
+
+
+@storage_costumes_bp.route('/api/mex/storage/costumes/retest-slippi-batch', methods=['POST'])
+def batch_retest_costume_slippi():
+    """Re-test many costumes for Slippi safety in one pooled validator pass
+    (dat_processor.validate_many_for_slippi): identical DATs are validated once
+    and previously seen DATs come straight from the verdict cache.
+
+    Body: {character?, skinIds?, autoFix?}. No character = every vault character;
+    no skinIds = every costume of the character(s). Streams over socket.io:
+    `slippi_retest_item` per costume ({character, skinId, slippi_safe, done,
+    total}), then `slippi_retest_complete` ({total, safe, fixed, failed});
+    `slippi_retest_error` on a fatal error. Returns immediately."""
+    global _batch_slippi_running
+
+    data = request.json or {}
+    only_character = data.get('character')
+    only_ids = set(data.get('skinIds') or [])
+    auto_fix = bool(data.get('autoFix', False))
+
+    metadata = load_metadata() or {}
+    characters = metadata.get('characters', {})
+    if only_character:
+        characters = {only_character: characters.get(only_character, {})}
+    jobs = [(character, skin['id'])
+            for character, char_data in characters.items()
+            for skin in (char_data or {}).get('skins', [])
+            if skin.get('type') != 'folder' and (not only_ids or skin['id'] in only_ids)]
+    if not jobs:
+        return jsonify({'success': False, 'error': 'No costumes to re-test'}), 400
+
+    with _batch_slippi_lock:
+        if _batch_slippi_running:
+            return jsonify({'success': False,
+                            'error': 'A bulk Slippi re-test is already running.'}), 409
+        _batch_slippi_running = True
+
+    def run():
+        global _batch_slippi_running
+        from core.state import get_socketio
+        from dat_processor import validate_many_for_slippi
+        socketio = get_socketio()
+        total = len(jobs)
+        try:
+            with tempfile.TemporaryDirectory(prefix='slippi_batch_') as tmp:
+                # Pull every costume's DAT out of its zip first...
+                staged = []     # (character, skin_id, zip_path, dat_filename, dat_path)
+                failed = 0
+                for n, (character, skin_id) in enumerate(jobs):
+                    zip_path = STORAGE_PATH / character / f"{skin_id}.zip"
+                    try:
+                        with zipfile.ZipFile(zip_path, 'r') as zf:
+                            dat_filename = find_costume_archive_name(zf.namelist())
+                            if not dat_filename:
+                                raise ValueError('No costume archive found in costume ZIP')
+                            dat_path = Path(tmp) / f"{n}.dat"
+                            dat_path.write_bytes(zf.read(dat_filename))
+                        staged.append((character, skin_id, zip_path, dat_filename, dat_path))
+                    except Exception as e:  # noqa: BLE001 - one bad costume mustn't stop the batch
+                        failed += 1
+                        logger.warning(f"Slippi batch: {character}/{skin_id} skipped: {e}")
+
+                # ...then validate them all in one pooled pass.
+                done = [failed]
+                done_lock = threading.Lock()
+
+                def on_result(i, validation):
+                    character, skin_id = staged[i][:2]
+                    with done_lock:
+                        done[0] += 1
+                        n = done[0]
+                    socketio.emit('slippi_retest_item', {
+                        'character': character, 'skinId': skin_id,
+                        'slippi_safe': validation['slippi_safe'], 'done': n, 'total': total})
+
+                results = validate_many_for_slippi([s[4] for s in staged], auto_fix=auto_fix,
+                                                   on_result=on_result)
+
+                fixed = 0
+                verdicts = {}
+                for (character, skin_id, zip_path, dat_filename, dat_path), validation in zip(staged, results):
+                    if auto_fix and validation.get('fix_applied'):
+                        _replace_costume_dat(zip_path, dat_filename, dat_path.read_bytes())
+                        fixed += 1
+                    verdicts.setdefault(character, {})[skin_id] = validation['slippi_safe']
+
+            tested_at = datetime.now().isoformat()
+            for character, by_id in verdicts.items():
+                with skins_transaction(character) as skins:
+                    for skin in skins or []:
+                        if skin.get('id') in by_id:
+                            skin['slippi_safe'] = by_id[skin['id']]
+                            skin['slippi_tested'] = True
+                            skin['slippi_test_date'] = tested_at
+                            skin['slippi_manual_override'] = None
+
+            safe = sum(v for by_id in verdicts.values() for v in by_id.values())
+            socketio.emit('slippi_retest_complete',
+                          {'total': total, 'safe': safe, 'fixed': fixed, 'failed': failed})
+            logger.info(f"[OK] Batch Slippi re-test: {safe}/{total} safe, {fixed} fixed, {failed} failed")
+        except Exception as e:
+            logger.error(f"Batch Slippi re-test error: {e}", exc_info=True)
+            socketio.emit('slippi_retest_error', {'error': str(e)})
+        finally:
+            _batch_slippi_running = False
+
+    threading.Thread(target=run, daemon=True).start()
+    return jsonify({'success': True, 'message': f'Re-testing {len(jobs)} costume(s)'})
+
+
 @storage_costumes_bp.route('/api/mex/storage/costumes/override-slippi', methods=['POST'])
 def override_costume_slippi():
     """Manually override slippi safety status for a character costume"""
@@ -1447,27 +1670,17 @@ def override_costume_slippi():
         if not character or not skin_id or slippi_safe is None:
             return jsonify({'success': False, 'error': 'Missing character, skinId, or slippiSafe parameter'}), 400
 
-        metadata = load_metadata()
-        if metadata is None:
-            return jsonify({'success': False, 'error': 'Metadata file not found'}), 404
+        with skins_transaction(character) as skins:
+            if skins is None:
+                return jsonify({'success': False, 'error': f'Character {character} not found in metadata'}), 404
 
-        char_data = get_char_data(metadata, character)
-        if char_data is None:
-            return jsonify({'success': False, 'error': f'Character {character} not found in metadata'}), 404
+            skin = next((s for s in skins if s['id'] == skin_id), None)
+            if skin is None:
+                return jsonify({'success': False, 'error': f'Skin {skin_id} not found for {character}'}), 404
 
-        skin_found = False
-        for skin in char_data.get('skins', []):
-            if skin['id'] == skin_id:
-                skin['slippi_safe'] = slippi_safe
-                skin['slippi_manual_override'] = True
-                skin['slippi_test_date'] = datetime.now().isoformat()
-                skin_found = True
-                break
-
-        if not skin_found:
-            return jsonify({'success': False, 'error': f'Skin {skin_id} not found for {character}'}), 404
-
-        save_metadata(metadata)
+            skin['slippi_safe'] = slippi_safe
+            skin['slippi_manual_override'] = True
+            skin['slippi_test_date'] = datetime.now().isoformat()
 
         logger.info(f"[OK] Manually set slippi status for {character} - {skin_id}: {slippi_safe}")
         return jsonify({
@@ -1492,33 +1705,25 @@ def reorder_costumes():
         if character is None or from_index is None or to_index is None:
             return jsonify({'success': False, 'error': 'Missing character, fromIndex, or toIndex parameter'}), 400
 
-        metadata = load_metadata()
-        if metadata is None:
-            return jsonify({'success': False, 'error': 'Metadata file not found'}), 404
-
-        if character not in metadata.get('characters', {}):
-            return jsonify({'success': False, 'error': f'Character {character} not found in metadata'}), 404
-
-        character_data = metadata['characters'][character]
-        skins = character_data.get('skins', [])
-
-        if from_index < 0 or from_index >= len(skins) or to_index < 0 or to_index >= len(skins):
-            return jsonify({'success': False, 'error': 'Invalid fromIndex or toIndex'}), 400
+        with skins_transaction(character) as skins:
+            if skins is None:
+                return jsonify({'success': False, 'error': f'Character {character} not found in metadata'}), 404
 
-        item = skins.pop(from_index)
-        skins.insert(to_index, item)
+            if from_index < 0 or from_index >= len(skins) or to_index < 0 or to_index >= len(skins):
+                return jsonify({'success': False, 'error': 'Invalid fromIndex or toIndex'}), 400
 
-        if item.get('type') != 'folder':
-            new_folder_id = get_folder_id_at_position(skins, to_index)
-            if new_folder_id:
-                item['folder_id'] = new_folder_id
-            elif 'folder_id' in item:
-                del item['folder_id']
+            item = skins.pop(from_index)
+            skins.insert(to_index, item)
 
-        save_metadata(metadata)
+            if item.get('type') != 'folder':
+                new_folder_id = get_folder_id_at_position(skins, to_index)
+                if new_folder_id:
+                    item['folder_id'] = new_folder_id
+                elif 'folder_id' in item:
+                    del item['folder_id']
 
-        logger.info(f"[OK] Reordered {character} skins: moved index {from_index} to {to_index}")
-        return jsonify({'success': True, 'skins': skins})
+            logger.info(f"[OK] Reordered {character} skins: moved index {from_index} to {to_index}")
+            return jsonify({'success': True, 'skins': skins})
     except Exception as e:
         logger.error(f"Reorder costumes error: {str(e)}", exc_info=True)
         return jsonify({'success': False, 'error': str(e)}), 500
@@ -1535,32 +1740,25 @@ def move_costume_to_top():
         if not character or not skin_id:
             return jsonify({'success': False, 'error': 'Missing character or skinId parameter'}), 400
 
-        metadata = load_metadata()
-        if metadata is None:
-            return jsonify({'success': False, 'error': 'Metadata file not found'}), 404
+        with skins_transaction(character) as skins:
+            if skins is None:
+                return jsonify({'success': False, 'error': f'Character {character} not found in metadata'}), 404
 
-        if character not in metadata.get('characters', {}):
-            return jsonify({'success': False, 'error': f'Character {character} not found in metadata'}), 404
-
-        character_data = metadata['characters'][character]
-        skins = character_data.get('skins', [])
-
-        skin_index = None
-        for i, skin in enumerate(skins):
-            if skin['id'] == skin_id:
-                skin_index = i
-                break
+            skin_index = None
+            for i, skin in enumerate(skins):
+                if skin['id'] == skin_id:
+                    skin_index = i
+                    break
 
-        if skin_index is None:
-            return jsonify({'success': False, 'error': f'Skin {skin_id} not found'}), 404
+            if skin_index is None:
+                return jsonify({'success': False, 'error': f'Skin {skin_id} not found'}), 404
 
-        if skin_index > 0:
-            skin = skins.pop(skin_index)
-            skins.insert(0, skin)
-            save_metadata(metadata)
-            logger.info(f"[OK] Moved {character} skin {skin_id} to top")
+            if skin_index > 0:
+                skin = skins.pop(skin_index)
+                skins.insert(0, skin)
+                logger.info(f"[OK] Moved {character} skin {skin_id} to top")
 
-        return jsonify({'success': True, 'skins': skins})
+            return jsonify({'success': True, 'skins': skins})
     except Exception as e:
         logger.error(f"Move costume to top error: {str(e)}", exc_info=True)
         return jsonify({'success': False, 'error': str(e)}), 500
@@ -1577,32 +1775,25 @@ def move_costume_to_bottom():
         if not character or not skin_id:
             return jsonify({'success': False, 'error': 'Missing character or skinId parameter'}), 400
 
-        metadata = load_metadata()
-        if metadata is None:
-            return jsonify({'success': False, 'error': 'Metadata file not found'}), 404
-
-        if character not in metadata.get('characters', {}):
-            return jsonify({'success': False, 'error': f'Character {character} not found in metadata'}), 404
-
-        character_data = metadata['characters'][character]
-        skins = character_data.get('skins', [])
+        with skins_transaction(character) as skins:
+            if skins is None:
+                return jsonify({'success': False, 'error': f'Character {character} not found in metadata'}), 404
 
-        skin_index = None
-        for i, skin in enumerate(skins):
-            if skin['id'] == skin_id:
-                skin_index = i
-                break
+            skin_index = None
+            for i, skin in enumerate(skins):
+                if skin['id'] == skin_id:
+                    skin_index = i
+                    break
 
-        if skin_index is None:
-            return jsonify({'success': False, 'error': f'Skin {skin_id} not found'}), 404
+            if skin_index is None:
+                return jsonify({'success': False, 'error': f'Skin {skin_id} not found'}), 404
 
-        if skin_index < len(skins) - 1:
-            skin = skins.pop(skin_index)
-            skins.append(skin)
-            save_metadata(metadata)
-            logger.info(f"[OK] Moved {character} skin {skin_id} to bottom")
+            if skin_index < len(skins) - 1:
+                skin = skins.pop(skin_index)
+                skins.append(skin)
+                logger.info(f"[OK] Moved {character} skin {skin_id} to bottom")
 
-        return jsonify({'success': True, 'skins': skins})
+            return jsonify({'success': True, 'skins': skins})
     except Exception as e:
         logger.error(f"Move costume to bottom error: {str(e)}", exc_info=True)
         return jsonify({'success': False, 'error': str(e)}), 500
@@ -1622,18 +1813,11 @@ def create_folder():
             return jsonify({'success': False, 'error': 'Missing character parameter'}), 400
 
         STORAGE_PATH.mkdir(parents=True, exist_ok=True)
-        metadata = load_metadata(default={'characters': {}})
-
-        characters = metadata.setdefault('characters', {})
-        character_data = characters.setdefault(character, {})
-        skins = character_data.setdefault('skins', [])
-
         folder_id = f"folder_{uuid.uuid4().hex[:8]}"
         new_folder = {'type': 'folder', 'id': folder_id, 'name': name, 'expanded': True}
 
-        skins.append(new_folder)
-
-        save_metadata(metadata)
+        with skins_transaction(character, create=True) as skins:
+            skins.append(new_folder)
 
         logger.info(f"[OK] Created folder '{name}' for {character}")
         return jsonify({'success': True, 'folder': new_folder, 'skins': skins})
@@ -1654,26 +1838,18 @@ def rename_folder():
         if not character or not folder_id or not new_name:
             return jsonify({'success': False, 'error': 'Missing character, folderId, or newName parameter'}), 400
 
-        metadata = load_metadata()
-        if metadata is None:
-            return jsonify({'success': False, 'error': 'Metadata file not found'}), 404
-
-        if character not in metadata.get('characters', {}):
-            return jsonify({'success': False, 'error': f'Character {character} not found in metadata'}), 404
-
-        character_data = metadata['characters'][character]
-        skins = character_data.get('skins', [])
+        with skins_transaction(character) as skins:
+            if skins is None:
+                return jsonify({'success': False, 'error': f'Character {character} not found in metadata'}), 404
 
-        folder, idx = find_folder_in_skins(skins, folder_id)
-        if not folder:
-            return jsonify({'success': False, 'error': f'Folder {folder_id} not found'}), 404
-
-        folder['name'] = new_name
+            folder, idx = find_folder_in_skins(skins, folder_id)
+            if not folder:
+                return jsonify({'success': False, 'error': f'Folder {folder_id} not found'}), 404
 
-        save_metadata(metadata)
+            folder['name'] = new_name
 
-        logger.info(f"[OK] Renamed folder {folder_id} to '{new_name}'")
-        return jsonify({'success': True, 'skins': skins})
+            logger.info(f"[OK] Renamed folder {folder_id} to '{new_name}'")
+            return jsonify({'success': True, 'skins': skins})
     except Exception as e:
         logger.error(f"Rename folder error: {str(e)}", exc_info=True)
         return jsonify({'success': False, 'error': str(e)}), 500
@@ -1690,30 +1866,22 @@ def delete_folder():
         if not character or not folder_id:
             return jsonify({'success': False, 'error': 'Missing character or folderId parameter'}), 400
 
-        metadata = load_metadata()
-        if metadata is None:
-            return jsonify({'success': False, 'error': 'Metadata file not found'}), 404
-
-        if character not in metadata.get('characters', {}):
-            return jsonify({'success': False, 'error': f'Character {character} not found in metadata'}), 404
+        with skins_transaction(character) as skins:
+            if skins is None:
+                return jsonify({'success': False, 'error': f'Character {character} not found in metadata'}), 404
 
-        character_data = metadata['characters'][character]
-        skins = character_data.get('skins', [])
-
-        folder, folder_idx = find_folder_in_skins(skins, folder_id)
-        if not folder:
-            return jsonify({'success': False, 'error': f'Folder {folder_id} not found'}), 404
-
-        for skin in skins:
-            if skin.get('folder_id') == folder_id:
-                del skin['folder_id']
+            folder, folder_idx = find_folder_in_skins(skins, folder_id)
+            if not folder:
+                return jsonify({'success': False, 'error': f'Folder {folder_id} not found'}), 404
 
-        skins.pop(folder_idx)
+            for skin in skins:
+                if skin.get('folder_id') == folder_id:
+                    del skin['folder_id']
 
-        save_metadata(metadata)
+            skins.pop(folder_idx)
 
-        logger.info(f"[OK] Deleted folder {folder_id}")
-        return jsonify({'success': True, 'skins': skins})
+            logger.info(f"[OK] Deleted folder {folder_id}")
+            return jsonify({'success': True, 'skins': skins})
     except Exception as e:
         logger.error(f"Delete folder error: {str(e)}", exc_info=True)
         return jsonify({'success': False, 'error': str(e)}), 500
@@ -1730,26 +1898,18 @@ def toggle_folder():
         if not character or not folder_id:
             return jsonify({'success': False, 'error': 'Missing character or folderId parameter'}), 400
 
-        metadata = load_metadata()
-        if metadata is None:
-            return jsonify({'success': False, 'error': 'Metadata file not found'}), 404
+        with skins_transaction(character) as skins:
+            if skins is None:
+                return jsonify({'success': False, 'error': f'Character {character} not found in metadata'}), 404
 
-        if character not in metadata.get('characters', {}):
-            return jsonify({'success': False, 'error': f'Character {character} not found in metadata'}), 404
-
-        character_data = metadata['characters'][character]
-        skins = character_data.get('skins', [])
-
-        folder, idx = find_folder_in_skins(skins, folder_id)
-        if not folder:
-            return jsonify({'success': False, 'error': f'Folder {folder_id} not found'}), 404
-
-        folder['expanded'] = not folder.get('expanded', True)
+            folder, idx = find_folder_in_skins(skins, folder_id)
+            if not folder:
+                return jsonify({'success': False, 'error': f'Folder {folder_id} not found'}), 404
 
-        save_metadata(metadata)
+            folder['expanded'] = not folder.get('expanded', True)
 
-        logger.info(f"[OK] Toggled folder {folder_id} expanded: {folder['expanded']}")
-        return jsonify({'success': True, 'expanded': folder['expanded'], 'skins': skins})
+            logger.info(f"[OK] Toggled folder {folder_id} expanded: {folder['expanded']}")
+            return jsonify({'success': True, 'expanded': folder['expanded'], 'skins': skins})
     except Exception as e:
         logger.error(f"Toggle folder error: {str(e)}", exc_info=True)
         return jsonify({'success': False, 'error': str(e)}), 500
@@ -1767,39 +1927,31 @@ def set_skin_folder():
         if not character or not skin_id:
             return jsonify({'success': False, 'error': 'Missing character or skinId parameter'}), 400
 
-        metadata = load_metadata()
-        if metadata is None:
-            return jsonify({'success': False, 'error': 'Metadata file not found'}), 404
-
-        if character not in metadata.get('characters', {}):
-            return jsonify({'success': False, 'error': f'Character {character} not found in metadata'}), 404
-
-        character_data = metadata['characters'][character]
-        skins = character_data.get('skins', [])
-
-        skin = None
-        for s in skins:
-            if s.get('id') == skin_id and s.get('type') != 'folder':
-                skin = s
-                break
+        with skins_transaction(character) as skins:
+            if skins is None:
+                return jsonify({'success': False, 'error': f'Character {character} not found in metadata'}), 404
 
-        if not skin:
-            return jsonify({'success': False, 'error': f'Skin {skin_id} not found'}), 404
+            skin = None
+            for s in skins:
+                if s.get('id') == skin_id and s.get('type') != 'folder':
+                    skin = s
+                    break
 
-        if folder_id:
-            folder, _ = find_folder_in_skins(skins, folder_id)
-            if not folder:
-                return jsonify({'success': False, 'error': f'Folder {folder_id} not found'}), 404
+            if not skin:
+                return jsonify({'success': False, 'error': f'Skin {skin_id} not found'}), 404
 
-        if folder_id:
-            skin['folder_id'] = folder_id
-        elif 'folder_id' in skin:
-            del skin['folder_id']
+            if folder_id:
+                folder, _ = find_folder_in_skins(skins, folder_id)
+                if not folder:
+                    return jsonify({'success': False, 'error': f'Folder {folder_id} not found'}), 404
 
-        save_metadata(metadata)
+            if folder_id:
+                skin['folder_id'] = folder_id
+            elif 'folder_id' in skin:
+                del skin['folder_id']
 
-        logger.info(f"[OK] Set skin {skin_id} folder to {folder_id}")
-        return jsonify({'success': True, 'skins': skins})
+            logger.info(f"[OK] Set skin {skin_id} folder to {folder_id}")
+            return jsonify({'success': True, 'skins': skins})
     except Exception as e:
         logger.error(f"Set skin folder error: {str(e)}", exc_info=True)
         return jsonify({'success': False, 'error': str(e)}), 500
@@ -2157,6 +2309,9 @@ def convert_animelee():
         idx = next((i for i, s in enumerate(skins) if s.get('id') == skin_id), len(skins) - 1)
         skins.insert(idx + 1, new_skin)
         save_metadata(metadata)
+        hash_index.record_vault_zip(new_zip, dat_hash=new_skin['dat_hash'],
+                                    inner_hash=new_skin['dat_hash'],
+                                    storage=STORAGE_PATH)
 
         logger.info(f"[OK] Animelee convert ({mode}): {character}/{skin_id} -> {new_id} "
                     f"({changed} DObjs)")
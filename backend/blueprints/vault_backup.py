@@ -2,6 +2,16 @@
 Vault Backup Blueprint - Backup and restore operations.
 
 Handles creating backups of the storage vault and restoring from backups.
+
+Backups are incremental snapshots in a content-addressed store
+(core.backup_store, under output/vault_backups/store): only files changed since
+the last snapshot are read, and only new content is written. The downloadable
+zip is exported from the snapshot, and any kept snapshot can be restored
+directly (replace or merge) without a zip round-trip.
+
+Backups and restores both run as background jobs that report over socketio
+(vault_backup_* / vault_restore_*), and both spread the compression/extraction
+work over core.backup_store.BACKUP_WORKERS threads.
 """
 
 import os
@@ -13,11 +23,16 @@ import zipfile
 import tempfile
 import logging
 import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
 from flask import Blueprint, request, jsonify, send_file, after_this_request
 
+from core import hash_index
+from core import backup_store
+from core.backup_store import BackupStore, SnapshotNotFound
 from core.config import PROJECT_ROOT, STORAGE_PATH, LOGS_PATH
+from core.metadata import flush_mirror
 from core.state import get_socketio
 
 logger = logging.getLogger(__name__)
@@ -25,35 +40,105 @@ logger = logging.getLogger(__name__)
 vault_backup_bp = Blueprint('vault_backup', __name__)
 
 
-def _emit_restore(restore_id, event, **payload):
-    """Emit a vault-restore socketio event (no-op if socketio isn't wired)."""
+def _emit(event, payload):
+    """Emit a socketio event (no-op if socketio isn't wired)."""
     socketio = get_socketio()
     if socketio is None:
         return
     try:
-        socketio.emit(event, {'restore_id': restore_id, **payload})
+        socketio.emit(event, payload)
     except Exception as e:
-        logger.debug(f"restore emit failed: {e}")
+        logger.debug(f"{event} emit failed: {e}")
+
+
+def _emit_restore(restore_id, event, **payload):
+    """Emit a vault-restore socketio event."""
+    _emit(event, {'restore_id': restore_id, **payload})
+
+
+def _emit_backup(backup_id, event, **payload):
+    """Emit a vault-backup socketio event."""
+    _emit(event, {'backup_id': backup_id, **payload})
+
+
+def _escaping_member(zipf, dest):
+    """The first member of ``zipf`` that would extract outside ``dest``, or
+    None. Checked before a replace restore clears the vault, so a crafted
+    backup is refused while the current vault is still intact."""
+    root = Path(dest).resolve()
+    for info in zipf.infolist():
+        target = (root / info.filename).resolve()
+        if target != root and root not in target.parents:
+            return info.filename
+    return None
 
 
 def _extract_zip_with_progress(zipf, dest, restore_id, lo, hi,
-                               skip=(), phase='Extracting files'):
+                               skip=None, phase='Extracting files'):
     """Extract every member of an open ZipFile into ``dest``, emitting
     ``vault_restore_progress`` percentages mapped onto the [lo, hi] band. Members
-    in ``skip`` (posix relative paths) are not written. Returns the temp/extract
-    root used so callers can post-process."""
-    members = [m for m in zipf.namelist() if m not in skip]
-    total = len(members) or 1
+    for which ``skip(posix relative path)`` is true are not written.
+
+    Members are inflated on a thread pool, each thread reading through its own
+    handle on the zip file. Names that would land outside ``dest`` are refused."""
+    dest = Path(dest)
+    root = dest.resolve()
+    jobs = []
+    for info in zipf.infolist():
+        if skip and skip(info.filename):
+            continue
+        target = (dest / info.filename).resolve()
+        if target != root and root not in target.parents:
+            raise ValueError(f"Backup entry escapes the vault: {info.filename}")
+        if info.is_dir():
+            target.mkdir(parents=True, exist_ok=True)
+        else:
+            jobs.append((info, target))
+    total = len(jobs) or 1
+
+    local = threading.local()
+    handles = []
+    handles_lock = threading.Lock()
+
+    def handle():
+        # A ZipFile's position is shared state; give each worker its own.
+        if zipf.filename is None:
+            return zipf
+        zf = getattr(local, 'zf', None)
+        if zf is None:
+            zf = local.zf = zipfile.ZipFile(zipf.filename, 'r')
+            with handles_lock:
+                handles.append(zf)
+        return zf
+
+    def extract(info, target):
+        target.parent.mkdir(parents=True, exist_ok=True)
+        with handle().open(info) as src, open(target, 'wb') as out:
+            shutil.copyfileobj(src, out, 1 << 20)
+
+    workers = backup_store.BACKUP_WORKERS if zipf.filename is not None else 1
     last_pct = -1
-    for i, member in enumerate(members, 1):
-        zipf.extract(member, dest)
-        pct = lo + int((i / total) * (hi - lo))
-        # Throttle: only emit when the integer percent advances.
-        if pct != last_pct:
-            last_pct = pct
-            _emit_restore(restore_id, 'vault_restore_progress',
-                          percentage=pct,
-                          message=f'{phase}… ({i}/{total})')
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, min(workers, len(jobs))),
+                                thread_name_prefix='vault-extract') as pool:
+            futures = [pool.submit(extract, info, target) for info, target in jobs]
+            try:
+                for i, fut in enumerate(futures, 1):
+                    fut.result()
+                    pct = lo + int((i / total) * (hi - lo))
+                    # Throttle: only emit when the integer percent advances.
+                    if pct != last_pct:
+                        last_pct = pct
+                        _emit_restore(restore_id, 'vault_restore_progress',
+                                      percentage=pct,
+                                      message=f'{phase}… ({i}/{total})')
+            except BaseException:
+                for fut in futures:
+                    fut.cancel()
+                raise
+    finally:
+        for zf in handles:
+            zf.close()
 
 
 # vault.db (+ WAL sidecars) is a rebuildable local cache of metadata.json, not a
@@ -61,6 +146,50 @@ def _extract_zip_with_progress(zipf, dest, restore_id, lo, hi,
 # state. Backups exclude it; restores rebuild it from the restored metadata.json
 # (which dual-write keeps current). See docs/VAULT_SQLITE_MIGRATION.md.
 _DB_ARTIFACTS = {'vault.db', 'vault.db-wal', 'vault.db-shm'}
+# Same for the ISO-scan hash index (core.hash_index): a per-machine cache keyed
+# by local mtimes, rebuilt on the next scan.
+_CACHE_ARTIFACTS = {'hash_index.json'}
+# Rebuildable cache folders kept inside the vault (derived data, refilled on
+# demand), left out of backups, snapshots and restores wholesale: Slippi
+# validator verdicts (services/slippi_cache), decoded textures / HSL stats
+# (skinlab.texture_cache) and extras DAT offsets (blueprints.extras.helpers).
+_CACHE_DIRS = {'_slippi_cache', '_texture_cache', '_extras_offsets'}
+# Compiled arrays next to model-lab SMDs, rebuilt from the SMD they sit beside:
+# rig kits (modellab.rigkit_cache) and SMD sidecars (modellab.smd).
+_CACHE_SUFFIXES = ('/rigkit.npz', '.smd.npz')
+
+
+def _is_local_cache(rel):
+    """True for a vault-relative posix path that backups leave out."""
+    return (rel in _DB_ARTIFACTS or rel in _CACHE_ARTIFACTS
+            or rel.split('/', 1)[0] in _CACHE_DIRS
+            or rel.endswith(_CACHE_SUFFIXES))
+
+
+# Snapshots kept in the backup store; older ones (and content only they
+# reference) are pruned after each backup.
+_keep_env = os.environ.get('MEX_BACKUP_KEEP', '')
+BACKUP_KEEP = max(1, int(_keep_env)) if _keep_env.isdigit() else 10
+
+
+def _backup_store():
+    return BackupStore(PROJECT_ROOT / "output" / "vault_backups" / "store")
+
+
+def _restore_snapshot_with_progress(snapshot_id, dest, restore_id, lo, hi,
+                                    skip=None, phase='Extracting files'):
+    """BackupStore.restore counterpart of _extract_zip_with_progress."""
+    last_pct = [-1]
+
+    def progress(i, total):
+        pct = lo + int((i / max(1, total)) * (hi - lo))
+        if pct != last_pct[0]:
+            last_pct[0] = pct
+            _emit_restore(restore_id, 'vault_restore_progress',
+                          percentage=pct, message=f'{phase}… ({i}/{total})')
+
+    _backup_store().restore(snapshot_id, dest, skip=skip,
+                            progress=progress)
 
 
 def _sync_db_after_restore():
@@ -84,47 +213,140 @@ def get_storage_stats():
     return jsonify({'success': True, 'stats': {'storage': total}})
 
 
-@vault_backup_bp.route('/api/mex/storage/backup', methods=['POST'])
-def backup_vault():
-    """Create a backup ZIP of the entire storage vault"""
+@vault_backup_bp.route('/api/mex/storage/hd-csp-cache', methods=['GET'])
+def get_hd_csp_cache_stats():
+    """HD CSP render cache size, budget, pinned share and hit/miss counters."""
+    from skinlab import hd_csp_cache
     try:
-        logger.info("=== VAULT BACKUP REQUEST ===")
+        return jsonify({'success': True, 'stats': hd_csp_cache.cache_stats()})
+    except Exception as e:
+        logger.error(f"HD CSP cache stats error: {e}", exc_info=True)
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+@vault_backup_bp.route('/api/mex/storage/hd-csp-cache/prune', methods=['POST'])
+def prune_hd_csp_cache():
+    """Evict unpinned HD CSP renders down to the budget now.
+
+    Body (optional): { budgetMb } to prune to a smaller one-off budget.
+    """
+    from skinlab import hd_csp_cache
+    data = request.get_json(silent=True) or {}
+    budget = None
+    if data.get('budgetMb') is not None:
+        try:
+            budget = max(1, int(data['budgetMb'])) * 1024 * 1024
+        except (TypeError, ValueError):
+            return jsonify({'success': False, 'error': 'budgetMb must be an integer'}), 400
+    try:
+        result = hd_csp_cache.enforce_budget(budget)
+        return jsonify({'success': True, **result,
+                        'stats': hd_csp_cache.cache_stats(include_pinned=False)})
+    except Exception as e:
+        logger.error(f"HD CSP cache prune error: {e}", exc_info=True)
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+def run_vault_backup(backup_id, label=None, download=True):
+    """Background worker: snapshot the vault into the backup store and (when
+    ``download``) export that snapshot as a ZIP, emitting socketio progress.
+
+    Events (all carry ``backup_id``):
+      vault_backup_progress  {percentage, message}
+      vault_backup_complete  {snapshot, filename?, size?, path?}
+      vault_backup_error     {error}
+    """
+    snap_hi = 60 if download else 99
+    last_pct = [-1]
+
+    def progress(lo, hi, phase):
+        def report(i, total):
+            pct = lo + int((i / max(1, total)) * (hi - lo))
+            if pct != last_pct[0]:
+                last_pct[0] = pct
+                _emit_backup(backup_id, 'vault_backup_progress',
+                             percentage=pct, message=f'{phase}… ({i}/{total})')
+        return report
 
+    try:
+        _emit_backup(backup_id, 'vault_backup_progress',
+                     percentage=1, message='Scanning vault…')
         backups_dir = PROJECT_ROOT / "output" / "vault_backups"
         backups_dir.mkdir(parents=True, exist_ok=True)
 
-        timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-        backup_filename = f"vault_backup_{timestamp}.zip"
-        backup_path = backups_dir / backup_filename
-
-        logger.info(f"Creating backup: {backup_path}")
-
-        with zipfile.ZipFile(backup_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-            for root, dirs, files in os.walk(STORAGE_PATH):
-                for file in files:
-                    file_path = Path(root) / file
-                    arcname = file_path.relative_to(STORAGE_PATH)
-                    # Skip the rebuildable SQLite cache (see _DB_ARTIFACTS); the
-                    # dual-written metadata.json is the portable backup.
-                    if arcname.as_posix() in _DB_ARTIFACTS:
-                        continue
-                    zipf.write(file_path, arcname)
-
-        backup_size = backup_path.stat().st_size
-        logger.info(f"Backup created successfully: {backup_size} bytes")
+        # Skip the rebuildable caches (see _is_local_cache); the
+        # dual-written metadata.json is the portable backup, so write a
+        # deferred mirror first.
+        flush_mirror()
+        store = _backup_store()
+        manifest = store.create_snapshot(STORAGE_PATH,
+                                         exclude=_is_local_cache,
+                                         label=label,
+                                         progress=progress(2, snap_hi, 'Snapshotting files'))
+        store.prune(BACKUP_KEEP)
+        snapshot = {'id': manifest['id'], 'created_at': manifest['created_at'],
+                    **manifest['stats']}
+        result = {'snapshot': snapshot}
+
+        if download:
+            timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+            backup_filename = f"vault_backup_{timestamp}.zip"
+            backup_path = backups_dir / backup_filename
+            logger.info(f"Exporting snapshot {manifest['id']} to {backup_path}")
+            store.export_zip(manifest['id'], backup_path,
+                             progress=progress(snap_hi, 99, 'Compressing backup'))
+            result.update({'filename': backup_filename,
+                           'size': backup_path.stat().st_size,
+                           'path': str(backup_path)})
+
+        logger.info(f"Backup created successfully: snapshot {manifest['id']} "
+                    f"({snapshot['hashed']}/{snapshot['files']} files read, "
+                    f"{snapshot['stored_bytes']} new bytes stored)")
         logger.info("=== VAULT BACKUP COMPLETE ===")
+        _emit_backup(backup_id, 'vault_backup_complete', **result)
+    except Exception as e:
+        logger.error(f"Vault backup error: {str(e)}", exc_info=True)
+        _emit_backup(backup_id, 'vault_backup_error', error=str(e))
 
+
+@vault_backup_bp.route('/api/mex/storage/backup', methods=['POST'])
+def backup_vault():
+    """Start a vault backup in a background thread: snapshot into the backup
+    store and (by default) export that snapshot as a downloadable ZIP. Returns
+    a ``backup_id`` immediately; the client follows the
+    ``vault_backup_progress/complete/error`` socketio events.
+
+    Body (optional): { download: false } to only take the snapshot, { label }.
+    """
+    try:
+        logger.info("=== VAULT BACKUP REQUEST ===")
+        data = request.get_json(silent=True) or {}
+        backup_id = str(uuid.uuid4())[:8]
+        threading.Thread(
+            target=run_vault_backup,
+            args=(backup_id, data.get('label'), bool(data.get('download', True))),
+            daemon=True,
+        ).start()
         return jsonify({
             'success': True,
-            'filename': backup_filename,
-            'size': backup_size,
-            'path': str(backup_path)
+            'message': 'Vault backup started',
+            'backup_id': backup_id,
         })
     except Exception as e:
         logger.error(f"Vault backup error: {str(e)}", exc_info=True)
         return jsonify({'success': False, 'error': str(e)}), 500
 
 
+@vault_backup_bp.route('/api/mex/storage/backup/snapshots', methods=['GET'])
+def list_backup_snapshots():
+    """Snapshots in the backup store, newest first."""
+    try:
+        return jsonify({'success': True, 'snapshots': _backup_store().list_snapshots()})
+    except Exception as e:
+        logger.error(f"List snapshots error: {str(e)}", exc_info=True)
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
 @vault_backup_bp.route('/api/mex/storage/backup/download/<filename>', methods=['GET'])
 def download_backup(filename):
     """Download a backup file"""
@@ -310,8 +532,9 @@ def merge_plan(current, incoming):
     return {'added': added, 'kept': kept}, skip
 
 
-def _merge_restore(zip_path, restore_id=None):
-    """Restore a backup ZIP in *merge* mode: keep the current vault and add only
+def _merge_restore(zip_path, restore_id=None, snapshot_id=None):
+    """Restore a backup ZIP (or, with ``snapshot_id``, a backup-store snapshot)
+    in *merge* mode: keep the current vault and add only
     items it doesn't already have. The backup's ``metadata.json`` is deep-merged
     with the current one (never overwritten). Data files for items you ALREADY
     have are skipped ATOMICALLY -- the whole conflicting item is left untouched,
@@ -323,9 +546,15 @@ def _merge_restore(zip_path, restore_id=None):
     """
     with tempfile.TemporaryDirectory() as extract_dir:
         extract_root = Path(extract_dir)
-        with zipfile.ZipFile(zip_path, 'r') as zipf:
-            _extract_zip_with_progress(zipf, extract_root, restore_id, 5, 50,
-                                       phase='Reading backup')
+        if snapshot_id:
+            _restore_snapshot_with_progress(snapshot_id, extract_root, restore_id,
+                                            5, 50, skip=_is_local_cache,
+                                            phase='Reading backup')
+        else:
+            with zipfile.ZipFile(zip_path, 'r') as zipf:
+                _extract_zip_with_progress(zipf, extract_root, restore_id, 5, 50,
+                                           skip=_is_local_cache,
+                                           phase='Reading backup')
 
         # Merge metadata.json rather than letting extractall overwrite it.
         incoming_meta = {}
@@ -351,7 +580,7 @@ def _merge_restore(zip_path, restore_id=None):
         files = [s for s in extract_root.rglob('*')
                  if s.is_file()
                  and s.relative_to(extract_root).as_posix() != 'metadata.json'
-                 and s.relative_to(extract_root).as_posix() not in _DB_ARTIFACTS]
+                 and not _is_local_cache(s.relative_to(extract_root).as_posix())]
         total = len(files) or 1
         copied = 0
         last_pct = -1
@@ -380,12 +609,14 @@ def _merge_restore(zip_path, restore_id=None):
 
         # Rebuild the SQLite cache from the merged metadata.json (DB mode only).
         _sync_db_after_restore()
+        hash_index.invalidate(STORAGE_PATH)
 
         return stats, report
 
 
-def run_vault_restore(restore_id, tmp_path, restore_mode):
-    """Background worker: restore a backup ZIP, emitting socketio progress.
+def run_vault_restore(restore_id, tmp_path, restore_mode, snapshot_id=None):
+    """Background worker: restore a backup ZIP (or the backup-store snapshot
+    ``snapshot_id``, when given), emitting socketio progress.
 
     Events (all carry ``restore_id``):
       vault_restore_progress  {percentage, message}
@@ -393,15 +624,18 @@ def run_vault_restore(restore_id, tmp_path, restore_mode):
       vault_restore_error     {error}
     The uploaded temp ZIP is deleted when finished.
     """
-    tmp_path = Path(tmp_path)
+    tmp_path = Path(tmp_path) if tmp_path else None
     try:
+        # a deferred DB mirror must not land on top of the restored metadata.json
+        flush_mirror()
         _emit_restore(restore_id, 'vault_restore_progress',
                       percentage=2, message='Reading backup…')
         logger.info(f"Restore mode: {restore_mode}")
 
         if restore_mode == 'merge':
             logger.info("Merging backup into existing vault...")
-            stats, report = _merge_restore(tmp_path, restore_id=restore_id)
+            stats, report = _merge_restore(tmp_path, restore_id=restore_id,
+                                           snapshot_id=snapshot_id)
             added = sum(stats.values())
             kept = sum(len(v) for v in report['kept'].values())
             logger.info(f"Merge added {added} new item(s), kept {kept} conflict(s): {stats}")
@@ -421,7 +655,12 @@ def run_vault_restore(restore_id, tmp_path, restore_mode):
                           added=stats, report=report)
             return
 
-        # Replace mode.
+        # Replace mode. Refuse a bad backup before anything is deleted.
+        if not snapshot_id:
+            with zipfile.ZipFile(tmp_path, 'r') as zipf:
+                bad = _escaping_member(zipf, STORAGE_PATH)
+            if bad:
+                raise ValueError(f"Backup entry escapes the vault: {bad}")
         _emit_restore(restore_id, 'vault_restore_progress',
                       percentage=3, message='Clearing current vault…')
         logger.info("Clearing existing storage...")
@@ -430,12 +669,19 @@ def run_vault_restore(restore_id, tmp_path, restore_mode):
         STORAGE_PATH.mkdir(parents=True, exist_ok=True)
 
         logger.info("Extracting backup...")
-        with zipfile.ZipFile(tmp_path, 'r') as zipf:
-            _extract_zip_with_progress(zipf, STORAGE_PATH, restore_id, 5, 99,
-                                       skip=_DB_ARTIFACTS, phase='Restoring files')
+        if snapshot_id:
+            _restore_snapshot_with_progress(snapshot_id, STORAGE_PATH, restore_id,
+                                            5, 99, skip=_is_local_cache,
+                                            phase='Restoring files')
+        else:
+            with zipfile.ZipFile(tmp_path, 'r') as zipf:
+                _extract_zip_with_progress(zipf, STORAGE_PATH, restore_id, 5, 99,
+                                           skip=_is_local_cache,
+                                           phase='Restoring files')
 
         # Rebuild the SQLite cache from the restored metadata.json (DB mode only).
         _sync_db_after_restore()
+        hash_index.invalidate(STORAGE_PATH)
 
         logger.info("=== VAULT RESTORE COMPLETE ===")
         _emit_restore(restore_id, 'vault_restore_complete',
@@ -446,7 +692,7 @@ def run_vault_restore(restore_id, tmp_path, restore_mode):
         _emit_restore(restore_id, 'vault_restore_error', error=str(e))
     finally:
         try:
-            if tmp_path.exists():
+            if tmp_path and tmp_path.exists():
                 tmp_path.unlink()
         except OSError:
             pass
@@ -486,8 +732,11 @@ def restore_vault():
         validation_error = None
         try:
             with zipfile.ZipFile(tmp_path, 'r') as zipf:
+                bad = _escaping_member(zipf, STORAGE_PATH)
                 if 'metadata.json' not in zipf.namelist():
                     validation_error = 'Invalid backup file: metadata.json not found'
+                elif bad:
+                    validation_error = f'Invalid backup file: entry escapes the vault: {bad}'
         except zipfile.BadZipFile:
             validation_error = 'Invalid backup file: not a valid ZIP'
         if validation_error:
@@ -512,6 +761,47 @@ def restore_vault():
         return jsonify({'success': False, 'error': str(e)}), 500
 
 
+@vault_backup_bp.route('/api/mex/storage/restore/snapshot', methods=['POST'])
+def restore_vault_snapshot():
+    """Restore a snapshot from the backup store (no upload). Same background
+    worker and socketio events as /api/mex/storage/restore.
+
+    Body: { snapshotId, mode: 'replace' | 'merge' }
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        snapshot_id = data.get('snapshotId')
+        restore_mode = data.get('mode', 'replace')
+        if not snapshot_id:
+            return jsonify({'success': False, 'error': 'snapshotId is required'}), 400
+        try:
+            manifest = _backup_store().load_manifest(snapshot_id)
+        except SnapshotNotFound as e:
+            return jsonify({'success': False, 'error': str(e)}), 404
+        if 'metadata.json' not in manifest['files']:
+            return jsonify({'success': False,
+                            'error': 'Invalid snapshot: metadata.json not found'}), 400
+
+        logger.info(f"=== VAULT RESTORE REQUEST (snapshot {snapshot_id}) ===")
+        restore_id = str(uuid.uuid4())[:8]
+        threading.Thread(
+            target=run_vault_restore,
+            args=(restore_id, None, restore_mode),
+            kwargs={'snapshot_id': manifest['id']},
+            daemon=True,
+        ).start()
+
+        return jsonify({
+            'success': True,
+            'message': 'Vault restore started',
+            'restore_id': restore_id,
+            'mode': restore_mode,
+        })
+    except Exception as e:
+        logger.error(f"Vault restore error: {str(e)}", exc_info=True)
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
 @vault_backup_bp.route('/api/mex/storage/clear', methods=['POST'])
 def clear_storage():
     """Clear storage based on provided options."""
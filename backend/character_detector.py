@@ -23,6 +23,7 @@ import sys
 import os
 import re
 import hashlib
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Optional, Dict, Tuple, List
 import zipfile
@@ -225,6 +226,93 @@ def read_7z_member(archive, member):
         return p.read_bytes() if p.exists() else None
 
 
+def read_7z_members(archive, members):
+    """Read several members in one extract pass; returns {member: bytes}.
+
+    Solid 7z archives decompress from the start for every extract() call, so
+    pulling N DATs one read_7z_member() at a time costs N passes.
+    """
+    import tempfile
+    archive.reset()
+    with tempfile.TemporaryDirectory(prefix='7z_members_') as tmp:
+        archive.extract(path=tmp, targets=list(members))
+        out = {}
+        for member in members:
+            p = Path(tmp) / member
+            if p.is_file():
+                out[member] = p.read_bytes()
+        return out
+
+
+def _detect_parallelism() -> int:
+    """Pick a worker count for parsing archive DATs.
+
+    Zip inflate and md5 release the GIL and DATParser only walks the root
+    node table, so threads are enough; a process pool would spend more
+    pickling the DAT bytes than parsing them. Defaults to the logical CPU
+    count clamped to [1, 8]; overridable via MEX_DETECT_PARALLELISM.
+    """
+    env = os.environ.get('MEX_DETECT_PARALLELISM')
+    if env and env.isdigit():
+        return max(1, min(int(env), 32))
+    cpus = os.cpu_count() or 2
+    return max(1, min(cpus, 8))
+
+
+DETECT_PARALLELISM = _detect_parallelism()
+
+
+def map_dats(fn, members):
+    """Run fn(member) for each archive member on the detect pool.
+
+    Results come back in `members` order so detection stays deterministic.
+    Exceptions propagate to the caller like they would from a plain loop.
+    """
+    members = list(members)
+    if DETECT_PARALLELISM <= 1 or len(members) <= 1:
+        return [fn(m) for m in members]
+    with ThreadPoolExecutor(max_workers=min(DETECT_PARALLELISM, len(members)),
+                            thread_name_prefix='dat-detect') as pool:
+        return list(pool.map(fn, members))
+
+
+def _parse_costume_dat(dat_filename, dat_bytes):
+    """Pass 1 for one DAT: parse it in memory and return its detection
+    record, or None if it is not a character costume (no character or no
+    Ply joint symbols)."""
+    if not dat_bytes:
+        return None
+    parser = DATParser(dat_bytes)
+    parser.read_dat()
+
+    character, symbol = parser.detect_character()
+    if not character:
+        return None
+
+    # Only include costume DATs (must have Ply symbols)
+    has_ply_symbol = any('Ply' in node['symbol'] for node in parser.root_nodes)
+    if not has_ply_symbol:
+        return None
+
+    color_info = parser.detect_costume_color()
+    costume_code = parser.get_character_filename()
+    is_nana = 'PlNn' in (costume_code or '')
+
+    # Normalize Ice Climbers character name
+    if character in ('Ice Climbers (Nana)', 'Ice Climbers (Popo)'):
+        character = 'Ice Climbers'
+
+    return {
+        'character': character,
+        'color': color_info if color_info else 'Custom',
+        'costume_code': costume_code,
+        'dat_file': dat_filename,
+        'symbol': symbol,
+        'folder': _get_folder(dat_filename),
+        'is_ice_climbers_nana': is_nana,
+        '_hash': hashlib.md5(dat_bytes).hexdigest(),
+    }
+
 # ── Image dimension reading ───────────────────────────────────────────────────
 
 def get_image_dimensions(archive, filename, is_7z=False):
@@ -866,57 +954,16 @@ def detect_character_from_zip(zip_path: str) -> List[Dict]:
                 archive.close()
             return []
 
-        import tempfile
-
         # --- Pass 1: Parse all DATs, compute hashes, detect char/color ---
-        dat_results = []
-        for dat_filename in dat_files:
-            with tempfile.NamedTemporaryFile(suffix=os.path.splitext(dat_filename)[1] or '.dat', delete=False) as tmp:
-                if is_7z:
-                    dat_bytes = read_7z_member(archive, dat_filename)
-                else:
-                    dat_bytes = archive.read(dat_filename)
-                tmp.write(dat_bytes)
-                tmp_path = tmp.name
-
-            try:
-                parser = DATParser(tmp_path)
-                parser.read_dat()
-
-                character, symbol = parser.detect_character()
-                if not character:
-                    continue
-
-                # Only include costume DATs (must have Ply symbols)
-                has_ply_symbol = any('Ply' in node['symbol'] for node in parser.root_nodes)
-                if not has_ply_symbol:
-                    continue
-
-                color_info = parser.detect_costume_color()
-                costume_code = parser.get_character_filename()
-                is_nana = 'PlNn' in (costume_code or '')
-
-                dat_hash = hashlib.md5(dat_bytes).hexdigest()
-
-                # Normalize Ice Climbers character name
-                if character in ('Ice Climbers (Nana)', 'Ice Climbers (Popo)'):
-                    character = 'Ice Climbers'
-
-                dat_results.append({
-                    'character': character,
-                    'color': color_info if color_info else 'Custom',
-                    'costume_code': costume_code,
-                    'dat_file': dat_filename,
-                    'symbol': symbol,
-                    'folder': _get_folder(dat_filename),
-                    'is_ice_climbers_nana': is_nana,
-                    '_hash': dat_hash,
-                })
-            finally:
-                try:
-                    os.unlink(tmp_path)
-                except Exception:
-                    pass
+        # Members are parsed straight from memory; zip reads share the one
+        # handle (ZipFile serialises the seek+read, inflate runs unlocked).
+        if is_7z:
+            dat_blobs = read_7z_members(archive, dat_files)
+            read = dat_blobs.get
+        else:
+            read = archive.read
+        dat_results = [r for r in map_dats(lambda n: _parse_costume_dat(n, read(n)), dat_files)
+                       if r is not None]
 
         if not dat_results:
             if not is_7z:
@@ -0,0 +1,463 @@
+"""
+Content-addressed, incremental store for vault backups.
+
+A vault backup used to be a fresh zip of all of storage/, DEFLATE-ing every
+file again -- including PNGs and costume zips that are already compressed -- so
+each backup cost a full copy and a full recompress. Instead, each backup is a
+*snapshot* in a chunk store:
+
+    <root>/objects/ab/abcdef...        raw chunk (already-compressed file types)
+    <root>/objects/ab/abcdef....z      zlib-compressed chunk (everything else)
+    <root>/snapshots/<id>.json         manifest: {rel path: size, mtime_ns, chunks}
+
+Files are split into CHUNK_SIZE pieces named by their sha256, so a chunk is
+stored once no matter how many files or snapshots reference it. A new snapshot
+only reads files whose (size, mtime_ns) moved since the previous manifest, and
+only writes chunks the store doesn't have -- an unchanged vault snapshots with
+nothing hashed and nothing written. Any snapshot can be materialized back into
+a directory (restore) or a plain zip (export_zip, the portable download format
+the restore endpoint accepts), and prune() drops old snapshots and the chunks
+only they referenced.
+
+The heavy work runs on a thread pool (BACKUP_WORKERS; hashlib, zlib and file
+I/O all release the GIL): changed files are hashed and compressed in parallel,
+restore writes files in parallel, and export_zip deflates each member in
+CHUNK_SIZE pieces on the pool while the calling thread writes the pieces in
+order, pigz-style, so a large zip export isn't bound to one core.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import uuid
+import zipfile
+import zlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+STORE_VERSION = 1
+CHUNK_SIZE = 8 << 20
+
+_workers_env = os.environ.get('MEX_BACKUP_WORKERS', '')
+BACKUP_WORKERS = (max(1, int(_workers_env)) if _workers_env.isdigit()
+                  else min(8, os.cpu_count() or 1))
+
+# Formats whose bytes are already entropy-coded: deflating them again burns CPU
+# for ~0% gain, so their chunks (and zip-export members) are stored as-is.
+PRECOMPRESSED_EXTS = frozenset({
+    '.png', '.jpg', '.jpeg', '.webp', '.gif',
+    '.zip', '.7z', '.rar', '.gz', '.xz', '.bz2', '.zst',
+    '.mp3', '.ogg', '.opus', '.m4a', '.mp4', '.webm',
+    '.xdelta', '.vcdiff',
+})
+
+_locks: dict = {}
+_locks_guard = threading.Lock()
+
+
+class SnapshotNotFound(FileNotFoundError):
+    """No snapshot with that id in the store."""
+
+
+class CorruptChunk(ValueError):
+    """A stored chunk no longer hashes to its name."""
+
+
+def is_precompressed(rel: str) -> bool:
+    return Path(rel).suffix.lower() in PRECOMPRESSED_EXTS
+
+
+def _new_snapshot_id(after: Optional[str] = None) -> str:
+    # Ids sort by creation time, which is what prune() and the incremental
+    # parent lookup rely on; bump past `after` if the clock hasn't moved.
+    now = datetime.now()
+    sid = f"{now.strftime('%Y%m%d-%H%M%S-%f')}-{uuid.uuid4().hex[:6]}"
+    while after and sid <= after:
+        now += timedelta(microseconds=1)
+        sid = f"{now.strftime('%Y%m%d-%H%M%S-%f')}-{uuid.uuid4().hex[:6]}"
+    return sid
+
+
+def _write_json_atomic(path: Path, data):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + '.tmp')
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(data, f, separators=(',', ':'))
+    os.replace(tmp, path)
+
+
+def _empty_piece(deflate: bool):
+    return b'', (zlib.compressobj(6, zlib.DEFLATED, -15).flush() if deflate else b'')
+
+
+class _RawMember:
+    """Writes one zip member whose payload is produced outside zipfile (the
+    pool's pre-deflated pieces). Mirrors what zipfile's own streaming writer
+    does -- header, payload, then patch CRC/sizes into the header -- since
+    zipfile has no public API for appending already-compressed data."""
+
+    def __init__(self, zf: zipfile.ZipFile, name: str, entry: dict, deflated: bool):
+        ts = datetime.fromtimestamp(entry['mtime_ns'] / 1e9)
+        info = zipfile.ZipInfo(name, date_time=max(ts.timetuple()[:6],
+                                                   (1980, 1, 1, 0, 0, 0)))
+        info.compress_type = zipfile.ZIP_DEFLATED if deflated else zipfile.ZIP_STORED
+        info.file_size = entry['size']
+        info.compress_size = 0
+        info.CRC = 0
+        self.zf, self.info = zf, info
+        # same reservation rule as ZipFile.open(..., 'w')
+        self.zip64 = entry['size'] * 1.05 > zipfile.ZIP64_LIMIT
+
+    def __enter__(self):
+        fp = self.zf.fp
+        self.info.header_offset = fp.tell()
+        fp.write(self.info.FileHeader(self.zip64))
+        self.crc = 0
+        self.size = 0
+        return self
+
+    def write(self, raw: bytes, payload: bytes):
+        self.crc = zlib.crc32(raw, self.crc)
+        self.size += len(raw)
+        self.info.compress_size += len(payload)
+        self.zf.fp.write(payload)
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            return False
+        zf, info = self.zf, self.info
+        if self.size != info.file_size:
+            raise CorruptChunk(f"{info.filename}: rebuilt {self.size} bytes, "
+                               f"manifest says {info.file_size}")
+        info.CRC = self.crc
+        end = zf.fp.tell()
+        zf.fp.seek(info.header_offset)
+        zf.fp.write(info.FileHeader(self.zip64))
+        zf.fp.seek(end)
+        zf.filelist.append(info)
+        zf.NameToInfo[info.filename] = info
+        zf.start_dir = end
+        return False
+
+
+class BackupStore:
+    def __init__(self, root):
+        self.root = Path(root)
+        self.objects = self.root / 'objects'
+        self.snapshots = self.root / 'snapshots'
+        with _locks_guard:
+            self._lock = _locks.setdefault(self.root.resolve(), threading.RLock())
+        self._claim_guard = threading.Lock()
+        self._claimed = set()
+
+    # -- chunks ----------------------------------------------------------- #
+    def _chunk_path(self, h: str, packed: bool) -> Path:
+        return self.objects / h[:2] / (h + '.z' if packed else h)
+
+    def _find_chunk(self, h: str) -> Optional[Path]:
+        for packed in (True, False):
+            p = self._chunk_path(h, packed)
+            if p.exists():
+                return p
+        return None
+
+    def _put_chunk(self, h: str, data: bytes, compress: bool) -> int:
+        """Store a chunk unless present. Returns bytes written (0 = deduped).
+        Safe to call from several threads: the first caller for a hash writes it."""
+        with self._claim_guard:
+            if h in self._claimed or self._find_chunk(h) is not None:
+                return 0
+            self._claimed.add(h)
+        try:
+            dest = self._chunk_path(h, compress)
+            dest.parent.mkdir(parents=True, exist_ok=True)
+            blob = zlib.compress(data, 6) if compress else data
+            tmp = dest.with_name(f"{dest.name}.{threading.get_ident()}.tmp")
+            with open(tmp, 'wb') as f:
+                f.write(blob)
+            os.replace(tmp, dest)
+            return len(blob)
+        except BaseException:
+            with self._claim_guard:
+                self._claimed.discard(h)
+            raise
+
+    def read_chunk(self, h: str) -> bytes:
+        path = self._find_chunk(h)
+        if path is None:
+            raise CorruptChunk(f"chunk {h} missing from {self.objects}")
+        data = path.read_bytes()
+        if path.suffix == '.z':
+            data = zlib.decompress(data)
+        if hashlib.sha256(data).hexdigest() != h:
+            raise CorruptChunk(f"chunk {h} is corrupt")
+        return data
+
+    # -- snapshots -------------------------------------------------------- #
+    def snapshot_ids(self) -> list:
+        if not self.snapshots.exists():
+            return []
+        return sorted(p.stem for p in self.snapshots.glob('*.json'))
+
+    def load_manifest(self, snapshot_id: str) -> dict:
+        path = self.snapshots / f"{Path(snapshot_id).name}.json"
+        if not path.exists():
+            raise SnapshotNotFound(f"no backup snapshot {snapshot_id!r}")
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def latest_manifest(self) -> Optional[dict]:
+        for sid in reversed(self.snapshot_ids()):
+            try:
+                manifest = self.load_manifest(sid)
+            except Exception as e:
+                logger.warning(f"[backup-store] unreadable snapshot {sid}: {e}")
+                continue
+            if manifest.get('version') == STORE_VERSION:
+                return manifest
+        return None
+
+    def list_snapshots(self) -> list:
+        """Newest first: {id, created_at, label, files, bytes, stats}."""
+        out = []
+        for sid in reversed(self.snapshot_ids()):
+            try:
+                m = self.load_manifest(sid)
+            except Exception:
+                continue
+            out.append({'id': m['id'], 'created_at': m.get('created_at'),
+                        'label': m.get('label'), 'files': len(m['files']),
+                        'bytes': sum(e['size'] for e in m['files'].values()),
+                        'stats': m.get('stats', {})})
+        return out
+
+    def create_snapshot(self, source, exclude=(), label=None,
+                        progress: Optional[Callable[[int, int], None]] = None) -> dict:
+        """Snapshot every file under `source` except the posix relative paths in
+        `exclude` (a collection, or a predicate rel -> True to leave out). Files
+        unchanged since the previous snapshot (same size and mtime_ns, chunks
+        still present) are carried over without being read."""
+        source = Path(source)
+        excluded = exclude if callable(exclude) else exclude.__contains__
+        with self._lock:
+            prev = self.latest_manifest()
+            ids = self.snapshot_ids()
+            prev_files = prev['files'] if prev else {}
+            paths = []
+            for dirpath, _dirs, names in os.walk(source):
+                for name in names:
+                    path = Path(dirpath) / name
+                    rel = path.relative_to(source).as_posix()
+                    if not excluded(rel):
+                        paths.append((rel, path))
+            paths.sort()
+
+            files = {}
+            stats = {'files': 0, 'reused': 0, 'hashed': 0, 'bytes': 0,
+                     'new_chunks': 0, 'stored_bytes': 0}
+            changed = []
+            for rel, path in paths:
+                try:
+                    st = path.stat()
+                except OSError:
+                    continue
+                old = prev_files.get(rel)
+                if (old and old['size'] == st.st_size
+                        and old['mtime_ns'] == st.st_mtime_ns
+                        and all(self._find_chunk(h) for h in old['chunks'])):
+                    files[rel] = old
+                    stats['reused'] += 1
+                else:
+                    changed.append((rel, path, st))
+            done = len(files)
+            if progress:
+                progress(done, len(paths))
+
+            if changed:
+                with ThreadPoolExecutor(max_workers=min(BACKUP_WORKERS, len(changed)),
+                                        thread_name_prefix='backup-hash') as pool:
+                    futures = [(rel, pool.submit(self._store_file, path, st))
+                               for rel, path, st in changed]
+                    for rel, fut in futures:
+                        entry, new_chunks, stored = fut.result()
+                        files[rel] = entry
+                        stats['hashed'] += 1
+                        stats['new_chunks'] += new_chunks
+                        stats['stored_bytes'] += stored
+                        done += 1
+                        if progress:
+                            progress(done, len(paths))
+            files = dict(sorted(files.items()))
+            stats['files'] = len(files)
+            stats['bytes'] = sum(e['size'] for e in files.values())
+
+            manifest = {
+                'version': STORE_VERSION,
+                'id': _new_snapshot_id(ids[-1] if ids else None),
+                'created_at': datetime.now().isoformat(),
+                'label': label,
+                'parent': prev['id'] if prev else None,
+                'stats': stats,
+                'files': files,
+            }
+            _write_json_atomic(self.snapshots / f"{manifest['id']}.json", manifest)
+            logger.info(
+                f"[backup-store] snapshot {manifest['id']}: {stats['files']} files, "
+                f"{stats['hashed']} read, {stats['new_chunks']} new chunks "
+                f"({stats['stored_bytes']} bytes stored)")
+            return manifest
+
+    def _store_file(self, path: Path, st):
+        """Chunk, hash and store one file -> (entry, new chunks, bytes written)."""
+        compress = not is_precompressed(path.name)
+        chunks = []
+        size = new_chunks = stored = 0
+        with open(path, 'rb') as f:
+            for data in iter(lambda: f.read(CHUNK_SIZE), b''):
+                h = hashlib.sha256(data).hexdigest()
+                written = self._put_chunk(h, data, compress)
+                if written:
+                    new_chunks += 1
+                    stored += written
+                chunks.append(h)
+                size += len(data)
+        return ({'size': size, 'mtime_ns': st.st_mtime_ns, 'chunks': chunks},
+                new_chunks, stored)
+
+    # -- materialize ------------------------------------------------------ #
+    def write_file(self, entry: dict, dest) -> Path:
+        """Rebuild one manifest entry at `dest` (temp + replace), restoring its
+        mtime so a snapshot of the restored tree reuses the same entry."""
+        dest = Path(dest)
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        tmp = dest.with_name(dest.name + '.part')
+        with open(tmp, 'wb') as out:
+            for h in entry['chunks']:
+                out.write(self.read_chunk(h))
+        os.replace(tmp, dest)
+        os.utime(dest, ns=(entry['mtime_ns'], entry['mtime_ns']))
+        return dest
+
+    def restore(self, snapshot_id: str, dest, skip: Optional[Callable[[str], bool]] = None,
+                progress: Optional[Callable[[int, int], None]] = None) -> int:
+        """Write snapshot `snapshot_id` under `dest`, several files at a time.
+        `skip(rel)` -> True leaves that file out. Returns the number of files
+        written."""
+        manifest = self.load_manifest(snapshot_id)
+        dest = Path(dest)
+        items = [(rel, entry) for rel, entry in sorted(manifest['files'].items())
+                 if not (skip and skip(rel))]
+        if not items:
+            return 0
+        with ThreadPoolExecutor(max_workers=min(BACKUP_WORKERS, len(items)),
+                                thread_name_prefix='backup-restore') as pool:
+            futures = [pool.submit(self.write_file, entry, dest / rel)
+                       for rel, entry in items]
+            try:
+                for i, fut in enumerate(futures, 1):
+                    fut.result()
+                    if progress:
+                        progress(i, len(items))
+            except BaseException:
+                for fut in futures:
+                    fut.cancel()
+                raise
+        return len(items)
+
+    def _deflate_piece(self, h: str, deflate: bool, last: bool):
+        """Pool job for export_zip: one chunk -> (raw bytes, zip payload).
+        Each piece is an independent raw-deflate stream ended with a sync flush
+        (the last one with Z_FINISH), so the pieces concatenate into one valid
+        deflate stream."""
+        data = self.read_chunk(h)
+        if not deflate:
+            return data, data
+        c = zlib.compressobj(6, zlib.DEFLATED, -15)
+        return data, c.compress(data) + c.flush(zlib.Z_FINISH if last else zlib.Z_SYNC_FLUSH)
+
+    def export_zip(self, snapshot_id: str, zip_path,
+                   progress: Optional[Callable[[int, int], None]] = None) -> Path:
+        """Write a snapshot as a plain zip (the portable backup file). Already
+        compressed formats are STORED, the rest DEFLATED.
+
+        Chunks are read (and deflated) on the pool; this thread is the writer,
+        taking the pieces in order with at most ~2 pieces per worker in
+        flight, so memory stays bounded however big the vault is."""
+        manifest = self.load_manifest(snapshot_id)
+        zip_path = Path(zip_path)
+        items = sorted(manifest['files'].items())
+        window = BACKUP_WORKERS * 2
+
+        def pieces():
+            for rel, entry in items:
+                deflate = not is_precompressed(rel)
+                chunks = entry['chunks'] or [None]
+                for n, h in enumerate(chunks):
+                    yield rel, deflate, h, n == len(chunks) - 1
+
+        with ThreadPoolExecutor(max_workers=BACKUP_WORKERS,
+                                thread_name_prefix='backup-zip') as pool, \
+                zipfile.ZipFile(zip_path, 'w', allowZip64=True) as zf:
+            todo = pieces()
+            inflight = deque()
+
+            def fill():
+                for rel, deflate, h, last in todo:
+                    fut = (pool.submit(self._deflate_piece, h, deflate, last) if h
+                           else pool.submit(_empty_piece, deflate))
+                    inflight.append((rel, fut))
+                    if len(inflight) >= window:
+                        return
+
+            try:
+                fill()
+                for i, (rel, entry) in enumerate(items, 1):
+                    with _RawMember(zf, rel, entry, deflated=not is_precompressed(rel)) as out:
+                        for _ in range(len(entry['chunks']) or 1):
+                            piece_rel, fut = inflight.popleft()
+                            assert piece_rel == rel
+                            out.write(*fut.result())
+                            fill()
+                    if progress:
+                        progress(i, len(items))
+            except BaseException:
+                for _rel, fut in inflight:
+                    fut.cancel()
+                raise
+        return zip_path
+
+    # -- housekeeping ----------------------------------------------------- #
+    def prune(self, keep: int) -> dict:
+        """Keep the newest `keep` snapshots; delete older manifests and every
+        chunk no remaining snapshot references."""
+        result = {'snapshots_removed': 0, 'chunks_removed': 0, 'bytes_freed': 0}
+        with self._lock:
+            ids = self.snapshot_ids()
+            old = ids[:-keep] if keep > 0 else ids
+            if not old:
+                return result
+            for sid in old:
+                (self.snapshots / f"{sid}.json").unlink(missing_ok=True)
+                result['snapshots_removed'] += 1
+            live = set()
+            for sid in self.snapshot_ids():
+                for entry in self.load_manifest(sid)['files'].values():
+                    live.update(entry['chunks'])
+            if self.objects.exists():
+                for path in self.objects.rglob('*'):
+                    if not path.is_file():
+                        continue
+                    h = path.name[:-2] if path.name.endswith('.z') else path.name
+                    if h not in live:
+                        result['bytes_freed'] += path.stat().st_size
+                        path.unlink()
+                        result['chunks_removed'] += 1
+        logger.info(f"[backup-store] pruned {result}")
+        return result
@@ -105,9 +105,11 @@ VAULT_BACKEND = 'db' if _vault_flag in ('1', 'true', 'db', 'yes', 'on') else 'js
 VAULT_DB_PATH = STORAGE_PATH / "vault.db"
 
 # Dual-write canary: when the DB backend is active, ALSO keep metadata.json in
-# sync on every save. This makes the JSON a live rollback backup and keeps any
-# path=-based JSON reader (e.g. the duel assembler) current. On by default during
-# rollout; set NUCLEUS_VAULT_DUAL_WRITE=0 to turn it off once the DB is proven.
+# sync (whole-vault saves at once, row-level edits shortly after; see
+# core.metadata.flush_mirror). This makes the JSON a live rollback backup and
+# keeps any path=-based JSON reader (e.g. the duel assembler) current. On by
+# default during rollout; set NUCLEUS_VAULT_DUAL_WRITE=0 to turn it off once
+# the DB is proven.
 _dual_write_flag = os.environ.get('NUCLEUS_VAULT_DUAL_WRITE', '').strip().lower()
 VAULT_DUAL_WRITE = _dual_write_flag not in ('0', 'false', 'no', 'off')
 
@@ -126,6 +128,8 @@ else:
 
 # Processor tools log into the app's logs folder (see processor/logging_config.py)
 os.environ.setdefault('NUCLEUS_LOGS_DIR', str(LOGS_PATH))
+# Slippi validator verdicts are cached next to the vault (see services/slippi_cache.py)
+os.environ.setdefault('NUCLEUS_SLIPPI_CACHE_DIR', str(STORAGE_PATH / "_slippi_cache"))
 
 # Add processor tools to path for imports (CSP generation, slippi validation)
 sys.path.insert(0, str(PROCESSOR_DIR))
@@ -0,0 +1,270 @@
+"""
+Per-project journal of pending costume reorder/remove/import operations.
+
+Every reorder-costume / remove-costume MexCLI call runs a full workspace Save
+(MxDt, IfAll, MnSlChr, codes.gct, ... -- the whole build), and the frontend
+replays a drag as a run of adjacent swaps, so dragging one tile across ten
+slots used to cost ten recompiles. Instead the endpoints append to this
+journal and return at once; the journal is applied later as a minimal batch:
+
+  * consecutive swaps on one fighter collapse into their net permutation,
+    written as the fewest swaps that produce it (A<->B then A<->B is nothing);
+  * a run of removes becomes ONE remove-costumes manifest, with each index
+    mapped back to the slot it named before the earlier removes shifted it;
+  * a run of imports becomes ONE import-costumes manifest;
+  * each run is one MexCLI command (one Save), applied in queue order.
+
+The journal is flushed when the queue has been idle for MEX_COSTUME_OPS_IDLE
+seconds (default 1.5; 0 applies every op immediately), and before anything
+else touches the project: get_mex_manager() flushes first, so reads (e.g. the
+costume list) and export always see the queued changes. Queue depth is pushed
+to the UI as 'costume_ops_queue' SocketIO events; a failed flush emits
+'costume_ops_error' and drops the rest of the batch (later indices would be
+meaningless), after which the UI reloads the real order.
+"""
+
+import atexit
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from .config import MEXCLI_PATH
+from .state import (MexManager, MexManagerError, get_current_project_path,
+                    get_socketio, mexcli_lock, reload_mex_manager)
+
+logger = logging.getLogger(__name__)
+
+REORDER = 'reorder'
+REMOVE = 'remove'
+IMPORT = 'import'
+
+
+def _idle_flush_s() -> float:
+    env = os.environ.get('MEX_COSTUME_OPS_IDLE')
+    try:
+        return max(0.0, float(env)) if env else 1.5
+    except ValueError:
+        return 1.5
+
+
+IDLE_FLUSH_S = _idle_flush_s()
+
+
+def _net_swaps(pairs: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    """The fewest swaps with the same net effect as applying `pairs` in order."""
+    arrangement: Dict[int, int] = {}          # slot -> original slot now there
+    for a, b in pairs:
+        arrangement[a], arrangement[b] = arrangement.get(b, b), arrangement.get(a, a)
+
+    swaps = []
+    current: Dict[int, int] = {}
+    where: Dict[int, int] = {}
+    for slot in sorted(arrangement):
+        want = arrangement[slot]
+        have = current.get(slot, slot)
+        if have == want:
+            continue
+        src = where.get(want, want)
+        current[slot], current[src] = want, have
+        where[want], where[have] = slot, src
+        swaps.append((slot, src))
+    return swaps
+
+
+def _original_indices(indices: List[int]) -> List[int]:
+    """Map sequential single-remove indices to the slots they named before any
+    of them ran (remove-costumes removes all of its indices from the original
+    list, highest first)."""
+    removed: List[int] = []
+    for idx in indices:
+        orig = idx
+        for r in sorted(removed):
+            if r <= orig:
+                orig += 1
+        removed.append(orig)
+    return removed
+
+
+def plan_batches(ops: List[Dict]) -> List[Tuple[str, object]]:
+    """Collapse a queue of ops into (kind, payload) MexCLI batches, in order.
+
+    reorder -> [{"fighter", "from", "to"}, ...]   (reorder-costumes)
+    remove  -> {fighter: [index, ...]}           (remove-costumes)
+    import  -> {fighter: [zip_path, ...]}        (import-costumes)
+    """
+    batches: List[Tuple[str, object]] = []
+    i = 0
+    while i < len(ops):
+        kind = ops[i]['kind']
+        j = i
+        while j < len(ops) and ops[j]['kind'] == kind:
+            j += 1
+        run = ops[i:j]
+        i = j
+
+        if kind == REORDER:
+            swaps = []
+            k = 0
+            while k < len(run):
+                fighter = run[k]['fighter']
+                pairs = []
+                while k < len(run) and run[k]['fighter'] == fighter:
+                    pairs.append((run[k]['from'], run[k]['to']))
+                    k += 1
+                swaps.extend({'fighter': fighter, 'from': a, 'to': b}
+                             for a, b in _net_swaps(pairs))
+            if swaps:
+                batches.append((REORDER, swaps))
+        elif kind == REMOVE:
+            per_fighter: Dict[str, List[int]] = {}
+            for op in run:
+                per_fighter.setdefault(op['fighter'], []).append(op['index'])
+            batches.append((REMOVE, {f: _original_indices(idxs)
+                                     for f, idxs in per_fighter.items()}))
+        elif kind == IMPORT:
+            manifest: Dict[str, List[str]] = {}
+            for op in run:
+                manifest.setdefault(op['fighter'], []).append(op['zip'])
+            batches.append((IMPORT, manifest))
+    return batches
+
+
+def _emit(event: str, payload: Dict):
+    socketio = get_socketio()
+    if socketio is None:
+        return
+    try:
+        socketio.emit(event, payload)
+    except Exception as e:
+        logger.warning(f"socketio.emit({event}) failed: {e}")
+
+
+class CostumeOpsJournal:
+    """Pending costume ops for one project; see the module docstring."""
+
+    def __init__(self, project_path):
+        self.project_path = Path(project_path)
+        self._ops: List[Dict] = []
+        self._lock = threading.Lock()
+        self._timer: Optional[threading.Timer] = None
+
+    def depth(self) -> int:
+        return len(self._ops)
+
+    def enqueue(self, op: Dict) -> int:
+        with self._lock:
+            self._ops.append(op)
+            depth = len(self._ops)
+            self._cancel_timer()
+            if IDLE_FLUSH_S > 0:
+                self._timer = threading.Timer(IDLE_FLUSH_S, self._idle_flush)
+                self._timer.daemon = True
+                self._timer.start()
+        self._emit_depth(depth, flushing=False)
+        return depth
+
+    def _cancel_timer(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+    def _idle_flush(self):
+        try:
+            self.flush()
+        except Exception as e:
+            logger.error(f"Idle costume-op flush failed: {e}", exc_info=True)
+
+    def _emit_depth(self, depth: int, flushing: bool):
+        _emit('costume_ops_queue', {'project': str(self.project_path),
+                                    'depth': depth, 'flushing': flushing})
+
+    def flush(self) -> Dict:
+        """Apply every queued op. Holds mexcli_lock for the whole batch, like any
+        other workspace writer."""
+        with mexcli_lock:
+            with self._lock:
+                ops, self._ops = self._ops, []
+                self._cancel_timer()
+            if not ops:
+                return {'success': True, 'ops': 0, 'commands': 0, 'results': []}
+
+            batches = plan_batches(ops)
+            self._emit_depth(len(ops), flushing=True)
+            logger.info(f"Flushing {len(ops)} costume op(s) for {self.project_path.name} "
+                        f"as {len(batches)} MexCLI command(s)")
+
+            results = []
+            error = None
+            try:
+                mex = MexManager(str(MEXCLI_PATH), str(self.project_path), lock=mexcli_lock)
+                for kind, payload in batches:
+                    if kind == REORDER:
+                        results.append(mex.reorder_costumes(payload))
+                    elif kind == REMOVE:
+                        results.append(mex.remove_costumes(payload))
+                    else:
+                        results.append(mex.import_costumes(payload))
+            except (MexManagerError, OSError) as e:
+                error = str(e)
+                logger.error(f"Costume op flush failed after {len(results)}/{len(batches)} "
+                             f"command(s): {e}")
+            finally:
+                if get_current_project_path() == self.project_path:
+                    reload_mex_manager()
+
+        self._emit_depth(self.depth(), flushing=False)
+        summary = {'success': error is None, 'ops': len(ops),
+                   'commands': len(results), 'results': results}
+        if error is not None:
+            summary['error'] = error
+            _emit('costume_ops_error', {'project': str(self.project_path), 'error': error,
+                                        'dropped': len(batches) - len(results)})
+        return summary
+
+
+_journals: Dict[str, CostumeOpsJournal] = {}
+_journals_lock = threading.Lock()
+
+
+def get_journal(project_path) -> CostumeOpsJournal:
+    key = str(Path(project_path))
+    with _journals_lock:
+        journal = _journals.get(key)
+        if journal is None:
+            journal = _journals[key] = CostumeOpsJournal(project_path)
+        return journal
+
+
+def enqueue(project_path, kind: str, fighter: str, **fields) -> int:
+    """Queue one op for `project_path`; returns the new queue depth."""
+    return get_journal(project_path).enqueue({'kind': kind, 'fighter': fighter, **fields})
+
+
+def pending(project_path) -> int:
+    with _journals_lock:
+        journal = _journals.get(str(Path(project_path)))
+    return journal.depth() if journal is not None else 0
+
+
+def flush(project_path) -> Dict:
+    return get_journal(project_path).flush()
+
+
+def flush_pending(project_path):
+    """Apply queued ops before the project is read or written some other way.
+    Cheap when nothing is queued; a failed flush is reported, not raised."""
+    if pending(project_path):
+        flush(project_path)
+
+
+def flush_all():
+    with _journals_lock:
+        journals = list(_journals.values())
+    for journal in journals:
+        if journal.depth():
+            journal.flush()
+
+
+atexit.register(flush_all)
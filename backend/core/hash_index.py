@@ -0,0 +1,286 @@
+"""
+Persistent content-hash index for the vault and the vanilla assets.
+
+ISO scans filter every ripped costume against "DATs the user already has":
+the md5 of each vault costume zip's inner DAT, the pre-Slippi-fix `dat_hash`
+recorded in metadata at import time, and the md5 of every vanilla DAT.
+Recomputing those from scratch meant opening and hashing thousands of zips at
+the start of every scan job.
+
+This module keeps those hashes in storage/hash_index.json keyed by
+(relative path, size, mtime_ns). A refresh only stats files; it re-hashes just
+the ones whose size/mtime moved, and the import and delete paths update their
+entry directly (record_vault_zip / forget_vault_zip) so a warm scan starts
+with nothing to hash. The metadata hashes are cached alongside, keyed by the
+metadata store's own size/mtime, and re-read whenever it changes. The index is
+a rebuildable cache: deleting the file only costs one cold rebuild, and vault
+backups skip it.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import zipfile
+from pathlib import Path
+
+from . import config as _config
+
+logger = logging.getLogger(__name__)
+
+INDEX_FILENAME = 'hash_index.json'
+INDEX_VERSION = 1
+
+# storage/ subfolders that hold stage/patch/bundle zips, not costume zips.
+_NON_COSTUME_DIRS = ('xdelta', 'das', 'bundles')
+
+_lock = threading.RLock()
+# index file path -> loaded index dict (kept warm between scans)
+_cache: dict[Path, dict] = {}
+
+
+def _md5_file(path: Path) -> str:
+    h = hashlib.md5()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _zip_dat_hash(zip_path: Path):
+    """md5 of the costume DAT inside a vault zip, or None if it has none."""
+    with zipfile.ZipFile(zip_path, 'r') as zf:
+        for inner in zf.namelist():
+            lower = inner.lower()
+            if lower.endswith(('.dat', '.usd')) and 'plco' not in lower:
+                return hashlib.md5(zf.read(inner)).hexdigest()
+    return None
+
+
+def _signature(path: Path):
+    st = path.stat()
+    return st.st_size, st.st_mtime_ns
+
+
+def _storage_root(storage=None) -> Path:
+    return Path(storage) if storage else Path(_config.STORAGE_PATH)
+
+
+def _index_file(storage=None) -> Path:
+    return _storage_root(storage) / INDEX_FILENAME
+
+
+def _load(storage=None) -> dict:
+    file = _index_file(storage)
+    index = _cache.get(file)
+    if index is not None:
+        return index
+    index = {'version': INDEX_VERSION, 'vault': {}, 'vanilla': {}, 'metadata': {}}
+    if file.exists():
+        try:
+            with open(file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') == INDEX_VERSION:
+                index['vault'] = data.get('vault', {})
+                index['vanilla'] = data.get('vanilla', {})
+                index['metadata'] = data.get('metadata', {})
+        except Exception as e:
+            logger.warning(f"[hash-index] {file} unreadable, rebuilding: {e}")
+    _cache[file] = index
+    return index
+
+
+def _save(index: dict, storage=None):
+    """Atomic write (temp + os.replace), like core.metadata."""
+    file = _index_file(storage)
+    file.parent.mkdir(parents=True, exist_ok=True)
+    tmp = file.with_name(file.name + '.tmp')
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(index, f, separators=(',', ':'))
+    os.replace(tmp, file)
+
+
+def _is_live(storage: Path) -> bool:
+    return Path(storage) == Path(_config.STORAGE_PATH)
+
+
+def _metadata_dat_hashes(storage: Path) -> dict:
+    """relative zip path -> metadata dat_hash, for every canonical skin. The
+    live vault reads through load_metadata (JSON or DB, per the flag); any
+    other storage root reads its own metadata.json."""
+    from .metadata import load_metadata
+    out = {}
+    if _is_live(storage):
+        metadata = load_metadata(default={}) or {}
+    else:
+        metadata = load_metadata(default={}, path=Path(storage) / 'metadata.json') or {}
+    for char, char_data in metadata.get('characters', {}).items():
+        for skin in char_data.get('skins', []):
+            h = skin.get('dat_hash')
+            if not h or not skin.get('id'):
+                continue
+            name = skin.get('filename') or f"{skin['id']}.zip"
+            out[f"{char}/{name}"] = h
+    return out
+
+
+def _metadata_stamp(storage: Path):
+    """(name, size, mtime_ns) of the files `storage`'s metadata lives in."""
+    from . import metadata as _metadata
+    if _is_live(storage):
+        paths = (Path(_metadata.METADATA_FILE), Path(_config.VAULT_DB_PATH),
+                 Path(str(_config.VAULT_DB_PATH) + '-wal'))
+    else:
+        paths = (Path(storage) / 'metadata.json',)
+    stamp = []
+    for path in paths:
+        try:
+            st = path.stat()
+        except OSError:
+            continue
+        stamp.append([path.name, st.st_size, st.st_mtime_ns])
+    return stamp
+
+
+def _cached_metadata_hashes(index: dict, storage: Path):
+    """_metadata_dat_hashes, re-read only when the metadata store changed.
+    Returns (hashes, changed)."""
+    stamp = _metadata_stamp(storage)
+    cached = index['metadata']
+    if cached.get('stamp') == stamp and 'hashes' in cached:
+        return cached['hashes'], False
+    index['metadata'] = {'stamp': stamp, 'hashes': _metadata_dat_hashes(storage)}
+    return index['metadata']['hashes'], True
+
+
+def _iter_vault_zips(storage: Path):
+    if not storage.exists():
+        return
+    for char_dir in storage.iterdir():
+        if not char_dir.is_dir() or char_dir.name in _NON_COSTUME_DIRS:
+            continue
+        for zip_path in char_dir.glob('*.zip'):
+            yield f"{char_dir.name}/{zip_path.name}", zip_path
+
+
+def vault_hashes(storage=None) -> set[str]:
+    """Every hash a vault costume is known by: the stored zip's inner DAT md5
+    plus the metadata `dat_hash` (which is the PRE-auto-fix hash when import
+    Slippi-fixed the DAT, so the two can differ). Every metadata `dat_hash`
+    counts, whether or not its zip is on disk.
+
+    Stats every costume zip and re-hashes only new or modified ones; metadata
+    is re-read only when the metadata store changed since the last call."""
+    storage = _storage_root(storage)
+    with _lock:
+        index = _load(storage)
+        entries = index['vault']
+        meta, changed = _cached_metadata_hashes(index, storage)
+        seen = set()
+        rehashed = 0
+        for rel, zip_path in _iter_vault_zips(storage):
+            seen.add(rel)
+            try:
+                size, mtime = _signature(zip_path)
+            except OSError:
+                continue
+            entry = entries.get(rel)
+            if entry and entry[0] == size and entry[1] == mtime:
+                continue
+            try:
+                inner = _zip_dat_hash(zip_path)
+            except Exception as e:
+                logger.debug(f"[hash-index] could not hash {zip_path}: {e}")
+                inner = None
+            # a rewritten zip (CSP/stock update) keeps its recorded dat_hash
+            entries[rel] = [size, mtime, inner, entry[3] if entry else None]
+            changed = True
+            rehashed += 1
+        for rel in [r for r in entries if r not in seen]:
+            del entries[rel]
+            changed = True
+        if changed:
+            _save(index, storage)
+        # metadata is authoritative for a zip it knows; a dat_hash passed to
+        # record_vault_zip only bridges the gap until metadata is written
+        out = {e[2] for e in entries.values() if e[2]}
+        out |= {e[3] for rel, e in entries.items() if e[3] and rel not in meta}
+        out |= set(meta.values())
+        logger.info(
+            f"[hash-index] vault: {len(entries)} zips, {len(out)} unique hashes "
+            f"({rehashed} re-hashed)")
+        return out
+
+
+def vanilla_hashes(vanilla_dir=None, storage=None) -> set[str]:
+    """md5 of every DAT under the vanilla assets folder (incremental, like
+    vault_hashes)."""
+    root = Path(vanilla_dir) if vanilla_dir else Path(_config.VANILLA_ASSETS_DIR)
+    with _lock:
+        index = _load(storage)
+        entries = index['vanilla']
+        seen = set()
+        changed = False
+        if root.exists():
+            for dat in root.rglob('*.dat'):
+                rel = dat.relative_to(root).as_posix()
+                seen.add(rel)
+                try:
+                    size, mtime = _signature(dat)
+                    entry = entries.get(rel)
+                    if entry and entry[0] == size and entry[1] == mtime:
+                        continue
+                    entries[rel] = [size, mtime, _md5_file(dat)]
+                    changed = True
+                except OSError:
+                    continue
+        for rel in [r for r in entries if r not in seen]:
+            del entries[rel]
+            changed = True
+        if changed:
+            _save(index, storage)
+        return {e[2] for e in entries.values()}
+
+
+def record_vault_zip(zip_path, dat_hash=None, inner_hash=None, storage=None):
+    """Index a costume zip the caller just wrote. `dat_hash` is the metadata
+    hash (pre-fix source DAT); `inner_hash` the md5 of the DAT stored in the
+    zip -- hashed from the zip when not given. Never raises: a missed update
+    is caught by the next vault_hashes() stat pass."""
+    storage = _storage_root(storage)
+    zip_path = Path(zip_path)
+    try:
+        rel = zip_path.relative_to(storage).as_posix()
+        size, mtime = _signature(zip_path)
+        if inner_hash is None:
+            inner_hash = _zip_dat_hash(zip_path)
+        with _lock:
+            index = _load(storage)
+            entry = index['vault'].get(rel)
+            if dat_hash is None and entry:
+                dat_hash = entry[3]
+            index['vault'][rel] = [size, mtime, inner_hash, dat_hash]
+            _save(index, storage)
+    except Exception as e:
+        logger.debug(f"[hash-index] record {zip_path} failed: {e}")
+
+
+def forget_vault_zip(zip_path, storage=None):
+    """Drop a deleted costume zip from the index."""
+    storage = _storage_root(storage)
+    try:
+        rel = Path(zip_path).relative_to(storage).as_posix()
+        with _lock:
+            index = _load(storage)
+            if index['vault'].pop(rel, None) is not None:
+                _save(index, storage)
+    except Exception as e:
+        logger.debug(f"[hash-index] forget {zip_path} failed: {e}")
+
+
+def invalidate(storage=None):
+    """Forget the in-memory copy (e.g. after a vault restore replaced files);
+    the next lookup reloads and re-validates the on-disk index."""
+    with _lock:
+        _cache.pop(_index_file(storage), None)
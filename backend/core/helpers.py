@@ -6,6 +6,7 @@ import re
 import json
 import math
 import logging
+import shutil
 import hashlib
 import zipfile
 from pathlib import Path
@@ -96,6 +97,12 @@ def cleanup_output_folder():
         cleaned_size = 0
 
         for item in OUTPUT_PATH.iterdir():
+            if item.is_dir() and item.name.startswith('nucleus_texexport_'):
+                # Project overlay left by an interrupted texture-pack export;
+                # its links are removed, never the live files they point to
+                shutil.rmtree(item, ignore_errors=True)
+                cleaned_count += 1
+                continue
             if item.is_dir():
                 # Clean contents of mod_exports and vault_backups
                 if item.name in ['mod_exports', 'vault_backups']:
@@ -9,6 +9,7 @@ lets the storage backend swap from metadata.json to SQLite in one place behind
 a feature flag (see docs/VAULT_SQLITE_MIGRATION.md).
 """
 
+import atexit
 import json
 import logging
 import os
@@ -68,6 +69,8 @@ def load_metadata(default=None, path: Path = None):
     assembler, etc.) and is NEVER redirected to the DB.
     """
     if path is not None:
+        if Path(path) == Path(METADATA_FILE):
+            flush_mirror()
         return _load_json(path, default)
     if _use_db():
         from . import vault
@@ -87,19 +90,71 @@ def save_metadata(metadata, path: Path = None):
         _save_json(metadata, path)
         return
     if _use_db():
-        from . import config, vault
+        from . import vault
         vault.save_blob(metadata)
-        # Dual-write canary: mirror to metadata.json so it stays a live rollback
-        # backup and path=-based JSON readers see current data.
-        if getattr(config, 'VAULT_DUAL_WRITE', False):
-            try:
-                _save_json(metadata, METADATA_FILE)
-            except Exception as e:
-                logger.warning(f"Vault dual-write to {METADATA_FILE} failed: {e}")
+        _cancel_mirror()        # this full write supersedes a pending one
+        _dual_write(lambda: metadata)
         return
     _save_json(metadata, METADATA_FILE)
 
 
+def _dual_write(get_blob):
+    """Dual-write canary: mirror the DB to metadata.json so it stays a live
+    rollback backup and path=-based JSON readers see current data. `get_blob`
+    is only called when the mirror is on."""
+    from . import config
+    if not getattr(config, 'VAULT_DUAL_WRITE', False):
+        return
+    try:
+        _save_json(get_blob(), METADATA_FILE)
+    except Exception as e:
+        logger.warning(f"Vault dual-write to {METADATA_FILE} failed: {e}")
+
+
+# Row-level DB writes don't rewrite the metadata.json mirror inline -- that is
+# the whole-vault cost they exist to avoid. They mark it stale instead, and it
+# is rewritten once writes have been quiet for MIRROR_DELAY_S, so a burst
+# (drag-reordering a character, a bulk Slippi re-test) costs one rewrite.
+# flush_mirror() brings it current on demand (backups, JSON readers, exit).
+MIRROR_DELAY_S = 2.0
+_mirror_timer = None
+_mirror_guard = threading.Lock()
+
+
+def _cancel_mirror():
+    global _mirror_timer
+    with _mirror_guard:
+        timer, _mirror_timer = _mirror_timer, None
+    if timer is not None:
+        timer.cancel()
+    return timer is not None
+
+
+def _schedule_mirror():
+    global _mirror_timer
+    from . import config
+    if not getattr(config, 'VAULT_DUAL_WRITE', False):
+        return
+    with _mirror_guard:
+        if _mirror_timer is not None:
+            _mirror_timer.cancel()
+        _mirror_timer = threading.Timer(MIRROR_DELAY_S, flush_mirror)
+        _mirror_timer.daemon = True
+        _mirror_timer.start()
+
+
+def flush_mirror():
+    """Write a pending metadata.json mirror now. No-op when none is pending."""
+    if not _cancel_mirror():
+        return
+    with metadata_lock:
+        from . import vault
+        _dual_write(vault.load_blob)
+
+
+atexit.register(flush_mirror)
+
+
 @contextmanager
 def metadata_transaction(default=None, path: Path = None):
     """Locked read-modify-write of a metadata file.
@@ -119,6 +174,68 @@ def metadata_transaction(default=None, path: Path = None):
         save_metadata(data, path=path)
 
 
+def load_skins(character):
+    """One character's skins list (canonical name or custom-character pseudo
+    key), or None if the character isn't in the vault. On the DB backend a
+    canonical character is read from its own rows, not the whole blob."""
+    if _use_db():
+        from . import vault
+        skins = vault.character_skins(character)
+        if skins is not None:
+            return skins
+    char_data = get_char_data(load_metadata(), character)
+    return char_data.get('skins', []) if char_data is not None else None
+
+
+@contextmanager
+def skins_transaction(character, create=False):
+    """Locked read-modify-write of ONE character's skins list.
+
+    Yields the list (mutate it IN PLACE), or None when the character isn't in
+    the vault -- unless `create`, which adds it with an empty list. Saved on
+    clean exit; an exception in the body saves nothing, and neither does a
+    body that changed nothing. On the DB backend only the rows the body
+    changed are written (see vault.skins_transaction) and the metadata.json
+    mirror is deferred (see flush_mirror), so a single-skin edit or a reorder
+    no longer rewrites the whole vault; custom-character pseudo keys and
+    characters not yet in the DB take the whole-blob path.
+
+        with skins_transaction('Fox') as skins:
+            skins.insert(0, skins.pop(i))
+    """
+    with metadata_lock:
+        if _use_db():
+            from . import vault
+            if vault.has_character_skins(character):
+                written = {}
+                with vault.skins_transaction(character, written=written) as skins:
+                    yield skins
+                if written['rows']:
+                    _schedule_mirror()
+                return
+        data = load_metadata(default={'characters': {}} if create else None)
+        char_data = get_char_data(data, character)
+        if char_data is None and create and isinstance(data, dict):
+            char_data = data.setdefault('characters', {}).setdefault(character, {})
+        if char_data is None:
+            yield None
+            return
+        existed = 'skins' in char_data
+        skins = char_data.setdefault('skins', [])
+        before = json.dumps(skins) if existed else None
+        yield skins
+        if json.dumps(skins) != before:
+            save_metadata(data)
+
+
+@contextmanager
+def skin_transaction(character, skin_id):
+    """skins_transaction narrowed to the skin with id `skin_id` (None if the
+    character or skin is missing). Only that skin's row is rewritten."""
+    with skins_transaction(character) as skins:
+        yield next((s for s in skins or () if s.get('id') == skin_id), None)
+
+
 def custom_character_slug(character):
     """Slug for custom-character pseudo keys.
 
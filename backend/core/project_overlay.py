@@ -0,0 +1,151 @@
+"""
+Copy-on-write overlay of a MEX project, for texture-pack export.
+
+Why this exists
+---------------
+Texture-pack export swaps every CSP for an encoded placeholder, recompiles
+them and builds the ISO -- all on a throwaway copy, so the live project is
+never touched (a crash mid-export can't leave it full of placeholders). A
+full shutil.copytree of the project is gigabytes (the extracted disc's
+fighter/stage DATs, music, movies) for a build that rewrites a few MB.
+
+build_overlay() lays out the same tree with real directories and gives each
+file one of two treatments:
+
+  materialized   its own bytes in the overlay: a reflink clone where the
+                 filesystem supports it (Linux FICLONE: btrfs/XFS/...),
+                 otherwise a plain copy. Used for assets/csp (placeholders +
+                 recompiled .tex), the project file, data/ and sys/ (the
+                 FSM bake patches main.dol), and the files/ entries MexCLI's
+                 workspace save regenerates (REWRITTEN_FILES + the sound
+                 banks).
+  referenced     a hardlink to the live file (a symlink across volumes, a
+                 copy if neither is allowed). Everything else: MexCLI only
+                 reads these into the ISO.
+
+MexCLI writes with File.WriteAllBytes, which truncates the existing file in
+place, so a hardlink is never used for anything it may write -- the write
+would land in the live project. That is why the rewrite set errs towards
+materializing, and a new generator in mexLib writing to files/ must be added
+to REWRITTEN_FILES.
+"""
+
+import errno
+import logging
+import os
+import shutil
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+# files/ entries (lower-case, relative to files/) regenerated by
+# MexWorkspace.Save: the Generate*/MxDtCompiler outputs, codes, patches,
+# sound test data and the banner
+REWRITTEN_FILES = frozenset({
+    'mnslchr.usd', 'mexselectchr.dat', 'mnslmap.usd', 'gmrst.usd', 'ifall.usd',
+    'plco.dat', 'mxsr.dat', 'mxdt.dat', 'sdtoy.usd', 'sdtoyexp.usd',
+    'tydataf.dat', 'tydatai.usd', 'codes.gct', 'codes.ini', 'mxpt.dat',
+    'mxpt_.dat', 'smst.dat', 'opening.bnr', 'audio/us/smash2.sem',
+})
+
+# Linux FICLONE ioctl (_IOW(0x94, 9, int)): share the source's extents
+_FICLONE = 0x40049409
+
+try:
+    import fcntl
+except ImportError:      # Windows
+    fcntl = None
+
+
+def must_materialize(rel: str) -> bool:
+    """Whether the project-relative path `rel` (POSIX separators) needs its own
+    bytes in the overlay rather than a reference to the live file."""
+    top, _, rest = rel.partition('/')
+    if top == 'files':
+        rest = rest.lower()
+        return rest in REWRITTEN_FILES or (rest.startswith('audio/us/')
+                                           and rest.endswith('.ssm'))
+    if top == 'assets':
+        return rest.startswith('csp/')
+    return True
+
+
+class _Placer:
+    """Per-build file placement; a method that fails once for reasons of the
+    filesystem (no reflink support, cross-device, no symlink privilege) is not
+    retried for the rest of the build."""
+
+    def __init__(self):
+        self.can_clone = fcntl is not None
+        self.can_link = True
+        self.can_symlink = True
+        self.stats = {'cloned': 0, 'copied': 0, 'linked': 0, 'symlinked': 0,
+                      'copied_bytes': 0, 'referenced_bytes': 0}
+
+    def _clone(self, src: Path, dst: Path) -> bool:
+        try:
+            with open(src, 'rb') as s, open(dst, 'wb') as d:
+                fcntl.ioctl(d.fileno(), _FICLONE, s.fileno())
+        except OSError as e:
+            try:
+                dst.unlink()
+            except OSError:
+                pass
+            if e.errno in (errno.EOPNOTSUPP, errno.ENOTTY, errno.EXDEV,
+                           errno.EINVAL, errno.ENOSYS):
+                self.can_clone = False
+                return False
+            raise
+        shutil.copystat(src, dst)
+        return True
+
+    def materialize(self, src: Path, dst: Path):
+        if self.can_clone and self._clone(src, dst):
+            self.stats['cloned'] += 1
+            return
+        shutil.copy2(src, dst)
+        self.stats['copied'] += 1
+        self.stats['copied_bytes'] += dst.stat().st_size
+
+    def reference(self, src: Path, dst: Path):
+        if self.can_link:
+            try:
+                os.link(src, dst)
+                self.stats['linked'] += 1
+                self.stats['referenced_bytes'] += dst.stat().st_size
+                return
+            except OSError:
+                self.can_link = False
+        if self.can_symlink:
+            try:
+                os.symlink(src, dst)
+                self.stats['symlinked'] += 1
+                self.stats['referenced_bytes'] += src.stat().st_size
+                return
+            except OSError:
+                self.can_symlink = False
+        shutil.copy2(src, dst)
+        self.stats['copied'] += 1
+        self.stats['copied_bytes'] += dst.stat().st_size
+
+
+def build_overlay(live_dir, dest_dir) -> dict:
+    """Lay out `live_dir` at `dest_dir` (which must not exist) as an overlay:
+    materialized copies of what export rewrites, references to the rest.
+    Returns the placement counts. The live project is only read."""
+    live_dir, dest_dir = Path(live_dir), Path(dest_dir)
+    placer = _Placer()
+    dest_dir.mkdir(parents=True)
+    for root, dirs, files in os.walk(live_dir, followlinks=True):
+        root = Path(root)
+        rel_root = root.relative_to(live_dir).as_posix()
+        out_root = dest_dir / rel_root if rel_root != '.' else dest_dir
+        for d in dirs:
+            (out_root / d).mkdir()
+        for name in files:
+            rel = f"{rel_root}/{name}" if rel_root != '.' else name
+            if must_materialize(rel):
+                placer.materialize(root / name, out_root / name)
+            else:
+                placer.reference(root / name, out_root / name)
+    return placer.stats
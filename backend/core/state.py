@@ -28,7 +28,7 @@ from .metadata import metadata_lock  # noqa: F401  (re-exported for back-compat)
 mexcli_lock = threading.RLock()
 
 sys.path.insert(0, str(PROJECT_ROOT / "scripts" / "tools"))
-from mex_bridge import MexManager, MexManagerError
+from mex_bridge import MexManager, MexManagerError, shutdown_servers
 
 from .config import MEXCLI_PATH
 
@@ -91,11 +91,19 @@ def get_mex_manager():
     if _current_project_path is None:
         raise Exception("No MEX project loaded. Please open a project first.")
 
+    # Apply any queued costume reorders/removes first, so whatever the caller
+    # reads or writes next sees them (see core.costume_ops).
+    from .costume_ops import flush_pending
+    flush_pending(_current_project_path)
+
     if _mex_manager is None:
         try:
+            # mexcli_lock also guards the shared `mexcli serve` process, so its
+            # requests queue behind (and never interleave with) workspace writers.
             _mex_manager = MexManager(
                 cli_path=str(MEXCLI_PATH),
-                project_path=str(_current_project_path)
+                project_path=str(_current_project_path),
+                lock=mexcli_lock
             )
         except MexManagerError as e:
             raise Exception(f"Failed to initialize MexManager: {e}")
@@ -107,6 +115,7 @@ def set_project_path(path):
     global _mex_manager, _current_project_path
     _current_project_path = Path(path)
     _mex_manager = None  # Reset manager so it reinitializes with new path
+    shutdown_servers()   # the old project's mexcli serve process
 
 
 def clear_project_path():
@@ -114,6 +123,7 @@ def clear_project_path():
     global _mex_manager, _current_project_path
     _current_project_path = None
     _mex_manager = None
+    shutdown_servers()
 
 
 def reload_mex_manager():
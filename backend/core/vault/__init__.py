@@ -20,6 +20,12 @@ Design — "structured where it matters, verbatim everywhere":
 Ordering: integer `sort_order`, initially the source list index; reorders
 renumber the affected group in a transaction (Phase 2). `seq` is a stable
 per-group primary key so rows never collide even if entries lack unique ids.
+
+Row-level access: character_skins() reads one character's skins and
+skins_transaction() writes back only the rows a mutation actually touched
+(a rename is one UPDATE, a reorder updates `sort_order` for the moved span),
+so the hot per-skin endpoints don't pay the load_blob/save_blob round-trip of
+the whole vault.
 """
 import copy
 import json
@@ -264,6 +270,100 @@ def db_to_blob(path=None):
         return blob
 
 
+# ───────────────────────────── row-level access ─────────────────────────────
+
+def _has_skin_rows(conn, character) -> bool:
+    """Whether `character` exists with a decomposed skins list. The skeleton
+    holds every character with its lists emptied, so it stays small."""
+    row = conn.execute("SELECT value_json FROM kv WHERE key='__skeleton__'").fetchone()
+    if row is None:
+        return False
+    skel = json.loads(row[0])
+    cdata = skel.get('characters', {}).get(character) if isinstance(skel, dict) else None
+    return isinstance(cdata, dict) and isinstance(cdata.get('skins'), list)
+
+
+def has_character_skins(character, path=None) -> bool:
+    """True when the DB stores `character`'s skins as rows (row-level ops apply)."""
+    p = db_path(path)
+    if not p.exists():
+        return False
+    with _conn(p) as conn:
+        return _has_skin_rows(conn, character)
+
+
+def _skin_rows(conn, character):
+    return conn.execute(
+        "SELECT seq, sort_order, data_json FROM costumes WHERE character=? "
+        "ORDER BY sort_order, seq", (character,)).fetchall()
+
+
+def character_skins(character, path=None):
+    """One character's skins in display order, or None if the DB doesn't hold
+    that character."""
+    p = db_path(path)
+    if not p.exists():
+        return None
+    with _conn(p) as conn:
+        if not _has_skin_rows(conn, character):
+            return None
+        return [json.loads(dj) for _seq, _order, dj in _skin_rows(conn, character)]
+
+
+def _write_skin_diff(conn, character, rows, originals, skins) -> int:
+    """Persist `skins` against the rows it was loaded from. Entries are matched
+    to rows by object identity, so edited entries UPDATE in place, moved ones
+    only get a new sort_order, new ones INSERT and dropped ones DELETE.
+    Returns the number of rows written."""
+    by_obj = {id(obj): row for obj, row in zip(originals, rows)}
+    next_seq = max((seq for seq, _o, _d in rows), default=-1) + 1
+    kept = set()
+    changed = 0
+    for pos, item in enumerate(skins):
+        dj = json.dumps(item)
+        row = by_obj.get(id(item))
+        if row is not None and row[0] not in kept:
+            seq, order, old_dj = row
+            kept.add(seq)
+            if order != pos or old_dj != dj:
+                conn.execute("UPDATE costumes SET sort_order=?, data_json=? "
+                             "WHERE character=? AND seq=?", (pos, dj, character, seq))
+                changed += 1
+        else:
+            conn.execute("INSERT INTO costumes(character, seq, sort_order, data_json) "
+                         "VALUES(?,?,?,?)", (character, next_seq, pos, dj))
+            next_seq += 1
+            changed += 1
+    dropped = [(character, seq) for seq, _o, _d in rows if seq not in kept]
+    conn.executemany("DELETE FROM costumes WHERE character=? AND seq=?", dropped)
+    return changed + len(dropped)
+
+
+@contextmanager
+def skins_transaction(character, path=None, written=None):
+    """Yield `character`'s skins (a list to mutate IN PLACE) inside one write
+    transaction; on clean exit only the rows that changed are written, and
+    their count is stored in `written['rows']` when a dict is passed. An
+    exception in the body rolls back. Raises KeyError if the DB doesn't hold
+    the character (check has_character_skins first)."""
+    with _conn(path) as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if not _has_skin_rows(conn, character):
+                raise KeyError(character)
+            rows = _skin_rows(conn, character)
+            originals = [json.loads(dj) for _seq, _order, dj in rows]
+            skins = list(originals)
+            yield skins
+            changed = _write_skin_diff(conn, character, rows, originals, skins)
+            conn.commit()
+            if written is not None:
+                written['rows'] = changed
+        except BaseException:
+            conn.rollback()
+            raise
+
+
 # ─────────────────── high-level API used by core.metadata ───────────────────
 
 def load_blob(path=None):
@@ -0,0 +1,176 @@
+"""
+gc_disc.py -- minimal read-only GameCube disc image (.iso/.gcm) reader.
+
+Parses the boot header and the FST (file system table) so individual files can
+be hashed or copied straight out of the image, without extracting the whole
+disc with wit first. The ISO scanner uses it to stream every `Pl*` costume
+archive through its hash filter and only write the few that survive.
+
+Layout (all big-endian, offsets are absolute disc offsets on GameCube):
+
+    0x0000  game code (6 bytes)      0x001C  magic 0xC2339F3D
+    0x0020  game name (0x3E0 bytes)
+    0x0420  main.dol offset          0x0424  FST offset   0x0428  FST size
+
+FST entry (12 bytes): u8 flags (1 = directory) + u24 name offset, then
+    file: u32 data offset, u32 size
+    dir:  u32 parent index, u32 index one past the directory's last entry
+Entry 0 is the root directory; its second word is the total entry count, and
+the name string table follows the last entry.
+
+Only plain (uncompressed) images are supported. Compressed/scrubbed formats
+(NKit, CISO, GCZ, RVZ, WIA) don't carry a readable FST at 0x424 and raise
+DiscFormatError, so callers can fall back to wit.
+"""
+
+import hashlib
+import os
+import struct
+import threading
+from pathlib import Path
+from typing import NamedTuple
+
+GC_MAGIC = 0xC2339F3D
+_HEADER_SIZE = 0x440
+_CHUNK = 1 << 20
+
+
+class DiscFormatError(ValueError):
+    """The file is not a plain GameCube disc image this reader understands."""
+
+
+class DiscFile(NamedTuple):
+    path: str       # posix path inside the disc's file tree, e.g. 'PlFxNr.dat'
+    offset: int     # absolute byte offset in the image
+    size: int
+
+
+class GCDisc:
+    """An open GameCube disc image. Thread-safe: reads are serialized on one
+    handle, so several hashing threads can share a disc."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._f = open(self.path, 'rb')
+        self._lock = threading.Lock()
+        try:
+            self._image_size = os.fstat(self._f.fileno()).st_size
+            header = self._read_at(0, _HEADER_SIZE)
+            if len(header) < _HEADER_SIZE or \
+                    struct.unpack_from('>I', header, 0x1C)[0] != GC_MAGIC:
+                raise DiscFormatError(f'{self.path.name}: not a GameCube disc image')
+            self.game_id = header[0:6].decode('ascii', 'replace')
+            self.title = header[0x20:0x400].split(b'\0', 1)[0].decode(
+                'ascii', 'replace')
+            self.dol_offset, fst_offset, fst_size = struct.unpack_from(
+                '>III', header, 0x420)
+            if fst_offset + fst_size > self._image_size or fst_size < 12:
+                raise DiscFormatError(
+                    f'{self.path.name}: FST out of range (compressed image?)')
+            self.files = self._parse_fst(self._read_at(fst_offset, fst_size))
+        except Exception:
+            self._f.close()
+            raise
+
+    # -- lifecycle -------------------------------------------------------- #
+    def close(self):
+        self._f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # -- raw IO ----------------------------------------------------------- #
+    def _read_at(self, offset, size):
+        with self._lock:
+            self._f.seek(offset)
+            return self._f.read(size)
+
+    def _parse_fst(self, fst):
+        count = struct.unpack_from('>I', fst, 8)[0]
+        strings = count * 12
+        if count == 0 or strings > len(fst):
+            raise DiscFormatError(f'{self.path.name}: corrupt FST')
+
+        def name_at(off):
+            end = fst.find(b'\0', strings + off)
+            return fst[strings + off:end if end >= 0 else len(fst)].decode(
+                'ascii', 'replace')
+
+        files = []
+        # stack of (directory prefix, index one past its last entry)
+        dirs = [('', count)]
+        for i in range(1, count):
+            while len(dirs) > 1 and i >= dirs[-1][1]:
+                dirs.pop()
+            word, a, b = struct.unpack_from('>III', fst, i * 12)
+            name = name_at(word & 0xFFFFFF)
+            prefix = dirs[-1][0]
+            if word >> 24:
+                dirs.append((f'{prefix}{name}/', b))
+            else:
+                if a + b > self._image_size:
+                    raise DiscFormatError(
+                        f'{self.path.name}: {prefix}{name} lies past end of image')
+                files.append(DiscFile(prefix + name, a, b))
+        return files
+
+    # -- file access ------------------------------------------------------ #
+    def find(self, name):
+        """First file whose basename matches `name` (case-insensitive)."""
+        lower = name.lower()
+        for f in self.files:
+            if f.path.rsplit('/', 1)[-1].lower() == lower:
+                return f
+        return None
+
+    def iter_chunks(self, entry: DiscFile, chunk=_CHUNK):
+        pos, end = entry.offset, entry.offset + entry.size
+        while pos < end:
+            data = self._read_at(pos, min(chunk, end - pos))
+            if not data:
+                raise DiscFormatError(f'{self.path.name}: truncated at {pos:#x}')
+            pos += len(data)
+            yield data
+
+    def read(self, entry: DiscFile) -> bytes:
+        return b''.join(self.iter_chunks(entry))
+
+    def md5(self, entry: DiscFile) -> str:
+        h = hashlib.md5()
+        for data in self.iter_chunks(entry):
+            h.update(data)
+        return h.hexdigest()
+
+    def extract(self, entry: DiscFile, dest) -> Path:
+        dest = Path(dest)
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        tmp = dest.with_name(dest.name + '.part')
+        with open(tmp, 'wb') as out:
+            for data in self.iter_chunks(entry):
+                out.write(data)
+        os.replace(tmp, dest)
+        return dest
+
+    def dol_size(self) -> int:
+        """main.dol isn't in the FST; its size is the end of its furthest
+        text/data section (7 text + 11 data section offset/size tables)."""
+        head = self._read_at(self.dol_offset, 0x100)
+        offsets = struct.unpack_from('>18I', head, 0x00)
+        sizes = struct.unpack_from('>18I', head, 0x90)
+        return max([0x100] + [o + s for o, s in zip(offsets, sizes) if o and s])
+
+    def extract_dol(self, dest) -> Path:
+        return self.extract(DiscFile('main.dol', self.dol_offset, self.dol_size()),
+                            dest)
+
+
+def open_disc(path):
+    """GCDisc for a plain GameCube image, or None if the file isn't one
+    (compressed formats, Wii images, unreadable files)."""
+    try:
+        return GCDisc(path)
+    except (OSError, DiscFormatError, struct.error):
+        return None
@@ -19,11 +19,13 @@ import tempfile
 import threading
 import time
 import uuid
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait
 from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Callable, Optional
 
+from core import hash_index
 from core.config import (
     PROJECT_ROOT, RESOURCES_DIR, STORAGE_PATH, OUTPUT_PATH, VANILLA_ASSETS_DIR,
     get_subprocess_args,
@@ -34,7 +36,8 @@ from core.config import (
 from detect_character import DATParser
 from dat_processor import validate_for_slippi
 from generate_csp import HSDRAW_EXE, generate_csp
-from skinlab.csp_pool import active_pool
+from skinlab.csp_pool import active_pool, bulk
+from gc_disc import GCDisc, open_disc
 
 logger = logging.getLogger(__name__)
 
@@ -140,6 +143,24 @@ def _csp_parallelism() -> int:
 
 CSP_PARALLELISM = _csp_parallelism()
 
+
+def _hash_parallelism() -> int:
+    """Pick a worker count for the hash + identify stage.
+
+    Hashing is disk-bound and DATParser is light CPU work, so a few threads
+    per core saturate an SSD without thrashing a spinning disk much; the
+    default is the logical CPU count clamped to [2, 8]. Overridable via the
+    MEX_HASH_PARALLELISM env var (set 1 for slow HDDs / network shares).
+    """
+    env = os.environ.get('MEX_HASH_PARALLELISM')
+    if env and env.isdigit():
+        return max(1, min(int(env), 32))
+    cpus = os.cpu_count() or 2
+    return max(2, min(cpus, 8))
+
+
+HASH_PARALLELISM = _hash_parallelism()
+
 # HSDRawViewer.Program.RunCSPGeneration has two hardcoded Thread.Sleep
 # barriers (500ms after MainForm.OpenFile, 1000ms after form.Show) that
 # wait for async WinForms / OpenGL initialization to settle. When N
@@ -276,7 +297,7 @@ class IsoScanJob:
     job_id: str
     iso_paths: list[str]
     work_dir: Path
-    status: str = 'pending'  # pending | extracting | scanning | slippi | csp | complete | error
+    status: str = 'pending'  # pending | extracting | scanning | csp | complete | error
     phase_message: str = ''
     percent: int = 0
     error: Optional[str] = None
@@ -289,6 +310,9 @@ class IsoScanJob:
     })
     candidates: dict[str, list[CandidateSkin]] = field(default_factory=dict)
     preview_failures: list[dict] = field(default_factory=list)
+    # Per-stage pipeline rates (see _StageMeter.snapshot), refreshed with
+    # every progress event.
+    throughput: dict = field(default_factory=dict)
     created_at: float = field(default_factory=time.time)
     cancelled: bool = False
 
@@ -312,6 +336,7 @@ class IsoScanJob:
             'percent': self.percent,
             'error': self.error,
             'stats': self.stats,
+            'throughput': self.throughput,
             'preview_failures': self.preview_failures,
             'characters': chars,
             'total_new': sum(len(v) for v in self.candidates.values()),
@@ -341,53 +366,13 @@ def _load_vault_hashes() -> set[str]:
     of the source DAT, but the zip on disk stores the slippi-FIXED bytes.
     Those have different hashes. So when a modder distributes a skin in
     slippi-safe form and the user already has it, scanning that ISO would
-    leak it as 'new' unless we also include the stored-zip hash. Solution:
-    walk every storage/<Char>/*.zip, hash the inner DAT, add it to the set.
-    Cheap one-shot at scan start.
-    """
-    out: set[str] = set()
-    metadata_file = STORAGE_PATH / 'metadata.json'
-    if metadata_file.exists():
-        try:
-            with open(metadata_file, 'r') as f:
-                metadata = json.load(f)
-            for char_data in metadata.get('characters', {}).values():
-                for skin in char_data.get('skins', []):
-                    h = skin.get('dat_hash')
-                    if h:
-                        out.add(h)
-        except Exception as e:
-            logger.warning(f"[iso-scan][vault] metadata.json read failed: {e}")
-
-    metadata_count = len(out)
-
-    # Layer in hashes of the actual DAT bytes stored in each vault zip. These
-    # may differ from metadata's dat_hash when auto_fix changed the file at
-    # import time.
-    import zipfile as _zipfile
-    zip_count = 0
-    if STORAGE_PATH.exists():
-        for char_dir in STORAGE_PATH.iterdir():
-            if not char_dir.is_dir() or char_dir.name in ('xdelta', 'das', 'bundles'):
-                continue
-            for zip_path in char_dir.glob('*.zip'):
-                try:
-                    with _zipfile.ZipFile(zip_path, 'r') as zf:
-                        for inner in zf.namelist():
-                            lower = inner.lower()
-                            if lower.endswith(('.dat', '.usd')) and 'plco' not in lower:
-                                out.add(hashlib.md5(zf.read(inner)).hexdigest())
-                                zip_count += 1
-                                break  # one DAT per costume zip
-                except Exception as e:
-                    logger.debug(f"[iso-scan][vault] could not hash {zip_path}: {e}")
+    leak it as 'new' unless we also include the stored-zip hash.
 
-    logger.info(
-        f"[iso-scan][vault] loaded {len(out)} unique hashes "
-        f"({metadata_count} from metadata.json dat_hash, "
-        f"{zip_count} from vault zip contents)"
-    )
-    return out
+    Both come from the persistent core.hash_index, which only re-hashes zips
+    whose size/mtime changed since the last scan (import/delete keep it
+    current), so a warm scan start is a stat pass, not a vault re-hash.
+    """
+    return hash_index.vault_hashes(STORAGE_PATH)
 
 
 # Known vanilla DAT hashes that aren't always present in user vanilla folders.
@@ -403,14 +388,9 @@ _SUPPLEMENTAL_VANILLA_HASHES = {
 
 
 def _load_vanilla_hashes() -> set[str]:
-    out = set()
     if not VANILLA_ASSETS_DIR.exists():
-        return out
-    for dat in VANILLA_ASSETS_DIR.rglob('*.dat'):
-        try:
-            out.add(_md5_file(dat))
-        except Exception:
-            pass
+        return set()
+    out = hash_index.vanilla_hashes(VANILLA_ASSETS_DIR, storage=STORAGE_PATH)
 
     # Layer on the supplemental hashes and report which slots they cover so
     # gaps in the user's vanilla folder are visible at scan start.
@@ -1017,6 +997,260 @@ def _extract_iso(iso_path: Path, dest_dir: Path) -> bool:
         return False
 
 
+def _open_disc_native(iso_path: Path, dest_dir: Path) -> Optional[GCDisc]:
+    """Open a plain GameCube image for in-place reads and write out just the
+    stock-icon inputs (main.dol + IfAll) under dest_dir, in the same
+    sys/ + files/ layout wit produces. None if the image needs wit."""
+    disc = open_disc(iso_path)
+    if disc is None:
+        return None
+    try:
+        dol = dest_dir / 'sys' / 'main.dol'
+        if not dol.exists():
+            disc.extract_dol(dol)
+        for name in ('IfAll.usd', 'IfAll.dat'):
+            entry = disc.find(name)
+            if entry is not None:
+                target = dest_dir / 'files' / entry.path
+                if not target.exists():
+                    disc.extract(entry, target)
+    except Exception as e:
+        logger.warning(f"[iso-scan] native read of {iso_path.name} failed: {e}")
+        disc.close()
+        return None
+    logger.info(
+        f"[iso-scan] {iso_path.name}: native read ({disc.game_id}, "
+        f"{len(disc.files)} files in FST)"
+    )
+    return disc
+
+
+def _hash_scan_file(fp: str, disc_files: dict) -> str:
+    """md5 of a scan file — streamed from the disc image when it hasn't been
+    materialized, so filtered-out files are never written."""
+    src = disc_files.get(fp)
+    if src is not None and not os.path.exists(fp):
+        disc, entry = src
+        return disc.md5(entry)
+    return _md5_file(fp)
+
+
+def _materialize(fp: str, disc_files: dict) -> None:
+    """Copy a disc-resident scan file to its on-disk path (no-op otherwise)."""
+    src = disc_files.get(fp)
+    if src is not None and not os.path.exists(fp):
+        disc, entry = src
+        disc.extract(entry, fp)
+
+
+def _identify(fp: str) -> dict:
+    """Parse a costume DAT and name its character (runs on the hash pool)."""
+    parser = DATParser(fp)
+    parser.read_dat()
+    if not parser.is_character_costume():
+        logger.debug(
+            f"[iso-scan][id] DATA_MOD {os.path.basename(fp)} — no Ply*5K symbol"
+        )
+        return {'kind': 'data_mod'}
+    character, symbol = parser.detect_character()
+    # Filename-prefix override: PlBoXX.dat and PlClXX.dat both
+    # carry an "ftDataBoy" symbol, so symbol-based detection tags
+    # wireframes as Young Link. The 2-char filename prefix is the
+    # authoritative signal — trust it when it disagrees.
+    filename_character = _character_from_filename(fp)
+    if filename_character and filename_character != character:
+        logger.warning(
+            f"[iso-scan][id] OVERRIDE {os.path.basename(fp)}: "
+            f"symbol={symbol!r} said {character!r} but filename "
+            f"prefix says {filename_character!r} — trusting filename"
+        )
+        character = filename_character
+    if not character:
+        root_syms = [n.get('symbol') for n in parser.root_nodes][:5]
+        logger.warning(
+            f"[iso-scan][id] UNKNOWN {os.path.basename(fp)} — "
+            f"root symbols: {root_syms}"
+        )
+        return {'kind': 'unknown'}
+    return {
+        'kind': 'costume', 'character': character, 'symbol': symbol,
+        'costume_code': parser.get_character_filename() or os.path.basename(fp),
+    }
+
+
+def _hash_one(fp: str, disc_files: dict, vault_hashes: set, vanilla_hashes: set) -> dict:
+    """Hash one scan file and tag it if the vault / vanilla set already has it.
+
+    Runs on the hash pool and only READS the file (disc-resident ones straight
+    from the ISO); extraction and parsing wait until the order-dependent
+    duplicate check has passed it (see _identify_one)."""
+    try:
+        src = disc_files.get(fp)
+        size = src[1].size if src is not None else os.path.getsize(fp)
+        file_hash = _hash_scan_file(fp, disc_files)
+    except Exception:
+        return {'kind': 'error', 'bytes': 0}
+    out = {'hash': file_hash, 'bytes': size}
+    if file_hash in vault_hashes:
+        out['kind'] = 'existing'
+    elif file_hash in vanilla_hashes:
+        out['kind'] = 'vanilla'
+    return out
+
+
+def _identify_one(fp: str, disc_files: dict) -> dict:
+    """Extract and identify one scan file that survived every hash filter
+    (runs on the hash pool)."""
+    try:
+        _materialize(fp, disc_files)
+        return _identify(fp)
+    except Exception as e:
+        logger.warning(f"[iso-scan][id] ERROR parsing {os.path.basename(fp)}: {e}")
+        return {'kind': 'parse_error'}
+
+
+def _iter_scanned(all_files, pool, window: int, fn):
+    """Run fn(path) over all_files on `pool`, keeping at most `window` in
+    flight, and yield (path, source, result) in input order."""
+    pending = deque()
+    try:
+        for fp, source in all_files:
+            pending.append((fp, source, pool.submit(fn, fp)))
+            if len(pending) >= window:
+                fp0, src0, fut = pending.popleft()
+                yield fp0, src0, fut.result()
+        while pending:
+            fp0, src0, fut = pending.popleft()
+            yield fp0, src0, fut.result()
+    finally:
+        for _, _, fut in pending:
+            fut.cancel()
+
+
+def _keep_hashed(job: IsoScanJob, fp: str, res: dict, seen_hashes: set) -> bool:
+    """Apply the hash-only scan filters to one _hash_one result, in walk
+    order: False (with the reason counted) for errors, vault / vanilla
+    matches, duplicates of an earlier file and custom-fighter slots. Only
+    files that pass are extracted and parsed."""
+    if res.get('kind') == 'error':
+        job.stats['errors'] += 1
+        return False
+    if res.get('kind') in ('existing', 'vanilla'):
+        job.stats[res['kind']] += 1
+        return False
+    file_hash = res['hash']
+    if file_hash in seen_hashes:
+        job.stats['dupes'] += 1
+        return False
+    seen_hashes.add(file_hash)
+
+    # Custom-fighter costume slots (PlQp*, ...) are NOT vanilla-char
+    # skins: their content symbols still say e.g. Fox (cloned from
+    # Fox), so the symbol-based identification would misfile
+    # them. They're handled by the custom-characters scan instead.
+    if _is_custom_fighter_file(fp):
+        job.stats['custom_fighter'] += 1
+        logger.info(
+            f"[iso-scan][id] CUSTOM_FIGHTER {os.path.basename(fp)} — "
+            "non-vanilla Pl code; belongs to a custom character"
+        )
+        return False
+    return True
+
+
+def _filter_identified(job: IsoScanJob, fp: str, source: str, file_hash: str,
+                       res: dict, stock_maps: dict) -> Optional[dict]:
+    """Turn one _identify_one result into its pre-candidate dict (or None,
+    with the reason counted)."""
+    kind = res.get('kind')
+    if kind == 'data_mod':
+        job.stats['data_mod'] += 1
+        return None
+    if kind == 'unknown':
+        job.stats['unknown'] += 1
+        return None
+    if kind != 'costume':
+        job.stats['errors'] += 1
+        return None
+
+    character, costume_code = res['character'], res['costume_code']
+    # Drop characters the user has marked uninteresting.
+    if character in SKIP_CHARACTERS:
+        logger.info(
+            f"[iso-scan][id] SKIP {character} ({costume_code}) — in SKIP_CHARACTERS"
+        )
+        return None
+
+    logger.info(
+        f"[iso-scan][id] {character:22} code={costume_code!r:14} "
+        f"symbol={res['symbol']!r} src={source!r}"
+    )
+    return {
+        'path': fp, 'hash': file_hash,
+        'character': character, 'costume_code': costume_code,
+        'source_iso': source, 'symbol': res['symbol'],
+        'stock_path': stock_maps.get(source, {}).get(_stock_lookup_key(costume_code)),
+    }
+
+
+def _check_and_build(idx: int, c: dict, skins_dir: Path, job: IsoScanJob,
+                     vault_hashes: set, vanilla_hashes: set):
+    """CSP-pool task: drop the candidate if its Slippi-fixed bytes are already
+    in the vault / vanilla set, otherwise stage it and render its CSP."""
+    if job.cancelled:
+        return None, None
+    fixed = _slippi_fixed_hash(c['path'])
+    if fixed and (fixed in vault_hashes or fixed in vanilla_hashes):
+        return None, 'slippi_matched'
+    return _build_candidate(idx, c, skins_dir, job)
+
+
+class _StageMeter:
+    """Per-stage throughput for progress events: hash files/s + MB/s and
+    CSP renders/min, throttled to one report per REPORT_INTERVAL_S."""
+
+    REPORT_INTERVAL_S = 0.5
+
+    def __init__(self, total_files: int):
+        self.total = total_files
+        self.files = 0
+        self.bytes = 0
+        self.t0 = time.time()
+        self.hash_done_at: Optional[float] = None
+        self._last = 0.0
+
+    def add(self, nbytes: int):
+        self.files += 1
+        self.bytes += nbytes
+        if self.files >= self.total and self.hash_done_at is None:
+            self.hash_done_at = time.time()
+
+    def due(self, force: bool = False) -> bool:
+        now = time.time()
+        if force or now - self._last >= self.REPORT_INTERVAL_S:
+            self._last = now
+            return True
+        return False
+
+    def snapshot(self, csp_done: int, csp_submitted: int = 0) -> dict:
+        now = time.time()
+        hash_secs = max(1e-6, (self.hash_done_at or now) - self.t0)
+        csp_secs = max(1e-6, now - self.t0)
+        return {
+            'hash': {
+                'done': self.files, 'total': self.total,
+                'files_per_s': round(self.files / hash_secs, 1),
+                'mb_per_s': round(self.bytes / hash_secs / (1 << 20), 1),
+                'workers': HASH_PARALLELISM,
+            },
+            'csp': {
+                'done': csp_done, 'submitted': csp_submitted,
+                'per_min': round(csp_done / csp_secs * 60, 1),
+                'workers': CSP_PARALLELISM,
+            },
+        }
+
+
 # ---------- Public API ----------
 
 def start_scan(iso_paths: list[str], on_event: Callable[[str, dict], None]) -> IsoScanJob:
@@ -1084,6 +1318,7 @@ def _emit(job: IsoScanJob, on_event, status: str, message: str, percent: int):
             'message': message,
             'percent': percent,
             'stats': job.stats,
+            'throughput': job.throughput,
         })
     except Exception as e:
         logger.warning(f"emit failed: {e}")
@@ -1097,31 +1332,41 @@ def _run_scan(job: IsoScanJob, on_event):
     )
     for p in job.iso_paths:
         logger.info(f"[iso-scan]   ISO: {p}")
+    discs: dict[str, GCDisc] = {}  # source_iso_stem -> open native disc
     try:
-        # --- Phase 1: extract ---
+        # --- Phase 1: open / extract ---
+        # Plain GameCube images are read in place through their FST: only the
+        # stock-icon inputs (main.dol, IfAll) are written now, and costume
+        # archives are hashed straight out of the image in Phase 2 — just the
+        # ones that survive the hash filter ever touch disk. wit is only
+        # needed for images the native reader can't open (compressed formats).
         extract_root = job.work_dir / "extracted"
         extract_root.mkdir(exist_ok=True)
 
-        if not wit_available():
-            job.error = (
-                "wit.exe not found. Place wit-v3.05a-r8638-cygwin64 in "
-                "<project>/tools/. Download: https://wit.wiimm.de/"
-            )
-            job.status = 'error'
-            on_event('iso_scan_error', {'job_id': job.job_id, 'error': job.error})
-            return
-
         for i, iso_path_str in enumerate(job.iso_paths):
             if job.cancelled:
                 break
             iso_path = Path(iso_path_str)
             pct = int(5 + (i / max(1, len(job.iso_paths))) * 15)
+            dest = extract_root / iso_path.stem
+            disc = _open_disc_native(iso_path, dest)
+            if disc is not None:
+                _emit(job, on_event, 'extracting',
+                      f"Reading {iso_path.name} ({i+1}/{len(job.iso_paths)})", pct)
+                discs[iso_path.stem] = disc
+                continue
             _emit(job, on_event, 'extracting',
                   f"Extracting {iso_path.name} ({i+1}/{len(job.iso_paths)})", pct)
-            dest = extract_root / iso_path.stem
             if dest.exists():
                 # Reuse existing extraction
                 continue
+            if not wit_available():
+                logger.warning(
+                    f"[iso-scan] {iso_path.name} is not a plain GameCube image "
+                    "and wit.exe is not available to extract it"
+                )
+                job.stats['errors'] += 1
+                continue
             ok = _extract_iso(iso_path, dest)
             if not ok:
                 shutil.rmtree(dest, ignore_errors=True)
@@ -1131,6 +1376,17 @@ def _run_scan(job: IsoScanJob, on_event):
             _finalize(job, on_event, cancelled=True)
             return
 
+        if not discs and not any(extract_root.iterdir()) and not wit_available():
+            job.error = (
+                "None of the selected images could be read directly, and "
+                "wit.exe (needed for compressed images) was not found. Place "
+                "wit-v3.05a-r8638-cygwin64 in <project>/tools/. "
+                "Download: https://wit.wiimm.de/"
+            )
+            job.status = 'error'
+            on_event('iso_scan_error', {'job_id': job.job_id, 'error': job.error})
+            return
+
         # --- Phase 2: walk + hash filter ---
         _emit(job, on_event, 'scanning', "Loading vault & vanilla hashes...", 22)
         vault_hashes = _load_vault_hashes()
@@ -1139,9 +1395,20 @@ def _run_scan(job: IsoScanJob, on_event):
         job.stats['stock_icons'] = sum(len(v) for v in stock_maps.values())
 
         all_files: list[tuple[str, str]] = []  # (path, source_iso_stem)
+        # Costume archives still inside a disc image: the on-disk path they
+        # get materialized to -> (disc, FST entry).
+        disc_files: dict[str, tuple] = {}
         for iso_dir in extract_root.iterdir():
             if not iso_dir.is_dir():
                 continue
+            disc = discs.get(iso_dir.name)
+            if disc is not None:
+                for entry in disc.files:
+                    fp = os.path.join(str(iso_dir), 'files', *entry.path.split('/'))
+                    if _is_character_file(fp):
+                        all_files.append((fp, iso_dir.name))
+                        disc_files[fp] = (disc, entry)
+                continue
             for root, _, files in os.walk(iso_dir):
                 for f in files:
                     fp = os.path.join(root, f)
@@ -1150,108 +1417,6 @@ def _run_scan(job: IsoScanJob, on_event):
 
         job.stats['total_files'] = len(all_files)
 
-        # Each pre-candidate is a dict to keep things readable.
-        pre_candidates: list[dict] = []
-        seen_hashes: set[str] = set()
-
-        for i, (fp, source) in enumerate(all_files):
-            if job.cancelled:
-                break
-            if i % 100 == 0:
-                pct = 22 + int((i / max(1, len(all_files))) * 30)
-                _emit(job, on_event, 'scanning',
-                      f"Hashing files {i}/{len(all_files)}", pct)
-            try:
-                file_hash = _md5_file(fp)
-            except Exception:
-                job.stats['errors'] += 1
-                continue
-
-            if file_hash in vault_hashes:
-                job.stats['existing'] += 1
-                continue
-            if file_hash in vanilla_hashes:
-                job.stats['vanilla'] += 1
-                continue
-            if file_hash in seen_hashes:
-                job.stats['dupes'] += 1
-                continue
-            seen_hashes.add(file_hash)
-
-            # Custom-fighter costume slots (PlQp*, ...) are NOT vanilla-char
-            # skins: their content symbols still say e.g. Fox (cloned from
-            # Fox), so the symbol-based identification below would misfile
-            # them. They're handled by the custom-characters scan instead.
-            if _is_custom_fighter_file(fp):
-                job.stats['custom_fighter'] += 1
-                logger.info(
-                    f"[iso-scan][id] CUSTOM_FIGHTER {os.path.basename(fp)} — "
-                    "non-vanilla Pl code; belongs to a custom character"
-                )
-                continue
-
-            # Identify character
-            try:
-                parser = DATParser(fp)
-                parser.read_dat()
-                if not parser.is_character_costume():
-                    job.stats['data_mod'] += 1
-                    logger.debug(
-                        f"[iso-scan][id] DATA_MOD {os.path.basename(fp)} — no Ply*5K symbol"
-                    )
-                    continue
-                character, symbol = parser.detect_character()
-                # Filename-prefix override: PlBoXX.dat and PlClXX.dat both
-                # carry an "ftDataBoy" symbol, so symbol-based detection tags
-                # wireframes as Young Link. The 2-char filename prefix is the
-                # authoritative signal — trust it when it disagrees.
-                filename_character = _character_from_filename(fp)
-                if filename_character and filename_character != character:
-                    logger.warning(
-                        f"[iso-scan][id] OVERRIDE {os.path.basename(fp)}: "
-                        f"symbol={symbol!r} said {character!r} but filename "
-                        f"prefix says {filename_character!r} — trusting filename"
-                    )
-                    character = filename_character
-                if not character:
-                    job.stats['unknown'] += 1
-                    root_syms = [n.get('symbol') for n in parser.root_nodes][:5]
-                    logger.warning(
-                        f"[iso-scan][id] UNKNOWN {os.path.basename(fp)} — "
-                        f"root symbols: {root_syms}"
-                    )
-                    continue
-                costume_code = parser.get_character_filename() or os.path.basename(fp)
-            except Exception as e:
-                job.stats['errors'] += 1
-                logger.warning(
-                    f"[iso-scan][id] ERROR parsing {os.path.basename(fp)}: {e}"
-                )
-                continue
-
-            # Drop characters the user has marked uninteresting.
-            if character in SKIP_CHARACTERS:
-                logger.info(
-                    f"[iso-scan][id] SKIP {character} ({costume_code}) — in SKIP_CHARACTERS"
-                )
-                continue
-
-            logger.info(
-                f"[iso-scan][id] {character:22} code={costume_code!r:14} "
-                f"symbol={symbol!r} src={source!r}"
-            )
-            pre_candidates.append({
-                'path': fp, 'hash': file_hash,
-                'character': character, 'costume_code': costume_code,
-                'source_iso': source, 'symbol': symbol,
-                'stock_path': stock_maps.get(source, {}).get(_stock_lookup_key(costume_code)),
-            })
-
-        if job.cancelled:
-            _finalize(job, on_event, cancelled=True)
-            return
-
-        # --- Phase 2b: pair Ice Climbers Popo + Nana by (source_iso, color suffix) ---
         # Pool of EVERY Nana DAT in each ISO (incl. vanilla ones filtered out as
         # candidates) so a modded Popo with an unchanged Nana still gets the
         # correct same-colour Nana in its CSP instead of rendering solo.
@@ -1261,82 +1426,149 @@ def _run_scan(job: IsoScanJob, on_event):
             if stem.startswith('PlNn') and len(stem) >= 6:
                 slot = (ext.lstrip('.')[:1] or 'd').lower()
                 nana_pool.setdefault((source, stem[-2:], slot), fp)
-        candidates = _pair_ice_climbers(pre_candidates, nana_pool)
-
-        # --- Phase 3: Slippi-fixed hash check (against both vault AND vanilla) ---
-        survivors: list[dict] = []
-        for i, c in enumerate(candidates):
-            if job.cancelled:
-                break
-            if i % 25 == 0:
-                pct = 52 + int((i / max(1, len(candidates))) * 18)
-                _emit(job, on_event, 'slippi',
-                      f"Slippi-fix check {i}/{len(candidates)}", pct)
-            fixed = _slippi_fixed_hash(c['path'])
-            if fixed and (fixed in vault_hashes or fixed in vanilla_hashes):
-                job.stats['slippi_matched'] += 1
-                continue
-            survivors.append(c)
 
-        if job.cancelled:
-            _finalize(job, on_event, cancelled=True)
-            return
-
-        # --- Phase 4: copy DATs + generate CSPs into work dir (parallel) ---
+        # --- Phases 2-4 as one bounded pipeline ---
+        # hash+identify (HASH_PARALLELISM threads, consumed in walk order so
+        # duplicate resolution stays deterministic) -> vault/vanilla/dupe
+        # filter -> Slippi-fixed hash check + CSP render (CSP_PARALLELISM
+        # threads). Candidates start rendering as soon as they pass the
+        # filters; only Ice Climbers wait for the hash stage to finish, since
+        # Popo/Nana pairing needs every half of the ISO set.
         skins_dir = job.work_dir / "skins"
         skins_dir.mkdir(exist_ok=True)
 
         results: dict[int, Optional[CandidateSkin]] = {}
         results_lock = threading.Lock()
-        completed_counter = {'n': 0, 'errors': 0, 'preview_failed': 0}
-
-        total = len(survivors)
-        _emit(job, on_event, 'csp',
-              f"Generating thumbnails 0/{total} (×{CSP_PARALLELISM} workers)", 70)
+        completed_counter = {'n': 0, 'errors': 0, 'preview_failed': 0,
+                             'slippi_matched': 0}
+        futures: dict = {}
+        seen_hashes: set[str] = set()
+        held_ic: list[dict] = []
+        meter = _StageMeter(len(all_files))
+        job.throughput = meter.snapshot(0)
 
-        # Reuse a handful of persistent --csp-server workers across every costume
+        def on_done(fut, idx):
+            try:
+                candidate, error_kind = fut.result()
+            except Exception as e:
+                logger.warning(f"CSP worker for #{idx} crashed: {e}")
+                candidate, error_kind = None, 'worker_crash'
+            with results_lock:
+                results[idx] = candidate
+                if error_kind in ('preview_failed', 'slippi_matched'):
+                    completed_counter[error_kind] += 1
+                elif error_kind:
+                    completed_counter['errors'] += 1
+                completed_counter['n'] += 1
+
+        def submit(c):
+            idx = len(futures)
+            fut = csp_ex.submit(bulk(_check_and_build), idx, c, skins_dir, job,
+                                vault_hashes, vanilla_hashes)
+            futures[fut] = idx
+            fut.add_done_callback(lambda f, i=idx: on_done(f, i))
+
+        def report(force=False):
+            if not meter.due(force):
+                return
+            with results_lock:
+                done = completed_counter['n']
+            job.throughput = meter.snapshot(done, len(futures))
+            hashed = meter.files
+            if hashed < len(all_files):
+                pct = 22 + int((hashed / max(1, len(all_files))) * 30)
+                _emit(job, on_event, 'scanning',
+                      f"Hashing files {hashed}/{len(all_files)} · "
+                      f"thumbnails {done}/{len(futures)}", pct)
+            else:
+                pct = 52 + int((done / max(1, len(futures))) * 46)
+                _emit(job, on_event, 'csp',
+                      f"Generating thumbnails {done}/{len(futures)} "
+                      f"(×{CSP_PARALLELISM} workers)", pct)
+
+        _emit(job, on_event, 'scanning',
+              f"Hashing files 0/{len(all_files)} (×{HASH_PARALLELISM} workers)", 22)
+
+        # Reuse the backend's persistent --csp-server workers across every costume
         # instead of spawning one HSDRawViewer process per costume (~9x render
-        # throughput). generate_csp routes through the pool while it's active and
-        # falls back to a one-shot process for any costume the pool fails to
-        # render, so a flaky worker or bad DAT never blocks the scan. Kill switch:
-        # MEX_CSP_SERVER=0.
+        # throughput); renders queue in the BULK lane behind interactive ones.
+        # generate_csp routes through the service and falls back to a one-shot
+        # process for any costume the pool fails to render, so a flaky worker or
+        # bad DAT never blocks the scan. Kill switch: MEX_CSP_SERVER=0.
         with active_pool(workers=CSP_PARALLELISM), \
-                ThreadPoolExecutor(max_workers=CSP_PARALLELISM) as ex:
-            futures = {
-                ex.submit(_build_candidate, i, c, skins_dir, job): i
-                for i, c in enumerate(survivors)
-            }
-            for fut in as_completed(futures):
+                ThreadPoolExecutor(max_workers=CSP_PARALLELISM) as csp_ex, \
+                ThreadPoolExecutor(max_workers=HASH_PARALLELISM) as hash_ex:
+            # Two pool stages chained in walk order: hash every file, then
+            # extract + parse only the ones no hash filter dropped (vault,
+            # vanilla, an earlier duplicate), so known files never touch disk.
+            hashed = _iter_scanned(
+                all_files, hash_ex, HASH_PARALLELISM * 4,
+                lambda fp: _hash_one(fp, disc_files, vault_hashes, vanilla_hashes))
+
+            def survivors():
+                for fp, source, res in hashed:
+                    if job.cancelled:
+                        return
+                    meter.add(res.get('bytes', 0))
+                    report()
+                    if _keep_hashed(job, fp, res, seen_hashes):
+                        yield fp, (source, res['hash'])
+
+            kept = survivors()
+            identified = _iter_scanned(
+                kept, hash_ex, HASH_PARALLELISM * 4,
+                lambda fp: _identify_one(fp, disc_files))
+            try:
+                for fp, (source, file_hash), res in identified:
+                    if job.cancelled:
+                        break
+                    c = _filter_identified(job, fp, source, file_hash, res, stock_maps)
+                    if c is None:
+                        continue
+                    if c['character'] in ('Ice Climbers', 'Ice Climbers (Nana)'):
+                        held_ic.append(c)
+                    else:
+                        submit(c)
+            finally:
+                identified.close()
+                kept.close()
+                hashed.close()
+
+            if not job.cancelled:
+                # Pair Ice Climbers Popo + Nana by (source_iso, color suffix).
+                for c in _pair_ice_climbers(held_ic, nana_pool):
+                    if c.get('paired_path'):
+                        try:
+                            _materialize(c['paired_path'], disc_files)
+                        except Exception as e:
+                            logger.warning(
+                                f"[iso-scan][ic] could not read paired DAT "
+                                f"{os.path.basename(c['paired_path'])}: {e}"
+                            )
+                            c.pop('paired_path', None)
+                            c.pop('paired_costume_code', None)
+                    submit(c)
+
+            report(force=True)
+            pending = set(futures)
+            while pending:
                 if job.cancelled:
-                    for f in futures:
+                    for f in pending:
                         f.cancel()
                     break
-                idx = futures[fut]
-                try:
-                    candidate, error_kind = fut.result()
-                except Exception as e:
-                    logger.warning(f"CSP worker for #{idx} crashed: {e}")
-                    candidate, error_kind = None, 'worker_crash'
-                with results_lock:
-                    results[idx] = candidate
-                    if error_kind == 'preview_failed':
-                        completed_counter['preview_failed'] += 1
-                    elif error_kind:
-                        completed_counter['errors'] += 1
-                    completed_counter['n'] += 1
-                    n = completed_counter['n']
-                if n % 5 == 0 or n == total:
-                    pct = 70 + int((n / max(1, total)) * 28)
-                    _emit(job, on_event, 'csp',
-                          f"Generating thumbnails {n}/{total} (×{CSP_PARALLELISM} workers)", pct)
+                _, pending = wait(pending, timeout=0.5)
+                report()
+            report(force=True)
 
         # Stitch results back together in submission order so the UI grid is stable.
-        for i in range(total):
+        for i in range(len(futures)):
             cand = results.get(i)
             if cand is not None:
                 job.candidates.setdefault(cand.character, []).append(cand)
         job.stats['errors'] += completed_counter['errors']
         job.stats['preview_failed'] += completed_counter['preview_failed']
+        job.stats['slippi_matched'] += completed_counter['slippi_matched']
+        logger.info(f"[iso-scan] throughput: {job.throughput}")
 
         _finalize(job, on_event, cancelled=job.cancelled)
 
@@ -1348,6 +1580,9 @@ def _run_scan(job: IsoScanJob, on_event):
             on_event('iso_scan_error', {'job_id': job.job_id, 'error': str(e)})
         except Exception:
             pass
+    finally:
+        for disc in discs.values():
+            disc.close()
 
 
 def _build_candidate(idx: int, c: dict, skins_dir: Path, job: IsoScanJob) -> tuple[Optional[CandidateSkin], Optional[str]]:
@@ -3,8 +3,19 @@ MEX API Backend - Flask server for MexManager operations.
 
 Main entry point that initializes the Flask app, registers all blueprints,
 and handles startup/shutdown.
+
+Startup side effects (log setup, output-folder cleanup, vault DB migration,
+blueprint registration, background probes) live in init_app(), run only by
+the real backend: stock_gen.generate_stocks' process-pool workers re-import
+this script (as __mp_main__ under spawn, or from the top in a frozen build)
+and must not clean up or re-initialize anything.
 """
 
+# Frozen builds: a process-pool worker must turn into a worker right here,
+# before anything else in this script runs.
+import multiprocessing
+multiprocessing.freeze_support()
+
 import os
 import sys
 import socket
@@ -93,81 +104,8 @@ CORS(app, resources={
 socketio = SocketIO(app, cors_allowed_origins="*", async_mode='threading')
 set_socketio(socketio)
 
-# Ensure directories exist
-STORAGE_PATH.mkdir(exist_ok=True)
-LOGS_PATH.mkdir(exist_ok=True)
-MEX_PROJECT_PATH.parent.mkdir(exist_ok=True)
-
-# Configure logging
-log_file = LOGS_PATH / f"mex_api_{datetime.now().strftime('%Y%m%d')}.log"
-logging.basicConfig(
-    level=logging.DEBUG,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        RotatingFileHandler(log_file, maxBytes=10*1024*1024, backupCount=5),
-        logging.StreamHandler(sys.stdout)
-    ]
-)
 logger = logging.getLogger(__name__)
 
-# Clean up output folder on startup
-cleanup_output_folder()
-
-# Initialize extras API with dependencies
-init_extras_api(STORAGE_PATH, get_project_files_dir, HSDRAW_EXE)
-
-# Vault storage backend: when the SQLite backend is selected (NUCLEUS_VAULT_DB),
-# make sure the DB is built from metadata.json before serving — otherwise the
-# vault would read as empty. On any failure, fall back to JSON so the user is
-# never blocked or shown a blank vault. Default (json) mode is a no-op.
-import core.config as _core_config
-from core import vault as _vault_store
-if _core_config.VAULT_BACKEND == 'db':
-    try:
-        _result = _vault_store.ensure_migrated()
-        logger.info("Vault DB backend ready: %s", _result)
-    except Exception as _e:
-        logger.error("Vault DB migration failed; falling back to JSON backend: %s", _e, exc_info=True)
-        _core_config.VAULT_BACKEND = 'json'
-
-# Register all blueprints
-app.register_blueprint(extras_bp)
-app.register_blueprint(assets_bp)
-app.register_blueprint(project_bp)
-app.register_blueprint(costumes_bp)
-app.register_blueprint(export_bp)
-app.register_blueprint(storage_costumes_bp)
-app.register_blueprint(storage_stages_bp)
-app.register_blueprint(vault_backup_bp)
-app.register_blueprint(mod_export_bp)
-app.register_blueprint(import_bp)
-app.register_blueprint(das_bp)
-app.register_blueprint(poses_bp)
-app.register_blueprint(setup_bp)
-app.register_blueprint(slippi_bp)
-app.register_blueprint(xdelta_bp)
-app.register_blueprint(bundles_bp)
-app.register_blueprint(viewer_bp)
-app.register_blueprint(settings_bp)
-app.register_blueprint(iso_scan_bp)
-app.register_blueprint(menus_bp)
-app.register_blueprint(custom_stages_bp)
-app.register_blueprint(custom_characters_bp)
-app.register_blueprint(character_sounds_bp)
-app.register_blueprint(stage_song_packs_bp)
-app.register_blueprint(test_in_game_bp)
-app.register_blueprint(skin_lab_bp)
-app.register_blueprint(skin_lab_ai_bp)
-app.register_blueprint(stage_lab_ai_bp)
-app.register_blueprint(ai_engine_bp)
-app.register_blueprint(model_lab_bp)
-
-# Warm the Ollama probe in the background: starting the bundled server +
-# reachability timeouts can take seconds, and without this the FIRST open of
-# Settings/AI Studio is the one that pays for it (the planner UI "pops in").
-from blueprints.ai_engine import warm_ollama_probe  # noqa: E402
-warm_ollama_probe()
-
 
 # SocketIO connection handlers
 @socketio.on('connect')
@@ -182,6 +120,92 @@ def handle_disconnect():
     print('Client disconnected')
 
 
+_initialized = False
+
+
+def init_app():
+    """One-time backend startup: directories, logging, output cleanup, the
+    vault store, blueprints and background probes. Idempotent."""
+    global _initialized
+    if _initialized:
+        return
+    _initialized = True
+
+    # Ensure directories exist
+    STORAGE_PATH.mkdir(exist_ok=True)
+    LOGS_PATH.mkdir(exist_ok=True)
+    MEX_PROJECT_PATH.parent.mkdir(exist_ok=True)
+
+    # Configure logging
+    log_file = LOGS_PATH / f"mex_api_{datetime.now().strftime('%Y%m%d')}.log"
+    logging.basicConfig(
+        level=logging.DEBUG,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        handlers=[
+            RotatingFileHandler(log_file, maxBytes=10*1024*1024, backupCount=5),
+            logging.StreamHandler(sys.stdout)
+        ]
+    )
+
+    # Clean up output folder on startup
+    cleanup_output_folder()
+
+    # Initialize extras API with dependencies
+    init_extras_api(STORAGE_PATH, get_project_files_dir, HSDRAW_EXE)
+
+    # Vault storage backend: when the SQLite backend is selected (NUCLEUS_VAULT_DB),
+    # make sure the DB is built from metadata.json before serving — otherwise the
+    # vault would read as empty. On any failure, fall back to JSON so the user is
+    # never blocked or shown a blank vault. Default (json) mode is a no-op.
+    import core.config as core_config
+    from core import vault as vault_store
+    if core_config.VAULT_BACKEND == 'db':
+        try:
+            result = vault_store.ensure_migrated()
+            logger.info("Vault DB backend ready: %s", result)
+        except Exception as e:
+            logger.error("Vault DB migration failed; falling back to JSON backend: %s", e, exc_info=True)
+            core_config.VAULT_BACKEND = 'json'
+
+    # Register all blueprints
+    app.register_blueprint(extras_bp)
+    app.register_blueprint(assets_bp)
+    app.register_blueprint(project_bp)
+    app.register_blueprint(costumes_bp)
+    app.register_blueprint(export_bp)
+    app.register_blueprint(storage_costumes_bp)
+    app.register_blueprint(storage_stages_bp)
+    app.register_blueprint(vault_backup_bp)
+    app.register_blueprint(mod_export_bp)
+    app.register_blueprint(import_bp)
+    app.register_blueprint(das_bp)
+    app.register_blueprint(poses_bp)
+    app.register_blueprint(setup_bp)
+    app.register_blueprint(slippi_bp)
+    app.register_blueprint(xdelta_bp)
+    app.register_blueprint(bundles_bp)
+    app.register_blueprint(viewer_bp)
+    app.register_blueprint(settings_bp)
+    app.register_blueprint(iso_scan_bp)
+    app.register_blueprint(menus_bp)
+    app.register_blueprint(custom_stages_bp)
+    app.register_blueprint(custom_characters_bp)
+    app.register_blueprint(character_sounds_bp)
+    app.register_blueprint(stage_song_packs_bp)
+    app.register_blueprint(test_in_game_bp)
+    app.register_blueprint(skin_lab_bp)
+    app.register_blueprint(skin_lab_ai_bp)
+    app.register_blueprint(stage_lab_ai_bp)
+    app.register_blueprint(ai_engine_bp)
+    app.register_blueprint(model_lab_bp)
+
+    # Warm the Ollama probe in the background: starting the bundled server +
+    # reachability timeouts can take seconds, and without this the FIRST open of
+    # Settings/AI Studio is the one that pays for it (the planner UI "pops in").
+    from blueprints.ai_engine import warm_ollama_probe
+    warm_ollama_probe()
+
+
 def cleanup_on_exit():
     """Cleanup function called on exit."""
     logger.info("Cleaning up MEX API Backend...")
@@ -196,6 +220,13 @@ def cleanup_on_exit():
             viewer_process.kill()
         set_viewer_process(None)
 
+    # Close the persistent HSDRawViewer CSP workers
+    try:
+        from skinlab.csp_pool import shutdown_service
+        shutdown_service()
+    except Exception as e:
+        logger.warning(f"CSP render service shutdown failed: {e}")
+
     logger.info("MEX API Backend shutdown complete")
 
 
@@ -223,6 +254,8 @@ def find_free_port(preferred=5000):
 
 
 if __name__ == '__main__':
+    init_app()
+
     print(f"Starting MEX API Backend...")
     print(f"MexCLI: {MEXCLI_PATH}")
     print(f"Default Project: {MEX_PROJECT_PATH}")
@@ -250,6 +283,12 @@ if __name__ == '__main__':
         print(f"WARNING: {len(_missing_deps)} optional dependency(ies) missing. Some features may not work.")
         print("  " + "\n  ".join(_missing_deps))
 
+    # Shared CSP render service: workers start lazily on the first render and
+    # stay warm across batches until idle (kill switch MEX_CSP_SERVER=0).
+    if HSDRAW_EXE.exists():
+        from skinlab.csp_pool import install_service
+        install_service()
+
     # Register cleanup handlers
     atexit.register(cleanup_on_exit)
     signal.signal(signal.SIGINT, signal_handler)
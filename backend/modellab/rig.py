@@ -20,6 +20,7 @@ CLI:
 from __future__ import annotations
 
 import argparse
+import functools
 import json
 import math
 import shutil
@@ -29,7 +30,7 @@ from pathlib import Path
 import numpy as np
 
 sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
-from modellab import smd  # noqa: E402
+from modellab import rigkit_cache, smd  # noqa: E402
 
 # Melee's engine supports at most 2 bone influences per vertex (community
 # "Bone Affect Limit = 2"); more than that deforms wrong in-game.
@@ -63,14 +64,16 @@ class ForeignMesh:
 
 
 def load_foreign_smd(path: Path) -> ForeignMesh:
-    m = smd.load(path)
-    tri_pos = np.array([[v.pos for v in t.verts] for t in m.triangles])
-    tri_norm = np.array([[v.normal for v in t.verts] for t in m.triangles])
-    tri_uv = np.array([[v.uv for v in t.verts] for t in m.triangles])
-    tri_mat = [t.material for t in m.triangles]
+    # re-rigging the same export reads its binary sidecar, not the text
+    arrays = smd.load_arrays(path, sidecar=True)
+    m = arrays.to_smd()
+    tri_pos = np.array(arrays.pos).reshape(-1, 3, 3)
+    tri_norm = np.array(arrays.normal).reshape(-1, 3, 3)
+    tri_uv = np.array(arrays.uv).reshape(-1, 3, 2)
+    tri_mat = arrays.triangle_materials()
     # the source SMD's vertex parent = its mesh placeholder node
-    tri_group = [t.verts[0].parent if t.verts[0].parent is not None else t.material
-                 for t in m.triangles]
+    tri_group = [p if p != smd.NO_PARENT else mat
+                 for p, mat in zip(arrays.parent[0::3].tolist(), tri_mat)]
     tri_src_w = [[v.weights for v in t.verts] for t in m.triangles]
 
     textures = {}
@@ -520,6 +523,10 @@ def split_groups(foreign: ForeignMesh, target_groups: int) -> None:
 
 def joint_world_matrices(rigkit: smd.SMD) -> dict[int, np.ndarray]:
     """World 4x4 of every joint from the rig kit's bind pose (FK)."""
+    cached = getattr(rigkit, "world_matrices", None)
+    if cached is not None:
+        return dict(cached)
+
     def euler(rx, ry, rz):
         cx, sx = math.cos(rx), math.sin(rx)
         cy, sy = math.cos(ry), math.sin(ry)
@@ -555,6 +562,10 @@ def sane_surface(rigkit: smd.SMD):
     vanilla meshes are rigged: cluster mesh groups by shared weight bones and
     keep the component anchored at the feet (the global lowest vertex).
     """
+    cached = getattr(rigkit, "surface_index", None)
+    if cached is not None:
+        return [rigkit.triangles[i] for i in cached.tolist()]
+
     names = {b.id: b.name for b in rigkit.bones}
 
     # per mesh group: bone usage (weight mass) + lowest vertex
@@ -616,18 +627,21 @@ def transfer_weights(
         van_tri = np.asarray(surface_pts).reshape(len(tris), 3, 3)
     else:
         van_tri = np.array([[v.pos for v in t.verts] for t in tris])
-    van_w = [[v.weights for v in t.verts] for t in tris]
+    van_w = [w for t in tris for w in (v.weights for v in t.verts)]
 
     pts = foreign.tri_pos.reshape(-1, 3)
     # bone stability: accessory bones (ear tips, antennae, hair physics
     # chains) carry a tiny share of the vanilla surface's weight mass; a
     # foreign vert that samples one would flail with it in-game. Remap such
     # weights up the skeleton to the nearest high-mass ancestor.
-    mass: dict[int, float] = {}
-    for tw in van_w:
-        for corner in tw:
-            for bone, w in corner:
-                mass[bone] = mass.get(bone, 0.0) + w
+    lens = np.array([len(w) for w in van_w], dtype=np.int64)
+    ent_bone = np.fromiter((b for wl in van_w for b, _ in wl), dtype=np.int64,
+                           count=int(lens.sum()))
+    ent_w = np.fromiter((w for wl in van_w for _, w in wl), dtype=float,
+                        count=len(ent_bone))
+    bone_ids, ent_col = np.unique(ent_bone, return_inverse=True)
+    mass = dict(zip(bone_ids.tolist(),
+                    np.bincount(ent_col.ravel(), ent_w, len(bone_ids)).tolist()))
     total_mass = sum(mass.values()) or 1.0
     stable = {b for b, m in mass.items() if m / total_mass >= 0.02}
     if forbidden:
@@ -650,32 +664,31 @@ def transfer_weights(
     # right beside the head, so face verts sample arm weights and launch when
     # the arm swings). Among the K nearest vanilla verts, prefer samples whose
     # weighted-bone anchor is also near the foreign vert.
+    from scipy import sparse
     from scipy.spatial import cKDTree
 
     world = bone_world if bone_world is not None else joint_world_positions(rigkit)
     all_pts = van_tri.reshape(-1, 3)
-    all_w = [w for tw in van_w for w in tw]
-    # weld duplicate corners or K nearest neighbors are all copies of the
-    # same few verts and the anchor vote never sees an alternative body part
-    seen: dict = {}
-    uniq_idx = []
-    for i, key in enumerate(map(tuple, np.round(all_pts / 1e-3).astype(np.int64))):
-        if key not in seen:
-            seen[key] = True
-            uniq_idx.append(i)
+    uniq_idx = _surface_corners(all_pts)
     van_pts = all_pts[uniq_idx]
-    van_corner_w = [all_w[i] for i in uniq_idx]
 
+    # the welded verts' weight entries, bones already stabilized, as flat
+    # (row, bone, weight) arrays
+    starts = np.concatenate([[0], np.cumsum(lens)])
+    row = np.repeat(np.arange(len(uniq_idx)), lens[uniq_idx])
+    packed = np.cumsum(lens[uniq_idx]) - lens[uniq_idx]
+    sel = np.arange(len(row)) + np.repeat(starts[uniq_idx] - packed, lens[uniq_idx])
+    stab_of = np.array([stabilize(b) for b in bone_ids.tolist()], dtype=np.int64)
+    sbone = stab_of[ent_col.ravel()[sel]]
+    sw = ent_w[sel]
+
+    in_world = np.array([b in world for b in sbone.tolist()], dtype=bool)
+    wpos = np.array([world[b] if ok else (0.0, 0.0, 0.0)
+                     for b, ok in zip(sbone.tolist(), in_world)]).reshape(-1, 3)
     anchors = np.zeros((len(van_pts), 3))
-    for i, wlist in enumerate(van_corner_w):
-        tot = 0.0
-        for bone, w in wlist:
-            bone = stabilize(bone)
-            if bone in world:
-                anchors[i] += world[bone] * w
-                tot += w
-        if tot:
-            anchors[i] /= tot
+    np.add.at(anchors, row[in_world], wpos[in_world] * sw[in_world, None])
+    tot = np.bincount(row[in_world], sw[in_world], len(van_pts))
+    anchors[tot != 0] /= tot[tot != 0, None]
 
     # match positions may differ from the real geometry: a tall source torso
     # keeps its looks but BINDS as if compressed onto the target's hip->neck
@@ -683,9 +696,14 @@ def transfer_weights(
     # near-arbitrary torso bones — the run-pose garble)
     mpts = np.asarray(match_pos).reshape(-1, 3) if match_pos is not None else pts
 
-    tree = cKDTree(van_pts)
+    # a compiled rig kit ships the bind-pose tree; posed surfaces build their own
+    tree = getattr(rigkit, "surface_tree", None)
+    if tree is None or tree.data.shape != van_pts.shape or not np.array_equal(tree.data, van_pts):
+        tree = cKDTree(van_pts)
     K = min(24, len(van_pts))
     d_geo, idx = tree.query(mpts, k=K)
+    if idx.ndim == 1:
+        d_geo, idx = d_geo[:, None], idx[:, None]
     anchor_d = np.linalg.norm(mpts[:, None, :] - anchors[idx], axis=2)
     score = d_geo + 1.2 * anchor_d
 
@@ -695,52 +713,67 @@ def transfer_weights(
     # of every shard/melt artifact on cross-character rigs)
     if part_of and vert_parts is not None:
         from modellab.skeleton_parts import ALLOWED
-        sample_part = []
-        for wlist in van_corner_w:
-            mass: dict = {}
-            for bone, w in wlist:
-                p = part_of.get(stabilize(bone))
-                if p:
-                    mass[p] = mass.get(p, 0.0) + w
-            sample_part.append(max(mass, key=mass.get) if mass else None)
-        sample_part = np.asarray(sample_part, dtype=object)
+        # dominant part per sample: most weight mass, first-seen part on ties
+        labels = sorted({p for p in part_of.values() if p})
+        code = {p: i for i, p in enumerate(labels)}
+        ent_part = np.array([code.get(part_of.get(b), -1) if part_of.get(b) else -1
+                             for b in sbone.tolist()], dtype=np.int64)
+        has = ent_part >= 0
+        part_mass = np.zeros((len(van_pts), len(labels)))
+        np.add.at(part_mass, (row[has], ent_part[has]), sw[has])
+        first_seen = np.full((len(van_pts), len(labels)), np.inf)
+        np.minimum.at(first_seen, (row[has], ent_part[has]),
+                      np.arange(len(sbone))[has])
+        seen_any = np.isfinite(first_seen)
+        top_mass = np.where(seen_any, part_mass, -np.inf).max(axis=1, initial=-np.inf)
+        tie = seen_any & (part_mass == top_mass[:, None])
+        sample_part = np.where(seen_any.any(axis=1),
+                               np.where(tie, first_seen, np.inf).argmin(axis=1), -1)
 
         def allowed_of(vp):
             # vp may be a single label or a SET of labels (mixed-weight verts
             # like skirts keep every >=15% part); None = unconstrained
             if vp is None:
                 return None
-            labels = vp if isinstance(vp, (set, frozenset)) else {vp}
+            labels_ = vp if isinstance(vp, (set, frozenset)) else {vp}
             out = set()
-            for p in labels:
+            for p in labels_:
                 a = ALLOWED.get(p)
                 if a is None:
                     return None
                 out |= a
             return out
 
+        # one vectorized test per distinct label (set)
+        groups: dict = {}
+        for k, vp in enumerate(vert_parts):
+            key = frozenset(vp) if isinstance(vp, (set, frozenset)) else vp
+            groups.setdefault(key, []).append(k)
         penalty = np.zeros_like(score)
-        for k in range(len(pts)):
-            allowed = allowed_of(vert_parts[k])
+        for vp, ks in groups.items():
+            allowed = allowed_of(vp)
             if allowed is None:
                 continue
-            cand = sample_part[idx[k]]
-            penalty[k] = [0.0 if (cp is None or cp in allowed) else 1e4
-                          for cp in cand]
+            ks = np.array(ks)
+            cand = sample_part[idx[ks]]
+            ok_codes = [code[p] for p in allowed if p in code]
+            ok = (cand < 0) | np.isin(cand, ok_codes)
+            penalty[ks] = np.where(ok, 0.0, 1e4)
         score = score + penalty
 
     best = idx[np.arange(len(pts)), score.argmin(axis=1)]
 
-    raw = []
-    for k in range(len(pts)):
-        acc: dict[int, float] = {}
-        for bone, w in van_corner_w[best[k]]:
-            bone = stabilize(bone)
-            acc[bone] = acc.get(bone, 0.0) + w
-        total = sum(acc.values()) or 1.0
-        raw.append({b: w / total for b, w in acc.items()})
+    # sampled weights: each corner takes its winning sample's (stabilized,
+    # normalized) row -- one sparse row gather for the whole mesh
+    out_ids, out_col = np.unique(sbone, return_inverse=True)
+    samples = sparse.csr_matrix((sw, (row, out_col.ravel())),
+                                shape=(len(van_pts), len(out_ids)))
+    samples.sum_duplicates()
+    s_tot = np.asarray(samples.sum(axis=1)).ravel()
+    s_tot[s_tot == 0] = 1.0
+    samples = (sparse.diags(1.0 / s_tot) @ samples).tocsr()
 
-    smoothed = smooth_weights(pts, raw, iterations=smooth_iters)
+    vw, corner_to_v = _smooth_weight_matrix(pts, samples[best], smooth_iters)
 
     # distance gate: smoothing can diffuse weights far up the body (collar ->
     # head picks up ARM bones; at non-rest poses those verts stretch between
@@ -750,39 +783,42 @@ def transfer_weights(
     stable_ids = [b for b in world if b in stable]
     stable_pos = np.array([world[b] for b in stable_ids])
 
+    corner_w = vw[corner_to_v].tocoo()
+    held = np.array([b in world for b in out_ids.tolist()], dtype=bool)
+    held_pos = np.array([world[b] if b in world else (np.nan,) * 3
+                         for b in out_ids.tolist()]).reshape(-1, 3)
+    reach = np.linalg.norm(mpts[corner_w.row] - held_pos[corner_w.col], axis=1)
+    keep = held[corner_w.col] & (reach <= max_reach)
+    gated = sparse.csr_matrix(
+        (corner_w.data[keep], (corner_w.row[keep], corner_w.col[keep])),
+        shape=corner_w.shape)
+    out = _rows_as_pairs(_top_k_rows(gated, max_weights), out_ids)
+
     if part_of and vert_parts is not None:
         from modellab.skeleton_parts import ALLOWED as _ALLOWED
-    out = []
-    for k, acc in enumerate(smoothed):
-        gated = {b: w for b, w in acc.items()
-                 if b in world and
-                 float(np.linalg.norm(mpts[k] - world[b])) <= max_reach}
-        if not gated:
-            # no held bone is near (crest tips, prop extremities): ride the
-            # single nearest STABLE bone instead of a far-flung mixture —
-            # restricted to the vert's allowed body parts when labeled
-            cand_ids, cand_pos = stable_ids, stable_pos
-            if part_of and vert_parts is not None and vert_parts[k]:
-                vp = vert_parts[k]
-                labels = vp if isinstance(vp, (set, frozenset)) else {vp}
-                allowed = set()
-                for p in labels:
-                    a = _ALLOWED.get(p)
-                    if a is None:
-                        allowed = None
-                        break
-                    allowed |= a
-                if allowed:
-                    sel = [i for i, b in enumerate(stable_ids)
-                           if part_of.get(b) in allowed]
-                    if sel:
-                        cand_ids = [stable_ids[i] for i in sel]
-                        cand_pos = stable_pos[sel]
-            nearest = cand_ids[int(np.linalg.norm(cand_pos - mpts[k], axis=1).argmin())]
-            gated = {nearest: 1.0}
-        top = sorted(gated.items(), key=lambda kv: -kv[1])[:max_weights]
-        total = sum(w for _, w in top) or 1.0
-        out.append([(b, w / total) for b, w in top])
+    for k in np.flatnonzero(np.diff(gated.indptr) == 0).tolist():
+        # no held bone is near (crest tips, prop extremities): ride the
+        # single nearest STABLE bone instead of a far-flung mixture —
+        # restricted to the vert's allowed body parts when labeled
+        cand_ids, cand_pos = stable_ids, stable_pos
+        if part_of and vert_parts is not None and vert_parts[k]:
+            vp = vert_parts[k]
+            labels = vp if isinstance(vp, (set, frozenset)) else {vp}
+            allowed = set()
+            for p in labels:
+                a = _ALLOWED.get(p)
+                if a is None:
+                    allowed = None
+                    break
+                allowed |= a
+            if allowed:
+                sel = [i for i, b in enumerate(stable_ids)
+                       if part_of.get(b) in allowed]
+                if sel:
+                    cand_ids = [stable_ids[i] for i in sel]
+                    cand_pos = stable_pos[sel]
+        nearest = cand_ids[int(np.linalg.norm(cand_pos - mpts[k], axis=1).argmin())]
+        out[k] = [(nearest, 1.0)]
 
     # cloth keeps an anchor: capes may FOLD with the legs but not ride them —
     # a cape vert majority-bound to one thigh swings between the legs. Cap
@@ -818,49 +854,8 @@ def transfer_weights(
     # neighborhood consensus: a vert whose primary bone is (nearly) unused by
     # every nearby vert is a transfer outlier — the moment that bone moves
     # away from the region, the lone vert stretches into a spike. Snap such
-    # verts to their neighborhood's dominant weighting. Welded positions
-    # first, or a spike's duplicated corners would vote for themselves.
-    pos_key = list(map(tuple, np.round(pts / 1e-3).astype(np.int64)))
-    uniq: dict = {}
-    for k, key in enumerate(pos_key):
-        uniq.setdefault(key, k)
-    u_ids = list(uniq.values())
-    u_pts = pts[u_ids]
-    utree = cKDTree(u_pts)
-    NK = min(9, len(u_pts))
-    radius = max(1.2, 0.05 * height)
-    nd, nidx = utree.query(u_pts, k=NK)
-    # two passes: a pair of mutually-adjacent outliers props each other up on
-    # the first pass; once one is snapped the survivor loses its only support
-    for _ in range(2):
-        consensus: dict = {}
-        for ui, k in enumerate(u_ids):
-            votes: dict[int, float] = {}
-            n_nb = 0
-            for j, dist in zip(nidx[ui][1:], nd[ui][1:]):
-                if dist > radius:
-                    break
-                n_nb += 1
-                for b, w in out[u_ids[int(j)]]:
-                    votes[b] = votes.get(b, 0.0) + w
-            if n_nb < 3 or not votes:
-                continue
-            dominant = max(votes.values())
-            prim = out[k][0][0]
-            if votes.get(prim, 0.0) >= 0.08 * dominant:
-                continue
-            top = sorted(votes.items(), key=lambda kv: -kv[1])[:max_weights]
-            total = sum(w for _, w in top) or 1.0
-            consensus[pos_key[k]] = [(b, w / total) for b, w in top]
-        if not consensus:
-            break
-        snapped = 0
-        for k, key in enumerate(pos_key):
-            if key in consensus:
-                out[k] = consensus[key]
-                snapped += 1
-        print(f"  consensus pass: snapped {snapped} outlier corners "
-              f"({len(consensus)} unique verts)")
+    # verts to their neighborhood's dominant weighting.
+    consensus_snap(pts, out, max_weights, log=print)
 
     # (a triangle-coherence snap pass lived here briefly: it re-bound any
     # triangle spanning skeleton-distant bones to its mates' blend. REVERTED —
@@ -871,6 +866,121 @@ def transfer_weights(
     return out
 
 
+def _surface_corners(all_pts: np.ndarray) -> np.ndarray:
+    """Indices of the first copy of every distinct rig-kit surface corner.
+    Duplicate corners must be welded or K nearest neighbors are all copies of
+    the same few verts and the anchor vote never sees another body part."""
+    _, first = np.unique(np.round(all_pts / 1e-3).astype(np.int64), axis=0,
+                         return_index=True)
+    return np.sort(first)
+
+
+def surface_points(all_pts: np.ndarray) -> np.ndarray:
+    """The welded surface corners transfer_weights searches."""
+    return all_pts[_surface_corners(all_pts)]
+
+
+def surface_tree(points: np.ndarray):
+    """transfer_weights' cKDTree over surface_points."""
+    from scipy.spatial import cKDTree
+    return cKDTree(points)
+
+
+def _weld(pts: np.ndarray, tol: float = 1e-4):
+    """Corner -> welded vertex id (numbered in first-appearance order) and the
+    vertex count. The soup duplicates verts per triangle."""
+    key = np.round(pts / tol).astype(np.int64)
+    _, first, inverse = np.unique(key, axis=0, return_index=True,
+                                  return_inverse=True)
+    rank = np.empty(len(first), dtype=np.int64)
+    rank[np.argsort(first)] = np.arange(len(first))
+    return rank[inverse.ravel()], len(first)
+
+
+def _smoothing_operator(pts: np.ndarray):
+    """Welded-mesh Laplacian step as one sparse matrix: row v mixes half of
+    vertex v with half the mean of its triangle neighbors (isolated vertices
+    keep their value). Returns (corner_to_v, n_v, M)."""
+    from scipy import sparse
+    corner_to_v, n_v = _weld(pts)
+    tri = corner_to_v[:len(pts) // 3 * 3].reshape(-1, 3)
+    rows = tri[:, [0, 1, 1, 2, 2, 0]].ravel()
+    cols = tri[:, [1, 0, 2, 1, 0, 2]].ravel()
+    adj = sparse.csr_matrix((np.ones(len(rows)), (rows, cols)), shape=(n_v, n_v))
+    adj.data[:] = 1.0                   # neighbor SETS: shared edges count once
+    deg = np.diff(adj.indptr)
+    has_nb = deg > 0
+    mix = sparse.diags(np.where(has_nb, 0.5 / np.maximum(deg, 1), 0.0)) @ adj
+    mix = mix + sparse.diags(np.where(has_nb, 0.5, 1.0))
+    return corner_to_v, n_v, mix.tocsr()
+
+
+def _weights_matrix(weights: list[dict]):
+    """list of {bone: weight} -> (bone ids, rows x bones CSR)."""
+    from scipy import sparse
+    lens = [len(d) for d in weights]
+    bones = np.fromiter((b for d in weights for b in d), dtype=np.int64,
+                        count=sum(lens))
+    vals = np.fromiter((w for d in weights for w in d.values()), dtype=float,
+                       count=len(bones))
+    ids, cols = np.unique(bones, return_inverse=True)
+    rows = np.repeat(np.arange(len(weights)), lens)
+    mat = sparse.csr_matrix((vals, (rows, cols.ravel())),
+                            shape=(len(weights), len(ids)))
+    return ids, mat
+
+
+def _top_k_rows(mat, k):
+    """Keep the k largest entries of every CSR row, then renormalize rows to
+    sum to 1 (an empty row stays empty)."""
+    from scipy import sparse
+    mat = mat.tocsr()
+    mat.sum_duplicates()
+    counts = np.diff(mat.indptr)
+    rows = np.repeat(np.arange(mat.shape[0]), counts)
+    if len(counts) and counts.max() > k:
+        order = np.lexsort((-mat.data, rows))
+        rank = np.arange(len(order)) - mat.indptr[rows[order]]
+        keep = np.sort(order[rank < k])
+        mat = sparse.csr_matrix((mat.data[keep], (rows[keep], mat.indices[keep])),
+                                shape=mat.shape)
+    total = np.asarray(mat.sum(axis=1)).ravel()
+    total[total == 0] = 1.0
+    return (sparse.diags(1.0 / total) @ mat).tocsr()
+
+
+def _rows_as_pairs(mat, ids):
+    """CSR rows -> [[(bone, weight), ...] strongest first, ...]."""
+    mat = mat.tocsr()
+    counts = np.diff(mat.indptr)
+    rows = np.repeat(np.arange(mat.shape[0]), counts)
+    order = np.lexsort((ids[mat.indices], -mat.data, rows))
+    bones = ids[mat.indices[order]].tolist()
+    vals = mat.data[order].tolist()
+    out = []
+    pos = 0
+    for c in counts.tolist():
+        out.append(list(zip(bones[pos:pos + c], vals[pos:pos + c])))
+        pos += c
+    return out
+
+
+def _smooth_weight_matrix(pts: np.ndarray, corner_w, iterations: int):
+    """smooth_weights on a corners x bones CSR: returns the welded-vertex
+    weight matrix and corner_to_v."""
+    from scipy import sparse
+    corner_to_v, n_v, mix = _smoothing_operator(pts)
+    gather = sparse.csr_matrix(
+        (np.ones(len(pts)), (corner_to_v, np.arange(len(pts)))),
+        shape=(n_v, len(pts)))
+    counts = np.asarray(gather.sum(axis=1)).ravel()
+    vw = sparse.diags(1.0 / np.maximum(counts, 1)) @ (gather @ corner_w)
+    for _ in range(iterations):
+        # keep the strongest few to bound growth
+        vw = _top_k_rows(mix @ vw, 6)
+    return vw.tocsr(), corner_to_v
+
+
 def smooth_weights(pts: np.ndarray, weights: list[dict], iterations: int = 12):
     """Laplacian smoothing of bone weights over the foreign mesh.
 
@@ -878,96 +988,64 @@ def smooth_weights(pts: np.ndarray, weights: list[dict], iterations: int = 12):
     DIFFERENT bones wherever the source surface is ambiguous — in any pose
     but bind, the mesh TEARS along those cliffs (the in-game shredded-shell
     artifact). Weld coincident corners, then diffuse weights across mesh
-    neighbors until they vary smoothly.
+    neighbors until they vary smoothly. Weights are a vertices x bones
+    sparse matrix and each pass is one sparse mat-mat product.
     """
-    # weld coincident corners (the soup duplicates verts per triangle)
-    key = np.round(pts / 1e-4).astype(np.int64)
-    welded: dict = {}
-    corner_to_v = np.empty(len(pts), dtype=np.int64)
-    for i, k in enumerate(map(tuple, key)):
-        corner_to_v[i] = welded.setdefault(k, len(welded))
-    n_v = len(welded)
-
-    # vertex weights = average of their corners'
-    vw: list[dict] = [{} for _ in range(n_v)]
-    counts = np.zeros(n_v)
-    for i, acc in enumerate(weights):
-        v = corner_to_v[i]
-        counts[v] += 1
-        for b, w in acc.items():
-            vw[v][b] = vw[v].get(b, 0.0) + w
-    for v in range(n_v):
-        if counts[v]:
-            vw[v] = {b: w / counts[v] for b, w in vw[v].items()}
-
-    # adjacency from triangles (corners come in consecutive triples)
-    neighbors: list[set] = [set() for _ in range(n_v)]
-    for t in range(len(pts) // 3):
-        a, b, c = corner_to_v[t * 3:t * 3 + 3]
-        neighbors[a] |= {b, c}
-        neighbors[b] |= {a, c}
-        neighbors[c] |= {a, b}
+    ids, corner_w = _weights_matrix(weights)
+    vw, corner_to_v = _smooth_weight_matrix(pts, corner_w, iterations)
+    per_v = [dict(pairs) for pairs in _rows_as_pairs(vw, ids)]
+    return [per_v[v] for v in corner_to_v]
 
-    for _ in range(iterations):
-        new: list[dict] = []
-        for v in range(n_v):
-            acc = {b: w * 0.5 for b, w in vw[v].items()}
-            ns = neighbors[v]
-            if ns:
-                k = 0.5 / len(ns)
-                for n in ns:
-                    for b, w in vw[n].items():
-                        acc[b] = acc.get(b, 0.0) + w * k
-            # keep the strongest few to bound growth
-            top = sorted(acc.items(), key=lambda kv: -kv[1])[:6]
-            total = sum(w for _, w in top) or 1.0
-            new.append({b: w / total for b, w in top})
-        vw = new
-
-    return [vw[corner_to_v[i]] for i in range(len(pts))]
 
-
-def consensus_snap(pts, out, max_weights, passes=2):
+def consensus_snap(pts, out, max_weights, passes=2, log=None):
     """Snap weight outliers to their spatial-neighbor consensus: a vert whose
     primary bone is barely used by the verts around it is a transfer/parametric
     glitch (the moment that bone moves, the lone vert spikes — the thigh shard).
     Welded positions vote so a spike's duplicated corners can't vote for
-    themselves. (Same logic transfer_weights runs; the parametric path needs it
-    too — out is mutated in place.)"""
+    themselves. Used by transfer_weights and the parametric path alike — out
+    is mutated in place. Votes are one sparse (neighbors x weights) product
+    per pass."""
+    from scipy import sparse
     from scipy.spatial import cKDTree
     height = float(pts[:, 1].max() - pts[:, 1].min()) or 1.0
-    pos_key = list(map(tuple, np.round(pts / 1e-3).astype(np.int64)))
-    uniq: dict = {}
-    for k, key in enumerate(pos_key):
-        uniq.setdefault(key, k)
-    u_ids = list(uniq.values())
-    utree = cKDTree(pts[u_ids])
+    _, first, corner_u = np.unique(np.round(pts / 1e-3).astype(np.int64), axis=0,
+                                   return_index=True, return_inverse=True)
+    corner_u = corner_u.ravel()
+    u_ids = first                       # one representative corner per position
     NK = min(9, len(u_ids))
     radius = max(1.2, 0.05 * height)
-    nd, nidx = utree.query(pts[u_ids], k=NK)
+    nd, nidx = cKDTree(pts[u_ids]).query(pts[u_ids], k=NK)
+    if nidx.ndim == 1:
+        nd, nidx = nd[:, None], nidx[:, None]
+    # neighbors: the K nearest minus self, in order, up to the first one
+    # beyond the radius
+    within = np.cumprod(nd[:, 1:] <= radius, axis=1).astype(bool)
+    n_nb = within.sum(axis=1)
+    nb_rows = np.repeat(np.arange(len(u_ids)), n_nb)
+    neighbors = sparse.csr_matrix(
+        (np.ones(len(nb_rows)), (nb_rows, nidx[:, 1:][within])),
+        shape=(len(u_ids), len(u_ids)))
+
     for _ in range(passes):
-        snap: dict = {}
-        for ui, k in enumerate(u_ids):
-            votes: dict = {}
-            n_nb = 0
-            for j, dist in zip(nidx[ui][1:], nd[ui][1:]):
-                if dist > radius:
-                    break
-                n_nb += 1
-                for b, w in out[u_ids[int(j)]]:
-                    votes[b] = votes.get(b, 0.0) + w
-            if n_nb < 3 or not votes:
-                continue
-            if votes.get(out[k][0][0], 0.0) >= 0.08 * max(votes.values()):
-                continue
-            top = sorted(votes.items(), key=lambda kv: -kv[1])[:max_weights]
-            tot = sum(w for _, w in top) or 1.0
-            snap[pos_key[k]] = [(b, w / tot) for b, w in top]
-        if not snap:
+        ids, cur = _weights_matrix([dict(out[k]) for k in u_ids.tolist()])
+        votes = (neighbors @ cur).tocsr()
+        dominant = votes.max(axis=1).toarray().ravel()
+        prim = np.searchsorted(ids, [out[k][0][0] for k in u_ids.tolist()])
+        prim_vote = np.asarray(votes[np.arange(len(u_ids)), prim]).ravel()
+        snap = ((n_nb >= 3) & (np.diff(votes.indptr) > 0)
+                & (prim_vote < 0.08 * dominant))
+        if not snap.any():
             break
-        for k, key in enumerate(pos_key):
-            if key in snap:
-                out[k] = snap[key]
+        snapped = _rows_as_pairs(_top_k_rows(votes[snap], max_weights), ids)
+        new = dict(zip(np.flatnonzero(snap).tolist(), snapped))
+        hit = 0
+        for k, u in enumerate(corner_u.tolist()):
+            if u in new:
+                out[k] = new[u]
+                hit += 1
+        if log:
+            log(f"  consensus pass: snapped {hit} outlier corners "
+                f"({len(new)} unique verts)")
     return out
 
 
@@ -1078,7 +1156,8 @@ def emit(rigkit: smd.SMD, foreign: ForeignMesh, weights, out_path: Path,
     # real skeleton joints only (the rig kit also carries "Joint_X_Object_Y"
     # mesh placeholder nodes from the vanilla mesh — drop those)
     joints = [b for b in rigkit.bones if b.name.startswith("JOBJ_")]
-    out = smd.SMD(bones=list(joints))
+    bones = list(joints)
+    parts: list[smd.SMDArrays] = []   # triangle runs, concatenated in slot order
 
     import re
 
@@ -1124,30 +1203,30 @@ def emit(rigkit: smd.SMD, foreign: ForeignMesh, weights, out_path: Path,
             g = next(hi, None)
             name = (str(foreign.group_names.get(g, "")) if g in single_joint
                     else f"Joint_0_Object_{i}")
-            out.bones.append(smd.Bone(id=next_id,
+            bones.append(smd.Bone(id=next_id,
                                       name=name or f"Joint_0_Object_{i}",
                                       parent=-1))
             (high_node.__setitem__(g, next_id) if g is not None
              else dummy_nodes.append(next_id))
         elif kind == "low":
             g = next(lo, None)
-            out.bones.append(smd.Bone(id=next_id, name=f"Joint_0_Object_{i}",
+            bones.append(smd.Bone(id=next_id, name=f"Joint_0_Object_{i}",
                                       parent=-1))
             (low_node.__setitem__(g, next_id) if g is not None
              else dummy_nodes.append(next_id))
         else:
-            out.bones.append(smd.Bone(id=next_id, name=f"Joint_0_Object_{i}",
+            bones.append(smd.Bone(id=next_id, name=f"Joint_0_Object_{i}",
                                       parent=-1))
             dummy_nodes.append(next_id)
         next_id += 1
     # leftover groups (more groups than their slots): append at the end
     for g in hi:
-        out.bones.append(smd.Bone(id=next_id, name=f"Joint_0_Object_x{next_id}",
+        bones.append(smd.Bone(id=next_id, name=f"Joint_0_Object_x{next_id}",
                                   parent=-1))
         high_node[g] = next_id
         next_id += 1
     for g in lo:
-        out.bones.append(smd.Bone(id=next_id, name=f"Joint_0_Object_x{next_id}",
+        bones.append(smd.Bone(id=next_id, name=f"Joint_0_Object_x{next_id}",
                                   parent=-1))
         low_node[g] = next_id
         next_id += 1
@@ -1165,32 +1244,24 @@ def emit(rigkit: smd.SMD, foreign: ForeignMesh, weights, out_path: Path,
     dummy_mat = foreign.tri_mat[0] if foreign.tri_mat else "mat0"
 
     def emit_group(g, node, mesh, w_list, tri_by, single):
-        for t in tri_by[g]:
-            verts = []
-            for c in range(3):
-                w = [single[g]] if g in single else w_list[t * 3 + c]
-                verts.append(smd.Vertex(
-                    pos=tuple(mesh.tri_pos[t][c]),
-                    normal=tuple(mesh.tri_norm[t][c]),
-                    uv=tuple(mesh.tri_uv[t][c]),
-                    weights=w,
-                    parent=node,
-                ))
-            out.triangles.append(
-                smd.Triangle(material=mesh.tri_mat[t], verts=tuple(verts)))
+        tris = np.asarray(tri_by[g])
+        corners = (3 * tris[:, None] + np.arange(3)).ravel()
+        w = ([[single[g]]] * len(corners) if g in single
+             else [w_list[i] for i in corners.tolist()])
+        parts.append(smd.SMDArrays.from_corners(
+            (), [mesh.tri_mat[t] for t in tri_by[g]],
+            np.asarray(mesh.tri_pos)[tris], np.asarray(mesh.tri_norm)[tris],
+            np.asarray(mesh.tri_uv)[tris], [node] * len(corners), w))
 
     def emit_dummy(node):
         # one micro-triangle, textured (textureless DObjs hang the game),
         # rigidly bound to the root-adjacent joint
         base = (0.0, 3.0, 0.0)
         eps = 1e-3
-        verts = []
-        for dx, dy in ((0, 0), (eps, 0), (0, eps)):
-            verts.append(smd.Vertex(
-                pos=(base[0] + dx, base[1] + dy, base[2]),
-                normal=(0.0, 0.0, 1.0), uv=(0.5, 0.5),
-                weights=[(4, 1.0)], parent=node))
-        out.triangles.append(smd.Triangle(material=dummy_mat, verts=tuple(verts)))
+        pos = [(base[0] + dx, base[1] + dy, base[2]) for dx, dy in ((0, 0), (eps, 0), (0, eps))]
+        parts.append(smd.SMDArrays.from_corners(
+            (), [dummy_mat], pos, [(0.0, 0.0, 1.0)] * 3, [(0.5, 0.5)] * 3,
+            [node] * 3, [[(4, 1.0)]] * 3))
 
     hi2 = iter(high_groups)
     lo2 = iter(low_groups)
@@ -1218,7 +1289,7 @@ def emit(rigkit: smd.SMD, foreign: ForeignMesh, weights, out_path: Path,
         emit_group(g, low_node[g], low_foreign, low_weights, tri_by_low, {})
 
     out_path.parent.mkdir(parents=True, exist_ok=True)
-    smd.save(out, out_path)
+    smd.save_arrays(smd.SMDArrays.concat(bones, parts), out_path)
 
     # textures: copy/save next to the SMD + write the import sidecar
     sidecar = {}
@@ -1281,13 +1352,27 @@ def repose_points(pts, weights_per_pt, skin):
     return out
 
 
+@functools.lru_cache(maxsize=None)
+def _read_table(path: Path, mtime_ns: int):
+    return json.loads(path.read_text())
+
+
+def _table(name):
+    """Parsed JSON table shipped next to this module (None when absent),
+    re-read only when the file changes."""
+    path = Path(__file__).parent / name
+    try:
+        return _read_table(path, path.stat().st_mtime_ns)
+    except FileNotFoundError:
+        return None
+
+
 def load_visibility(char_code):
     """HighPoly (visible) DObj indices + total DObj count for a character's
     costume-0 visibility table; (None, None) when unknown."""
-    table_path = Path(__file__).parent / "visibility_tables.json"
-    if not table_path.exists() or not char_code:
+    data = _table("visibility_tables.json")
+    if data is None or not char_code:
         return None, None
-    data = json.loads(table_path.read_text())
     entry = data.get(char_code)
     if not entry or "costumes" not in entry or not entry["costumes"]:
         return None, None
@@ -1305,10 +1390,9 @@ def load_low_indices(char_code):
     ONLY in the magnifier and hides it in normal play, so a decimated copy of
     the body placed here is the proper low-detail model (vs the dummy specks
     emit() falls back to)."""
-    table_path = Path(__file__).parent / "visibility_tables.json"
-    if not table_path.exists() or not char_code:
+    data = _table("visibility_tables.json")
+    if data is None or not char_code:
         return []
-    data = json.loads(table_path.read_text())
     entry = data.get(char_code)
     if not entry or not entry.get("costumes"):
         return []
@@ -1322,43 +1406,23 @@ def load_dynamics(char_code):
     into these chains: their motion is physics tuned for the VANILLA part
     (fox's tail), so transplanted verts flail (capes grabbing the tail chain
     was the cross-rig 'glitchy cape/tail' artifact)."""
-    path = Path(__file__).parent / "dynamic_bones.json"
-    if not path.exists() or not char_code:
+    data = _table("dynamic_bones.json")
+    if data is None or not char_code:
         return []
-    data = json.loads(path.read_text())
     return [c["bone"] for c in data.get(char_code, [])]
 
 
 def _smooth_field(pts: np.ndarray, vals: np.ndarray, iterations: int = 5):
     """Laplacian-smooth a per-corner float field over the welded mesh (same
     weld/adjacency treatment as smooth_weights, but for plain vectors)."""
-    key = np.round(pts / 1e-4).astype(np.int64)
-    welded: dict = {}
-    corner_to_v = np.empty(len(pts), dtype=np.int64)
-    for i, k in enumerate(map(tuple, key)):
-        corner_to_v[i] = welded.setdefault(k, len(welded))
-    n_v = len(welded)
-
+    corner_to_v, n_v, mix = _smoothing_operator(pts)
     vv = np.zeros((n_v, vals.shape[1]))
     counts = np.zeros(n_v)
     np.add.at(vv, corner_to_v, vals)
     np.add.at(counts, corner_to_v, 1)
     vv /= np.maximum(counts, 1)[:, None]
-
-    neighbors: list[set] = [set() for _ in range(n_v)]
-    for t in range(len(pts) // 3):
-        a, b, c = corner_to_v[t * 3:t * 3 + 3]
-        neighbors[a].update((b, c))
-        neighbors[b].update((a, c))
-        neighbors[c].update((a, b))
-
     for _ in range(iterations):
-        nxt = vv.copy()
-        for v in range(n_v):
-            if neighbors[v]:
-                nb = np.array([vv[n] for n in neighbors[v]])
-                nxt[v] = 0.5 * vv[v] + 0.5 * nb.mean(axis=0)
-        vv = nxt
+        vv = mix @ vv
     return vv[corner_to_v]
 
 
@@ -1493,36 +1557,39 @@ def part_deform(foreign: ForeignMesh, vert_parts, src_bone_parts, src_bone_pos,
         q[1 + k] = (R[k, i] + R[i, k]) / S
         return q
 
-    def quat_mat(q):
-        w, x, y, z = q
-        return np.array([
-            [1 - 2 * (y * y + z * z), 2 * (x * y - z * w), 2 * (x * z + y * w)],
-            [2 * (x * y + z * w), 1 - 2 * (x * x + z * z), 2 * (y * z - x * w)],
-            [2 * (x * z - y * w), 2 * (y * z + x * w), 1 - 2 * (x * x + y * y)],
-        ])
+    def quat_mats(q):
+        # unit quaternions (N, 4) -> rotation matrices (N, 3, 3)
+        w, x, y, z = q.T
+        return np.stack([
+            np.stack([1 - 2 * (y * y + z * z), 2 * (x * y - z * w), 2 * (x * z + y * w)], -1),
+            np.stack([2 * (x * y + z * w), 1 - 2 * (x * x + z * z), 2 * (y * z - x * w)], -1),
+            np.stack([2 * (x * z - y * w), 2 * (y * z + x * w), 1 - 2 * (x * x + y * y)], -1),
+        ], axis=1)
 
-    base_q = None
     pts = foreign.tri_pos.reshape(-1, 3)
-    field = np.zeros((len(pts), 8))      # s, quat(4), T(3)
-    for k in range(len(pts)):
-        s, R, T = transforms.get(vert_parts[k], fallback)
-        q = quat(R)
-        if base_q is None:
-            base_q = q
-        if np.dot(q, base_q) < 0:        # hemisphere-align for blending
-            q = -q
-        field[k, 0] = s
-        field[k, 1:5] = q
-        field[k, 5:] = T
+    # one (s, quat, T) row per distinct part label, hemisphere-aligned to the
+    # first corner's quaternion for blending
+    labels: dict = {}
+    label_of = np.array([labels.setdefault(vp, len(labels)) for vp in vert_parts[:len(pts)]])
+    rows = np.zeros((len(labels), 8))      # s, quat(4), T(3)
+    for vp, i in labels.items():
+        s, R, T = transforms.get(vp, fallback)
+        rows[i, 0] = s
+        rows[i, 1:5] = quat(R)
+        rows[i, 5:] = T
+    if len(labels):
+        flip = rows[:, 1:5] @ rows[label_of[0], 1:5] < 0
+        rows[flip, 1:5] *= -1
+    field = rows[label_of]
     # wide blend: shoulders/hips sit at part boundaries — a sharp jump
     # between torso and a rotated/compressed limb pinches them
     field = _smooth_field(pts, field, iterations=10)
-    out_pts = np.empty_like(pts)
-    for k in range(len(pts)):
-        q = field[k, 1:5]
-        n = np.linalg.norm(q)
-        R = quat_mat(q / n) if n > 1e-9 else np.eye(3)
-        out_pts[k] = field[k, 0] * (R @ pts[k]) + field[k, 5:]
+    q = field[:, 1:5]
+    n = np.linalg.norm(q, axis=1)
+    R = np.broadcast_to(np.eye(3), (len(pts), 3, 3)).copy()
+    ok = n > 1e-9
+    R[ok] = quat_mats(q[ok] / n[ok, None])
+    out_pts = field[:, :1] * np.einsum("nij,nj->ni", R, pts) + field[:, 5:]
     foreign.tri_pos = out_pts.reshape(foreign.tri_pos.shape)
     log("part deform: " + "  ".join(
         f"{p}x{s:.2f}{'+rot' if not np.allclose(R_, np.eye(3)) else ''}"
@@ -1788,30 +1855,56 @@ def segment_deform(foreign: ForeignMesh, src_parts, src_parents, src_pos,
 
     pts = foreign.tri_pos.reshape(-1, 3)
     wpp = [w for tw in foreign.tri_src_w for w in tw]
-    out = np.empty_like(pts)
-    LIMB_SET = set(LIMBS)
-    for k in range(len(pts)):
-        # blend affines by the vert's source skin weights — shoulder/hip/elbow
-        # verts carry mixed weights and deform like skin instead of tearing.
-        # WITHIN one limb, sharpen the blend (w^2): the upper/lower segment
-        # rotations diverge hard (straight human knee -> digitigrade fox) and
-        # a linear mix candy-wraps the knee; cross-part blends (shoulders)
-        # stay linear and smooth.
-        wl = [(b, w) for b, w in wpp[k] if b in bone_to_aff]
-        parts_here = {src_parts.get(b) for b, _ in wl}
-        if len(parts_here) == 1 and parts_here & LIMB_SET and len(wl) > 1:
-            wl = [(b, w * w) for b, w in wl]
-        acc = np.zeros(3)
-        tot = 0.0
+    # every (corner, bone, weight) link whose bone has an affine, flattened;
+    # affines are applied per distinct affine to all of its links at once
+    aff_list: list = []
+    slot: dict = {}                 # id(affine) -> index in aff_list
+    aff_index: dict = {}            # bone -> index in aff_list
+    for b, aff in bone_to_aff.items():
+        if id(aff) not in slot:
+            slot[id(aff)] = len(aff_list)
+            aff_list.append(aff)
+        aff_index[b] = slot[id(aff)]
+    link_k, link_a, link_w, link_p = [], [], [], []
+    for k, wl in enumerate(wpp):
         for b, w in wl:
-            M, sp, tp = bone_to_aff[b]
-            acc += w * (M @ (pts[k] - sp) + tp)
-            tot += w
-        if tot <= 1e-9:
-            M, sp, tp = fb
-            out[k] = M @ (pts[k] - sp) + tp
-        else:
-            out[k] = acc / tot
+            if b in bone_to_aff:
+                link_k.append(k)
+                link_a.append(aff_index[b])
+                link_w.append(w)
+                link_p.append(src_parts.get(b))
+    link_k = np.array(link_k, dtype=np.int64)
+    link_a = np.array(link_a, dtype=np.int64)
+    link_w = np.array(link_w, dtype=float)
+
+    # blend affines by the vert's source skin weights — shoulder/hip/elbow
+    # verts carry mixed weights and deform like skin instead of tearing.
+    # WITHIN one limb, sharpen the blend (w^2): the upper/lower segment
+    # rotations diverge hard (straight human knee -> digitigrade fox) and
+    # a linear mix candy-wraps the knee; cross-part blends (shoulders)
+    # stay linear and smooth.
+    LIMB_SET = set(LIMBS)
+    part_code = {p: i for i, p in enumerate(sorted({str(p) for p in link_p}))}
+    codes = np.array([part_code[str(p)] for p in link_p], dtype=np.int64)
+    n_links = np.bincount(link_k, minlength=len(pts))
+    lo = np.full(len(pts), len(part_code))
+    hi = np.full(len(pts), -1)
+    np.minimum.at(lo, link_k, codes)
+    np.maximum.at(hi, link_k, codes)
+    limb_codes = [part_code[str(p)] for p in LIMB_SET if str(p) in part_code]
+    one_limb = (lo == hi) & np.isin(lo, limb_codes) & (n_links > 1)
+    link_w = np.where(one_limb[link_k], link_w * link_w, link_w)
+
+    acc = np.zeros((len(pts), 3))
+    for a, (M, sp, tp) in enumerate(aff_list):
+        m = link_a == a
+        ks = link_k[m]
+        np.add.at(acc, ks, link_w[m, None] * ((pts[ks] - sp) @ M.T + tp))
+    tot = np.bincount(link_k, link_w, minlength=len(pts))
+    M, sp, tp = fb
+    out = (pts - sp) @ M.T + tp
+    blended = tot > 1e-9
+    out[blended] = acc[blended] / tot[blended, None]
     foreign.tri_pos = out.reshape(foreign.tri_pos.shape)
     log("segment deform: " + "  ".join(sorted(info)))
     return True
@@ -2072,7 +2165,7 @@ def rig_mesh(rigkit_path, mesh_path, out_path, rot_y=0.0,
     With accessory_dir + cape_dynamics (the source's dynamic-params dump),
     cloth geometry is split into a mexCostume physics accessory instead of
     being skinned onto the body."""
-    rigkit = smd.load(rigkit_path)
+    rigkit = rigkit_cache.load(rigkit_path)
     foreign = load_foreign(Path(mesh_path))
     log(f"rig kit: {len(rigkit.bones)} bones, {len(rigkit.triangles)} tris; "
         f"foreign: {len(foreign.tri_pos)} tris")
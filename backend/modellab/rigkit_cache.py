@@ -0,0 +1,152 @@
+"""Compiled rig kits: the vanilla SMD rig kit pre-parsed into NumPy arrays.
+
+Every rig pass starts from the same per-character rig kit, and parsing its
+text SMD (tens of thousands of vertex lines) plus re-deriving the bind-pose
+world matrices, the sane body surface and its welded surface points used to
+be paid on every call. ``load(path)`` compiles the kit once into ``<kit>.npz`` next to
+the SMD and afterwards reads the arrays back memory-mapped:
+
+  mesh         smd.SMDArrays members: bones, material ids, per-corner
+               pos / normal / uv / parent, CSR weight links
+  world        JOBJ ids + bind-pose world 4x4s (rig.joint_world_matrices)
+  surface      rig.sane_surface triangle indices + its welded corners
+               (rig.surface_points), which rig.transfer_weights' vanilla
+               cKDTree is rebuilt from on load
+
+The archive is written uncompressed so each member can be mapped straight
+out of the zip. It records the SHA-1 of the source SMD and a format version;
+either changing recompiles it. Nothing in it is pickled: the kits live in
+the vault, and a restored backup must not be able to run code. Rebuilding the kit's per-vertex objects is
+still most of a compiled load, so the last few built kits are also kept in
+memory, re-validated against the source hash on every call.
+
+The returned object is a plain ``smd.SMD`` carrying the precomputed pieces
+as attributes (``world_matrices``, ``surface_index``, ``surface_tree``),
+which the rig functions pick up when present — an ``smd.load`` result works
+exactly as before.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import zipfile
+from collections import OrderedDict
+from pathlib import Path
+
+import numpy as np
+
+from modellab import smd
+
+logger = logging.getLogger(__name__)
+
+FORMAT_VERSION = 3
+
+# built kits kept in-process: (resolved smd path) -> (source sha1, SMD)
+_LOADED_MAX = 4
+_loaded: OrderedDict[str, tuple[str, smd.SMD]] = OrderedDict()
+_lock = threading.Lock()
+
+
+def cache_path(smd_path) -> Path:
+    return Path(smd_path).with_suffix(".npz")
+
+
+source_hash = smd.source_hash
+
+
+# --------------------------------------------------------------------------- #
+# compile                                                                     #
+# --------------------------------------------------------------------------- #
+def compile_arrays(kit: smd.SMD, digest: str,
+                   mesh: smd.SMDArrays | None = None) -> dict[str, np.ndarray]:
+    """The archive members for a parsed rig kit (mesh: its array form, when
+    already at hand)."""
+    from modellab.rig import joint_world_matrices, sane_surface, surface_points
+
+    world = joint_world_matrices(kit)
+    surface = sane_surface(kit)
+    row_of = {id(t): i for i, t in enumerate(kit.triangles)}
+    surface_index = np.array([row_of[id(t)] for t in surface], dtype=np.int64)
+    points = surface_points(np.array([[v.pos for v in t.verts] for t in surface],
+                                     dtype=float).reshape(-1, 3))
+
+    members = (mesh if mesh is not None else smd.SMDArrays.from_smd(kit)).to_npz()
+    members.update({
+        "version": np.array(FORMAT_VERSION),
+        "source_sha1": np.array(digest),
+        "world_id": np.array(list(world), dtype=np.int64),
+        "world_matrix": np.array(list(world.values()), dtype=float).reshape(-1, 4, 4),
+        "surface_index": surface_index,
+        "surface_points": points,
+    })
+    return members
+
+
+def compile_kit(smd_path, out_path=None) -> Path:
+    """Parse the SMD and write its compiled archive."""
+    smd_path = Path(smd_path)
+    out_path = Path(out_path) if out_path else cache_path(smd_path)
+    mesh = smd.load_arrays(smd_path)
+    smd.write_npz(out_path, compile_arrays(mesh.to_smd(), source_hash(smd_path), mesh))
+    return out_path
+
+
+# --------------------------------------------------------------------------- #
+# load                                                                        #
+# --------------------------------------------------------------------------- #
+def _attach(kit: smd.SMD, a: dict[str, np.ndarray]) -> smd.SMD:
+    from modellab.rig import surface_tree
+    kit.world_matrices = dict(zip(a["world_id"].tolist(), np.array(a["world_matrix"])))
+    kit.surface_index = np.array(a["surface_index"])
+    kit.surface_tree = surface_tree(np.array(a["surface_points"]))
+    return kit
+
+
+def _load_compiled(smd_path: Path, digest: str) -> smd.SMD:
+    npz = cache_path(smd_path)
+    if npz.exists():
+        try:
+            arrays = smd.read_npz(npz)
+            if (int(arrays["version"]) == FORMAT_VERSION
+                    and str(arrays["source_sha1"]) == digest):
+                return _attach(smd.SMDArrays.from_npz(arrays).to_smd(), arrays)
+        except (OSError, ValueError, KeyError, zipfile.BadZipFile) as e:
+            logger.warning(f"rig kit cache {npz} unreadable, recompiling: {e}")
+
+    mesh = smd.load_arrays(smd_path)
+    kit = mesh.to_smd()
+    arrays = compile_arrays(kit, digest, mesh)
+    try:
+        smd.write_npz(npz, arrays)
+    except OSError as e:
+        logger.warning(f"could not write rig kit cache {npz}: {e}")
+    return _attach(kit, arrays)
+
+
+def load(smd_path) -> smd.SMD:
+    """The rig kit at smd_path, from its compiled archive when that is current
+    (recompiling it otherwise; a read-only kit directory just means no
+    archive).
+
+    The last few kits stay built in-process, so the result is shared between
+    callers and must be treated as read-only."""
+    smd_path = Path(smd_path)
+    key = str(smd_path.resolve())
+    digest = source_hash(smd_path)
+    with _lock:
+        hit = _loaded.get(key)
+        if hit and hit[0] == digest:
+            _loaded.move_to_end(key)
+            return hit[1]
+    kit = _load_compiled(smd_path, digest)
+    with _lock:
+        _loaded[key] = (digest, kit)
+        while len(_loaded) > _LOADED_MAX:
+            _loaded.popitem(last=False)
+    return kit
+
+
+def clear_cache() -> None:
+    with _lock:
+        _loaded.clear()
@@ -20,13 +20,31 @@ dialect here matches what HSDRawViewer's ``--model export`` emits:
 
 Vertex weight links are the SMD "extended" triangle format; when nlinks is
 absent the vertex is rigidly bound to <parent_bone>.
+
+High-poly meshes make per-vertex objects the bottleneck, so the real reader
+and writer work on SMDArrays (column-wise positions / normals / uvs / CSR
+weight links / material ids): the triangle section is tokenized and
+formatted a block of triangles at a time. load()/save() keep the
+dataclass interface on top of them. load_arrays(..., sidecar=True) also
+keeps an uncompressed ``<file>.smd.npz`` next to the SMD, keyed by its
+SHA-1, so re-reading an unchanged export skips text parsing entirely.
 """
 
 from __future__ import annotations
 
+import gc
+import hashlib
+import io
+import logging
+import zipfile
+from contextlib import contextmanager
 from dataclasses import dataclass, field
 from pathlib import Path
 
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
 
 @dataclass
 class Bone:
@@ -71,113 +89,409 @@ class SMD:
         return list(seen)
 
 
-def _parse_vertex(line: str) -> Vertex:
-    parts = line.split()
-    parent = int(parts[0])
-    x, y, z, nx, ny, nz, u, v = (float(p) for p in parts[1:9])
-    weights: list[tuple[int, float]] = []
-    if len(parts) > 9:
-        nlinks = int(parts[9])
-        for i in range(nlinks):
-            bone = int(parts[10 + i * 2])
-            w = float(parts[11 + i * 2])
-            weights.append((bone, w))
-    if not weights:
-        weights = [(parent, 1.0)]
-    return Vertex(pos=(x, y, z), normal=(nx, ny, nz), uv=(u, v),
-                  weights=weights, parent=parent)
 
 
-def load(path: str | Path) -> SMD:
-    smd = SMD()
-    section = None
-    material = None
-    tri_verts: list[Vertex] = []
+# sentinel for "no vertex parent" in the array form (bone ids are small ints)
+NO_PARENT = -(1 << 62)
+
+# triangles per tokenizer / writer block: bounds the text held in memory
+_BLOCK_TRIS = 16384
+
+SIDECAR_VERSION = 1
+
+
+@contextmanager
+def _gc_paused():
+    """Building a whole mesh of small acyclic objects (tuples, Vertex) makes
+    the cyclic collector rescan the growing heap over and over."""
+    was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if was_enabled:
+            gc.enable()
+
+
+@dataclass
+class SMDArrays:
+    """The same content as SMD with the triangles stored column-wise.
+
+    Corner c of triangle t is row 3*t + c of the per-corner arrays; corner
+    i's weight links are link_bone/link_weight[link_start[i]:link_start[i+1]].
+    """
+    bones: list[Bone]
+    materials: list[str]
+    tri_material: np.ndarray   # (T,) index into materials
+    pos: np.ndarray            # (3T, 3)
+    normal: np.ndarray         # (3T, 3)
+    uv: np.ndarray             # (3T, 2)
+    parent: np.ndarray         # (3T,) vertex parent, NO_PARENT when unset
+    link_start: np.ndarray     # (3T + 1,)
+    link_bone: np.ndarray      # (L,)
+    link_weight: np.ndarray    # (L,)
+
+    @property
+    def n_triangles(self) -> int:
+        return len(self.tri_material)
+
+    def triangle_materials(self) -> list[str]:
+        return [self.materials[i] for i in self.tri_material.tolist()]
+
+    def corner_weights(self) -> list[list[tuple[int, float]]]:
+        """Per-corner [(bone, weight), ...] lists, as Vertex.weights holds them."""
+        start = self.link_start.tolist()
+        bones = self.link_bone.tolist()
+        weights = self.link_weight.tolist()
+        return [list(zip(bones[a:b], weights[a:b])) for a, b in zip(start, start[1:])]
+
+    @classmethod
+    def from_corners(cls, bones, tri_materials, pos, normal, uv, parent, weights):
+        """Build from per-triangle material names and per-corner arrays /
+        weight lists (parent may hold None)."""
+        index: dict[str, int] = {}
+        tri_material = np.fromiter((index.setdefault(m, len(index)) for m in tri_materials),
+                                   np.int64, len(tri_materials))
+        counts = np.fromiter(map(len, weights), np.int64, len(weights))
+        n_links = int(counts.sum())
+        return cls(
+            bones=list(bones), materials=list(index), tri_material=tri_material,
+            pos=np.asarray(pos, dtype=float).reshape(-1, 3),
+            normal=np.asarray(normal, dtype=float).reshape(-1, 3),
+            uv=np.asarray(uv, dtype=float).reshape(-1, 2),
+            parent=np.fromiter((NO_PARENT if p is None else p for p in parent),
+                               np.int64, len(weights)),
+            link_start=np.concatenate([[0], np.cumsum(counts)]),
+            link_bone=np.fromiter((b for wl in weights for b, _ in wl), np.int64, n_links),
+            link_weight=np.fromiter((w for wl in weights for _, w in wl), float, n_links),
+        )
+
+    @classmethod
+    def from_smd(cls, smd: "SMD") -> "SMDArrays":
+        corners = [v for t in smd.triangles for v in t.verts]
+        return cls.from_corners(
+            smd.bones, [t.material for t in smd.triangles],
+            [v.pos for v in corners], [v.normal for v in corners],
+            [v.uv for v in corners], [v.parent for v in corners],
+            [v.weights for v in corners])
+
+    @classmethod
+    def concat(cls, bones, parts: list["SMDArrays"]) -> "SMDArrays":
+        index: dict[str, int] = {}
+        tri_material, link_start, offset = [], [np.zeros(1, np.int64)], 0
+        for p in parts:
+            remap = np.array([index.setdefault(m, len(index)) for m in p.materials], np.int64)
+            tri_material.append(remap[p.tri_material])
+            link_start.append(p.link_start[1:] + offset)
+            offset += int(p.link_start[-1])
+        cat = lambda name, shape: (np.concatenate([getattr(p, name) for p in parts])  # noqa: E731
+                                   if parts else np.zeros(shape))
+        return cls(
+            bones=list(bones), materials=list(index),
+            tri_material=np.concatenate(tri_material) if parts else np.zeros(0, np.int64),
+            pos=cat("pos", (0, 3)), normal=cat("normal", (0, 3)), uv=cat("uv", (0, 2)),
+            parent=cat("parent", 0).astype(np.int64),
+            link_start=np.concatenate(link_start),
+            link_bone=cat("link_bone", 0).astype(np.int64),
+            link_weight=cat("link_weight", 0))
+
+    def to_smd(self) -> "SMD":
+        with _gc_paused():
+            return self._to_smd()
+
+    def _to_smd(self) -> "SMD":
+        smd = SMD(bones=[Bone(b.id, b.name, b.parent, b.pos, b.rot) for b in self.bones])
+        verts = [Vertex(tuple(p), tuple(n), tuple(uv), w, None if par == NO_PARENT else par)
+                 for p, n, uv, par, w in zip(self.pos.tolist(), self.normal.tolist(),
+                                             self.uv.tolist(), self.parent.tolist(),
+                                             self.corner_weights())]
+        smd.triangles = [Triangle(m, (verts[3 * i], verts[3 * i + 1], verts[3 * i + 2]))
+                         for i, m in enumerate(self.triangle_materials())]
+        return smd
+
+    def to_npz(self) -> dict[str, np.ndarray]:
+        """Archive members (see read_npz / write_npz)."""
+        return {
+            "bone_id": np.array([b.id for b in self.bones], dtype=np.int64),
+            "bone_parent": np.array([b.parent for b in self.bones], dtype=np.int64),
+            "bone_name": np.array([b.name for b in self.bones], dtype=str),
+            "bone_pos": np.array([b.pos for b in self.bones], dtype=float).reshape(-1, 3),
+            "bone_rot": np.array([b.rot for b in self.bones], dtype=float).reshape(-1, 3),
+            "materials": np.array(self.materials, dtype=str),
+            "tri_material": self.tri_material, "pos": self.pos, "normal": self.normal,
+            "uv": self.uv, "parent": self.parent, "link_start": self.link_start,
+            "link_bone": self.link_bone, "link_weight": self.link_weight,
+        }
+
+    @classmethod
+    def from_npz(cls, a: dict[str, np.ndarray]) -> "SMDArrays":
+        bones = [Bone(i, name, parent, tuple(pos), tuple(rot))
+                 for i, name, parent, pos, rot in zip(
+                     a["bone_id"].tolist(), a["bone_name"].tolist(), a["bone_parent"].tolist(),
+                     a["bone_pos"].tolist(), a["bone_rot"].tolist())]
+        return cls(bones, a["materials"].tolist(), a["tri_material"], a["pos"], a["normal"],
+                   a["uv"], a["parent"], a["link_start"], a["link_bone"], a["link_weight"])
+
+
+# --------------------------------------------------------------------------- #
+# reading                                                                     #
+# --------------------------------------------------------------------------- #
+def _parse_block(lines: list[str]):
+    """Tokenize whole triangles (material line + 3 vertex lines each) at once:
+    one split and one float conversion for the block instead of per vertex."""
+    n = len(lines) // 4
+    corners: list = [None] * (3 * n)
+    corners[0::3] = lines[1:4 * n:4]
+    corners[1::3] = lines[2:4 * n:4]
+    corners[2::3] = lines[3:4 * n:4]
+    blob = " ".join(corners)
+    if "\t" in blob or "  " in blob:
+        counts = np.fromiter((len(c.split()) for c in corners), np.int64, len(corners))
+    else:
+        counts = np.fromiter((c.count(" ") for c in corners), np.int64, len(corners)) + 1
+    tok = np.array(blob.split(), dtype=float)
+    start = np.concatenate([[0], np.cumsum(counts)[:-1]]).astype(np.int64)
+    fields = tok[start[:, None] + np.arange(9)]         # parent x y z nx ny nz u v
+    parent = fields[:, 0].astype(np.int64)
+
+    nlinks = np.zeros(len(corners), np.int64)
+    has = counts > 9
+    nlinks[has] = tok[start[has] + 9].astype(np.int64)
+    # no links: rigidly bound to the vertex parent
+    eff = np.where(nlinks > 0, nlinks, 1)
+    link_start = np.concatenate([[0], np.cumsum(eff)])
+    row = np.repeat(np.arange(len(corners)), eff)
+    src = start[row] + 10 + 2 * (np.arange(len(row)) - link_start[row])
+    if (has & (counts < 10 + 2 * nlinks)).any():
+        raise ValueError("SMD vertex line has fewer weight links than it declares")
+    explicit = nlinks[row] > 0
+    src = np.where(explicit, src, 0)
+    link_bone = np.where(explicit, tok[src], parent[row]).astype(np.int64)
+    link_weight = np.where(explicit, tok[src + 1], 1.0)
+    return (lines[0:4 * n:4], parent, fields[:, 1:4], fields[:, 4:7], fields[:, 7:9],
+            eff, link_bone, link_weight)
+
 
+def load_arrays(path: str | Path, sidecar: bool = False) -> SMDArrays:
+    """Parse an SMD straight into arrays. The triangle section is read in
+    blocks, so the text held at once stays bounded. With sidecar=True the
+    result is also stored as ``<path>.npz`` and read back from there
+    (memory-mapped, read-only) while the SMD is unchanged."""
+    path = Path(path)
+    digest = None
+    if sidecar:
+        digest = source_hash(path)
+        cached = _read_sidecar(path, digest)
+        if cached is not None:
+            return cached
+
+    bones: list[Bone] = []
+    by_id: dict[int, Bone] = {}
+    blocks = []
+    section = None
+    pending: list[str] = []
     with open(path, encoding="utf-8", errors="replace") as f:
         for raw in f:
             line = raw.strip()
             if not line or line.startswith("//"):
                 continue
+            if section == "triangles" and line != "end":
+                pending.append(line)
+                if len(pending) >= 4 * _BLOCK_TRIS:
+                    blocks.append(_parse_block(pending))
+                    pending = []
+                continue
             if line.startswith("version"):
                 continue
             if line in ("nodes", "skeleton", "triangles"):
                 section = line
                 continue
             if line == "end":
+                if section == "triangles" and pending:
+                    blocks.append(_parse_block(pending))   # drops a partial triangle
+                    pending = []
                 section = None
-                material = None
-                tri_verts = []
                 continue
 
             if section == "nodes":
                 # <id> "<name>" <parent>
                 first_quote = line.index('"')
                 last_quote = line.rindex('"')
-                bone_id = int(line[:first_quote].strip())
-                name = line[first_quote + 1:last_quote]
-                parent = int(line[last_quote + 1:].strip())
-                smd.bones.append(Bone(id=bone_id, name=name, parent=parent))
+                bone = Bone(id=int(line[:first_quote].strip()),
+                            name=line[first_quote + 1:last_quote],
+                            parent=int(line[last_quote + 1:].strip()))
+                bones.append(bone)
+                by_id[bone.id] = bone
             elif section == "skeleton":
                 if line.startswith("time"):
                     continue
                 parts = line.split()
-                bone_id = int(parts[0])
                 vals = [float(p) for p in parts[1:7]]
-                # bones list is indexed by id in HSDRawViewer exports, but be safe
-                bone = next(b for b in smd.bones if b.id == bone_id)
+                bone = by_id[int(parts[0])]
                 bone.pos = tuple(vals[0:3])
                 bone.rot = tuple(vals[3:6])
-            elif section == "triangles":
-                # alternating: material-name line, then 3 vertex lines
-                if material is None:
-                    material = line
-                    tri_verts = []
-                else:
-                    tri_verts.append(_parse_vertex(line))
-                    if len(tri_verts) == 3:
-                        smd.triangles.append(
-                            Triangle(material=material, verts=tuple(tri_verts))
-                        )
-                        material = None
-                        tri_verts = []
-
-    return smd
+    if pending:
+        blocks.append(_parse_block(pending))
+
+    index: dict[str, int] = {}
+    tri_material = [np.fromiter((index.setdefault(m, len(index)) for m in b[0]), np.int64, len(b[0]))
+                    for b in blocks]
+    cat = lambda i, shape, dtype=float: (np.concatenate([b[i] for b in blocks])  # noqa: E731
+                                         if blocks else np.zeros(shape, dtype))
+    counts = cat(5, 0, np.int64)
+    arrays = SMDArrays(
+        bones=bones, materials=list(index),
+        tri_material=np.concatenate(tri_material) if blocks else np.zeros(0, np.int64),
+        pos=cat(2, (0, 3)), normal=cat(3, (0, 3)), uv=cat(4, (0, 2)),
+        parent=cat(1, 0, np.int64), link_start=np.concatenate([[0], np.cumsum(counts)]),
+        link_bone=cat(6, 0, np.int64), link_weight=cat(7, 0))
+    if sidecar:
+        _write_sidecar(path, digest, arrays)
+    return arrays
 
 
+def load(path: str | Path) -> SMD:
+    return load_arrays(path).to_smd()
+
+
+# --------------------------------------------------------------------------- #
+# writing                                                                     #
+# --------------------------------------------------------------------------- #
 def _fmt(x: float) -> str:
     # enough precision for float32 round-trip without bloating the file
     return f"{x:.6g}"
 
 
-def save(smd: SMD, path: str | Path) -> None:
+def _format_block(a: SMDArrays, t0: int, t1: int) -> str:
+    """Triangle-section text for triangles [t0, t1): vertex lines are built
+    with one %-template per link count instead of per-field formatting."""
+    r0, r1 = 3 * t0, 3 * t1
+    n = r1 - r0
+    starts = a.link_start[r0:r1 + 1]
+    counts = np.diff(starts)
+    parent = a.parent[r0:r1]
+    if (parent == NO_PARENT).any():
+        first = a.link_bone[np.minimum(starts[:-1], max(len(a.link_bone) - 1, 0))]
+        parent = np.where(parent == NO_PARENT, first, parent)
+    base = np.column_stack([parent, a.pos[r0:r1], a.normal[r0:r1], a.uv[r0:r1], counts])
+    lines = np.empty(n, dtype=object)
+    for k in np.unique(counts).tolist():
+        rows = np.flatnonzero(counts == k)
+        li = starts[rows][:, None] + np.arange(k)
+        links = np.stack([a.link_bone[li], a.link_weight[li]], axis=2).reshape(len(rows), 2 * k)
+        full = np.ascontiguousarray(np.hstack([base[rows], links]))
+        # corners of indexed meshes repeat the same vertex: format each once
+        _, first, inverse = np.unique(full.view(np.dtype((np.void, full.strides[0]))).ravel(),
+                                      return_index=True, return_inverse=True)
+        template = "%d" + " %.6g" * 8 + " %d " + " ".join(["%d %.6g"] * k)
+        text = np.array([template % tuple(r) for r in full[first].tolist()], dtype=object)
+        lines[rows] = text[inverse.ravel()]
+
+    body: list = [None] * (4 * (t1 - t0))
+    body[0::4] = [a.materials[i] for i in a.tri_material[t0:t1].tolist()]
+    body[1::4] = lines[0::3].tolist()
+    body[2::4] = lines[1::3].tolist()
+    body[3::4] = lines[2::3].tolist()
+    return "\n".join(body) + "\n"
+
+
+def save_arrays(a: SMDArrays, path: str | Path) -> None:
     lines: list[str] = ["version 1", "nodes"]
-    for b in smd.bones:
+    for b in a.bones:
         lines.append(f'{b.id} "{b.name}" {b.parent}')
     lines.append("end")
 
     lines.append("skeleton")
     lines.append("time 0")
-    for b in smd.bones:
+    for b in a.bones:
         p, r = b.pos, b.rot
         lines.append(
             f"{b.id} {_fmt(p[0])} {_fmt(p[1])} {_fmt(p[2])} "
             f"{_fmt(r[0])} {_fmt(r[1])} {_fmt(r[2])}"
         )
     lines.append("end")
-
     lines.append("triangles")
-    for t in smd.triangles:
-        lines.append(t.material)
-        for v in t.verts:
-            parent = v.parent if v.parent is not None else v.weights[0][0]
-            links = " ".join(f"{b} {_fmt(w)}" for b, w in v.weights)
-            lines.append(
-                f"{parent} {_fmt(v.pos[0])} {_fmt(v.pos[1])} {_fmt(v.pos[2])} "
-                f"{_fmt(v.normal[0])} {_fmt(v.normal[1])} {_fmt(v.normal[2])} "
-                f"{_fmt(v.uv[0])} {_fmt(v.uv[1])} "
-                f"{len(v.weights)} {links}"
-            )
-    lines.append("end")
 
-    Path(path).write_text("\n".join(lines) + "\n", encoding="utf-8")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+        for t0 in range(0, a.n_triangles, _BLOCK_TRIS):
+            f.write(_format_block(a, t0, min(t0 + _BLOCK_TRIS, a.n_triangles)))
+        f.write("end\n")
+
+
+def save(smd: SMD, path: str | Path) -> None:
+    save_arrays(SMDArrays.from_smd(smd), path)
+
+
+# --------------------------------------------------------------------------- #
+# binary sidecar                                                              #
+# --------------------------------------------------------------------------- #
+def source_hash(path) -> str:
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def sidecar_path(path) -> Path:
+    return Path(str(path) + ".npz")
+
+
+def write_npz(path: Path, members: dict[str, np.ndarray]) -> None:
+    """Uncompressed (mappable) archive, replaced atomically."""
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as f:
+        np.savez(f, **members)
+    tmp.replace(path)
+
+
+def read_npz(path: Path) -> dict[str, np.ndarray]:
+    """Members of an uncompressed .npz as read-only memmaps (np.load ignores
+    mmap_mode for archives). Compressed or object members are read normally."""
+    out: dict[str, np.ndarray] = {}
+    with zipfile.ZipFile(path) as zf, open(path, "rb") as raw:
+        for info in zf.infolist():
+            name = info.filename[:-4] if info.filename.endswith(".npy") else info.filename
+            if info.compress_type == zipfile.ZIP_STORED:
+                # local header: 30 fixed bytes + file name + extra field
+                raw.seek(info.header_offset + 26)
+                name_len, extra_len = np.frombuffer(raw.read(4), "<u2")
+                raw.seek(info.header_offset + 30 + int(name_len) + int(extra_len))
+                version = np.lib.format.read_magic(raw)
+                read_header = {(1, 0): np.lib.format.read_array_header_1_0,
+                               (2, 0): np.lib.format.read_array_header_2_0}.get(version)
+                shape, fortran, dtype = read_header(raw) if read_header else ((), False, None)
+                if dtype is not None and not dtype.hasobject:
+                    if 0 in shape:
+                        out[name] = np.empty(shape, dtype)
+                    else:
+                        out[name] = np.memmap(path, dtype=dtype, mode="r", offset=raw.tell(),
+                                              shape=shape, order="F" if fortran else "C")
+                    continue
+            with zf.open(info) as member:
+                out[name] = np.lib.format.read_array(io.BytesIO(member.read()))
+    return out
+
+
+def _read_sidecar(path: Path, digest: str) -> SMDArrays | None:
+    npz = sidecar_path(path)
+    if not npz.exists():
+        return None
+    try:
+        a = read_npz(npz)
+        if int(a["version"]) == SIDECAR_VERSION and str(a["source_sha1"]) == digest:
+            return SMDArrays.from_npz(a)
+    except (OSError, ValueError, KeyError, zipfile.BadZipFile) as e:
+        logger.warning(f"SMD sidecar {npz} unreadable, re-parsing: {e}")
+    return None
+
+
+def _write_sidecar(path: Path, digest: str, arrays: SMDArrays) -> None:
+    members = arrays.to_npz()
+    members["version"] = np.array(SIDECAR_VERSION)
+    members["source_sha1"] = np.array(digest)
+    try:
+        write_npz(sidecar_path(path), members)
+    except OSError as e:
+        logger.warning(f"could not write SMD sidecar for {path}: {e}")
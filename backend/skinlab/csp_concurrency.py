@@ -35,19 +35,20 @@ _launch_lock = threading.Lock()
 
 
 def _csp_pool_active() -> bool:
-    """True when a persistent CSP render pool is installed. Then per-render
-    process-launch staggering is unnecessary (and would only slow pooled renders):
-    the pool already staggered its workers' one-time GL-init at startup, and each
-    pooled render reuses a warm worker instead of launching a process."""
+    """True when a persistent CSP render pool is installed and has warm workers.
+    Then per-render process-launch staggering is unnecessary (and would only
+    slow pooled renders): the pool staggers its workers' one-time GL-init itself,
+    and each pooled render reuses a warm worker instead of launching a process."""
     try:
         import generate_csp
-        return generate_csp.get_active_pool() is not None
+        pool = generate_csp.get_active_pool()
+        return pool is not None and getattr(pool, 'warm', True)
     except Exception:
         return False
 
 
 @contextmanager
-def staggered_launch():
+def staggered_launch(force=False):
     """Serialize only the LAUNCH of each render so each HSDRawViewer gets a
     clean init window before the next starts; then release so renders overlap.
 
@@ -57,9 +58,10 @@ def staggered_launch():
     parallel safely (the lock is shared across all callers in this process).
 
     No-op when a render pool is active -- pooled renders don't launch a process,
-    so the stagger would just add dead time per costume.
+    so the stagger would just add dead time per costume. `force` staggers anyway:
+    the pool itself uses it when it launches (or recycles) a worker.
     """
-    if CSP_LAUNCH_STAGGER_S > 0 and not _csp_pool_active():
+    if CSP_LAUNCH_STAGGER_S > 0 and (force or not _csp_pool_active()):
         with _launch_lock:
             time.sleep(CSP_LAUNCH_STAGGER_S)
     yield
@@ -1,90 +1,206 @@
-"""CspRenderPool -- a pool of persistent HSDRawViewer `--csp-server` workers.
+"""CspRenderService -- the backend's pool of persistent HSDRawViewer
+`--csp-server` workers.
 
 Bulk CSP generation otherwise spawns a fresh `HSDRawViewer.exe --csp` process
 per costume; ~4s of every ~6s is fixed process + OpenGL startup, paid every time.
 Each worker here keeps ONE process + GL context alive and renders costume after
-costume off a shared queue, so that startup is paid once per worker instead of
-once per costume (measured ~0.2s/job vs ~3.6s one-shot).
+costume, so that startup is paid once per worker instead of once per costume
+(measured ~0.2s/job vs ~3.6s one-shot).
+
+One service lives for the whole backend process (install_service at startup,
+or lazily on the first active_pool()), so back-to-back batches -- an ISO scan,
+then a texture-pack export, then a bulk retake -- reuse the same warm workers
+instead of paying worker startup per batch:
+
+  * Lazy: workers are spawned on demand, one per concurrent render, up to
+    `max_workers`; an idle service costs nothing.
+  * Idle shutdown: a worker unused for MEX_CSP_SERVER_IDLE seconds (default
+    180, 0 = never) is closed, so warm GL contexts don't sit on the GPU.
+  * Priority lanes: renders queue FIFO per lane and a free worker always goes
+    to the INTERACTIVE lane (one Retake CSP / pose preview in a request thread)
+    before the BULK lane. A thread is BULK inside active_pool() or a function
+    wrapped with bulk() (batch executors' tasks); everything else interactive.
+  * Health: per-worker job/failure/timeout/restart counts and busy time, plus
+    per-lane wait times -- see stats().
 
 Crash-safe by design: a job that errors, times out, or a worker that dies makes
 `render()` return False so the caller falls back to a one-shot `generate_csp`
-(a single bad DAT never blocks the batch). Dead workers respawn on next use, and
-every worker is recycled after N jobs to bound GPU/memory creep.
+(a single bad DAT never blocks the batch). Dead workers respawn on next use,
+every worker is recycled after N jobs to bound GPU/memory creep, and a worker
+that can't start backs spawning off for a while instead of failing per render.
 
 Protocol (see HSDRawViewer Program.cs RunCspServer): a worker prints "READY",
 then per job we write a TAB-joined argv line ("--csp\t<dat>\t<output>\t...") and
-read until "DONE\t<output>" / "ERR..." / "FATAL...".
+read until "DONE\t<output>" / "ERR..." / "FATAL...". tests/fake_csp_server.py
+speaks the same protocol so the service can be exercised without Windows.
 """
 import contextlib
+import functools
+import itertools
 import logging
 import os
-import queue
 import subprocess
 import threading
 import time
+from collections import deque
 
 from skinlab.csp_concurrency import csp_workers, staggered_launch
 
+logger = logging.getLogger(__name__)
+
 _CREATE_NO_WINDOW = 0x08000000
 _READY_TIMEOUT = 60.0
 _DEFAULT_JOB_TIMEOUT = 90.0
+# After a worker fails to start, one-shot renders are used for this long before
+# another spawn is attempted (missing exe, broken GL driver, ...).
+_SPAWN_BACKOFF_S = 30.0
+
+INTERACTIVE = 'interactive'
+BULK = 'bulk'
+LANES = (INTERACTIVE, BULK)
+
+
+def _idle_timeout() -> float:
+    env = os.environ.get('MEX_CSP_SERVER_IDLE')
+    try:
+        return max(0.0, float(env)) if env else 180.0
+    except ValueError:
+        return 180.0
+
+
+IDLE_TIMEOUT_S = _idle_timeout()
+
+_lane = threading.local()
+
+
+def current_lane() -> str:
+    return getattr(_lane, 'name', None) or INTERACTIVE
+
+
+@contextlib.contextmanager
+def render_lane(name):
+    """Run the block's renders (on THIS thread) in lane `name`."""
+    prev = getattr(_lane, 'name', None)
+    _lane.name = name
+    try:
+        yield
+    finally:
+        _lane.name = prev
+
+
+def bulk(fn):
+    """Wrap a batch task so the renders it makes on an executor thread queue in
+    the BULK lane (thread-locals don't follow work into a ThreadPoolExecutor)."""
+    @functools.wraps(fn)
+    def run(*args, **kwargs):
+        with render_lane(BULK):
+            return fn(*args, **kwargs)
+    return run
+
+
+def _command(exe):
+    """argv prefix for a worker: an exe path, or a list (e.g. an interpreter +
+    script, which is how the tests run the fake server)."""
+    if isinstance(exe, (list, tuple)):
+        return [str(a) for a in exe]
+    return [str(exe)]
 
 
 class _Worker:
-    def __init__(self, exe, idx):
-        self.exe = str(exe)
+    def __init__(self, cmd, idx):
+        self.cmd = list(cmd)
         self.idx = idx
         self.proc = None
-        self.jobs = 0
+        self.jobs = 0               # since the last (re)spawn, for recycling
+        self.total_jobs = 0
+        self.failures = 0
+        self.timeouts = 0
+        self.restarts = -1          # the first spawn isn't a restart
+        self.busy_s = 0.0
+        self.started_at = None
+        self.last_used = time.monotonic()
+        self._timed_out = False
         self._spawn()
 
     def _spawn(self):
         flags = _CREATE_NO_WINDOW if os.name == "nt" else 0
         self.proc = subprocess.Popen(
-            [self.exe, "--csp-server"],
+            [*self.cmd, "--csp-server"],
             stdin=subprocess.PIPE, stdout=subprocess.PIPE,
             text=True, bufsize=1, creationflags=flags,
         )
+        self.restarts += 1
+        self.jobs = 0
         deadline = time.time() + _READY_TIMEOUT
         while time.time() < deadline:
             line = self.proc.stdout.readline()
             if not line:
                 raise RuntimeError(f"csp worker {self.idx} exited during startup")
             if line.strip() == "READY":
+                self.started_at = time.time()
                 return
+        self.close()
         raise RuntimeError(f"csp worker {self.idx} did not become READY in time")
 
     def alive(self):
         return self.proc is not None and self.proc.poll() is None
 
+    def _kill_hung(self):
+        self._timed_out = True
+        try:
+            self.proc.kill()
+        except Exception:
+            pass
+
     def render(self, job_args, timeout):
         """job_args = the argv `--csp` takes (['--csp', dat, output, ...]).
-        Returns True on DONE, False on ERR/FATAL/timeout/dead worker."""
+        Returns True on DONE, False on ERR/FATAL/timeout/dead worker. A job that
+        overruns `timeout` gets its worker killed (readline would otherwise
+        block forever on a hung render)."""
         if not self.alive():
             self._spawn()
+        t0 = time.monotonic()
+        self._timed_out = False
+        watchdog = threading.Timer(timeout, self._kill_hung)
+        watchdog.daemon = True
+        ok = False
         try:
             self.proc.stdin.write("\t".join(job_args) + "\n")
             self.proc.stdin.flush()
+            watchdog.start()
+            while True:
+                line = self.proc.stdout.readline()
+                if not line:
+                    # worker died mid-job (or the watchdog killed it); reap it
+                    # so alive() is False and the slot gets a fresh process
+                    try:
+                        self.proc.wait(timeout=2)
+                    except subprocess.TimeoutExpired:
+                        self.proc.kill()
+                    break
+                line = line.rstrip("\n")
+                if line.startswith("DONE\t"):
+                    ok = True
+                    break
+                if line.startswith("ERR") or line.startswith("FATAL"):
+                    break
+                # ignore any stray line the worker might emit
         except Exception:
-            return False
-        deadline = time.time() + timeout
-        while time.time() < deadline:
-            line = self.proc.stdout.readline()
-            if not line:
-                return False  # worker died mid-job
-            line = line.rstrip("\n")
-            if line.startswith("DONE\t"):
-                self.jobs += 1
-                return True
-            if line.startswith("ERR") or line.startswith("FATAL"):
-                self.jobs += 1
-                return False
-            # ignore any stray line the worker might emit
-        return False  # timed out
+            ok = False
+        finally:
+            watchdog.cancel()
+            self.jobs += 1
+            self.total_jobs += 1
+            self.busy_s += time.monotonic() - t0
+            self.last_used = time.monotonic()
+            if not ok:
+                self.failures += 1
+            if self._timed_out:
+                self.timeouts += 1
+        return ok
 
     def recycle(self):
         self.close()
-        self.jobs = 0
         self._spawn()
 
     def close(self):
@@ -101,53 +217,217 @@ class _Worker:
         except Exception:
             pass
 
+    def health(self, state):
+        return {
+            'idx': self.idx,
+            'pid': self.proc.pid if self.proc else None,
+            'state': state,
+            'alive': self.alive(),
+            'jobs': self.total_jobs,
+            'failures': self.failures,
+            'timeouts': self.timeouts,
+            'restarts': self.restarts,
+            'busy_s': round(self.busy_s, 3),
+            'avg_job_ms': (round(1000 * self.busy_s / self.total_jobs, 1)
+                           if self.total_jobs else None),
+            'idle_s': round(time.monotonic() - self.last_used, 1),
+            'started_at': self.started_at,
+        }
+
 
-class CspRenderPool:
-    def __init__(self, exe, workers=None, recycle_after=50,
-                 job_timeout=_DEFAULT_JOB_TIMEOUT):
-        self.exe = str(exe)
+class CspRenderService:
+    def __init__(self, exe, max_workers=None, recycle_after=50,
+                 job_timeout=_DEFAULT_JOB_TIMEOUT, idle_timeout=None):
+        self.cmd = _command(exe)
+        self.max_workers = max_workers or csp_workers()
         self.recycle_after = recycle_after
         self.job_timeout = job_timeout
-        n = workers or csp_workers()
-        self._idle = queue.Queue()
-        self._all = []
-        for i in range(n):
-            # Stagger worker startup so their GL-inits don't race (the same
-            # blank/T-pose race the one-shot launch stagger guards). Only n
-            # launches now, not one per costume.
-            with staggered_launch():
-                try:
-                    w = _Worker(self.exe, i)
-                except Exception:
-                    continue
-            self._all.append(w)
-            self._idle.put(w)
-        if not self._all:
-            raise RuntimeError("CspRenderPool: no workers could start")
+        self.idle_timeout = IDLE_TIMEOUT_S if idle_timeout is None else idle_timeout
+        self._cond = threading.Condition()
+        self._workers = []          # every started worker (idle or busy)
+        self._idle = []             # free workers, most recently used last
+        self._starting = 0
+        self._waiting = {lane: deque() for lane in LANES}
+        self._ids = itertools.count()
+        self._spawn_blocked_until = 0.0
+        self._closed = False
+        self._reaper = None
+        self._lane_stats = {lane: {'jobs': 0, 'ok': 0, 'failed': 0,
+                                   'unserved': 0, 'wait_s': 0.0}
+                            for lane in LANES}
+        self.spawn_failures = 0
+        self.idle_shutdowns = 0
+        self.last_spawn_error = None
 
+    # -- capacity --------------------------------------------------------- #
     @property
     def size(self):
-        return len(self._all)
+        """Workers currently started (0 when idle-shut-down)."""
+        return len(self._workers)
 
-    def render(self, job_args) -> bool:
+    @property
+    def warm(self):
+        """True while at least one worker is up (csp_concurrency skips the
+        per-render launch stagger then; a cold service's renders may still fall
+        back to one-shot launches, which must stay staggered)."""
+        return bool(self._workers)
+
+    def ensure_capacity(self, workers):
+        """Raise the worker cap to at least `workers` (never lowers it)."""
+        if workers:
+            with self._cond:
+                self.max_workers = max(self.max_workers, int(workers))
+                self._cond.notify_all()
+
+    # -- scheduling ------------------------------------------------------- #
+    def _first_in_line(self, ticket, lane):
+        q = self._waiting[lane]
+        if not q or q[0] is not ticket:
+            return False
+        return lane == INTERACTIVE or not self._waiting[INTERACTIVE]
+
+    def _acquire(self, lane):
+        """A free worker for `lane`, or None when the service can't serve (closed,
+        or no worker running and spawning is backed off) -> caller falls back."""
+        ticket = object()
+        t0 = time.monotonic()
+        spawn = False
+        with self._cond:
+            if self._closed:
+                return None
+            self._waiting[lane].append(ticket)
+            try:
+                while True:
+                    if self._closed:
+                        return None
+                    if self._first_in_line(ticket, lane):
+                        if self._idle:
+                            return self._idle.pop()
+                        can_spawn = time.monotonic() >= self._spawn_blocked_until
+                        if can_spawn and (len(self._workers) + self._starting
+                                          < self.max_workers):
+                            self._starting += 1
+                            spawn = True
+                            break
+                        if not can_spawn and not self._workers and not self._starting:
+                            return None
+                    self._cond.wait(timeout=1.0)
+            finally:
+                self._waiting[lane].remove(ticket)
+                self._lane_stats[lane]['wait_s'] += time.monotonic() - t0
+                self._cond.notify_all()
+        if spawn:
+            return self._spawn_worker()
+        return None
+
+    def _spawn_worker(self):
+        """Start one worker (caller reserved a `_starting` slot). Launches are
+        staggered like one-shot renders so concurrent GL-inits don't race."""
+        worker = None
+        try:
+            with staggered_launch(force=True):
+                worker = _Worker(self.cmd, next(self._ids))
+        except Exception as e:
+            self.last_spawn_error = str(e)
+            logger.warning(f"[csp-service] worker failed to start ({e}); "
+                           f"one-shot renders for {_SPAWN_BACKOFF_S:.0f}s")
+        with self._cond:
+            self._starting -= 1
+            if worker is None:
+                self.spawn_failures += 1
+                self._spawn_blocked_until = time.monotonic() + _SPAWN_BACKOFF_S
+            elif self._closed:
+                worker.close()
+                worker = None
+            else:
+                self._workers.append(worker)
+                self._start_reaper()
+                logger.info(f"[csp-service] worker {worker.idx} up "
+                            f"({len(self._workers)}/{self.max_workers})")
+            self._cond.notify_all()
+        return worker
+
+    def _release(self, worker):
+        if worker.alive() and worker.jobs >= self.recycle_after:
+            try:
+                with staggered_launch(force=True):
+                    worker.recycle()
+            except Exception as e:
+                logger.warning(f"[csp-service] worker {worker.idx} recycle failed: {e}")
+        with self._cond:
+            if self._closed or not worker.alive():
+                if worker in self._workers:
+                    self._workers.remove(worker)
+                dead = True
+            else:
+                self._idle.append(worker)
+                dead = False
+            self._cond.notify_all()
+        if dead:
+            worker.close()
+
+    def render(self, job_args, lane=None) -> bool:
         """Render one costume. job_args is the argv `--csp` takes:
         ['--csp', <dat>, <output>, ...flags...]. Blocks until a worker is free
-        (natural backpressure at `size` concurrent renders). Returns True only
-        on a confirmed DONE; on any failure the caller should fall back."""
-        w = self._idle.get()
+        for this lane (natural backpressure at `max_workers` concurrent renders).
+        Returns True only on a confirmed DONE; on any failure the caller should
+        fall back."""
+        lane = lane or current_lane()
+        stats = self._lane_stats[lane]
+        worker = self._acquire(lane)
+        if worker is None:
+            with self._cond:
+                stats['unserved'] += 1
+            return False
+        ok = False
         try:
-            ok = w.render(list(job_args), self.job_timeout)
-            if (not w.alive()) or w.jobs >= self.recycle_after:
-                try:
-                    w.recycle()
-                except Exception:
-                    pass
+            ok = worker.render(list(job_args), self.job_timeout)
             return ok
         finally:
-            self._idle.put(w)
+            self._release(worker)
+            with self._cond:
+                stats['jobs'] += 1
+                stats['ok' if ok else 'failed'] += 1
+
+    # -- idle shutdown ---------------------------------------------------- #
+    def _start_reaper(self):
+        if self.idle_timeout <= 0 or (self._reaper and self._reaper.is_alive()):
+            return
+        self._reaper = threading.Thread(target=self._reap, name='csp-service-reaper',
+                                        daemon=True)
+        self._reaper.start()
 
+    def _reap(self):
+        while True:
+            with self._cond:
+                self._cond.wait(timeout=min(5.0, self.idle_timeout))
+                if self._closed:
+                    return
+                now = time.monotonic()
+                stale = [w for w in self._idle
+                         if now - w.last_used >= self.idle_timeout]
+                for w in stale:
+                    self._idle.remove(w)
+                    self._workers.remove(w)
+                self.idle_shutdowns += len(stale)
+                done = not self._workers and not self._starting
+                if done:
+                    self._reaper = None
+            for w in stale:
+                w.close()
+            if stale:
+                logger.info(f"[csp-service] closed {len(stale)} idle worker(s), "
+                            f"{len(self._workers)} still up")
+            if done:
+                return
+
+    # -- lifecycle / stats ------------------------------------------------ #
     def close(self):
-        for w in self._all:
+        with self._cond:
+            self._closed = True
+            workers, self._workers, self._idle = self._workers, [], []
+            self._cond.notify_all()
+        for w in workers:
             w.close()
 
     def __enter__(self):
@@ -156,44 +436,110 @@ class CspRenderPool:
     def __exit__(self, *exc):
         self.close()
 
+    def stats(self) -> dict:
+        with self._cond:
+            idle = {id(w) for w in self._idle}
+            workers = [w.health('idle' if id(w) in idle else 'busy')
+                       for w in self._workers]
+            lanes = {}
+            for lane, s in self._lane_stats.items():
+                served = s['jobs'] + s['unserved']
+                lanes[lane] = {
+                    'queued': len(self._waiting[lane]),
+                    'jobs': s['jobs'], 'ok': s['ok'], 'failed': s['failed'],
+                    'unserved': s['unserved'],
+                    'avg_wait_ms': (round(1000 * s['wait_s'] / served, 1)
+                                    if served else None),
+                }
+            return {
+                'max_workers': self.max_workers,
+                'starting': self._starting,
+                'idle_timeout_s': self.idle_timeout,
+                'workers': workers,
+                'lanes': lanes,
+                'spawn_failures': self.spawn_failures,
+                'spawn_backoff_s': round(max(
+                    0.0, self._spawn_blocked_until - time.monotonic()), 1),
+                'last_spawn_error': self.last_spawn_error,
+                'idle_shutdowns': self.idle_shutdowns,
+                'closed': self._closed,
+            }
+
+
+# -- the backend's shared service ------------------------------------------ #
+_service = None
+_service_lock = threading.Lock()
+
+
+def service_enabled() -> bool:
+    """Kill switch: MEX_CSP_SERVER=0 keeps every render one-shot."""
+    return os.environ.get("MEX_CSP_SERVER", "1") != "0"
+
+
+def get_service(create=True):
+    """The shared CspRenderService, created (no workers yet) and installed as
+    generate_csp's active pool on first call. None when disabled."""
+    global _service
+    if _service is not None or not create or not service_enabled():
+        return _service
+    with _service_lock:
+        if _service is None:
+            # Lazy import: generate_csp pulls in the heavy HSDRaw stack, and it's
+            # on the path in every backend caller of this module.
+            import generate_csp
+            _service = CspRenderService(generate_csp.HSDRAW_EXE)
+            generate_csp.set_active_pool(_service)
+    return _service
+
+
+def install_service():
+    """Start the shared service at backend startup so single interactive
+    renders use warm workers too. Never raises."""
+    try:
+        return get_service()
+    except Exception as e:
+        logger.warning(f"[csp-service] unavailable ({e}); using one-shot renders")
+        return None
+
+
+def shutdown_service():
+    """Close every worker and uninstall the service (backend exit)."""
+    global _service
+    with _service_lock:
+        service, _service = _service, None
+    if service is None:
+        return
+    try:
+        import generate_csp
+        if generate_csp.get_active_pool() is service:
+            generate_csp.set_active_pool(None)
+    except Exception:
+        pass
+    service.close()
+
 
 @contextlib.contextmanager
 def active_pool(workers=None, enabled=None):
-    """Stand up a CspRenderPool and install it as generate_csp's active pool for
-    the duration of the block, so every costume rendered inside routes through a
-    reused --csp-server worker instead of a one-shot process. Yields the pool (or
-    None when disabled / unavailable -- callers then transparently get the
-    one-shot path). Kill switch: MEX_CSP_SERVER=0.
-
-    Wrap BATCH render loops in this (iso scan, texture-pack export, vanilla HD
-    preseed). Do NOT wrap single-costume renders (Retake CSP, one pose, an install
-    endpoint): the pool's one-time worker startup costs far more than one render.
-
-    Pool workers are created BEFORE the pool is installed, so their launch still
-    gets the csp_concurrency stagger; once installed, per-render staggers no-op.
-    """
-    # Lazy import: generate_csp pulls in the heavy HSDRaw stack, and it's on the
-    # path in every backend caller of this module.
-    import generate_csp
+    """Run a BATCH of renders through the shared CSP render service: the
+    calling thread's renders go in the BULK lane (wrap executor tasks with
+    bulk() for theirs), and `workers` raises the service's worker cap if it's
+    below it. Yields the service (or None when disabled / unavailable -- callers
+    then transparently get the one-shot path). Kill switch: MEX_CSP_SERVER=0.
 
+    Workers outlive the block: the next batch reuses them until they go idle
+    for IDLE_TIMEOUT_S. Single-costume renders needn't use this -- they go
+    through the same service in the interactive lane.
+    """
     if enabled is None:
-        enabled = os.environ.get("MEX_CSP_SERVER", "1") != "0"
-
-    pool = None
+        enabled = service_enabled()
+    service = None
     if enabled:
         try:
-            pool = CspRenderPool(generate_csp.HSDRAW_EXE, workers=workers)
-            generate_csp.set_active_pool(pool)
+            service = get_service()
+            if service is not None:
+                service.ensure_capacity(workers)
         except Exception as e:
-            logging.getLogger(__name__).warning(
-                f"CSP render pool unavailable ({e}); using one-shot renders")
-            pool = None
-    try:
-        yield pool
-    finally:
-        if pool is not None:
-            try:
-                generate_csp.set_active_pool(None)
-            except Exception:
-                pass
-            pool.close()
+            logger.warning(f"CSP render service unavailable ({e}); using one-shot renders")
+            service = None
+    with render_lane(BULK):
+        yield service
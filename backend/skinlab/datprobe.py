@@ -23,6 +23,8 @@ import sys
 from collections import namedtuple
 from pathlib import Path
 
+import numpy as np
+
 HEADER_SIZE = 0x20
 
 # GXTexFmt numeric values (matches HSDRaw.GX.GXTexFmt)
@@ -36,6 +38,7 @@ Tlut = namedtuple('Tlut', 'offset data_offset format count data')
 TexAnimInfo = namedtuple(
     'TexAnimInfo', 'joint_index matanim_index texmap_id images tluts')
 TobjInfo = namedtuple('TobjInfo', 'jobj_index dobj_index image tlut')
+DecodedTexture = namedtuple('DecodedTexture', 'source info image tlut pixels')
 
 
 class DatFile:
@@ -179,6 +182,12 @@ class DatFile:
     def find_roots(self, suffix):
         return [(n, o) for n, o in self.roots if n.endswith(suffix)]
 
+    def jobj_roots(self):
+        """Model JOBJ trees: `*_joint` roots that aren't mat/shape anims."""
+        return [(n, o) for n, o in self.roots
+                if n.endswith('_joint') and 'matanim' not in n
+                and 'shapeanim' not in n]
+
 
 # --------------------------------------------------------------------------- #
 # GX image helpers (sizes + decode for the common Melee formats)              #
@@ -312,8 +321,177 @@ def decode_image(img, tlut=None):
     return out
 
 
+# --------------------------------------------------------------------------- #
+# vectorized decode: same formats and integer math as decode_image, but GX    #
+# tiles are untiled with reshape/transpose and colors come from lookup tables #
+# --------------------------------------------------------------------------- #
+_X255_31 = (np.arange(32, dtype=np.uint16) * 255 // 31).astype(np.uint8)
+_X255_63 = (np.arange(64, dtype=np.uint16) * 255 // 63).astype(np.uint8)
+_X255_7 = (np.arange(8, dtype=np.uint16) * 255 // 7).astype(np.uint8)
+
+
+def _rgb565_array(v):
+    """uint16 array -> (..., 4) uint8 RGBA (matches _rgb565)."""
+    v = v.astype(np.uint16, copy=False)
+    out = np.empty(v.shape + (4,), dtype=np.uint8)
+    out[..., 0] = _X255_31[(v >> 11) & 0x1F]
+    out[..., 1] = _X255_63[(v >> 5) & 0x3F]
+    out[..., 2] = _X255_31[v & 0x1F]
+    out[..., 3] = 255
+    return out
+
+
+def _rgb5a3_array(v):
+    """uint16 array -> (..., 4) uint8 RGBA (matches _rgb5a3)."""
+    v = v.astype(np.uint16, copy=False)
+    opaque = (v & 0x8000) != 0
+    out = np.empty(v.shape + (4,), dtype=np.uint8)
+    out[..., 0] = np.where(opaque, _X255_31[(v >> 10) & 0x1F],
+                           ((v >> 8) & 0xF) * 17)
+    out[..., 1] = np.where(opaque, _X255_31[(v >> 5) & 0x1F],
+                           ((v >> 4) & 0xF) * 17)
+    out[..., 2] = np.where(opaque, _X255_31[v & 0x1F], (v & 0xF) * 17)
+    out[..., 3] = np.where(opaque, 255, _X255_7[(v >> 12) & 0x7])
+    return out
+
+
+def _ia8_array(v):
+    v = v.astype(np.uint16, copy=False)
+    out = np.empty(v.shape + (4,), dtype=np.uint8)
+    out[..., :3] = (v & 0xFF)[..., None]
+    out[..., 3] = v >> 8
+    return out
+
+
+def _palette_array(tlut):
+    """Tlut -> (count, 4) uint8 RGBA (matches _decode_palette)."""
+    v = np.frombuffer(tlut.data, dtype='>u2', count=tlut.count)
+    if tlut.format == 1:
+        return _rgb565_array(v)
+    if tlut.format == 2:
+        return _rgb5a3_array(v)
+    return _ia8_array(v)
+
+
+def _untile(texels, w, h, bw, bh):
+    """Texels in GX tile order (row-major tiles of bw x bh, row-major inside
+    each tile) -> (h, w, ...) image, cropping the padding tiles."""
+    tx, ty = (w + bw - 1) // bw, (h + bh - 1) // bh
+    extra = texels.shape[1:]
+    t = texels[:tx * ty * bw * bh].reshape((ty, tx, bh, bw) + extra)
+    t = t.swapaxes(1, 2).reshape((ty * bh, tx * bw) + extra)
+    return t[:h, :w]
+
+
+def decode_image_array(img, tlut=None):
+    """Image -> (h, w, 4) uint8 RGBA array. Pixel-identical to decode_image
+    (same formats, same rounding) but without per-pixel Python loops."""
+    w, h, fmt = img.width, img.height, img.format
+    if fmt not in (0, 1, 2, 3, 4, 5, 6, 8, 9, 14):
+        raise ValueError(f'decode not implemented for format {fmt}')
+    data = np.frombuffer(img.data, dtype=np.uint8,
+                         count=gx_image_size(fmt, w, h))
+    pal = _palette_array(tlut) if tlut is not None else None
+
+    if fmt in (0, 8):       # I4 / CI4: high nibble first
+        nib = np.empty(data.size * 2, dtype=np.uint8)
+        nib[0::2] = data >> 4
+        nib[1::2] = data & 0xF
+        idx = _untile(nib, w, h, 8, 8)
+        if fmt == 8:
+            return pal[idx]
+        out = np.empty((h, w, 4), dtype=np.uint8)
+        out[..., :3] = (idx * 17)[..., None]
+        out[..., 3] = 255
+        return out
+    if fmt in (1, 2, 9):    # I8 / IA4 / CI8
+        b = _untile(data, w, h, 8, 4)
+        if fmt == 9:
+            return pal[b]
+        out = np.empty((h, w, 4), dtype=np.uint8)
+        if fmt == 1:
+            out[..., :3] = b[..., None]
+            out[..., 3] = 255
+        else:
+            out[..., :3] = ((b & 0xF) * 17)[..., None]
+            out[..., 3] = (b >> 4) * 17
+        return out
+    if fmt in (3, 4, 5):    # IA8 / RGB565 / RGB5A3
+        v = _untile(data.view('>u2'), w, h, 4, 4)
+        if fmt == 4:
+            return _rgb565_array(v)
+        if fmt == 5:
+            return _rgb5a3_array(v)
+        return _ia8_array(v)
+    if fmt == 6:            # RGBA8: 32 bytes of AR pairs, then 32 of GB
+        t = data.reshape(-1, 2, 16, 2)
+        px = np.stack([t[:, 0, :, 1], t[:, 1, :, 0], t[:, 1, :, 1],
+                       t[:, 0, :, 0]], axis=-1)
+        return _untile(px.reshape(-1, 4), w, h, 4, 4)
+
+    # CMPR: 8x8 tiles of four 4x4 DXT1 sub-blocks (2x2, row-major)
+    blk = data.reshape(-1, 8)
+    c0 = (blk[:, 0].astype(np.uint16) << 8) | blk[:, 1]
+    c1 = (blk[:, 2].astype(np.uint16) << 8) | blk[:, 3]
+    p0 = _rgb565_array(c0).astype(np.uint16)
+    p1 = _rgb565_array(c1).astype(np.uint16)
+    four = (c0 > c1)[:, None]
+    pal4 = np.stack([
+        p0, p1,
+        np.where(four, (2 * p0 + p1) // 3, (p0 + p1) // 2),
+        np.where(four, (p0 + 2 * p1) // 3, 0),
+    ], axis=1).astype(np.uint8)                            # (n, 4, 4)
+    shifts = np.array([6, 4, 2, 0], dtype=np.uint8)
+    idx = (blk[:, 4:8, None] >> shifts) & 3                # (n, 4y, 4x)
+    px = pal4[np.arange(len(blk))[:, None, None], idx]     # (n, 4, 4, 4)
+    # (tile, sub_y, sub_x, y, x) -> (tile, sub_y, y, sub_x, x): one 8x8 tile
+    px = px.reshape(-1, 2, 2, 4, 4, 4).transpose(0, 1, 3, 2, 4, 5)
+    return _untile(px.reshape(-1, 4), w, h, 8, 8)
+
+
+def decode_textures(dat, matanim=False):
+    """Decode every material texture of a DatFile in one pass.
+
+    Returns DecodedTexture(source, info, image, tlut, pixels) entries:
+    source 'jobj' (info is the TobjInfo) for each material TOBJ in JOBJ-walk
+    order, then -- with matanim=True -- source 'matanim' (info is the
+    TexAnimInfo) for every swap frame. pixels is an (h, w, 4) uint8 array,
+    or None where the image can't be decoded. Image+palette pairs shared by
+    several TOBJs/frames are decoded once and share the same array."""
+    decoded = {}
+
+    def pixels(image, tlut):
+        key = (image.data_offset, image.format, image.width, image.height,
+               tlut.data_offset if tlut is not None else None)
+        if key not in decoded:
+            try:
+                decoded[key] = decode_image_array(image, tlut)
+            except Exception:
+                decoded[key] = None
+        return decoded[key]
+
+    out = []
+    for _name, off in dat.jobj_roots():
+        for t in dat.jobj_textures(off):
+            out.append(DecodedTexture('jobj', t, t.image, t.tlut,
+                                      pixels(t.image, t.tlut)))
+    if matanim:
+        for _name, off in dat.find_roots('_matanim_joint'):
+            for t in dat.matanim_texanims(off):
+                for i, image in enumerate(t.images):
+                    tlut = t.tluts[i] if i < len(t.tluts) else (
+                        t.tluts[0] if t.tluts else None)
+                    out.append(DecodedTexture('matanim', t, image, tlut,
+                                              pixels(image, tlut)))
+    return out
+
+
 def save_png(rows, path):
+    """Save decode_image rows or a decode_image_array array as PNG."""
     from PIL import Image as PILImage
+    if isinstance(rows, np.ndarray):
+        PILImage.fromarray(rows, 'RGBA').save(path)
+        return
     h, w = len(rows), len(rows[0])
     im = PILImage.new('RGBA', (w, h))
     im.putdata([px for row in rows for px in row])
@@ -329,9 +507,7 @@ def probe(path, dump_dir=None):
     for name, off in dat.roots:
         print(f'  {name} @ 0x{off:X}')
 
-    jobj_roots = [(n, o) for n, o in dat.roots
-                  if n.endswith('_joint') and 'matanim' not in n
-                  and 'shapeanim' not in n]
+    jobj_roots = dat.jobj_roots()
     mat_roots = dat.find_roots('_matanim_joint')
 
     listed = []
@@ -370,7 +546,7 @@ def probe(path, dump_dir=None):
                            f't{t.texmap_id}_f{i}.png')
                     out.parent.mkdir(parents=True, exist_ok=True)
                     try:
-                        save_png(decode_image(img, tlut), out)
+                        save_png(decode_image_array(img, tlut), out)
                         print(f'      -> {out}')
                     except Exception as e:
                         print(f'      decode failed: {e}')
@@ -22,6 +22,19 @@ The vanilla bank pre-seed (see first_run_setup) renders the shipped vanilla
 costumes into this same cache on first run, so app-native vanilla slots are warm
 without an export-time render. Patch costumes (custom bytes) still render once on
 first export, then hit the cache forever after.
+
+Size bound
+----------
+Content addressing means an edited costume leaves its old render behind, so the
+cache is bounded by a byte budget (MEX_HD_CSP_CACHE_MB, default 2 GiB; 0 turns
+eviction off). Every hit bumps the file's mtime, which makes mtime the
+last-access clock; when a publish pushes the cache over budget, the least
+recently used renders are deleted down to 90% of it. Renders whose DAT hash is
+still a vault skin or a vanilla costume (core.hash_index) are pinned and never
+evicted. A render keyed by a derived hash (Ice Climbers partner, Game & Watch
+color -- see effective_key_hash) gets a `<key>.src` sidecar holding the raw DAT
+hash, which is what pinning checks. cache_stats() reports hits/misses/bytes for
+the storage API.
 """
 
 import hashlib
@@ -30,6 +43,8 @@ import os
 import re
 import shutil
 import tempfile
+import threading
+import time
 from pathlib import Path
 from typing import Callable, Optional
 
@@ -47,6 +62,42 @@ HD_SCALE = 4
 CACHE_DIR = STORAGE_PATH / "_csp_hd_cache"
 
 
+def _budget_bytes() -> int:
+    """Cache byte budget: MEX_HD_CSP_CACHE_MB (0 = unbounded), default 2 GiB
+    (~5000 HD renders)."""
+    env = os.environ.get('MEX_HD_CSP_CACHE_MB')
+    if env and env.isdigit():
+        return int(env) * 1024 * 1024
+    return 2048 * 1024 * 1024
+
+
+CACHE_BUDGET_BYTES = _budget_bytes()
+
+# Eviction trims to this fraction of the budget, so a full cache doesn't evict
+# (and re-walk the vault for pins) on every single render.
+_LOW_WATER = 0.9
+
+# Publish temp files older than this are crash leftovers, safe to delete.
+_STALE_TMP_SECONDS = 3600
+
+_ENTRY_RE = re.compile(r'^([0-9a-f]{32})_(\d+)x\.png$')
+_SOURCE_SUFFIX = '.src'
+
+_stats_lock = threading.Lock()
+_evict_lock = threading.Lock()
+# Process-lifetime counters (reset on restart). hits/misses count
+# get_or_render_hd lookups; get_cached is a peek and isn't counted.
+_counters = {'hits': 0, 'misses': 0, 'renders': 0, 'render_failures': 0,
+             'evictions': 0, 'evicted_bytes': 0}
+# cache dir -> running byte total (seeded by one scan, then bumped per publish)
+_tracked_bytes: dict = {}
+
+
+def _count(key: str, n: int = 1):
+    with _stats_lock:
+        _counters[key] += n
+
+
 def _cache_key(dat_hash: str, scale: int = HD_SCALE) -> str:
     return f"{dat_hash}_{scale}x.png"
 
@@ -70,7 +121,178 @@ def get_cached(dat_hash: str, scale: int = HD_SCALE) -> Optional[Path]:
     if not dat_hash:
         return None
     p = cached_path(dat_hash, scale)
-    return p if p.exists() else None
+    if not p.exists():
+        return None
+    _touch(p)
+    return p
+
+
+def _touch(path: Path):
+    """Mark an entry as just used (mtime is the LRU clock; atime is unreliable
+    with noatime/relatime mounts)."""
+    try:
+        os.utime(path, None)
+    except OSError:
+        pass
+
+
+def _source_path(entry: Path) -> Path:
+    """Sidecar naming the raw DAT hash a derived-key render came from."""
+    return entry.with_name(entry.name + _SOURCE_SUFFIX)
+
+
+def _scan_entries(cache_dir: Path):
+    """[(path, pin_hash, size, mtime)] for every cached render -- pin_hash is
+    the raw DAT hash (the .src sidecar when the key is derived, else the key
+    itself). Also deletes stale publish temp files and orphaned sidecars."""
+    entries = []
+    if not cache_dir.exists():
+        return entries
+    now = time.time()
+    sources = {}
+    for p in cache_dir.iterdir():
+        try:
+            st = p.stat()
+        except OSError:
+            continue
+        m = _ENTRY_RE.match(p.name)
+        if m:
+            entries.append((p, m.group(1), st.st_size, st.st_mtime))
+        elif p.name.endswith(_SOURCE_SUFFIX):
+            sources[p.name[:-len(_SOURCE_SUFFIX)]] = p
+        elif p.name.endswith('.tmp') and now - st.st_mtime > _STALE_TMP_SECONDS:
+            try:
+                p.unlink()
+            except OSError:
+                pass
+    for i, (path, h, size, mtime) in enumerate(entries):
+        src = sources.pop(path.name, None)
+        if src is not None:
+            try:
+                entries[i] = (path, src.read_text().strip() or h, size, mtime)
+            except OSError:
+                pass
+    for src in sources.values():
+        try:
+            if now - src.stat().st_mtime <= _STALE_TMP_SECONDS:
+                continue
+        except OSError:                 # evicted under us (cache_stats is unlocked)
+            continue
+        try:
+            src.unlink()
+        except OSError:
+            pass
+    return entries
+
+
+def pinned_hashes() -> Optional[set]:
+    """Raw DAT hashes whose renders must never be evicted: every vault skin
+    (inner DAT md5 + metadata dat_hash) and every vanilla costume DAT --
+    matched against each entry's pin hash (see _scan_entries). None if the
+    index can't be read -- eviction then skips rather than guess."""
+    from core import hash_index
+    try:
+        return hash_index.vault_hashes() | hash_index.vanilla_hashes()
+    except Exception as e:  # noqa: BLE001
+        logger.warning(f"HD cache: cannot resolve pinned hashes: {e}")
+        return None
+
+
+def enforce_budget(budget: Optional[int] = None, *, wait: bool = True,
+                   keep=()) -> dict:
+    """Evict least-recently-used, unpinned renders until the cache is under
+    `budget` (default CACHE_BUDGET_BYTES) -- down to 90% of it, for headroom.
+
+    With wait=False, returns immediately if another eviction is running (the
+    render path uses this so parallel export workers never queue behind it).
+    Paths in `keep` are never evicted (the render that triggered this).
+    """
+    budget = CACHE_BUDGET_BYTES if budget is None else budget
+    result = {'evicted': 0, 'freed_bytes': 0}
+    if not _evict_lock.acquire(blocking=wait):
+        return result
+    try:
+        cache_dir = CACHE_DIR
+        entries = _scan_entries(cache_dir)
+        total = sum(e[2] for e in entries)
+        if budget and total > budget:
+            pinned = pinned_hashes()
+            if pinned is None:
+                return result
+            target = int(budget * _LOW_WATER)
+            for path, h, size, _mtime in sorted(
+                    (e for e in entries if e[1] not in pinned and e[0] not in keep),
+                    key=lambda e: e[3]):
+                if total <= target:
+                    break
+                try:
+                    path.unlink()
+                except OSError:
+                    continue
+                try:
+                    _source_path(path).unlink()
+                except OSError:
+                    pass
+                total -= size
+                result['evicted'] += 1
+                result['freed_bytes'] += size
+            if total > budget:
+                logger.warning(
+                    f"HD cache: {total} bytes still cached after eviction; pinned "
+                    f"renders alone exceed the {budget}-byte budget")
+            if result['evicted']:
+                logger.info(
+                    f"HD cache: evicted {result['evicted']} renders "
+                    f"({result['freed_bytes']} bytes), {total} bytes remain")
+                _count('evictions', result['evicted'])
+                _count('evicted_bytes', result['freed_bytes'])
+        with _stats_lock:
+            _tracked_bytes[cache_dir] = total
+        return result
+    finally:
+        _evict_lock.release()
+
+
+def _note_published(dest: Path):
+    """Account a new render and evict if it pushed the cache over budget."""
+    cache_dir = CACHE_DIR
+    size = dest.stat().st_size
+    with _stats_lock:
+        _counters['renders'] += 1
+        total = _tracked_bytes.get(cache_dir)
+        if total is not None:
+            total = _tracked_bytes[cache_dir] = total + size
+    if total is None:
+        # first publish this session: learn the real size (enforce_budget
+        # records it) and evict if an earlier session left it over budget
+        enforce_budget(wait=False, keep=(dest,))
+    elif CACHE_BUDGET_BYTES and total > CACHE_BUDGET_BYTES:
+        enforce_budget(wait=False, keep=(dest,))
+
+
+def cache_stats(include_pinned: bool = True) -> dict:
+    """Size + hit/miss counters for the storage API. `include_pinned` resolves
+    the pin set (a vault stat-walk) to report how much of the cache is pinned."""
+    entries = _scan_entries(CACHE_DIR)
+    total = sum(e[2] for e in entries)
+    with _stats_lock:
+        counters = dict(_counters)
+        _tracked_bytes[CACHE_DIR] = total
+    lookups = counters['hits'] + counters['misses']
+    stats = {
+        'dir': str(CACHE_DIR),
+        'budget_bytes': CACHE_BUDGET_BYTES,
+        'bytes': total,
+        'entries': len(entries),
+        'hit_rate': (counters['hits'] / lookups) if lookups else None,
+        **counters,
+    }
+    if include_pinned:
+        pinned = pinned_hashes() or set()
+        kept = [e for e in entries if e[1] in pinned]
+        stats['pinned_entries'] = len(kept)
+        stats['pinned_bytes'] = sum(e[2] for e in kept)
+    return stats
 
 
 def effective_key_hash(dat_path, *, paired_dat_path=None, dat_hash=None,
@@ -117,14 +339,18 @@ def get_or_render_hd(
     log = log or logger
     dat_path = Path(dat_path)
 
+    raw_hash = dat_hash or hash_dat(dat_path)
     h = effective_key_hash(dat_path, paired_dat_path=paired_dat_path,
-                           dat_hash=dat_hash, color_index=color_index)
+                           dat_hash=raw_hash, color_index=color_index)
     if not h:
         return None
 
     dest = cached_path(h, scale)
     if dest.exists():
+        _touch(dest)
+        _count('hits')
         return dest
+    _count('misses')
 
     # Lazy import: generate_csp pulls in the heavy HSDRaw stack. costume_assets
     # already imports it at module load, so this is free in practice, but keeping
@@ -155,16 +381,23 @@ def get_or_render_hd(
             )
         if not out or not Path(out).exists():
             log.warning(f"HD cache: render produced no output for {dat_path.name} ({h[:8]})")
+            _count('render_failures')
             return None
 
         # Atomic publish: write a unique temp name in the cache dir, then replace.
+        # A derived key records its raw DAT hash first, so the render is never
+        # visible without the hash it is pinned by.
+        if h != raw_hash:
+            _source_path(dest).write_text(raw_hash)
         tmp_dest = dest.with_name(f"{dest.name}.{os.getpid()}.tmp")
         shutil.copy2(out, tmp_dest)
         os.replace(tmp_dest, dest)
         log.info(f"HD cache: rendered {dat_path.name} at {scale}x -> {dest.name}")
+        _note_published(dest)
         return dest
     except Exception as e:  # noqa: BLE001 - a failed render must never break export
         log.warning(f"HD cache: render error for {dat_path.name}: {e}")
+        _count('render_failures')
         return None
     finally:
         shutil.rmtree(tmp, ignore_errors=True)
@@ -200,9 +433,9 @@ def preseed_vanilla_hd_csps(
 
     total = len(costume_dats)
     log.info(f"HD cache preseed: {total} vanilla costumes to warm")
-    # Pool persistent --csp-server workers across the whole preseed batch: each
-    # costume renders through a warm worker, and the per-render launch stagger
-    # no-ops while the pool is active. One-shot fallback per costume; kill switch
+    # Render through the shared --csp-server workers in the BULK lane: each
+    # costume renders on a warm worker, and the per-render launch stagger no-ops
+    # while workers are up. One-shot fallback per costume; kill switch
     # MEX_CSP_SERVER=0.
     from skinlab.csp_pool import active_pool
     with active_pool():
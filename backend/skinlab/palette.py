@@ -6,11 +6,14 @@ Same semantics as the UI: pool every texture's opaque, non-gray, mid-lightness
 pixels into 1-degree hue bins, merge adjacent bins (gap <= 25 degrees) into
 color groups, fit to the requested group count (merge closest / split widest),
 then apply per-group hue/saturation shifts back onto the ORIGINAL pixels.
-Lightness is never touched, so shading survives recolors.
+Lightness is never touched, so shading survives recolors. Each texture's
+HSL analysis is cached by pixel content (skinlab.texture_cache).
 """
 
 import numpy as np
 
+from skinlab import texture_cache
+
 HUE_TOLERANCE = 25
 MIN_GROUP_PIXELS = 100
 
@@ -68,6 +71,25 @@ def _valid_mask(rgba):
     return mask, h, s, l
 
 
+def _texture_stats(rgba):
+    """(mask, hue, hist) of one texture: the valid-pixel mask, the hues of
+    the valid pixels, and their 1-degree histogram [count, sum s, sum l].
+    Cached by pixel content (skinlab.texture_cache), so re-analyzing the
+    same textures skips the HSL conversion."""
+    key = texture_cache.pixel_key(rgba)
+    hit = texture_cache.get('hsl', key)
+    if hit is not None:
+        return hit['mask'], hit['hue'], hit['hist']
+    mask, h, s, l = _valid_mask(rgba)
+    hv = np.floor(h[mask]).astype(np.int64) % 360
+    hist = np.stack([np.bincount(hv, minlength=360).astype(np.float64),
+                     np.bincount(hv, weights=s[mask], minlength=360),
+                     np.bincount(hv, weights=l[mask], minlength=360)])
+    hue = h[mask]
+    texture_cache.put('hsl', key, {'mask': mask, 'hue': hue, 'hist': hist})
+    return mask, hue, hist
+
+
 # --------------------------------------------------------------------------- #
 # analysis                                                                     #
 # --------------------------------------------------------------------------- #
@@ -81,12 +103,11 @@ def analyze(textures, max_groups=8):
 
     per_tex = {}
     for idx, rgba in textures.items():
-        mask, h, s, l = _valid_mask(rgba)
-        per_tex[idx] = (mask, h)
-        hv = np.floor(h[mask]).astype(np.int64) % 360
-        bins_count += np.bincount(hv, minlength=360)
-        bins_s += np.bincount(hv, weights=s[mask], minlength=360)
-        bins_l += np.bincount(hv, weights=l[mask], minlength=360)
+        mask, hue, hist = _texture_stats(rgba)
+        per_tex[idx] = (mask, hue)
+        bins_count += hist[0].astype(np.int64)
+        bins_s += hist[1]
+        bins_l += hist[2]
 
     # merge adjacent occupied bins (gap <= tolerance) into raw groups
     raw = []
@@ -172,20 +193,21 @@ def analyze(textures, max_groups=8):
 
     # per-texture pixel -> group map (first matching group wins, like the UI)
     pixel_maps = {}
-    for idx, (mask, h) in per_tex.items():
-        flat_mask = mask.ravel()
-        flat_h = h.ravel()
-        gmap = np.full(flat_mask.shape, 255, dtype=np.uint8)
-        unassigned = flat_mask.copy()
+    for idx, (mask, hue) in per_tex.items():
+        # only valid pixels are ever assigned, so work on their hues alone
+        assigned = np.full(hue.shape, 255, dtype=np.uint8)
+        unassigned = np.ones(hue.shape, dtype=bool)
         for gi, g in enumerate(groups):
             lo, hi = g['hueRange']
             if lo <= hi:
-                in_range = (flat_h >= lo - HUE_TOLERANCE) & (flat_h <= hi + HUE_TOLERANCE)
+                in_range = (hue >= lo - HUE_TOLERANCE) & (hue <= hi + HUE_TOLERANCE)
             else:  # wraps 0
-                in_range = (flat_h >= lo - HUE_TOLERANCE) | (flat_h <= hi + HUE_TOLERANCE)
+                in_range = (hue >= lo - HUE_TOLERANCE) | (hue <= hi + HUE_TOLERANCE)
             sel = unassigned & in_range
-            gmap[sel] = gi
+            assigned[sel] = gi
             unassigned &= ~sel
+        gmap = np.full(mask.size, 255, dtype=np.uint8)
+        gmap[mask.ravel()] = assigned
         pixel_maps[idx] = gmap
 
     return groups, pixel_maps
@@ -25,16 +25,25 @@ Transfer estimation is a hybrid tuned against the real vanilla colorways
 Both estimators only need (src_px, dst_px) sample pairs, so the same code
 serves texture-diff (preferred: flat, unshaded, exactly aligned) and CSP-diff
 (fallback: CSP renders share pose/camera, so they are pixel-aligned too).
+
+Everything on the vanilla side (decoded textures, opaque samples, their
+HSL/HSV and hue groups, the stock icon) depends only on the reference
+folder, so `generate_stocks` shares it between all skins of a character and
+runs the per-skin work on a process pool.
 """
 
+import functools
 import io
 import logging
+import os
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
 
 import numpy as np
 from PIL import Image
 
-from skinlab import datprobe
+from skinlab import texture_cache
 from skinlab.palette import rgb_to_hsl, hsl_to_rgb
 
 logger = logging.getLogger(__name__)
@@ -51,64 +60,97 @@ MIN_SAMPLES = 5000      # below this a sample source is considered unusable
 # --------------------------------------------------------------------------- #
 def _dat_textures(dat_path):
     """Decoded material textures of a DAT as HxWx4 uint8 arrays (None where
-    decode fails), in JOBJ-tree walk order."""
-    dat = datprobe.DatFile(dat_path)
-    jobj_roots = [(n, o) for n, o in dat.roots
-                  if n.endswith('_joint') and 'matanim' not in n
-                  and 'shapeanim' not in n]
-    out = []
-    for _name, off in jobj_roots:
-        for t in dat.jobj_textures(off):
-            try:
-                out.append(np.asarray(datprobe.decode_image(t.image, t.tlut),
-                                      dtype=np.uint8))
-            except Exception:
-                out.append(None)
-    return out
+    decode fails), in JOBJ-tree walk order. Cached by DAT content, so the
+    same costume is only decoded once across previews, applies and batches."""
+    return texture_cache.dat_textures(dat_path)
 
 
-def _structure_corr(a, b):
-    """Pearson correlation of two textures' downsampled grayscales -- a
-    recolor keeps the image's spatial structure (hue moves, luminance
-    pattern stays put), a different model's art does not."""
-    ga = np.asarray(Image.fromarray(a).convert('L').resize((16, 16), Image.BOX),
-                    dtype=np.float64).ravel()
-    gb = np.asarray(Image.fromarray(b).convert('L').resize((16, 16), Image.BOX),
-                    dtype=np.float64).ravel()
+def _gray16(img):
+    """16x16 BOX-downsampled grayscale of an RGBA texture, flattened."""
+    return np.asarray(Image.fromarray(img).convert('L').resize((16, 16), Image.BOX),
+                      dtype=np.float64).ravel()
+
+
+def _gray_corr(ga, gb):
     sa, sb = ga.std(), gb.std()
     if sa < 1e-6 or sb < 1e-6:
         return None    # flat texture, no structure to compare
     return float(((ga - ga.mean()) * (gb - gb.mean())).mean() / (sa * sb))
 
 
-def texture_pixel_pairs(vanilla_dat_path, modded_dat_path):
-    """Aligned (src_px, dst_px) Nx3 float arrays from two costume DATs, or
-    None if this is a different model: texture lists that don't line up, OR
-    same-shaped textures whose CONTENT doesn't correlate (model imports that
-    reuse the vanilla texture dimensions)."""
+def _structure_corr(a, b):
+    """Pearson correlation of two textures' downsampled grayscales -- a
+    recolor keeps the image's spatial structure (hue moves, luminance
+    pattern stays put), a different model's art does not."""
+    return _gray_corr(_gray16(a), _gray16(b))
+
+
+class VanillaTextures:
+    """The vanilla half of texture_pixel_pairs, decoded once: per texture the
+    pixels, downsampled grayscale and opaque mask, plus every opaque pixel
+    concatenated in texture order (`samples`). A modded DAT's src_px is then
+    just a boolean selection of `samples`, so one instance serves every skin
+    of a character (generate_stocks) -- and so do the recolor source
+    statistics over it (`source_stats`)."""
+
+    def __init__(self, dat_path):
+        try:
+            textures = _dat_textures(dat_path)
+        except Exception as e:
+            logger.info(f"stock_gen: DAT decode failed: {e}")
+            textures = []
+        self.pixels = textures
+        self.gray = [None if t is None else _gray16(t) for t in textures]
+        self.opaque = [None if t is None else t[..., 3] > 128 for t in textures]
+        counts = [0 if m is None else int(m.sum()) for m in self.opaque]
+        self.offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+        parts = [t[m][:, :3] for t, m in zip(textures, self.opaque) if t is not None]
+        self.samples = (np.concatenate(parts).astype(np.float64) if parts
+                        else np.zeros((0, 3)))
+        self._stats = None
+
+    def source_stats(self, sel):
+        """recolor_stock's source statistics for samples[sel]: computed once
+        over all samples and sliced; the hue groups are only re-derived when
+        the modded DAT masks some of the vanilla pixels out."""
+        if self._stats is None:
+            self._stats = source_stats(self.samples)
+        if sel.all():
+            return self._stats
+        full = self._stats
+        return _stats_from(full.sh[sel], full.sl[sel], full.svh[sel],
+                           full.svs[sel], full.svv[sel])
+
+
+def _pair_textures(van, modded_dat_path):
+    """Pair a modded DAT's textures with decoded vanilla ones -> (sel, dst_px):
+    sel a boolean mask over van.samples (the src_px), or None if this is a
+    different model (see texture_pixel_pairs)."""
+    if not van.pixels:
+        return None
     try:
-        van = _dat_textures(vanilla_dat_path)
         mod = _dat_textures(modded_dat_path)
     except Exception as e:
         logger.info(f"stock_gen: DAT decode failed: {e}")
         return None
-    if not van or not mod:
+    if not mod:
         return None
-    n = min(len(van), len(mod))
+    n = min(len(van.pixels), len(mod))
     matched = 0
-    src, dst = [], []
+    sel = np.zeros(len(van.samples), dtype=bool)
+    dst = []
     corrs = []
     for i in range(n):
-        a, b = van[i], mod[i]
+        a, b = van.pixels[i], mod[i]
         if a is None or b is None or a.shape != b.shape:
             continue
         matched += 1
-        c = _structure_corr(a, b)
+        c = _gray_corr(van.gray[i], _gray16(b))
         if c is not None:
             corrs.append(c)
-        op = (a[..., 3] > 128) & (b[..., 3] > 128)
-        src.append(a[op][:, :3].astype(np.float64))
-        dst.append(b[op][:, :3].astype(np.float64))
+        b_op = b[..., 3] > 128
+        sel[van.offsets[i]:van.offsets[i + 1]] = b_op[van.opaque[i]]
+        dst.append(b[van.opaque[i] & b_op][:, :3].astype(np.float64))
     # a recolor keeps the texture list; lots of shape mismatches mean a
     # different model and index-pairing would produce garbage transforms
     if matched < max(n, 1) * 0.7:
@@ -117,12 +159,25 @@ def texture_pixel_pairs(vanilla_dat_path, modded_dat_path):
         logger.info(f"stock_gen: textures align but content does not "
                     f"(median corr {np.median(corrs):.2f}) -> model import")
         return None
-    if not src:
+    if not dst:
         return None
-    src_px, dst_px = np.concatenate(src), np.concatenate(dst)
-    if len(src_px) < MIN_SAMPLES:
+    dst_px = np.concatenate(dst)
+    if len(dst_px) < MIN_SAMPLES:
         return None
-    return src_px, dst_px
+    return sel, dst_px
+
+
+def texture_pixel_pairs(vanilla_dat_path, modded_dat_path):
+    """Aligned (src_px, dst_px) Nx3 float arrays from two costume DATs, or
+    None if this is a different model: texture lists that don't line up, OR
+    same-shaped textures whose CONTENT doesn't correlate (model imports that
+    reuse the vanilla texture dimensions)."""
+    van = VanillaTextures(vanilla_dat_path)
+    paired = _pair_textures(van, modded_dat_path)
+    if paired is None:
+        return None
+    sel, dst_px = paired
+    return van.samples[sel], dst_px
 
 
 def mapping_consistency(src_px, dst_px):
@@ -244,27 +299,15 @@ V_BLACK = 0.10
 IDENTITY_EPS = 0.02     # mean squared weighted-HSV movement = "unchanged"
 RAMP_KEEP = 0.5         # how much of the icon's own shading offset survives
 
+# the vanilla-side inputs of recolor_stock's lookup: HSL hue/lightness and HSV
+# of every source pixel, and the hue groups [(lo, hi, pixel indices)]
+SourceStats = namedtuple('SourceStats', 'sh sl svh svs svv groups')
 
-def recolor_stock(stock_rgba, src_px, dst_px):
-    """Recolor a stock icon (HxWx4) by DIRECT COLOR LOOKUP: for each icon
-    color, find the texture pixels of that color family in the vanilla skin
-    (hue-group gated for saturated colors) and take the color those pixels
-    actually BECAME in the modded skin. Outputs always come from the modded
-    skin's real palette, so drastic recolors (yellow -> near-black) cannot
-    leave stray out-of-gamut colors the way hue/sat deltas did. A fraction
-    of the icon's own lightness offset is kept so pixel-art shading ramps
-    survive, and colors whose matched pixels did not move keep their exact
-    original value."""
-    sh, ss, sl = rgb_to_hsl(src_px)
-    dh, ds, dl = rgb_to_hsl(dst_px)
-    # classification + distances use HSV: HSL saturation explodes near white
-    # (a pale pink reads s=100, l=92), which mis-routes light colored pixels
-    svh, svs, svv = _rgb_to_hsv(src_px)
-    dvh, dvs, dvv = _rgb_to_hsv(dst_px)
-    valid = (svs >= SAT_NEUTRAL_V) & (svv >= V_BLACK)
 
+def _stats_from(sh, sl, svh, svs, svv):
     # hue groups over the vanilla pixels; saturated icon colors only sample
     # within their own group so an unrelated region can't dilute the lookup
+    valid = (svs >= SAT_NEUTRAL_V) & (svv >= V_BLACK)
     groups = []
     for lo, hi in _hue_groups(sh, valid):
         if lo < 0:
@@ -273,6 +316,36 @@ def recolor_stock(stock_rgba, src_px, dst_px):
             in_g = valid & (sh >= lo) & (sh <= hi)
         if in_g.sum() >= 50:
             groups.append((lo, hi, np.where(in_g)[0]))
+    return SourceStats(sh, sl, svh, svs, svv, groups)
+
+
+def source_stats(src_px):
+    """SourceStats for an Nx3 source pixel array."""
+    sh, _ss, sl = rgb_to_hsl(src_px)
+    # classification + distances use HSV: HSL saturation explodes near white
+    # (a pale pink reads s=100, l=92), which mis-routes light colored pixels
+    svh, svs, svv = _rgb_to_hsv(src_px)
+    return _stats_from(sh, sl, svh, svs, svv)
+
+
+def recolor_stock(stock_rgba, src_px, dst_px, src_stats=None):
+    """Recolor a stock icon (HxWx4) by DIRECT COLOR LOOKUP: for each icon
+    color, find the texture pixels of that color family in the vanilla skin
+    (hue-group gated for saturated colors) and take the color those pixels
+    actually BECAME in the modded skin. Outputs always come from the modded
+    skin's real palette, so drastic recolors (yellow -> near-black) cannot
+    leave stray out-of-gamut colors the way hue/sat deltas did. A fraction
+    of the icon's own lightness offset is kept so pixel-art shading ramps
+    survive, and colors whose matched pixels did not move keep their exact
+    original value.
+
+    src_stats: source_stats(src_px) when the caller already has it (shared
+    vanilla samples, see VanillaTextures)."""
+    if src_stats is None:
+        src_stats = source_stats(src_px)
+    sh, sl, svh, svs, svv, groups = src_stats
+    dh, ds, dl = rgb_to_hsl(dst_px)
+    dvh, dvs, dvv = _rgb_to_hsv(dst_px)
 
     def group_pool(ch):
         best = None
@@ -740,9 +813,58 @@ def recolor_gw_stock(png_bytes, color_index):
 # --------------------------------------------------------------------------- #
 # entry point                                                                  #
 # --------------------------------------------------------------------------- #
+def _reference_dir(vanilla_dir, character, costume_code):
+    """The vanilla costume folder a skin is derived from: its own costume
+    code's, else the character's Nr folder (custom MEX slots)."""
+    ref = vanilla_dir / character / costume_code
+    if not ref.is_dir() and len(costume_code) >= 4:
+        ref = vanilla_dir / character / (costume_code[:4] + 'Nr')
+    if not ref.is_dir() and len(costume_code) >= 4:
+        # vault character names don't always match the vanilla folder names
+        # (Nana skins live under 'Ice Climbers' but assets under 'Nana');
+        # costume codes are globally unique, so search every character
+        for cand in (costume_code, costume_code[:4] + 'Nr'):
+            hits = [d for d in vanilla_dir.glob(f'*/{cand}') if d.is_dir()]
+            if hits:
+                ref = hits[0]
+                break
+    return ref
+
+
+class VanillaReference:
+    """A vanilla costume folder as generate_stock reads it. The decoded DAT
+    textures and the stock icon are loaded on first use and kept, so a batch
+    pays for them once per character instead of once per skin."""
+
+    def __init__(self, ref):
+        self.ref = Path(ref)
+        # the vanilla stock is only needed as the RECOLOR base; head-shot
+        # crops draw the icon from scratch (Nana's vanilla folders ship no
+        # stock.png -- the IC pair shares Popo's icon -- yet her skins still
+        # deserve crops)
+        self.stock_path = self.ref / 'stock.png'
+        self.stock_exists = self.stock_path.exists()
+        self.dat_path = self.ref / f'{self.ref.name}.dat'
+        self.csp_path = self.ref / 'csp.png'
+        self._textures = None
+        self._stock = None
+
+    @property
+    def textures(self):
+        if self._textures is None:
+            self._textures = VanillaTextures(self.dat_path)
+        return self._textures
+
+    @property
+    def stock(self):
+        if self._stock is None:
+            self._stock = _load_rgba(self.stock_path)
+        return self._stock
+
+
 def generate_stock(vanilla_dir, character, costume_code,
                    modded_dat_path=None, modded_csp=None,
-                   head_shot_provider=None):
+                   head_shot_provider=None, reference=None):
     """Generate a stock icon PNG for a modded costume.
 
     vanilla_dir: VANILLA_ASSETS_DIR (Path or str)
@@ -753,6 +875,8 @@ def generate_stock(vanilla_dir, character, costume_code,
     head_shot_provider: zero-arg callable -> (png_path_or_bytes, head_dict)
       from generate_csp.generate_head_shot. Called LAZILY, only when texture
       pairing fails (= model import), since the render costs a few seconds.
+    reference: a VanillaReference for this costume's vanilla folder, to share
+      its decoded textures between calls (generate_stocks)
 
     Method order:
       texture-diff  recolors of the vanilla model (texture lists align)
@@ -762,33 +886,22 @@ def generate_stock(vanilla_dir, character, costume_code,
 
     Returns (png_bytes, method) or None.
     """
-    vanilla_dir = Path(vanilla_dir)
-    ref = vanilla_dir / character / costume_code
-    if not ref.is_dir() and len(costume_code) >= 4:
-        ref = vanilla_dir / character / (costume_code[:4] + 'Nr')
-    if not ref.is_dir() and len(costume_code) >= 4:
-        # vault character names don't always match the vanilla folder names
-        # (Nana skins live under 'Ice Climbers' but assets under 'Nana');
-        # costume codes are globally unique, so search every character
-        for cand in (costume_code, costume_code[:4] + 'Nr'):
-            hits = [d for d in vanilla_dir.glob(f'*/{cand}') if d.is_dir()]
-            if hits:
-                ref = hits[0]
-                break
-    # the vanilla stock is only needed as the RECOLOR base; head-shot crops
-    # draw the icon from scratch (Nana's vanilla folders ship no stock.png --
-    # the IC pair shares Popo's icon -- yet her skins still deserve crops)
-    stock_path = ref / 'stock.png'
-    stock_exists = stock_path.exists()
-    ref_dat = ref / f'{ref.name}.dat'
+    if reference is None:
+        reference = VanillaReference(_reference_dir(Path(vanilla_dir), character,
+                                                    costume_code))
 
     pairs = None
+    src_stats = None
     method = None
     low_confidence = False
-    if stock_exists and modded_dat_path is not None and ref_dat.exists():
-        pairs = texture_pixel_pairs(ref_dat, modded_dat_path)
+    if reference.stock_exists and modded_dat_path is not None \
+            and reference.dat_path.exists():
+        paired = _pair_textures(reference.textures, modded_dat_path)
         method = 'texture-diff'
-        if pairs is not None:
+        if paired is not None:
+            sel, dst_px = paired
+            pairs = reference.textures.samples[sel], dst_px
+            src_stats = reference.textures.source_stats(sel)
             consistency = mapping_consistency(pairs[0], pairs[1])
             if consistency > CONSISTENCY_MAX:
                 low_confidence = True
@@ -814,18 +927,121 @@ def generate_stock(vanilla_dir, character, costume_code,
             logger.info(f"stock_gen: generated {character}/{costume_code} via csp-crop")
             return buf.getvalue(), 'csp-crop'
 
-    if pairs is None and stock_exists and modded_csp is not None:
-        ref_csp = ref / 'csp.png'
-        if ref_csp.exists():
-            pairs = csp_pixel_pairs(ref_csp, modded_csp)
+    if pairs is None and reference.stock_exists and modded_csp is not None:
+        if reference.csp_path.exists():
+            pairs = csp_pixel_pairs(reference.csp_path, modded_csp)
             method = 'csp-diff'
     if pairs is None:
         return None
 
-    stock_rgba = _load_rgba(stock_path)
-    result = recolor_stock(stock_rgba, pairs[0], pairs[1])
+    result = recolor_stock(reference.stock, pairs[0], pairs[1], src_stats)
     img = Image.fromarray(np.clip(result, 0, 255).astype(np.uint8))
     buf = io.BytesIO()
     img.save(buf, format='PNG')
     logger.info(f"stock_gen: generated {character}/{costume_code} via {method}")
     return buf.getvalue(), method
+
+
+# --------------------------------------------------------------------------- #
+# batch: a whole vault at once                                                 #
+# --------------------------------------------------------------------------- #
+# modded_csp: path or PNG bytes, as for generate_stock
+StockJob = namedtuple('StockJob', 'character costume_code modded_dat_path modded_csp',
+                      defaults=(None,))
+# png/method: generate_stock's result (png None = nothing derivable).
+# head_shot: the skin wanted a head-shot crop (model import / material
+# repaint), which a batch worker cannot render -- png is then only the
+# no-render fallback and the caller should redo the skin with a provider.
+StockResult = namedtuple('StockResult', 'png method head_shot error')
+
+STOCK_CHUNK = 16        # jobs per pool task
+
+
+def _stock_workers() -> int:
+    """Processes for generate_stocks. The work is NumPy/PIL-bound and holds
+    the GIL for most of a skin, so it scales with processes, not threads;
+    the default is the logical CPU count clamped to [1, 8], overridable via
+    the MEX_STOCK_WORKERS env var."""
+    env = os.environ.get('MEX_STOCK_WORKERS')
+    if env and env.isdigit():
+        return max(1, min(int(env), 32))
+    return max(1, min(os.cpu_count() or 2, 8))
+
+
+@functools.lru_cache(maxsize=2)
+def _cached_reference(ref_dir):
+    return VanillaReference(ref_dir)
+
+
+def _run_chunk(vanilla_dir, ref_dir, jobs):
+    """Pool task: a slice of one vanilla folder's jobs. The reference stays
+    cached in the worker process, so later slices of the same character that
+    land on it skip the vanilla decode too."""
+    reference = _cached_reference(ref_dir)
+    out = []
+    for job in jobs:
+        wanted = []
+
+        def no_render():
+            wanted.append(True)
+            return None, None
+
+        try:
+            got = generate_stock(vanilla_dir, job.character, job.costume_code,
+                                 modded_dat_path=job.modded_dat_path,
+                                 modded_csp=job.modded_csp,
+                                 head_shot_provider=no_render,
+                                 reference=reference)
+        except Exception as e:  # noqa: BLE001 - one bad skin mustn't stop the batch
+            logger.warning(f"stock_gen: {job.character}/{job.costume_code} failed: {e}")
+            out.append(StockResult(None, None, False, str(e)))
+            continue
+        png, method = got if got else (None, None)
+        out.append(StockResult(png, method, bool(wanted), None))
+    return out
+
+
+def generate_stocks(vanilla_dir, jobs, workers=None, on_result=None):
+    """generate_stock for many skins ("regenerate all stocks"). Jobs are
+    grouped by their vanilla folder so the vanilla textures and the recolor
+    source statistics are decoded once per character (per worker) and shared
+    by all of its skins; the groups are cut into STOCK_CHUNK slices and run
+    on a process pool (`workers`, default MEX_STOCK_WORKERS; 1 = inline).
+
+    jobs: StockJob list. on_result(index, StockResult) is called on the
+    calling thread as each skin finishes, in completion order. Returns the
+    StockResults in job order."""
+    vanilla_dir = Path(vanilla_dir)
+    groups = {}
+    for i, job in enumerate(jobs):
+        ref_dir = _reference_dir(vanilla_dir, job.character, job.costume_code)
+        groups.setdefault(str(ref_dir), []).append(i)
+    chunks = [(ref_dir, idx[k:k + STOCK_CHUNK])
+              for ref_dir, idx in groups.items()
+              for k in range(0, len(idx), STOCK_CHUNK)]
+
+    results = [None] * len(jobs)
+
+    def deliver(idx, chunk_results):
+        for i, res in zip(idx, chunk_results):
+            results[i] = res
+            if on_result is not None:
+                on_result(i, res)
+
+    workers = min(workers or _stock_workers(), len(chunks))
+    try:
+        if workers <= 1:
+            for ref_dir, idx in chunks:
+                deliver(idx, _run_chunk(vanilla_dir, ref_dir, [jobs[i] for i in idx]))
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = {pool.submit(_run_chunk, vanilla_dir, ref_dir,
+                                       [jobs[i] for i in idx]): idx
+                           for ref_dir, idx in chunks}
+                for fut in as_completed(futures):
+                    deliver(futures[fut], fut.result())
+    finally:
+        _cached_reference.cache_clear()
+    logger.info(f"stock_gen: batch of {len(jobs)} skin(s) over {len(groups)} "
+                f"vanilla reference(s), {max(workers, 1)} worker(s)")
+    return results
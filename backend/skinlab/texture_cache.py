@@ -0,0 +1,259 @@
+"""
+Content-addressed cache of decoded costume textures and their color analysis.
+
+Why this exists
+---------------
+Stock generation and the Skin Lab palette tool keep re-deriving the same
+arrays: every stock preview/apply (and every skin of a batch) decodes the
+vanilla and modded DATs' textures through datprobe, and every palette analyze
+converts each texture to HSL and re-bins it. Both depend only on bytes, so
+they are stored once and read back:
+
+    dat-<dat md5>.npz   decoded material textures of a DAT, one member per
+                        image+palette (named after their data offsets) and
+                        the JOBJ-walk `order` referencing them
+    hsl-<pixel md5>.npz palette.py's per-texture analysis: the valid-pixel
+                        mask, those pixels' hues and the 360-bin histogram
+                        (count / summed saturation / summed lightness)
+
+Skin Lab textures come from the live viewer session and may already be
+edited, so palette entries are keyed by the pixels themselves rather than by
+DAT + offset; an unedited texture hashes the same every time.
+
+Entries are compressed .npz (fast deflate), published atomically (a temp
+name in the cache dir, then os.replace). The cache is bounded by a byte
+budget (MEX_TEXTURE_CACHE_MB, default 512 MiB; 0 = unbounded): every hit
+bumps the entry's mtime, and a write that pushes the cache over budget evicts the
+least recently used entries down to 90% of it. Everything here is derived
+data, so nothing is pinned, and an unreadable entry is just a miss.
+"""
+
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+import time
+import zipfile
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+from core.config import STORAGE_PATH
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR = STORAGE_PATH / "_texture_cache"
+
+# bump when the stored layout (or what it is derived with) changes
+CACHE_VERSION = 1
+
+
+def _budget_bytes() -> int:
+    """Cache byte budget: MEX_TEXTURE_CACHE_MB (0 = unbounded), default 512 MiB."""
+    env = os.environ.get('MEX_TEXTURE_CACHE_MB')
+    if env and env.isdigit():
+        return int(env) * 1024 * 1024
+    return 512 * 1024 * 1024
+
+
+CACHE_BUDGET_BYTES = _budget_bytes()
+
+_LOW_WATER = 0.9
+# np.savez_compressed's default level costs ~3x the HSL conversion it saves on
+# a miss; level 1 writes as fast as the conversion for ~10% more bytes
+_COMPRESS_LEVEL = 1
+_STALE_TMP_SECONDS = 3600
+
+_stats_lock = threading.Lock()
+_evict_lock = threading.Lock()
+_counters = {'hits': 0, 'misses': 0, 'writes': 0, 'evictions': 0, 'evicted_bytes': 0}
+# cache dir -> running byte total (seeded by one scan, then bumped per write)
+_tracked_bytes: dict = {}
+
+
+def _count(key: str, n: int = 1):
+    with _stats_lock:
+        _counters[key] += n
+
+
+def entry_path(kind: str, key: str) -> Path:
+    return CACHE_DIR / f"{kind}-{key}.npz"
+
+
+def get(kind: str, key: str) -> Optional[dict]:
+    """The cached arrays for (kind, key) as a dict, or None on a miss."""
+    path = entry_path(kind, key)
+    try:
+        with np.load(path, allow_pickle=False) as npz:
+            arrays = {name: npz[name] for name in npz.files}
+    except FileNotFoundError:
+        _count('misses')
+        return None
+    except (OSError, ValueError, KeyError, EOFError, zipfile.BadZipFile) as e:
+        logger.warning(f"texture cache: unreadable entry {path.name}: {e}")
+        _count('misses')
+        return None
+    if int(arrays.pop('_version', -1)) != CACHE_VERSION:
+        _count('misses')
+        return None
+    try:
+        os.utime(path, None)   # mtime is the LRU clock
+    except OSError:
+        pass
+    _count('hits')
+    return arrays
+
+
+def put(kind: str, key: str, arrays: dict) -> None:
+    """Store arrays for (kind, key). Best-effort: a failed write only logs."""
+    dest = entry_path(kind, key)
+    try:
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=dest.parent, prefix=f".{dest.stem}-", suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f, \
+                    zipfile.ZipFile(f, 'w', zipfile.ZIP_DEFLATED,
+                                    compresslevel=_COMPRESS_LEVEL) as zf:
+                for name, arr in {'_version': np.array(CACHE_VERSION), **arrays}.items():
+                    with zf.open(f"{name}.npy", 'w', force_zip64=True) as member:
+                        np.lib.format.write_array(member, np.asanyarray(arr),
+                                                  allow_pickle=False)
+            os.replace(tmp, dest)
+        except BaseException:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+            raise
+    except OSError as e:
+        logger.warning(f"texture cache: could not write {dest.name}: {e}")
+        return
+    _note_written(dest)
+
+
+def _scan_entries(cache_dir: Path):
+    """[(path, size, mtime)] for every entry; also deletes stale temp files."""
+    entries = []
+    if not cache_dir.exists():
+        return entries
+    now = time.time()
+    for p in cache_dir.iterdir():
+        try:
+            st = p.stat()
+        except OSError:
+            continue
+        if p.suffix == '.npz':
+            entries.append((p, st.st_size, st.st_mtime))
+        elif p.name.endswith('.tmp') and now - st.st_mtime > _STALE_TMP_SECONDS:
+            try:
+                p.unlink()
+            except OSError:
+                pass
+    return entries
+
+
+def enforce_budget(budget: Optional[int] = None, *, wait: bool = True, keep=()) -> dict:
+    """Evict least-recently-used entries until the cache is under `budget`
+    (default CACHE_BUDGET_BYTES) -- down to 90% of it, for headroom. Paths in
+    `keep` are never evicted (the write that triggered this)."""
+    budget = CACHE_BUDGET_BYTES if budget is None else budget
+    result = {'evicted': 0, 'freed_bytes': 0}
+    if not _evict_lock.acquire(blocking=wait):
+        return result
+    try:
+        cache_dir = CACHE_DIR
+        entries = _scan_entries(cache_dir)
+        total = sum(e[1] for e in entries)
+        if budget and total > budget:
+            target = int(budget * _LOW_WATER)
+            for path, size, _mtime in sorted((e for e in entries if e[0] not in keep),
+                                             key=lambda e: e[2]):
+                if total <= target:
+                    break
+                try:
+                    path.unlink()
+                except OSError:
+                    continue
+                total -= size
+                result['evicted'] += 1
+                result['freed_bytes'] += size
+            if result['evicted']:
+                logger.info(f"texture cache: evicted {result['evicted']} entries "
+                            f"({result['freed_bytes']} bytes), {total} bytes remain")
+                _count('evictions', result['evicted'])
+                _count('evicted_bytes', result['freed_bytes'])
+        with _stats_lock:
+            _tracked_bytes[cache_dir] = total
+        return result
+    finally:
+        _evict_lock.release()
+
+
+def _note_written(dest: Path):
+    cache_dir = CACHE_DIR
+    try:
+        size = dest.stat().st_size
+    except OSError:
+        return
+    with _stats_lock:
+        _counters['writes'] += 1
+        total = _tracked_bytes.get(cache_dir)
+        if total is not None:
+            total = _tracked_bytes[cache_dir] = total + size
+    if total is None or (CACHE_BUDGET_BYTES and total > CACHE_BUDGET_BYTES):
+        enforce_budget(wait=False, keep=(dest,))
+
+
+def cache_stats() -> dict:
+    """Size + hit/miss counters (process lifetime)."""
+    entries = _scan_entries(CACHE_DIR)
+    total = sum(e[1] for e in entries)
+    with _stats_lock:
+        counters = dict(_counters)
+        _tracked_bytes[CACHE_DIR] = total
+    lookups = counters['hits'] + counters['misses']
+    return {
+        'dir': str(CACHE_DIR),
+        'budget_bytes': CACHE_BUDGET_BYTES,
+        'bytes': total,
+        'entries': len(entries),
+        'hit_rate': (counters['hits'] / lookups) if lookups else None,
+        **counters,
+    }
+
+
+# --------------------------------------------------------------------------- #
+# decoded DAT textures                                                         #
+# --------------------------------------------------------------------------- #
+def dat_textures(dat_path):
+    """datprobe.decode_textures(...) pixels of a DAT (HxWx4 uint8, None where
+    decode fails), in JOBJ-walk order -- decoded once per distinct DAT."""
+    from skinlab import datprobe
+
+    dat = datprobe.DatFile(dat_path)
+    digest = hashlib.md5(dat.raw).hexdigest()
+    hit = get('dat', digest)
+    if hit is not None:
+        return [hit[name] if name else None for name in hit['order'].tolist()]
+
+    decoded = datprobe.decode_textures(dat)
+    members, order = {}, []
+    for t in decoded:
+        if t.pixels is None:
+            order.append('')
+            continue
+        tlut = t.tlut.data_offset if t.tlut is not None else 'x'
+        name = f"t{t.image.data_offset}_{tlut}_{t.image.format}"
+        members.setdefault(name, t.pixels)
+        order.append(name)
+    put('dat', digest, {'order': np.array(order, dtype=str), **members})
+    return [t.pixels for t in decoded]
+
+
+def pixel_key(rgba) -> str:
+    """Content key of an image array (shape + bytes)."""
+    h = hashlib.md5(str(rgba.shape).encode())
+    h.update(np.ascontiguousarray(rgba).data)
+    return h.hexdigest()
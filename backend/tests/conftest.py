@@ -16,6 +16,7 @@ Usage:
         resp = client.post('/api/mex/storage/...', json={...})
         assert vault.read()['characters']['Fox']['skins'] == [...]
 """
+import stat
 import sys
 from pathlib import Path
 
@@ -32,6 +33,8 @@ if str(BACKEND_DIR) not in sys.path:
 import core.metadata as core_metadata  # noqa: E402
 import core.config as core_config      # noqa: E402
 
+FAKE_MEXCLI = Path(__file__).parent / 'fake_mexcli.py'
+
 
 class VaultHarness:
     """A temp vault: real metadata IO + filesystem helpers + a wired Flask client."""
@@ -120,3 +123,50 @@ def dual_backend(request, tmp_path, monkeypatch):
     harness = VaultHarness(storage, monkeypatch)
     harness.backend = request.param
     return harness
+
+
+@pytest.fixture(autouse=True)
+def _texture_cache_dir(tmp_path_factory, monkeypatch):
+    """stock_gen / palette read through skinlab.texture_cache; keep every test's
+    entries out of the real storage folder (and out of each other's way)."""
+    from skinlab import texture_cache
+    monkeypatch.setattr(texture_cache, 'CACHE_DIR',
+                        tmp_path_factory.mktemp('texture_cache'))
+
+
+@pytest.fixture(autouse=True)
+def _csp_log(tmp_path, monkeypatch):
+    """processor/generate_csp logs to the app's logs/ folder; send each test's
+    CSP log lines to its tmp_path instead."""
+    import logging
+    monkeypatch.setenv('NUCLEUS_LOGS_DIR', str(tmp_path))
+    handler = logging.FileHandler(tmp_path / 'csp_generation.log', delay=True)
+    monkeypatch.setattr(logging.getLogger('csp'), 'handlers', [handler])
+    yield
+    handler.close()
+
+
+@pytest.fixture
+def mex(tmp_path, monkeypatch):
+    """MexManager factory against tests/fake_mexcli.py (behind a POSIX shell
+    wrapper) and a temp project. `mex(**kw)` builds a manager (serve=True by
+    default); `mex.starts()` lists the mexcli process starts ('serve' /
+    'oneshot'). Servers are shut down afterwards."""
+    import core.state  # noqa: F401 - puts scripts/tools on sys.path
+    import mex_bridge
+
+    cli = tmp_path / 'mexcli'
+    cli.write_text(f'#!/bin/sh\nexec "{sys.executable}" "{FAKE_MEXCLI}" "$@"\n')
+    cli.chmod(cli.stat().st_mode | stat.S_IEXEC)
+    project = tmp_path / 'project' / 'project.mexproj'
+    project.parent.mkdir()
+    project.write_text('{}')
+    log = tmp_path / 'starts.log'
+    monkeypatch.setenv('FAKE_MEXCLI_LOG', str(log))
+
+    def make(**kw):
+        kw.setdefault('serve', True)
+        return mex_bridge.MexManager(str(cli), str(project), **kw)
+    make.starts = lambda: [line.split('\t')[1] for line in log.read_text().splitlines()] if log.exists() else []
+    yield make
+    mex_bridge.shutdown_servers()
@@ -0,0 +1,49 @@
+"""
+Stand-in for `HSDRawViewer.exe --csp-server`, speaking the same line protocol
+(see skinlab/csp_pool.py), so the render service can be tested on Linux.
+
+    python fake_csp_server.py --csp-server
+
+Prints READY, then for each TAB-joined job line ("--csp\t<dat>\t<output>...")
+writes <output> and prints "DONE\t<output>". The DAT's file name steers it:
+'bad' -> "ERR ...", 'crash' -> exits mid-job, 'hang' -> never answers,
+'slow' -> takes 0.3s. FAKE_CSP_SERVER_FAIL=1 makes it exit before READY, and
+every job is appended to FAKE_CSP_SERVER_LOG (when set) as "<pid>\t<dat>".
+"""
+import os
+import sys
+import time
+
+
+def main():
+    if os.environ.get('FAKE_CSP_SERVER_FAIL') == '1':
+        return 2
+    log = os.environ.get('FAKE_CSP_SERVER_LOG')
+    print('READY', flush=True)
+    for line in sys.stdin:
+        line = line.rstrip('\n')
+        if line == 'QUIT':
+            return 0
+        args = line.split('\t')
+        dat, output = args[1], args[2]
+        name = os.path.basename(dat)
+        if log:
+            with open(log, 'a') as f:
+                f.write(f'{os.getpid()}\t{name}\n')
+        if 'crash' in name:
+            return 3
+        if 'hang' in name:
+            time.sleep(3600)
+        if 'slow' in name:
+            time.sleep(0.3)
+        if 'bad' in name:
+            print(f'ERR cannot render {name}', flush=True)
+            continue
+        with open(output, 'wb') as f:
+            f.write(b'PNG:' + name.encode())
+        print(f'DONE\t{output}', flush=True)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
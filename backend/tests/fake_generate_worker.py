@@ -0,0 +1,88 @@
+"""
+Stand-in for aiengine/worker/generate_worker.py that needs no torch: the real
+worker's protocol (one-shot, --serve keep-warm loop, idle exit, --check) runs
+unchanged, only the pipeline is stubbed, so aiengine/runner.py can be tested
+anywhere.
+
+    python fake_generate_worker.py [--serve [--idle-timeout S]]
+
+"Loading" a model sleeps FAKE_WORKER_LOAD_S (default 0.3) and each step
+sleeps FAKE_WORKER_STEP_S (default 0); the output is a 1x1 PNG. The prompt
+steers failures: 'fail' -> an error result, 'crash' -> the process exits
+mid-job, 'hang' -> the job never finishes. Process starts and model loads
+are appended to FAKE_WORKER_LOG (when set) as "<pid>\t<start|load>\t<detail>".
+"""
+import importlib.util
+import os
+import struct
+import sys
+import time
+import zlib
+from pathlib import Path
+
+WORKER = Path(__file__).resolve().parents[1] / 'aiengine' / 'worker' / 'generate_worker.py'
+
+_spec = importlib.util.spec_from_file_location('generate_worker', WORKER)
+worker = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(worker)
+
+
+def _log(kind, detail):
+    path = os.environ.get('FAKE_WORKER_LOG')
+    if path:
+        with open(path, 'a') as f:
+            f.write(f"{os.getpid()}\t{kind}\t{detail}\n")
+
+
+def _png_1x1():
+    def chunk(tag, data):
+        return (struct.pack('>I', len(data)) + tag + data
+                + struct.pack('>I', zlib.crc32(tag + data)))
+    return (b'\x89PNG\r\n\x1a\n'
+            + chunk(b'IHDR', struct.pack('>IIBBBBB', 1, 1, 8, 2, 0, 0, 0))
+            + chunk(b'IDAT', zlib.compress(b'\x00\xff\x00\xff'))
+            + chunk(b'IEND', b''))
+
+
+class StubPipeline:
+    def __init__(self, spec):
+        self.repo_id = spec['repo_id']
+
+
+def load_pipeline(spec):
+    time.sleep(float(os.environ.get('FAKE_WORKER_LOAD_S', '0.3')))
+    _log('load', spec['repo_id'])
+    return StubPipeline(spec)
+
+
+def release_memory():
+    pass
+
+
+def render(pipe, job, prompt, width, height, steps, on_step):
+    if 'crash' in prompt:
+        os._exit(3)
+    if 'hang' in prompt:
+        time.sleep(3600)
+    if 'fail' in prompt:
+        raise RuntimeError('CUDA out of memory')
+    for done in range(1, steps + 1):
+        time.sleep(float(os.environ.get('FAKE_WORKER_STEP_S', '0')))
+        on_step(done)
+    with open(job['out_path'], 'wb') as f:
+        f.write(_png_1x1())
+
+
+def check():
+    worker.emit({'ok': True, 'python': sys.version.split()[0], 'torch': None,
+                 'cuda': False, 'stub': True})
+
+
+worker.load_pipeline = load_pipeline
+worker.release_memory = release_memory
+worker.render = render
+worker.check = check
+
+if __name__ == '__main__':
+    _log('start', 'serve' if '--serve' in sys.argv else 'oneshot')
+    worker.main()
@@ -0,0 +1,131 @@
+"""
+Stand-in for `mexcli`, one-shot and `mexcli serve` (see scripts/tools/mex_bridge.py
+MexCliServer and MexCLI Commands/ServeCommand.cs), so the bridge can be tested
+on Linux.
+
+    python fake_mexcli.py <command> <project> [args...]   # one-shot
+    python fake_mexcli.py serve                           # NDJSON server
+
+Every command answers {"success": true, "mode", "pid", "args", "opens", "stdin"}
+where `opens` counts project loads in this process (a server loads a project
+once and reuses it until a failed command or "reset"; `set-*` commands echo
+their stdin). Command names steer it:
+'fail' -> {"success": false, "error": "boom"} + exit code 1, 'crash' -> the
+process exits mid-command, 'hang' -> never answers. FAKE_MEXCLI_NO_SERVE=1
+makes `serve` an unknown command (an older mexcli), and each process start is
+appended to FAKE_MEXCLI_LOG (when set) as "<pid>\t<mode>\t<command>".
+
+When the project has a data/costumes.json ({fighter: [fileName, ...]}),
+list-fighters / get-costumes / get-all-costumes answer from it like MexCLI;
+FAKE_MEXCLI_NO_BULK=1 makes get-all-costumes unknown (usage on stdout,
+"Unknown command: ..." on stderr, exit 1) and FAKE_MEXCLI_OPEN_FAIL=1 makes
+them fail to open the project.
+"""
+import json
+import os
+import sys
+import time
+
+_loaded = None
+_opens = 0
+USAGE = 'MexCLI - Command-line interface for MexManager'
+
+
+class UnknownCommand(Exception):
+    pass
+
+
+def _costume_listing(command, args):
+    path = os.path.join(os.path.dirname(args[1]), 'data', 'costumes.json')
+    if not os.path.exists(path):
+        return None
+    if os.environ.get('FAKE_MEXCLI_OPEN_FAIL') == '1':
+        return 1, json.dumps({'success': False, 'error': 'Failed to open project'})
+    with open(path) as f:
+        table = json.load(f)
+    fighters = [{'fighter': name, 'fighterInternalId': i, 'costumeCount': len(files),
+                 'costumes': [{'index': c, 'name': f"{name} {c}", 'fileName': fn,
+                               'csp': f"csp\\csp_{i:03d}{c}", 'icon': None}
+                              for c, fn in enumerate(files)]}
+                for i, (name, files) in enumerate(table.items())]
+    if command == 'list-fighters':
+        return 0, json.dumps({'success': True, 'fighters': [
+            {'internalId': f['fighterInternalId'], 'name': f['fighter'],
+             'costumeCount': f['costumeCount']} for f in fighters]})
+    if command == 'get-all-costumes':
+        if os.environ.get('FAKE_MEXCLI_NO_BULK') == '1':
+            raise UnknownCommand(command)
+        return 0, json.dumps({'success': True, 'fighters': fighters})
+    for f in fighters:
+        if args[2] in (str(f['fighterInternalId']), f['fighter']):
+            return 0, json.dumps({'success': True, **f})
+    return 1, json.dumps({'success': False, 'error': f"Fighter not found: {args[2]}"})
+
+
+def run(args, stdin, mode):
+    global _loaded, _opens
+    command = args[0]
+    if command == 'crash':
+        sys.exit(3)
+    if command == 'hang':
+        time.sleep(3600)
+    if len(args) > 1 and args[1] != _loaded:
+        _loaded = args[1]
+        _opens += 1
+    if command == 'fail':
+        _loaded = None
+        return 1, json.dumps({'success': False, 'error': 'boom'})
+    if command in ('list-fighters', 'get-costumes', 'get-all-costumes'):
+        listing = _costume_listing(command, args)
+        if listing is not None:
+            return listing
+    return 0, json.dumps({'success': True, 'mode': mode, 'pid': os.getpid(),
+                          'args': args, 'opens': _opens, 'stdin': stdin})
+
+
+def serve():
+    global _loaded
+    print(json.dumps({'ready': True, 'protocol': 1}), flush=True)
+    for line in sys.stdin:
+        req = json.loads(line)
+        args = req['args']
+        err = ''
+        if args[0] == 'quit':
+            return 0
+        if args[0] == 'reset':
+            _loaded = None
+            code, out = 0, ''
+        else:
+            try:
+                code, out = run(args, req.get('stdin'), 'serve')
+            except UnknownCommand as e:
+                code, out, err = 1, USAGE, f"Unknown command: {e}\n"
+        print(json.dumps({'id': req.get('id'), 'exitCode': code,
+                          'stdout': out + '\n', 'stderr': err}), flush=True)
+    return 0
+
+
+def main():
+    args = sys.argv[1:]
+    serving = args[:1] == ['serve'] and os.environ.get('FAKE_MEXCLI_NO_SERVE') != '1'
+    log = os.environ.get('FAKE_MEXCLI_LOG')
+    if log:
+        with open(log, 'a') as f:
+            f.write(f"{os.getpid()}\t{'serve' if serving else 'oneshot'}\t{args[0]}\n")
+    if serving:
+        return serve()
+    if args[:1] == ['serve']:
+        print('Unknown command: serve', file=sys.stderr)
+        return 1
+    stdin = sys.stdin.read() if args[0].startswith('set-') else None
+    try:
+        code, out = run(args, stdin or None, 'oneshot')
+    except UnknownCommand as e:
+        print(f"Unknown command: {e}", file=sys.stderr)
+        code, out = 1, USAGE
+    print(out)
+    return code
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,34 @@
+"""
+Stand-in for skinlab.stock_gen._dat_textures that also reaches spawn()ed
+process-pool workers: monkeypatching only changes the parent process, so
+generate_stocks' pool runs install() as its worker initializer instead
+(which also keeps the workers' texture cache in a temp dir, as conftest does
+for the test process).
+
+save(texture_dir, {dat name: [HxWx4 array or None, ...]}) writes the table;
+a DAT then "decodes" to <texture_dir>/<dat name>.npz.
+"""
+from pathlib import Path
+
+import numpy as np
+
+_texture_dir = None
+
+
+def save(texture_dir, textures):
+    for name, texs in textures.items():
+        np.savez(Path(texture_dir) / f'{name}.npz', count=len(texs),
+                 **{f't{i}': t for i, t in enumerate(texs) if t is not None})
+
+
+def dat_textures(path):
+    with np.load(_texture_dir / f'{Path(path).name}.npz') as npz:
+        return [npz[f't{i}'] if f't{i}' in npz else None for i in range(int(npz['count']))]
+
+
+def install(texture_dir, cache_dir):
+    global _texture_dir
+    from skinlab import stock_gen, texture_cache
+    _texture_dir = Path(texture_dir)
+    texture_cache.CACHE_DIR = Path(cache_dir)
+    stock_gen._dat_textures = dat_textures
@@ -202,6 +202,23 @@ def test_telemetry_record_and_aggregate(monkeypatch, tmp_path):
     assert agg['totals']['runs'] == 4
 
 
+def test_telemetry_load_and_generation_split(monkeypatch, tmp_path):
+    ledger = tmp_path / 'ai_runs.jsonl'
+    monkeypatch.setattr('aiengine.telemetry.RUNS_LEDGER', ledger)
+
+    telemetry.record_run('local', 'sd-turbo', 'standard', 'material', 12.0, True,
+                         load_seconds=10.0, gen_seconds=2.0)
+    telemetry.record_run('local', 'sd-turbo', 'standard', 'material', 2.0, True,
+                         load_seconds=0.0, gen_seconds=2.0)
+    telemetry.record_run('openrouter', 'google/g', 'strong', 'stage', 9.0, True)
+
+    stats = telemetry.model_stats()
+    assert stats['sd-turbo']['avgLoadSeconds'] == 5.0
+    assert stats['sd-turbo']['avgGenSeconds'] == 2.0
+    assert stats['google/g']['avgLoadSeconds'] is None
+    assert 'load_seconds' not in ledger.read_text().splitlines()[-1]
+
+
 def test_telemetry_window_filters_old_runs(monkeypatch, tmp_path):
     ledger = tmp_path / 'ai_runs.jsonl'
     monkeypatch.setattr('aiengine.telemetry.RUNS_LEDGER', ledger)
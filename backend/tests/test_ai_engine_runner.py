@@ -0,0 +1,170 @@
+"""
+Tests for aiengine/runner.py against tests/fake_generate_worker.py (the real
+worker protocol with a stubbed pipeline): the keep-warm worker loads a model
+once per batch, reports load and generation time separately, evicts itself
+when idle, survives failed / crashed / hung jobs, and is stopped before an
+engine install or a model delete touches its files; one-shot mode still works.
+"""
+import os
+import sys
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+from aiengine import hardware, installer, models_admin, runner
+from aiengine.runner import EngineError
+
+FAKE_WORKER = Path(__file__).parent / 'fake_generate_worker.py'
+
+
+@pytest.fixture
+def engine(tmp_path, monkeypatch):
+    log = tmp_path / 'worker.log'
+    monkeypatch.setenv('FAKE_WORKER_LOG', str(log))
+    monkeypatch.setattr(runner, 'engine_python', lambda: Path(sys.executable))
+    monkeypatch.setattr(runner, 'WORKER_SCRIPT', FAKE_WORKER)
+    monkeypatch.setattr(runner, 'hf_cache_env', lambda: {})
+    monkeypatch.setattr(runner, 'KEEP_WARM', True)
+    monkeypatch.setattr(runner, '_warm', runner._WarmWorker())
+
+    def gen(prompt='brick wall', model='sd-turbo', **kw):
+        return runner.generate(prompt, model, tmp_path / f'{time.monotonic_ns()}.png', **kw)
+    gen.log = lambda kind: [line.split('\t') for line in log.read_text().splitlines()
+                            if line.split('\t')[1] == kind] if log.exists() else []
+    yield gen
+    runner.shutdown()
+
+
+def test_warm_worker_loads_the_model_once(engine, monkeypatch):
+    monkeypatch.setenv('FAKE_WORKER_LOAD_S', '0.5')
+    progress = []
+
+    path, seconds, cold = engine(on_progress=lambda pct, desc: progress.append(desc))
+    _, _, warm = engine()
+    _, _, warm2 = engine()
+
+    assert Path(path).read_bytes().startswith(b'\x89PNG')
+    assert cold['load_seconds'] >= 0.5 and seconds >= cold['load_seconds']
+    assert warm['load_seconds'] < 0.1 and warm2['load_seconds'] < 0.1
+    assert warm['gen_seconds'] is not None
+    assert progress[0].startswith('loading stabilityai/sd-turbo')
+    assert progress[-1].startswith('step 1/1')
+    assert len(engine.log('start')) == 1
+    assert len(engine.log('load')) == 1
+
+
+def test_switching_models_replaces_the_pipeline(engine):
+    engine(model='sd-turbo')
+    engine(model='z-image-turbo')
+    engine(model='z-image-turbo')
+
+    assert [row[2] for row in engine.log('load')] == [
+        'stabilityai/sd-turbo', runner.find('z-image-turbo').repo_id]
+    assert len(engine.log('start')) == 1
+
+
+def test_idle_worker_exits_and_is_replaced(engine, monkeypatch):
+    monkeypatch.setattr(runner, 'IDLE_TIMEOUT_S', 0.3)
+    engine()
+    first = runner._warm.proc
+
+    first.wait(timeout=10)                 # evicted itself: model memory freed
+    _, _, timings = engine()
+
+    assert first.returncode == 0
+    assert timings['load_seconds'] > 0     # cold again
+    assert len(engine.log('start')) == 2
+
+
+def test_job_sent_as_the_worker_idles_out_is_resent(engine, monkeypatch):
+    monkeypatch.setattr(runner, 'IDLE_TIMEOUT_S', 0.3)
+    engine()
+    time.sleep(1.0)                        # the client has not noticed yet
+    runner._warm.proc.poll = lambda: None
+
+    path, _, _ = engine()
+
+    assert Path(path).exists()
+    assert len(engine.log('start')) == 2
+
+
+def test_failed_job_keeps_the_worker(engine):
+    engine()
+    with pytest.raises(EngineError, match='CUDA out of memory'):
+        engine('fail here')
+    _, _, timings = engine()
+
+    assert len(engine.log('start')) == 1
+    assert len(engine.log('load')) == 2    # the failed run dropped the pipeline
+    assert timings['load_seconds'] > 0
+
+
+def test_crash_mid_job_raises_and_next_job_respawns(engine):
+    engine()
+    with pytest.raises(EngineError, match='died without a result'):
+        engine('crash')
+    path, _, _ = engine()
+
+    assert Path(path).exists()
+    assert len(engine.log('start')) == 2
+
+
+def test_hung_job_times_out(engine):
+    with pytest.raises(EngineError, match='timed out'):
+        engine('hang', timeout=1.5)
+    path, _, _ = engine()
+
+    assert Path(path).exists()
+
+
+def test_one_shot_mode(engine, monkeypatch):
+    monkeypatch.setattr(runner, 'KEEP_WARM', False)
+
+    _, _, first = engine()
+    _, _, second = engine()
+
+    assert first['load_seconds'] > 0 and second['load_seconds'] > 0
+    assert [row[2] for row in engine.log('start')] == ['oneshot', 'oneshot']
+    with pytest.raises(EngineError, match='CUDA out of memory'):
+        engine('fail')
+
+
+def test_unknown_model_is_rejected(engine):
+    with pytest.raises(EngineError, match='unknown local model'):
+        engine(model='gemini-image')
+    assert not os.path.exists(os.environ['FAKE_WORKER_LOG'])
+
+
+def test_install_stops_the_warm_worker_before_pip(engine, monkeypatch):
+    engine()
+    worker = runner._warm.proc
+    pip_saw = []
+    monkeypatch.setattr(installer, 'read_state', lambda: {})
+    monkeypatch.setattr(installer, '_write_state', lambda **kw: kw)
+    monkeypatch.setattr(installer, '_download_python', lambda emit: None)
+    monkeypatch.setattr(installer, '_pip',
+                        lambda args, phase, emit: pip_saw.append(worker.poll()))
+    monkeypatch.setattr(hardware, 'detect',
+                        lambda force=False: {'gpu': None, 'diskFreeBytes': installer.MIN_FREE_BYTES})
+    monkeypatch.setattr(runner, 'check', lambda force=False: {'ok': True})
+    monkeypatch.setattr(installer, 'threading', SimpleNamespace(
+        Thread=lambda target, daemon: SimpleNamespace(start=target)))
+
+    assert installer.start_install(SimpleNamespace(emit=lambda *a: None)) == (True, None)
+
+    assert pip_saw == [0, 0]               # the worker had exited before each pip run
+    assert not runner._warm.alive()
+
+
+def test_deleting_a_model_stops_the_warm_worker_first(engine, monkeypatch):
+    engine()
+    worker = runner._warm.proc
+    seen = []
+    monkeypatch.setattr(models_admin, 'scan_cache_dir',
+                        lambda **kw: seen.append(worker.poll()) or SimpleNamespace(repos=[]))
+
+    assert models_admin.delete_model_cache('sd-turbo') == 0
+
+    assert seen == [0]
@@ -0,0 +1,144 @@
+"""
+Tests for core/backup_store.py: incremental content-addressed snapshots.
+Unchanged files are carried over without being read, shared content is stored
+once, precompressed formats aren't recompressed, and any kept snapshot can be
+restored or exported byte-exact.
+"""
+import os
+import sys
+import zipfile
+from pathlib import Path
+
+import pytest
+
+BACKEND_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+from core import backup_store  # noqa: E402
+from core.backup_store import BackupStore, CorruptChunk, SnapshotNotFound  # noqa: E402
+
+
+def _vault(root):
+    (root / 'Fox').mkdir(parents=True)
+    (root / 'metadata.json').write_text('{"characters": {}}' * 50)
+    (root / 'Fox' / 'fox-red.zip').write_bytes(os.urandom(4096))
+    (root / 'Fox' / 'fox-red_csp.png').write_bytes(os.urandom(1024))
+    (root / 'Fox' / 'copy.zip').write_bytes((root / 'Fox' / 'fox-red.zip').read_bytes())
+    (root / 'vault.db').write_bytes(b'cache')
+    return root
+
+
+def _tree(root):
+    return {p.relative_to(root).as_posix(): p.read_bytes()
+            for p in root.rglob('*') if p.is_file()}
+
+
+def test_second_snapshot_reads_and_stores_nothing(tmp_path):
+    src = _vault(tmp_path / 'storage')
+    store = BackupStore(tmp_path / 'store')
+
+    first = store.create_snapshot(src, exclude={'vault.db'})
+    assert 'vault.db' not in first['files']
+    assert first['stats']['hashed'] == 4
+    # the duplicated zip shares its chunk
+    assert first['stats']['new_chunks'] == 3
+    assert first['files']['Fox/copy.zip']['chunks'] == first['files']['Fox/fox-red.zip']['chunks']
+
+    second = store.create_snapshot(src, exclude={'vault.db'})
+    assert second['stats']['hashed'] == 0 and second['stats']['reused'] == 4
+    assert second['stats']['new_chunks'] == 0
+    assert second['parent'] == first['id']
+
+
+def test_precompressed_chunks_are_stored_raw(tmp_path):
+    src = _vault(tmp_path / 'storage')
+    store = BackupStore(tmp_path / 'store')
+    m = store.create_snapshot(src)
+    [png] = m['files']['Fox/fox-red_csp.png']['chunks']
+    [meta] = m['files']['metadata.json']['chunks']
+    assert store._chunk_path(png, packed=False).exists()
+    assert store._chunk_path(meta, packed=True).exists()
+
+
+def test_restore_any_snapshot(tmp_path, monkeypatch):
+    monkeypatch.setattr(backup_store, 'CHUNK_SIZE', 1000)   # multi-chunk files
+    src = _vault(tmp_path / 'storage')
+    store = BackupStore(tmp_path / 'store')
+    before = _tree(src)
+    first = store.create_snapshot(src)
+
+    (src / 'Fox' / 'fox-red.zip').write_bytes(b'edited')
+    (src / 'Fox' / 'copy.zip').unlink()
+    (src / 'Fox' / 'new.dat').write_bytes(b'new')
+    after = _tree(src)
+    second = store.create_snapshot(src)
+    assert second['stats']['hashed'] == 2
+
+    store.restore(first['id'], tmp_path / 'r1')
+    store.restore(second['id'], tmp_path / 'r2', skip=lambda rel: rel == 'vault.db')
+    assert _tree(tmp_path / 'r1') == before
+    expected = dict(after)
+    del expected['vault.db']
+    assert _tree(tmp_path / 'r2') == expected
+    # mtimes come back, so re-snapshotting a restored tree reuses every entry
+    src_m = (src / 'metadata.json').stat().st_mtime_ns
+    assert (tmp_path / 'r2' / 'metadata.json').stat().st_mtime_ns == src_m
+
+
+def test_export_zip_stores_precompressed_members(tmp_path):
+    src = _vault(tmp_path / 'storage')
+    store = BackupStore(tmp_path / 'store')
+    m = store.create_snapshot(src)
+    out = store.export_zip(m['id'], tmp_path / 'backup.zip')
+    with zipfile.ZipFile(out) as zf:
+        kinds = {i.filename: i.compress_type for i in zf.infolist()}
+        assert zf.read('Fox/fox-red.zip') == (src / 'Fox' / 'fox-red.zip').read_bytes()
+    assert kinds['Fox/fox-red.zip'] == zipfile.ZIP_STORED
+    assert kinds['Fox/fox-red_csp.png'] == zipfile.ZIP_STORED
+    assert kinds['metadata.json'] == zipfile.ZIP_DEFLATED
+
+
+def test_export_zip_deflates_large_members_in_pieces(tmp_path, monkeypatch):
+    monkeypatch.setattr(backup_store, 'CHUNK_SIZE', 1000)
+    monkeypatch.setattr(backup_store, 'BACKUP_WORKERS', 3)
+    src = tmp_path / 'storage'
+    src.mkdir()
+    big = b''.join(b'%06d fighter.dat\n' % i for i in range(2000))   # 34 pieces
+    (src / 'big.dat').write_bytes(big)
+    (src / 'empty.json').write_bytes(b'')
+    (src / 'noise.png').write_bytes(os.urandom(2500))
+    store = BackupStore(tmp_path / 'store')
+    m = store.create_snapshot(src)
+
+    out = store.export_zip(m['id'], tmp_path / 'backup.zip')
+    with zipfile.ZipFile(out) as zf:
+        assert zf.testzip() is None
+        assert zf.read('big.dat') == big
+        assert zf.read('empty.json') == b''
+        assert zf.getinfo('big.dat').compress_size < len(big) // 4
+
+
+def test_prune_drops_old_snapshots_and_orphan_chunks(tmp_path):
+    src = _vault(tmp_path / 'storage')
+    store = BackupStore(tmp_path / 'store')
+    first = store.create_snapshot(src)
+    (src / 'Fox' / 'fox-red_csp.png').write_bytes(b'replaced')
+    second = store.create_snapshot(src)
+
+    result = store.prune(keep=1)
+    assert result['snapshots_removed'] == 1 and result['chunks_removed'] == 1
+    assert store.snapshot_ids() == [second['id']]
+    with pytest.raises(SnapshotNotFound):
+        store.load_manifest(first['id'])
+    store.restore(second['id'], tmp_path / 'r')
+    assert (tmp_path / 'r' / 'Fox' / 'fox-red_csp.png').read_bytes() == b'replaced'
+
+
+def test_corrupt_chunk_is_detected(tmp_path):
+    src = _vault(tmp_path / 'storage')
+    store = BackupStore(tmp_path / 'store')
+    m = store.create_snapshot(src)
+    [png] = m['files']['Fox/fox-red_csp.png']['chunks']
+    store._chunk_path(png, packed=False).write_bytes(b'bitrot')
+    with pytest.raises(CorruptChunk):
+        store.restore(m['id'], tmp_path / 'r')
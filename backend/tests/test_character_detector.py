@@ -11,6 +11,7 @@ desktop in-ZIP architecture:
 import sys
 import io
 import hashlib
+import struct
 import zipfile
 import pytest
 from pathlib import Path
@@ -279,6 +280,26 @@ class TestUtilityDatParserAliases:
         assert parser.detect_costume_color() == 'Red'
         assert parser.get_character_filename() == 'PlCaRe'
 
+    def test_parses_bytes_and_memoryview_like_a_path(self, tmp_path):
+        symbols = [b'PlyCaptain5KRd_Share_joint', b'ftDataCaptain']
+        strings = b''.join(sym + b'\x00' for sym in symbols)
+        roots = struct.pack('>IIII', 0, 0, 0, len(symbols[0]) + 1)
+        body = roots + strings
+        dat = struct.pack('>4I', 0x20 + len(body), 0, 0, len(symbols)) + bytes(16) + body
+        path = tmp_path / 'PlCaRd.dat'
+        path.write_bytes(dat)
+
+        parsed = []
+        for source in (str(path), dat, bytearray(dat), memoryview(dat)):
+            parser = UtilityDATParser(source)
+            parser.read_dat()
+            parsed.append((parser.root_nodes, parser.detect_character(),
+                           parser.get_character_filename()))
+
+        assert parsed[0][0][0]['symbol'] == 'PlyCaptain5KRd_Share_joint'
+        assert parsed[0][2] == 'PlCaRe'
+        assert all(p == parsed[0] for p in parsed)
+
     def test_underscore_format(self):
         char, color = _extract_character_color_from_filename('fox_green.png')
         assert char == 'Fox' and color == 'Green'
@@ -370,12 +391,12 @@ class TestDetectCharacterFromZip:
         import character_detector as detector_module
 
         class FakeParser:
-            def __init__(self, filepath):
-                self.filepath = filepath
+            def __init__(self, source):
+                self.data = source
                 self.root_nodes = []
 
             def read_dat(self):
-                marker = Path(self.filepath).read_text()
+                marker = bytes(self.data).decode()
                 if marker == 'falcon_red_usd':
                     self.root_nodes = [{'symbol': 'PlyCaptain5KRd_Share_joint'}]
                 else:
@@ -0,0 +1,241 @@
+"""Tests for the costume op journal (core/costume_ops.py) and the queued
+/api/mex/reorder and /api/mex/remove endpoints.
+
+The collapse rules are checked against a plain-list simulation of what N
+sequential reorder-costume / remove-costume calls would do; the journal and
+endpoints run against a recording stand-in for MexManager.
+"""
+
+import random
+from types import SimpleNamespace
+
+import pytest
+from flask import Flask
+
+import core.state as state
+from core import costume_ops
+from blueprints import costumes
+
+
+def _swap(lst, a, b):
+    lst[a], lst[b] = lst[b], lst[a]
+
+
+def _apply_plan(costumes_by_fighter, batches):
+    """What the batch MexCLI commands do to plain lists."""
+    for kind, payload in batches:
+        if kind == costume_ops.REORDER:
+            for s in payload:
+                _swap(costumes_by_fighter[s['fighter']], s['from'], s['to'])
+        elif kind == costume_ops.REMOVE:
+            for fighter, indices in payload.items():
+                for i in sorted(set(indices), reverse=True):
+                    del costumes_by_fighter[fighter][i]
+        else:
+            for fighter, zips in payload.items():
+                costumes_by_fighter[fighter].extend(zips)
+
+
+def _apply_sequential(costumes_by_fighter, ops):
+    for op in ops:
+        lst = costumes_by_fighter[op['fighter']]
+        if op['kind'] == costume_ops.REORDER:
+            _swap(lst, op['from'], op['to'])
+        elif op['kind'] == costume_ops.REMOVE:
+            del lst[op['index']]
+        else:
+            lst.append(op['zip'])
+
+
+def _reorder(fighter, a, b):
+    return {'kind': costume_ops.REORDER, 'fighter': fighter, 'from': a, 'to': b}
+
+
+def _remove(fighter, i):
+    return {'kind': costume_ops.REMOVE, 'fighter': fighter, 'index': i}
+
+
+def test_drag_of_adjacent_swaps_becomes_one_batch():
+    ops = [_reorder('Fox', i, i + 1) for i in range(9)]
+    batches = costume_ops.plan_batches(ops)
+    assert [kind for kind, _ in batches] == [costume_ops.REORDER]
+
+    expected, actual = {'Fox': list(range(12))}, {'Fox': list(range(12))}
+    _apply_sequential(expected, ops)
+    _apply_plan(actual, batches)
+    assert actual == expected
+
+
+def test_swaps_that_cancel_out_produce_nothing():
+    ops = [_reorder('Fox', 2, 3), _reorder('Fox', 2, 3), _reorder('Fox', 1, 1)]
+    assert costume_ops.plan_batches(ops) == []
+
+
+def test_removes_map_back_to_original_slots():
+    ops = [_remove('Fox', 3), _remove('Fox', 3), _remove('Fox', 5), _remove('Nana', 0)]
+    batches = costume_ops.plan_batches(ops)
+    assert batches == [(costume_ops.REMOVE, {'Fox': [3, 4, 7], 'Nana': [0]})]
+
+    expected = {'Fox': list(range(10)), 'Nana': list(range(10))}
+    actual = {'Fox': list(range(10)), 'Nana': list(range(10))}
+    _apply_sequential(expected, ops)
+    _apply_plan(actual, batches)
+    assert actual == expected
+
+
+def test_random_queues_match_sequential_application():
+    rng = random.Random(1234)
+    for _ in range(200):
+        state_ = {'Fox': list(range(8)), 'Falco': list(range(6))}
+        ops = []
+        sizes = {f: len(v) for f, v in state_.items()}
+        for _ in range(rng.randint(1, 15)):
+            fighter = rng.choice(['Fox', 'Falco'])
+            roll = rng.random()
+            if roll < 0.6 and sizes[fighter] > 1:
+                ops.append(_reorder(fighter, rng.randrange(sizes[fighter]),
+                                    rng.randrange(sizes[fighter])))
+            elif roll < 0.85 and sizes[fighter] > 1:
+                ops.append(_remove(fighter, rng.randrange(sizes[fighter])))
+                sizes[fighter] -= 1
+            else:
+                ops.append({'kind': costume_ops.IMPORT, 'fighter': fighter,
+                            'zip': f'new{len(ops)}.zip'})
+                sizes[fighter] += 1
+
+        expected = {f: list(v) for f, v in state_.items()}
+        actual = {f: list(v) for f, v in state_.items()}
+        _apply_sequential(expected, ops)
+        _apply_plan(actual, costume_ops.plan_batches(ops))
+        assert actual == expected, ops
+
+
+# ---------------------------------------------------------------------------
+# Journal + endpoints
+# ---------------------------------------------------------------------------
+
+class _RecordingMex:
+    calls = []
+
+    def __init__(self, cli_path, project_path, lock=None, serve=None):
+        self.project_path = project_path
+
+    def reorder_costumes(self, swaps):
+        self.calls.append(('reorder', swaps))
+        return {'success': True, 'totalSwapped': len(swaps)}
+
+    def remove_costumes(self, manifest):
+        self.calls.append(('remove', manifest))
+        return {'success': True}
+
+    def import_costumes(self, manifest):
+        self.calls.append(('import', manifest))
+        return {'success': True}
+
+
+class _RecordingSocket:
+    def __init__(self):
+        self.events = []
+
+    def emit(self, event, data=None):
+        self.events.append((event, data))
+
+
+@pytest.fixture
+def project(tmp_path, monkeypatch):
+    project_file = tmp_path / 'project.mexproj'
+    project_file.write_text('{}')
+    _RecordingMex.calls = []
+    socket = _RecordingSocket()
+    monkeypatch.setattr(costume_ops, 'MexManager', _RecordingMex)
+    monkeypatch.setattr(state, 'MexManager', _RecordingMex)
+    monkeypatch.setattr(costume_ops, 'IDLE_FLUSH_S', 600.0)
+    monkeypatch.setattr(costume_ops, '_journals', {})
+    monkeypatch.setattr(state, '_socketio', socket)
+    state.set_project_path(project_file)
+
+    app = Flask(__name__)
+    app.register_blueprint(costumes.costumes_bp)
+    yield app.test_client(), socket, project_file
+    for journal in costume_ops._journals.values():
+        journal._cancel_timer()
+    state.clear_project_path()
+
+
+def test_reorders_are_queued_and_flushed_before_the_next_read(project):
+    client, socket, project_file = project
+
+    for i in range(3):
+        resp = client.post('/api/mex/reorder', json={'fighter': 'Fox', 'fromIndex': i, 'toIndex': i + 1})
+        assert resp.get_json() == {'success': True, 'queued': True, 'queueDepth': i + 1}
+    assert _RecordingMex.calls == []
+    assert client.get('/api/mex/costume-ops').get_json()['queueDepth'] == 3
+    assert ('costume_ops_queue', {'project': str(project_file), 'depth': 3, 'flushing': False}) in socket.events
+
+    state.get_mex_manager()
+
+    assert [kind for kind, _ in _RecordingMex.calls] == ['reorder']
+    assert costume_ops.pending(project_file) == 0
+    assert socket.events[-1] == ('costume_ops_queue', {'project': str(project_file), 'depth': 0, 'flushing': False})
+
+
+def test_popo_and_nana_removes_share_one_command(project):
+    client, _, _ = project
+    client.post('/api/mex/remove', json={'fighter': 'Ice Climbers', 'costumeIndex': 2})
+    client.post('/api/mex/remove', json={'fighter': 'Nana', 'costumeIndex': 2})
+
+    resp = client.post('/api/mex/costume-ops/flush')
+
+    assert resp.get_json()['result']['commands'] == 1
+    assert _RecordingMex.calls == [('remove', {'Ice Climbers': [2], 'Nana': [2]})]
+
+
+def test_failed_flush_reports_and_drops_the_rest(project, monkeypatch):
+    client, socket, project_file = project
+
+    def boom(self, swaps):
+        raise costume_ops.MexManagerError('save failed')
+    monkeypatch.setattr(_RecordingMex, 'reorder_costumes', boom)
+
+    client.post('/api/mex/reorder', json={'fighter': 'Fox', 'fromIndex': 0, 'toIndex': 1})
+    client.post('/api/mex/remove', json={'fighter': 'Fox', 'costumeIndex': 0})
+    resp = client.post('/api/mex/costume-ops/flush')
+
+    assert resp.status_code == 500
+    assert resp.get_json()['error'] == 'save failed'
+    assert _RecordingMex.calls == []
+    assert ('costume_ops_error', {'project': str(project_file),
+                                  'error': 'save failed', 'dropped': 2}) in socket.events
+    assert client.get('/api/mex/costume-ops').get_json()['queueDepth'] == 0
+
+
+def test_idle_zero_applies_immediately(project, monkeypatch):
+    client, _, _ = project
+    monkeypatch.setattr(costume_ops, 'IDLE_FLUSH_S', 0.0)
+
+    resp = client.post('/api/mex/reorder', json={'fighter': 'Fox', 'fromIndex': 0, 'toIndex': 2})
+
+    assert resp.get_json()['result']['commands'] == 1
+    assert _RecordingMex.calls == [('reorder', [{'fighter': 'Fox', 'from': 0, 'to': 2}])]
+
+
+def test_export_stops_when_the_queued_ops_fail(project, monkeypatch):
+    from blueprints import export
+    client, socket, _ = project
+
+    def boom(self, swaps):
+        raise costume_ops.MexManagerError('save failed')
+    monkeypatch.setattr(_RecordingMex, 'reorder_costumes', boom)
+    monkeypatch.setattr(export, 'get_mex_manager',
+                        lambda: pytest.fail('exported with the queue unapplied'))
+    # run the export worker inline
+    monkeypatch.setattr(export, 'threading', SimpleNamespace(
+        Thread=lambda target: SimpleNamespace(start=target)))
+    app = Flask(__name__)
+    app.register_blueprint(export.export_bp)
+
+    client.post('/api/mex/reorder', json={'fighter': 'Fox', 'fromIndex': 0, 'toIndex': 1})
+    assert app.test_client().post('/api/mex/export/start', json={}).status_code == 200
+
+    assert ('export_error', {'success': False, 'error':
+            'Could not apply queued costume changes: save failed'}) in socket.events
@@ -0,0 +1,91 @@
+"""
+Tests for texture_pack's CSP perceptual-hash index: the BK-tree must return
+exactly what a linear Hamming scan returns, the per-character index must pick
+the closest vault HD CSP under the match threshold, and the memoized index
+must follow metadata.json changes.
+"""
+import json
+import os
+
+import numpy as np
+import pytest
+from PIL import Image
+
+import texture_pack
+from texture_pack import HASH_MATCH_DISTANCE, CspHashIndex, _BKTree, csp_hash_index
+
+
+def _near(h, flips, rng):
+    for bit in rng.choice(64, flips, replace=False):
+        h ^= 1 << int(bit)
+    return h
+
+
+def test_bktree_matches_linear_scan():
+    rng = np.random.default_rng(0)
+    base = [int(x) for x in rng.integers(0, 2**63, 20, dtype=np.int64)]
+    hashes = base + [_near(b, int(rng.integers(0, 12)), rng) for b in base for _ in range(10)]
+    tree = _BKTree()
+    for i, h in enumerate(hashes):
+        tree.add(h, i)
+
+    for q in (_near(b, 4, rng) for b in base):
+        for radius in (0, 5, 9, 20):
+            expected = sorted(((q ^ h).bit_count(), i) for i, h in enumerate(hashes)
+                              if (q ^ h).bit_count() <= radius)
+            assert sorted(tree.within(q, radius)) == expected
+
+
+def _vault(tmp_path, skins):
+    (tmp_path / 'Fox').mkdir(exist_ok=True)
+    for skin in skins:
+        if skin.pop('_file', True):
+            (tmp_path / 'Fox' / f"{skin['id']}_csp_hd.png").write_bytes(b'png')
+    metadata = {'characters': {'Fox': {'skins': skins}}}
+    (tmp_path / 'metadata.json').write_text(json.dumps(metadata))
+    return metadata
+
+
+def test_index_returns_the_closest_existing_hd_csp(tmp_path):
+    q = 0x0f0f_0f0f_0f0f_0f0f
+    metadata = _vault(tmp_path, [
+        {'id': 'far', 'has_hd_csp': True, 'csp_hash': f'{q ^ 0x3ff:016x}'},        # 10 bits
+        {'id': 'near', 'has_hd_csp': True, 'csp_hash': f'{q ^ 0x7:016x}'},         # 3 bits
+        {'id': 'nearer_sd', 'has_hd_csp': False, 'csp_hash': f'{q ^ 0x1:016x}'},
+        {'id': 'nearest_gone', 'has_hd_csp': True, 'csp_hash': f'{q ^ 0x3:016x}',
+         '_file': False},
+        {'id': 'bad', 'has_hd_csp': True, 'csp_hash': 'not-hex'},
+    ])
+    index = CspHashIndex(tmp_path, metadata)
+
+    assert index.find('Fox', q) == tmp_path / 'Fox' / 'near_csp_hd.png'
+    assert index.find('Fox', q ^ 0xffff_0000) is None          # nothing under the threshold
+    assert index.find('Falco', q) is None
+    assert HASH_MATCH_DISTANCE == 10
+
+
+def test_index_is_shared_until_metadata_changes(tmp_path):
+    _vault(tmp_path, [{'id': 'a', 'has_hd_csp': True, 'csp_hash': 'ff' * 8}])
+    first = csp_hash_index(tmp_path)
+    assert csp_hash_index(tmp_path) is first
+
+    _vault(tmp_path, [{'id': 'b', 'has_hd_csp': True, 'csp_hash': '00' * 8}])
+    st = (tmp_path / 'metadata.json').stat()
+    os.utime(tmp_path / 'metadata.json', ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+    second = csp_hash_index(tmp_path)
+
+    assert second is not first
+    assert second.find('Fox', 0) == tmp_path / 'Fox' / 'b_csp_hd.png'
+    assert csp_hash_index(tmp_path / 'missing') is None
+
+
+def test_find_hd_csp_by_hash_end_to_end(tmp_path):
+    imagehash = pytest.importorskip('imagehash')
+    rng = np.random.default_rng(1)
+    csp = tmp_path / 'backup.png'
+    Image.fromarray(rng.integers(0, 256, (188, 136, 3), dtype=np.uint8)).save(csp)
+    _vault(tmp_path, [{'id': 'x', 'has_hd_csp': True,
+                       'csp_hash': str(imagehash.phash(Image.open(csp)))}])
+
+    assert texture_pack.find_hd_csp_by_hash(tmp_path, str(csp), 'Fox') == \
+        tmp_path / 'Fox' / 'x_csp_hd.png'
@@ -0,0 +1,147 @@
+"""
+Tests for skinlab/csp_pool.CspRenderService against tests/fake_csp_server.py
+(the --csp-server line protocol without HSDRawViewer): warm-worker reuse,
+failure/crash/timeout handling, spawn backoff, recycling, priority lanes and
+idle shutdown.
+"""
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+BACKEND_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+from skinlab import csp_concurrency, csp_pool
+from skinlab.csp_pool import BULK, INTERACTIVE, CspRenderService
+
+FAKE_SERVER = [sys.executable, str(Path(__file__).parent / 'fake_csp_server.py')]
+
+
+@pytest.fixture(autouse=True)
+def _no_stagger(monkeypatch):
+    monkeypatch.setattr(csp_concurrency, 'CSP_LAUNCH_STAGGER_S', 0)
+
+
+@pytest.fixture
+def service():
+    made = []
+
+    def make(**kw):
+        kw.setdefault('idle_timeout', 0)
+        svc = CspRenderService(FAKE_SERVER, **kw)
+        made.append(svc)
+        return svc
+    yield make
+    for svc in made:
+        svc.close()
+
+
+def _job(tmp_path, name):
+    dat = tmp_path / name
+    return ['--csp', str(dat), str(tmp_path / f'{name}.png')]
+
+
+def test_renders_reuse_one_warm_worker(service, tmp_path):
+    svc = service(max_workers=2)
+    assert svc.size == 0                      # lazy: nothing started yet
+    for i in range(3):
+        job = _job(tmp_path, f'PlFx{i}.dat')
+        assert svc.render(job)
+        assert Path(job[2]).read_bytes() == f'PNG:PlFx{i}.dat'.encode()
+    stats = svc.stats()
+    [worker] = stats['workers']
+    assert worker['jobs'] == 3 and worker['restarts'] == 0
+    assert stats['lanes'][INTERACTIVE]['ok'] == 3
+
+
+def test_failures_are_reported_and_dead_workers_replaced(service, tmp_path):
+    svc = service(max_workers=1, job_timeout=1.0)
+    assert not svc.render(_job(tmp_path, 'bad.dat'))         # ERR, worker lives
+    assert svc.size == 1
+    assert not svc.render(_job(tmp_path, 'crash.dat'))       # worker dies
+    assert svc.size == 0
+    assert svc.render(_job(tmp_path, 'ok.dat'))              # fresh worker
+    t0 = time.monotonic()
+    assert not svc.render(_job(tmp_path, 'hang.dat'))        # watchdog kill
+    assert time.monotonic() - t0 < 5
+    stats = svc.stats()
+    assert stats['lanes'][INTERACTIVE]['failed'] == 3
+    assert svc.render(_job(tmp_path, 'after.dat'))
+    [worker] = svc.stats()['workers']
+    assert worker['jobs'] == 1
+
+
+def test_timeout_counts_on_worker_health(service, tmp_path):
+    svc = service(max_workers=1, job_timeout=0.5)
+    svc.render(_job(tmp_path, 'ok.dat'))
+    worker = svc._workers[0]
+    assert not svc.render(_job(tmp_path, 'hang.dat'))
+    assert worker.timeouts == 1 and worker.failures == 1
+
+
+def test_spawn_failure_backs_off(service, tmp_path, monkeypatch):
+    monkeypatch.setenv('FAKE_CSP_SERVER_FAIL', '1')
+    svc = service(max_workers=2)
+    assert not svc.render(_job(tmp_path, 'a.dat'))
+    assert not svc.render(_job(tmp_path, 'b.dat'))           # no second spawn
+    stats = svc.stats()
+    assert stats['spawn_failures'] == 1
+    assert stats['lanes'][INTERACTIVE]['unserved'] == 2
+    assert stats['last_spawn_error']
+
+
+def test_workers_recycle_after_n_jobs(service, tmp_path):
+    svc = service(max_workers=1, recycle_after=2)
+    svc.render(_job(tmp_path, 'a.dat'))
+    pid = svc._workers[0].proc.pid
+    svc.render(_job(tmp_path, 'b.dat'))
+    svc.render(_job(tmp_path, 'c.dat'))
+    worker = svc._workers[0]
+    assert worker.proc.pid != pid and worker.restarts == 1
+    assert worker.total_jobs == 3
+
+
+def test_interactive_lane_jumps_queued_bulk_jobs(service, tmp_path, monkeypatch):
+    log = tmp_path / 'jobs.log'
+    monkeypatch.setenv('FAKE_CSP_SERVER_LOG', str(log))
+    svc = service(max_workers=1)
+    svc.render(_job(tmp_path, 'warm.dat'))
+
+    def submit(name, lane):
+        t = threading.Thread(target=svc.render, args=(_job(tmp_path, name), lane))
+        t.start()
+        return t
+
+    threads = [submit('slow.dat', BULK)]
+    time.sleep(0.1)                           # slow job holds the only worker
+    threads += [submit('bulk1.dat', BULK), submit('bulk2.dat', BULK)]
+    time.sleep(0.05)
+    threads.append(submit('single.dat', INTERACTIVE))
+    for t in threads:
+        t.join(timeout=10)
+    order = [ln.split('\t')[1] for ln in log.read_text().splitlines()]
+    assert order == ['warm.dat', 'slow.dat', 'single.dat', 'bulk1.dat', 'bulk2.dat']
+    assert svc.stats()['lanes'][BULK]['ok'] == 3
+
+
+def test_idle_workers_shut_down_and_restart_on_demand(service, tmp_path):
+    svc = service(max_workers=1, idle_timeout=0.2)
+    assert svc.render(_job(tmp_path, 'a.dat'))
+    assert svc.warm
+    deadline = time.monotonic() + 5
+    while svc.size and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert svc.size == 0 and svc.stats()['idle_shutdowns'] == 1
+    assert svc.render(_job(tmp_path, 'b.dat'))
+
+
+def test_lane_helpers():
+    assert csp_pool.current_lane() == INTERACTIVE
+    with csp_pool.active_pool(enabled=False) as svc:
+        assert svc is None
+        assert csp_pool.current_lane() == BULK
+    assert csp_pool.bulk(csp_pool.current_lane)() == BULK
+    assert csp_pool.current_lane() == INTERACTIVE
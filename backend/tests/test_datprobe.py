@@ -0,0 +1,141 @@
+"""
+Tests for skinlab/datprobe.py's vectorized GX decoder.
+
+decode_image (per-pixel tuples) is the reference implementation; the NumPy
+path must be pixel-identical for every format in TEX_FMT, including partial
+tiles (sizes that aren't a multiple of the tile) and both CMPR palette modes.
+"""
+import struct
+
+import numpy as np
+import pytest
+
+from skinlab import datprobe
+from skinlab.datprobe import (
+    TEX_FMT, Image, Tlut, decode_image, decode_image_array, gx_image_size)
+
+
+def _image(fmt, w, h, seed=0):
+    rng = np.random.default_rng(seed)
+    data = rng.integers(0, 256, gx_image_size(fmt, w, h), dtype=np.uint8)
+    if fmt == 14:
+        # force half the DXT1 blocks into the 3-color + transparent mode
+        blocks = data.reshape(-1, 8)
+        swap = blocks[1::2, 0:2].copy()
+        blocks[1::2, 0:2] = np.minimum(swap, blocks[1::2, 2:4])
+        blocks[1::2, 2:4] = np.maximum(swap, blocks[1::2, 2:4])
+    return Image(0, 0, w, h, fmt, data.tobytes())
+
+
+def _tlut(fmt, count, seed=1):
+    rng = np.random.default_rng(seed)
+    data = rng.integers(0, 256, count * 2, dtype=np.uint8).tobytes()
+    return Tlut(0, 0, fmt, count, data)
+
+
+@pytest.mark.parametrize('fmt', sorted(TEX_FMT))
+@pytest.mark.parametrize('size', [(16, 16), (20, 13), (3, 5)])
+def test_array_decoder_matches_tuple_decoder(fmt, size):
+    w, h = size
+    img = _image(fmt, w, h, seed=fmt)
+    tlut_fmts = (0, 1, 2) if fmt in (8, 9, 10) else (None,)
+    for tlut_fmt in tlut_fmts:
+        tlut = (_tlut(tlut_fmt, 16 if fmt == 8 else 256)
+                if tlut_fmt is not None else None)
+        try:
+            expected = decode_image(img, tlut)
+        except ValueError:
+            with pytest.raises(ValueError):
+                decode_image_array(img, tlut)
+            continue
+        got = decode_image_array(img, tlut)
+        assert got.dtype == np.uint8
+        assert got.shape == (h, w, 4)
+        assert np.array_equal(got, np.asarray(expected, dtype=np.uint8))
+
+
+def test_save_png_accepts_arrays(tmp_path):
+    from PIL import Image as PILImage
+    img = _image(5, 8, 4)
+    datprobe.save_png(decode_image_array(img), tmp_path / 'a.png')
+    datprobe.save_png(decode_image(img), tmp_path / 'b.png')
+    a = np.asarray(PILImage.open(tmp_path / 'a.png'))
+    b = np.asarray(PILImage.open(tmp_path / 'b.png'))
+    assert np.array_equal(a, b)
+
+
+def _build_dat(path, images):
+    """Minimal DAT: one JOBJ -> DOBJ -> MOBJ -> chain of TOBJs, one TOBJ per
+    (Image, Tlut|None) in `images` (the same tuple may repeat)."""
+    data = bytearray()
+    relocs = []
+
+    def alloc(size):
+        off = len(data)
+        data.extend(b'\0' * size)
+        return off
+
+    def put_ptr(at, target):
+        struct.pack_into('>I', data, at, target)
+        relocs.append(at)
+
+    jobj, dobj, mobj = alloc(0x40), alloc(0x10), alloc(0x18)
+    put_ptr(jobj + 0x10, dobj)
+    put_ptr(dobj + 0x08, mobj)
+    placed = {}
+    prev = None
+    for image, tlut in images:
+        if id(image) not in placed:
+            img_off = alloc(0x18)
+            pix = alloc(len(image.data))
+            data[pix:pix + len(image.data)] = image.data
+            put_ptr(img_off, pix)
+            struct.pack_into('>HHI', data, img_off + 4,
+                             image.width, image.height, image.format)
+            tl_off = None
+            if tlut is not None:
+                tl_off = alloc(0x10)
+                pal = alloc(len(tlut.data))
+                data[pal:pal + len(tlut.data)] = tlut.data
+                put_ptr(tl_off, pal)
+                struct.pack_into('>I', data, tl_off + 4, tlut.format)
+                struct.pack_into('>H', data, tl_off + 0x0E, tlut.count)
+            placed[id(image)] = (img_off, tl_off)
+        img_off, tl_off = placed[id(image)]
+        tobj = alloc(0x5C)
+        put_ptr(tobj + 0x4C, img_off)
+        if tl_off is not None:
+            put_ptr(tobj + 0x50, tl_off)
+        put_ptr(prev + 0x04 if prev is not None else mobj + 0x08, tobj)
+        prev = tobj
+    strings = b'Ply_Share_joint\0'
+    body = (bytes(data) + b''.join(struct.pack('>I', r) for r in relocs)
+            + struct.pack('>II', jobj, 0) + strings)
+    header = struct.pack('>IIIII', 0x20 + len(body), len(data),
+                         len(relocs), 1, 0).ljust(0x20, b'\0')
+    path.write_bytes(header + body)
+    return path
+
+
+def test_decode_textures_batches_a_dat(tmp_path):
+    body = _image(14, 32, 32)
+    eyes = _image(9, 16, 8, seed=2)
+    pal = _tlut(2, 256)
+    dat = datprobe.DatFile(_build_dat(tmp_path / 'PlFxNr.dat',
+                                      [(body, None), (eyes, pal),
+                                       (body, None)]))
+    out = datprobe.decode_textures(dat)
+    assert [t.source for t in out] == ['jobj'] * 3
+    assert np.array_equal(out[0].pixels,
+                          np.asarray(decode_image(body), dtype=np.uint8))
+    assert np.array_equal(out[1].pixels,
+                          np.asarray(decode_image(eyes, pal), dtype=np.uint8))
+    # the shared image is decoded once
+    assert out[2].pixels is out[0].pixels
+
+
+def test_decode_textures_marks_undecodable_as_none(tmp_path):
+    bad = _image(10, 8, 8)          # CI14X2 has no decoder
+    dat = datprobe.DatFile(_build_dat(tmp_path / 'x.dat', [(bad, None)]))
+    [tex] = datprobe.decode_textures(dat)
+    assert tex.pixels is None
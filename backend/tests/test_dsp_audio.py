@@ -0,0 +1,182 @@
+"""
+Tests for dsp_audio.py: .ssm/.hps parsing and DSP-ADPCM decode against a
+straight per-sample reference decoder (the same continuous decode MexCLI's
+ssm-to-wav / hps-to-wav does), plus the in-process preview endpoint.
+"""
+import random
+import struct
+
+import numpy as np
+import pytest
+from flask import Flask
+
+import dsp_audio
+
+COEFS = (0, 0, 2048, 0, 0, 2048, 1024, 1024, 4096, -2048, 3584, -1536, 3072, -1024, 4032, -1990)
+
+
+def _reference(data, coefs, h1=0, h2=0):
+    out = []
+    n = dsp_audio.sample_count(len(data))
+    i = 0
+    while len(out) < n:
+        ps = data[i]
+        scale = (1 << (ps & 15)) * 2048
+        c1, c2 = coefs[2 * ((ps >> 4) & 7)], coefs[2 * ((ps >> 4) & 7) + 1]
+        for s in range(min(14, n - len(out))):
+            b = data[i + 1 + s // 2]
+            nib = (b >> 4) if s % 2 == 0 else (b & 15)
+            if nib >= 8:
+                nib -= 16
+            v = max(-32768, min(32767, (c1 * h1 + c2 * h2 + scale * nib + 1024) >> 11))
+            h2, h1 = h1, v
+            out.append(v)
+        i += 8
+    return np.array(out, np.int16)
+
+
+def _adpcm(rng, nframes):
+    """Random but well-behaved frames (small scales, so it isn't all clipping)."""
+    frames = bytearray()
+    for _ in range(nframes):
+        frames.append((rng.randrange(8) << 4) | rng.randrange(10))
+        frames.extend(rng.randrange(256) for _ in range(7))
+    return bytes(frames)
+
+
+def _ssm(sounds):
+    """sounds: [(frequency, [data, ...]), ...] -> .ssm bytes."""
+    header = bytearray()
+    body = bytearray()
+    for freq, channels in sounds:
+        header += struct.pack('>ii', len(channels), freq)
+        for data in channels:
+            ca = (len(body) + 1) * 2          # data starts at ceil(ca / 2) - 1
+            ea = ca + len(data) * 2 - 2
+            header += struct.pack('>hhiii', 0, 0, ca, ea, ca)
+            header += struct.pack('>16h', *COEFS)
+            header += bytes(0x40 - 0x30)
+            body += data
+    return struct.pack('>iiii', len(header), len(body), len(sounds), 0) + header + body
+
+
+def _hps(channels, block_bytes, freq=32000, hint=None):
+    """channels: [data, ...] (equal length) -> .hps bytes, block_bytes per
+    channel per block. hint(ch, block, true_h1, true_h2) -> (h1, h2)."""
+    nch = len(channels)
+    decoded = [_reference(d, COEFS) for d in channels]
+    out = bytearray(b' HALPST\x00' + struct.pack('>ii', freq, nch))
+    for _ in range(nch):
+        out += struct.pack('>hhiii', 0, 0, 2, len(channels[0]) * 2, 2)
+        out += struct.pack('>16h', *COEFS) + bytes(0x38 - 0x30)
+    out += bytes(0x80 - len(out))
+    offsets = list(range(0, len(channels[0]), block_bytes))
+    for b, off in enumerate(offsets):
+        size = min(block_bytes, len(channels[0]) - off)
+        pos = len(out)
+        last = b == len(offsets) - 1
+        nxt = -1 if last else pos + 0x20 + size * nch
+        out += struct.pack('>iii', size * nch, size * nch - 1, nxt)
+        s = off // 8 * 14
+        for c in range(nch):
+            h1 = int(decoded[c][s - 1]) if s >= 1 else 0
+            h2 = int(decoded[c][s - 2]) if s >= 2 else 0
+            if hint:
+                h1, h2 = hint(c, b, h1, h2)
+            out += struct.pack('>Hhhh', channels[c][off], h1, h2, 0)
+        out += bytes(4)
+        for c in range(nch):
+            out += channels[c][off:off + size]
+    return bytes(out), decoded
+
+
+def test_ssm_sounds_decode_like_the_reference():
+    rng = random.Random(1)
+    mono = _adpcm(rng, 300) + bytes([0x12, 0x34])          # trailing partial frame
+    left, right = _adpcm(rng, 50), _adpcm(rng, 50)
+    bank = _ssm([(22050, [mono]), (32000, [left, right])])
+
+    sound = dsp_audio.read_ssm_sound(bank, 0)
+    assert sound.frequency == 22050
+    assert np.array_equal(dsp_audio.decode(sound)[:, 0], _reference(mono, COEFS))
+
+    pcm = dsp_audio.decode(dsp_audio.read_ssm_sound(bank, 1))
+    assert pcm.shape == (700, 2)
+    assert np.array_equal(pcm[:, 1], _reference(right, COEFS))
+
+    with pytest.raises(dsp_audio.AudioFormatError):
+        dsp_audio.read_ssm_sound(bank, 2)
+
+
+def test_hps_lanes_match_the_continuous_decode():
+    rng = random.Random(2)
+    channels = [_adpcm(rng, 40 * 30 + 7) for _ in range(2)]
+    hps, decoded = _hps(channels, block_bytes=40 * 8)
+
+    pcm = dsp_audio.decode(dsp_audio.read_hps(hps))
+
+    assert len(dsp_audio.read_hps(hps).channels[0].hints) >= dsp_audio._MIN_LANES
+    assert np.array_equal(pcm[:, 0], decoded[0])
+    assert np.array_equal(pcm[:, 1], decoded[1])
+
+
+@pytest.mark.parametrize('bad_blocks', [{3}, {3, 4, 5, 6, 7, 8, 20}])
+def test_hps_wrong_block_history_is_repaired(bad_blocks):
+    rng = random.Random(3)
+    channels = [_adpcm(rng, 20 * 25) for _ in range(2)]
+
+    def hint(c, b, h1, h2):
+        return (h1 ^ 0x155, -h2) if b in bad_blocks else (h1, h2)
+    hps, decoded = _hps(channels, block_bytes=20 * 8, hint=hint)
+
+    pcm = dsp_audio.decode(dsp_audio.read_hps(hps))
+
+    assert np.array_equal(pcm[:, 0], decoded[0])
+    assert np.array_equal(pcm[:, 1], decoded[1])
+
+
+def test_wav_header():
+    pcm = np.array([[1, -1], [2, -2]], np.int16)
+    wav = dsp_audio.to_wav(pcm, 32000)
+    assert wav[:4] == b'RIFF' and wav[8:16] == b'WAVEfmt '
+    assert struct.unpack_from('<HHIIHH', wav, 20) == (1, 2, 32000, 128000, 4, 16)
+    assert wav[44:] == pcm.astype('<i2').tobytes()
+
+
+def test_preview_cache_follows_file_changes(tmp_path):
+    rng = random.Random(4)
+    bank = tmp_path / 'bank.ssm'
+    bank.write_bytes(_ssm([(32000, [_adpcm(rng, 10)])]))
+    dsp_audio.clear_cache()
+
+    first = dsp_audio.preview_wav(bank, 0)
+    assert dsp_audio.preview_wav(bank, 0) is first
+
+    bank.write_bytes(_ssm([(32000, [_adpcm(rng, 12)])]))
+    second = dsp_audio.preview_wav(bank, 0)
+    assert len(second) == 44 + 12 * 14 * 2
+    assert len(dsp_audio._cache) == 1
+
+
+def test_preview_endpoint_serves_ranges(tmp_path, monkeypatch):
+    from blueprints import character_sounds
+
+    pdir = tmp_path / 'pack'
+    pdir.mkdir()
+    (pdir / 'bank.ssm').write_bytes(_ssm([(32000, [_adpcm(random.Random(5), 20)])]))
+    monkeypatch.setattr(character_sounds, 'resolve_character', lambda c: ('Fox', 'ff'))
+    monkeypatch.setattr(character_sounds, '_pack_dir', lambda canonical, pack_id: pdir)
+    app = Flask(__name__)
+    app.register_blueprint(character_sounds.character_sounds_bp)
+    client = app.test_client()
+    url = '/api/mex/storage/characters/Fox/sound-packs/p/audio/sound/0'
+
+    full = client.get(url)
+    assert full.status_code == 200 and full.mimetype == 'audio/wav'
+    assert full.headers['Accept-Ranges'] == 'bytes'
+
+    part = client.get(url, headers={'Range': 'bytes=44-99'})
+    assert part.status_code == 206
+    assert part.data == full.data[44:100]
+
+    assert client.get(url.replace('/0', '/9')).status_code == 500
@@ -0,0 +1,122 @@
+"""
+Tests for the extras dynamic offset detection in blueprints/extras/helpers.py:
+one signature scan finds every extra type, agrees with the per-type
+find_*_offsets detectors, and is persisted by DAT content so a restarted
+backend (or another copy of the same DAT) does not scan again.
+"""
+from pathlib import Path
+
+import pytest
+
+import blueprints.extras.helpers as helpers
+
+SHINE_SAMPLE = (Path(__file__).resolve().parents[2] / 'docs' / 'research'
+                / 'color-effects-reference' / 'shine samples' / 'extracted'
+                / 'Red Shine' / 'Red-Shine-cfd97793' / 'EfFxData.dat')
+TYPES = ('laser', 'sideb', 'upb', 'shine', 'laser_ring')
+
+
+def _laser_dat(start=0x400, size=0x1000):
+    """A DAT with three uniform 98 00 17 matrices 0xA0 apart and side-B colors."""
+    data = bytearray(size)
+    for m in (start, start + 0xA0, start + 0x140):
+        data[m:m + 3] = b'\x98\x00\x17'
+        for e in range(23):
+            data[m + 3 + e * 4:m + 7 + e * 4] = bytes([e, 0xFC, 0x00, 0x03])
+    data[0x900:0x90C] = bytes.fromhex('FF0000FF00FF00FF0000FFFF')
+    data[0x90C:0x914] = bytes.fromhex('3E99999A42480000')
+    return bytes(data)
+
+
+@pytest.fixture
+def offsets_env(tmp_path, monkeypatch):
+    monkeypatch.setattr(helpers, 'STORAGE_PATH', tmp_path / 'storage')
+    monkeypatch.setattr(helpers, '_dynamic_offset_cache', {})
+    scans = []
+    real = helpers.detect_all_offsets
+    monkeypatch.setattr(helpers, 'detect_all_offsets',
+                        lambda data: scans.append(len(data)) or real(data))
+    return tmp_path, scans
+
+
+def test_one_scan_matches_the_per_type_detectors(tmp_path):
+    dat = tmp_path / 'PlFx.dat'
+    dat.write_bytes(_laser_dat())
+
+    found = helpers.detect_all_offsets(dat.read_bytes())
+
+    assert found == {t: getattr(helpers, f'find_{t}_offsets')(dat) for t in TYPES}
+    assert found['laser']['thin'] == {'start': 0x4A0, 'end': 0x500, 'format': 'RGBY'}
+    assert found['sideb']['primary']['start'] == 0x900
+    assert found['upb'] is found['shine'] is found['laser_ring'] is None
+
+
+@pytest.mark.skipif(not SHINE_SAMPLE.exists(), reason='EfFxData sample not present')
+def test_effect_data_sample():
+    found = helpers.detect_all_offsets(SHINE_SAMPLE.read_bytes())
+
+    assert found['upb']['tip']['start'] and found['laser_ring']['color1']['start']
+    assert found == {t: getattr(helpers, f'find_{t}_offsets')(SHINE_SAMPLE) for t in TYPES}
+
+
+def test_all_types_come_from_one_scan(offsets_env):
+    tmp_path, scans = offsets_env
+    dat = tmp_path / 'PlFx.dat'
+    dat.write_bytes(_laser_dat())
+    fallback = {'wide': {'start': 1, 'end': 2, 'format': 'RGBY'}}
+
+    laser = helpers.get_dynamic_offsets(dat, 'laser', fallback)
+    sideb = helpers.get_dynamic_offsets(dat, 'sideb', {})
+    shine = helpers.get_dynamic_offsets(dat, 'shine', fallback)
+
+    assert laser['wide']['start'] == 0x400
+    assert sideb['tertiary']['start'] == 0x908
+    assert shine is fallback
+    assert len(scans) == 1
+    assert helpers.get_dynamic_offsets(dat, 'gun', fallback) is fallback
+
+
+def test_offsets_persist_by_content(offsets_env):
+    tmp_path, scans = offsets_env
+    dat = tmp_path / 'PlFx.dat'
+    dat.write_bytes(_laser_dat())
+    first = helpers.dat_extras_offsets(dat)
+
+    helpers._dynamic_offset_cache.clear()          # backend restart
+    copy = tmp_path / 'other' / 'PlFx.dat'         # same bytes elsewhere
+    copy.parent.mkdir()
+    copy.write_bytes(dat.read_bytes())
+
+    assert helpers.dat_extras_offsets(dat) == first
+    assert helpers.dat_extras_offsets(copy) == first
+    assert len(scans) == 1
+    assert len(list((tmp_path / 'storage' / '_extras_offsets').glob('*.json'))) == 1
+
+
+def test_changed_dat_is_rescanned(offsets_env):
+    tmp_path, scans = offsets_env
+    dat = tmp_path / 'PlFx.dat'
+    dat.write_bytes(_laser_dat())
+    helpers.dat_extras_offsets(dat)
+
+    dat.write_bytes(_laser_dat(start=0x500, size=0x1200))
+
+    assert helpers.dat_extras_offsets(dat)['laser']['wide']['start'] == 0x500
+    assert len(scans) == 2
+
+
+def test_results_are_copies(offsets_env):
+    tmp_path, _ = offsets_env
+    dat = tmp_path / 'PlFx.dat'
+    dat.write_bytes(_laser_dat())
+
+    helpers.dat_extras_offsets(dat)['laser']['wide']['start'] = 0
+
+    assert helpers.dat_extras_offsets(dat)['laser']['wide']['start'] == 0x400
+
+
+def test_unreadable_dat_uses_fallback(offsets_env):
+    tmp_path, _ = offsets_env
+    fallback = {'wide': {'start': 1, 'end': 2, 'format': 'RGBY'}}
+
+    assert helpers.get_dynamic_offsets(tmp_path / 'missing.dat', 'laser', fallback) is fallback
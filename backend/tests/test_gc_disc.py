@@ -0,0 +1,154 @@
+"""
+Tests for gc_disc.py (native GameCube image reader) and the ISO scanner's
+in-place scan path that uses it instead of a full wit extraction.
+"""
+import contextlib
+import hashlib
+import os
+import struct
+
+import pytest
+
+import gc_disc
+import iso_scanner
+
+
+def build_gc_image(path, files, dol=b'\0' * 0x100):
+    """Write a minimal plain GameCube image. `files` maps posix paths (dirs
+    allowed) to bytes; entries are laid out after the FST."""
+    tree = {}
+    for p, data in files.items():
+        node = tree
+        *dirs, name = p.split('/')
+        for d in dirs:
+            node = node.setdefault(d, {})
+        node[name] = data
+
+    entries, names = [], bytearray()
+    payloads = []
+
+    def add_name(n):
+        off = len(names)
+        names.extend(n.encode('ascii') + b'\0')
+        return off
+
+    def walk(node, parent):
+        for name in sorted(node):
+            val = node[name]
+            if isinstance(val, dict):
+                idx = len(entries)
+                entries.append([1, add_name(name), parent, 0])
+                walk(val, idx)
+                entries[idx][3] = len(entries)
+            else:
+                entries.append([0, add_name(name), None, len(val)])
+                payloads.append((len(entries) - 1, val))
+
+    entries.append([1, 0, 0, 0])
+    names.extend(b'\0')
+    walk(tree, 0)
+    entries[0][3] = len(entries)
+
+    dol_off = 0x2440
+    fst_off = dol_off + len(dol)
+    fst_size = len(entries) * 12 + len(names)
+    data_off = (fst_off + fst_size + 0x1F) & ~0x1F
+    blob = bytearray()
+    for idx, payload in payloads:
+        entries[idx][2] = data_off + len(blob)
+        blob.extend(payload)
+        blob.extend(b'\0' * (-len(blob) % 0x20))
+
+    header = bytearray(0x2440)
+    header[0:6] = b'GALE01'
+    struct.pack_into('>I', header, 0x1C, gc_disc.GC_MAGIC)
+    header[0x20:0x20 + 13] = b'SUPER SMASH B'
+    struct.pack_into('>III', header, 0x420, dol_off, fst_off, fst_size)
+    fst = b''.join(struct.pack('>III', (f << 24) | n, a, b)
+                   for f, n, a, b in entries) + bytes(names)
+    image = bytes(header) + dol + fst
+    image += b'\0' * (data_off - len(image)) + bytes(blob)
+    path.write_bytes(image)
+    return path
+
+
+def _dol(text_size=0x80):
+    head = bytearray(0x100)
+    struct.pack_into('>I', head, 0x00, 0x100)          # text0 offset
+    struct.pack_into('>I', head, 0x90, text_size)      # text0 size
+    return bytes(head) + b'\x42' * text_size
+
+
+def test_reads_fst_and_files(tmp_path):
+    files = {'PlFxNr.dat': b'fox' * 100, 'audio/us/x.ssm': b'ssm',
+             'MnSlChr.usd': b'menu'}
+    img = build_gc_image(tmp_path / 'game.iso', files, dol=_dol())
+    with gc_disc.GCDisc(img) as disc:
+        assert disc.game_id == 'GALE01'
+        assert sorted(f.path for f in disc.files) == sorted(files)
+        entry = disc.find('plfxnr.dat')
+        assert disc.read(entry) == files['PlFxNr.dat']
+        assert disc.md5(entry) == hashlib.md5(files['PlFxNr.dat']).hexdigest()
+        out = disc.extract(disc.find('x.ssm'), tmp_path / 'out' / 'x.ssm')
+        assert out.read_bytes() == b'ssm'
+        dol = disc.extract_dol(tmp_path / 'main.dol')
+        assert dol.read_bytes() == _dol()
+
+
+def test_non_gc_images_are_rejected(tmp_path):
+    junk = tmp_path / 'x.iso'
+    junk.write_bytes(b'\0' * 0x1000)
+    assert gc_disc.open_disc(junk) is None
+    with pytest.raises(gc_disc.DiscFormatError):
+        gc_disc.GCDisc(junk)
+
+
+class _FakeParser:
+    def __init__(self, path):
+        self.path = path
+        self.root_nodes = []
+
+    def read_dat(self):
+        assert os.path.exists(self.path), 'candidate must be materialized'
+
+    def is_character_costume(self):
+        return True
+
+    def detect_character(self):
+        return 'Fox', 'PlyFox5K_Share_joint'
+
+    def get_character_filename(self):
+        return os.path.basename(self.path)
+
+
+def test_scan_reads_iso_in_place_and_writes_only_candidates(monkeypatch, tmp_path):
+    vanilla = b'vanilla fox'
+    img = build_gc_image(tmp_path / 'mod.iso', {
+        'PlFxNr.dat': vanilla,
+        'PlFxGr.dat': b'modded fox',
+        'PlFx.dat': b'shared',
+    }, dol=_dol())
+    monkeypatch.setattr(iso_scanner, 'SCAN_WORK_ROOT', tmp_path / 'work')
+    monkeypatch.setattr(iso_scanner, 'WIT_EXE', tmp_path / 'no-wit.exe')
+    monkeypatch.setattr(iso_scanner, '_load_vault_hashes', lambda: set())
+    monkeypatch.setattr(iso_scanner, '_load_vanilla_hashes',
+                        lambda: {hashlib.md5(vanilla).hexdigest()})
+    monkeypatch.setattr(iso_scanner, '_slippi_fixed_hash', lambda p: None)
+    monkeypatch.setattr(iso_scanner, 'DATParser', _FakeParser)
+    monkeypatch.setattr(iso_scanner, 'active_pool',
+                        lambda **kw: contextlib.nullcontext())
+    monkeypatch.setattr(iso_scanner, '_build_candidate',
+                        lambda i, c, d, j: (None, None))
+
+    events = []
+    job = iso_scanner.IsoScanJob('job1', [str(img)], tmp_path / 'work' / 'job1')
+    job.work_dir.mkdir(parents=True)
+    iso_scanner._run_scan(job, lambda e, p: events.append((e, p)))
+
+    assert job.status == 'complete', job.error
+    assert job.stats['total_files'] == 2
+    assert job.stats['vanilla'] == 1
+    files_dir = job.work_dir / 'extracted' / 'mod' / 'files'
+    assert (files_dir / 'PlFxGr.dat').read_bytes() == b'modded fox'
+    assert not (files_dir / 'PlFxNr.dat').exists()
+    assert (job.work_dir / 'extracted' / 'mod' / 'sys' / 'main.dol').exists()
@@ -0,0 +1,146 @@
+"""
+Tests for core/hash_index.py — the persistent vault/vanilla hash index that
+ISO scans start from.
+"""
+import hashlib
+import json
+import os
+import zipfile
+
+from core import hash_index
+
+
+def _costume_zip(path, dat: bytes):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with zipfile.ZipFile(path, 'w') as zf:
+        zf.writestr('PlFxNrMod.dat', dat)
+        zf.writestr('csp.png', b'png')
+    return path
+
+
+def _md5(b):
+    return hashlib.md5(b).hexdigest()
+
+
+def _fresh():
+    hash_index._cache.clear()
+
+
+def test_vault_hashes_include_zip_contents_and_metadata(vault):
+    _fresh()
+    vault.write({'characters': {'Fox': {'skins': [
+        {'id': 'fox-a', 'filename': 'fox-a.zip', 'dat_hash': 'prefix-hash'}]}}})
+    _costume_zip(vault.storage / 'Fox' / 'fox-a.zip', b'fixed bytes')
+    _costume_zip(vault.storage / 'das' / 'Battlefield' / 'x.zip', b'stage')
+
+    hashes = hash_index.vault_hashes(vault.storage)
+    assert hashes == {'prefix-hash', _md5(b'fixed bytes')}
+    assert (vault.storage / hash_index.INDEX_FILENAME).exists()
+
+
+def test_warm_refresh_hashes_nothing(vault, monkeypatch):
+    _fresh()
+    vault.write({'characters': {}})
+    _costume_zip(vault.storage / 'Fox' / 'a.zip', b'a')
+    hash_index.vault_hashes(vault.storage)
+    _fresh()    # simulate a backend restart: only the on-disk index survives
+
+    def boom(*a, **k):
+        raise AssertionError('warm refresh must not re-hash')
+    monkeypatch.setattr(hash_index, '_zip_dat_hash', boom)
+    monkeypatch.setattr(hash_index, '_metadata_dat_hashes', boom)
+    assert hash_index.vault_hashes(vault.storage) == {_md5(b'a')}
+
+
+def test_modified_and_deleted_zips_are_picked_up(vault):
+    _fresh()
+    vault.write({'characters': {}})
+    a = _costume_zip(vault.storage / 'Fox' / 'a.zip', b'a')
+    b = _costume_zip(vault.storage / 'Fox' / 'b.zip', b'b')
+    hash_index.vault_hashes(vault.storage)
+
+    _costume_zip(a, b'a2')
+    st = a.stat()
+    os.utime(a, ns=(st.st_atime_ns, st.st_mtime_ns + 10_000_000))
+    b.unlink()
+    assert hash_index.vault_hashes(vault.storage) == {_md5(b'a2')}
+
+
+def test_record_and_forget_keep_index_current(vault, monkeypatch):
+    _fresh()
+    vault.write({'characters': {}})
+    hash_index.vault_hashes(vault.storage)
+    z = _costume_zip(vault.storage / 'Fox' / 'new.zip', b'fixed')
+    hash_index.record_vault_zip(z, dat_hash='orig', storage=vault.storage)
+
+    monkeypatch.setattr(hash_index, '_zip_dat_hash',
+                        lambda p: (_ for _ in ()).throw(AssertionError()))
+    assert hash_index.vault_hashes(vault.storage) == {'orig', _md5(b'fixed')}
+
+    z.unlink()
+    hash_index.forget_vault_zip(z, storage=vault.storage)
+    assert hash_index.vault_hashes(vault.storage) == set()
+
+
+def test_metadata_dat_hash_changes_are_picked_up(vault):
+    _fresh()
+    skin = {'id': 'fox-a', 'filename': 'fox-a.zip', 'dat_hash': 'first'}
+    vault.write({'characters': {'Fox': {'skins': [skin]}}})
+    _costume_zip(vault.storage / 'Fox' / 'fox-a.zip', b'x')
+    assert 'first' in hash_index.vault_hashes(vault.storage)
+
+    # re-import / fix-up under the same zip path, zip itself untouched
+    vault.write({'characters': {'Fox': {'skins': [{**skin, 'dat_hash': 'second'}]}}})
+    meta = vault.storage / 'metadata.json'
+    st = meta.stat()
+    os.utime(meta, ns=(st.st_atime_ns, st.st_mtime_ns + 10_000_000))
+    _fresh()
+
+    assert hash_index.vault_hashes(vault.storage) == {'second', _md5(b'x')}
+
+
+def test_metadata_hash_counts_without_its_zip(vault):
+    _fresh()
+    vault.write({'characters': {'Fox': {'skins': [
+        {'id': 'fox-gone', 'filename': 'fox-gone.zip', 'dat_hash': 'orphan'}]}}})
+
+    assert hash_index.vault_hashes(vault.storage) == {'orphan'}
+
+
+def test_other_storage_root_reads_its_own_metadata(vault, tmp_path):
+    _fresh()
+    vault.write({'characters': {'Fox': {'skins': [
+        {'id': 'fox-live', 'filename': 'fox-live.zip', 'dat_hash': 'live'}]}}})
+    other = tmp_path / 'other'
+    other.mkdir()
+    (other / 'metadata.json').write_text(json.dumps({'characters': {'Fox': {'skins': [
+        {'id': 'fox-other', 'filename': 'fox-other.zip', 'dat_hash': 'other'}]}}}))
+
+    assert hash_index.vault_hashes(other) == {'other'}
+    assert hash_index.vault_hashes(vault.storage) == {'live'}
+def test_vanilla_hashes_incremental(tmp_path, monkeypatch):
+    _fresh()
+    storage, vanilla = tmp_path / 'storage', tmp_path / 'vanilla'
+    (vanilla / 'Fox' / 'PlFxNr').mkdir(parents=True)
+    (vanilla / 'Fox' / 'PlFxNr' / 'PlFxNr.dat').write_bytes(b'nr')
+    assert hash_index.vanilla_hashes(vanilla, storage=storage) == {_md5(b'nr')}
+
+    _fresh()
+    monkeypatch.setattr(hash_index, '_md5_file',
+                        lambda p: (_ for _ in ()).throw(AssertionError()))
+    assert hash_index.vanilla_hashes(vanilla, storage=storage) == {_md5(b'nr')}
+
+
+def test_delete_route_forgets_zip(vault):
+    from blueprints import storage_costumes
+    _fresh()
+    vault.write({'characters': {'Fox': {'skins': [
+        {'id': 'fox-a', 'filename': 'fox-a.zip', 'dat_hash': 'orig'}]}}})
+    _costume_zip(vault.storage / 'Fox' / 'fox-a.zip', b'x')
+    assert 'orig' in hash_index.vault_hashes(vault.storage)
+
+    client = vault.client(storage_costumes, 'storage_costumes_bp')
+    resp = client.post('/api/mex/storage/costumes/delete',
+                       json={'character': 'Fox', 'skinId': 'fox-a'})
+    assert resp.get_json()['success']
+    assert hash_index._load(vault.storage)['vault'] == {}
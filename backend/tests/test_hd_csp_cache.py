@@ -6,6 +6,7 @@ CSP). This covers the plumbing that selects the right CSP. The actual 4x render
 the place_costume_csp resolution priority:
     export-time HD CSP  ->  live vault perceptual match  ->  SD fallback.
 """
+import os
 import sys
 from dataclasses import asdict
 from pathlib import Path
@@ -73,3 +74,123 @@ def test_place_prefers_hd_then_sd(tmp_path):
     c = {'character': 'Fox', 'real_csp_path': str(sd), 'hd_csp_path': str(tmp_path / 'gone.png')}
     assert place_costume_csp(c, 'c.png', out, storage_path=None)
     assert Image.open(out / 'c.png').size == (136, 188)
+
+
+def _cached(h, size, mtime):
+    p = hc.cached_path(h)
+    p.write_bytes(b'\0' * size)
+    os.utime(p, (mtime, mtime))
+    return p
+
+
+def test_lru_eviction_spares_pinned_and_recent(tmp_path, monkeypatch):
+    monkeypatch.setattr(hc, 'CACHE_DIR', tmp_path / 'cache')
+    (tmp_path / 'cache').mkdir()
+    h = [f'{i:032x}' for i in range(5)]
+    paths = [_cached(x, 100, 1000 + i) for i, x in enumerate(h)]
+    # h[0] is the oldest but still a vault skin -> pinned
+    monkeypatch.setattr(hc, 'pinned_hashes', lambda: {h[0]})
+
+    hc.get_cached(h[1])                 # a hit makes h[1] the most recent
+    result = hc.enforce_budget(300)     # 500 bytes -> trim to 90% of 300
+
+    assert result == {'evicted': 3, 'freed_bytes': 300}
+    assert paths[0].exists() and paths[1].exists()
+    assert not any(p.exists() for p in paths[2:])
+
+
+def test_eviction_skips_when_pins_unknown(tmp_path, monkeypatch):
+    monkeypatch.setattr(hc, 'CACHE_DIR', tmp_path / 'cache')
+    (tmp_path / 'cache').mkdir()
+    p = _cached('a' * 32, 500, 1000)
+    monkeypatch.setattr(hc, 'pinned_hashes', lambda: None)
+    assert hc.enforce_budget(100)['evicted'] == 0
+    assert p.exists()
+
+
+def test_stats_and_publish_trigger_eviction(tmp_path, monkeypatch):
+    import generate_csp
+    monkeypatch.setattr(hc, 'CACHE_DIR', tmp_path / 'cache')
+    monkeypatch.setattr(hc, 'CACHE_BUDGET_BYTES', 250)
+    monkeypatch.setattr(hc, '_tracked_bytes', {})
+    monkeypatch.setattr(hc, '_counters', dict.fromkeys(hc._counters, 0))
+    monkeypatch.setattr(hc, 'pinned_hashes', lambda: set())
+    (tmp_path / 'cache').mkdir()
+    old = _cached('b' * 32, 200, 1000)
+
+    def fake_generate_csp(path, **kw):
+        out = Path(path).with_name('out_csp_hd.png')
+        out.write_bytes(b'\1' * 100)
+        return str(out)
+
+    monkeypatch.setattr(generate_csp, 'generate_csp', fake_generate_csp)
+    dat = tmp_path / 'PlFxNr.dat'
+    dat.write_bytes(b'costume')
+
+    first = hc.get_or_render_hd(dat)
+    assert first and first.exists()
+    assert not old.exists()                         # 300 > 250 -> LRU evicted
+    assert hc.get_or_render_hd(dat) == first        # now a hit
+
+    stats = hc.cache_stats()
+    assert stats['entries'] == 1 and stats['bytes'] == 100
+    assert (stats['hits'], stats['misses'], stats['renders']) == (1, 1, 1)
+    assert stats['evictions'] == 1 and stats['hit_rate'] == 0.5
+    assert stats['pinned_entries'] == 0
+
+
+def test_ice_climbers_and_game_and_watch_renders_stay_pinned(tmp_path, monkeypatch):
+    import generate_csp
+    monkeypatch.setattr(hc, 'CACHE_DIR', tmp_path / 'cache')
+    monkeypatch.setattr(hc, 'CACHE_BUDGET_BYTES', 0)
+    (tmp_path / 'cache').mkdir()
+
+    def fake_generate_csp(path, **kw):
+        out = Path(path).with_name('out_csp_hd.png')
+        out.write_bytes(b'\1' * 100)
+        return str(out)
+
+    monkeypatch.setattr(generate_csp, 'generate_csp', fake_generate_csp)
+    popo, nana, gw = (tmp_path / n for n in ('PlPpNr.dat', 'PlNnNr.dat', 'PlGwNr.dat'))
+    for dat in (popo, nana, gw):
+        dat.write_bytes(dat.name.encode())
+    ic = hc.get_or_render_hd(popo, paired_dat_path=nana)
+    gw_slots = [hc.get_or_render_hd(gw, color_index=i) for i in range(2)]
+    stale = _cached('c' * 32, 100, 1000)
+    for p in (ic, *gw_slots):
+        os.utime(p, (900, 900))          # older than the unpinned entry
+
+    # the vault/vanilla pin set holds RAW DAT hashes, not the derived keys
+    monkeypatch.setattr(hc, 'pinned_hashes', lambda: {hc.hash_dat(popo), hc.hash_dat(gw)})
+    assert ic.stem[:32] != hc.hash_dat(popo)
+    result = hc.enforce_budget(150)
+
+    assert result['evicted'] == 1 and not stale.exists()
+    assert ic.exists() and all(p.exists() for p in gw_slots)
+    assert hc.cache_stats()['pinned_entries'] == 3
+
+    # evicting a derived-key render takes its sidecar with it
+    monkeypatch.setattr(hc, 'pinned_hashes', lambda: set())
+    hc.enforce_budget(150)
+    [kept] = (tmp_path / 'cache').glob('*.png')
+    assert sorted(p.name for p in (tmp_path / 'cache').iterdir()) == [kept.name, kept.name + '.src']
+
+
+def test_stats_survive_a_sidecar_evicted_mid_scan(tmp_path, monkeypatch):
+    monkeypatch.setattr(hc, 'CACHE_DIR', tmp_path / 'cache')
+    monkeypatch.setattr(hc, 'pinned_hashes', lambda: set())
+    (tmp_path / 'cache').mkdir()
+    _cached('d' * 32, 100, 1000)
+    orphan = tmp_path / 'cache' / ('e' * 32 + '_4x.png.src')
+    orphan.write_text('f' * 32)
+    real_stat, seen = Path.stat, []
+
+    def stat(self, *a, **kw):
+        if self == orphan:
+            seen.append(self)
+            if len(seen) > 1:           # enforce_budget unlinked it after iterdir
+                orphan.unlink()
+        return real_stat(self, *a, **kw)
+
+    monkeypatch.setattr(Path, 'stat', stat)
+    assert hc.cache_stats()['entries'] == 1
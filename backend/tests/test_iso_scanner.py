@@ -1,3 +1,4 @@
+import os
 import sys
 import importlib
 from pathlib import Path
@@ -204,3 +205,80 @@ def test_build_candidate_passes_staged_ice_climbers_pair(monkeypatch, tmp_path):
     assert candidate is not None
     assert seen['paired_dat_filepath']
     assert Path(seen['paired_dat_filepath']).name == 'PlNnAq.dat'
+
+
+class _FakeCostumeParser:
+    def __init__(self, path):
+        self.path = path
+        self.root_nodes = []
+
+    def read_dat(self):
+        return None
+
+    def is_character_costume(self):
+        return True
+
+    def detect_character(self):
+        return iso_scanner._character_from_filename(self.path), 'sym'
+
+    def get_character_filename(self):
+        return os.path.basename(self.path)
+
+
+def test_scan_pipeline_streams_candidates_and_reports_throughput(monkeypatch, tmp_path):
+    import contextlib
+    import hashlib
+
+    work = tmp_path / 'work'
+    job = IsoScanJob('job2', [str(tmp_path / 'pack.iso')], work / 'job2')
+    files_dir = job.work_dir / 'extracted' / 'pack' / 'files'
+    files_dir.mkdir(parents=True)
+    (tmp_path / 'pack.iso').write_bytes(b'not a disc')   # -> reuse extraction
+    for code in ('FxGr', 'FxRe', 'FcGr', 'PpNr', 'NnNr'):
+        (files_dir / f'Pl{code}.dat').write_bytes(code.encode())
+    (files_dir / 'PlFxBu.dat').write_bytes(b'FxGr')      # duplicate of PlFxGr
+    (files_dir / 'PlMsNr.dat').write_bytes(b'vanilla')
+
+    monkeypatch.setattr(iso_scanner, 'SCAN_WORK_ROOT', work)
+    monkeypatch.setattr(iso_scanner, '_load_vault_hashes', lambda: set())
+    monkeypatch.setattr(iso_scanner, '_load_vanilla_hashes',
+                        lambda: {hashlib.md5(b'vanilla').hexdigest()})
+    monkeypatch.setattr(iso_scanner, '_slippi_fixed_hash',
+                        lambda p: hashlib.md5(b'vanilla').hexdigest()
+                        if p.endswith('PlFxRe.dat') else None)
+    monkeypatch.setattr(iso_scanner, 'DATParser', _FakeCostumeParser)
+    monkeypatch.setattr(iso_scanner, 'active_pool',
+                        lambda **kw: contextlib.nullcontext())
+
+    def fake_build(idx, c, skins_dir, job):
+        return iso_scanner.CandidateSkin(
+            key=f"k{idx}", character=c['character'],
+            costume_code=c['costume_code'], dat_path=c['path'], csp_path='x',
+            stock_path=None, dat_hash=c['hash'], source_iso=c['source_iso'],
+            paired_dat_path=c.get('paired_path'),
+            paired_costume_code=c.get('paired_costume_code')), None
+    monkeypatch.setattr(iso_scanner, '_build_candidate', fake_build)
+    materialized = []
+    real_materialize = iso_scanner._materialize
+    monkeypatch.setattr(iso_scanner, '_materialize',
+                        lambda fp, disc_files: materialized.append(os.path.basename(fp))
+                        or real_materialize(fp, disc_files))
+
+    events = []
+    iso_scanner._run_scan(job, lambda e, p: events.append((e, p)))
+
+    assert job.status == 'complete', job.error
+    assert job.stats['vanilla'] == 1
+    assert job.stats['dupes'] == 1
+    assert job.stats['slippi_matched'] == 1
+    assert sorted(job.candidates) == ['Falco', 'Fox', 'Ice Climbers']
+    [ic] = job.candidates['Ice Climbers']
+    assert ic.paired_costume_code == 'PlNnNr.dat'
+    assert job.throughput['hash']['done'] == job.stats['total_files'] == 7
+    assert job.throughput['csp']['done'] == job.throughput['csp']['submitted'] == 4
+    assert any('throughput' in p for e, p in events if e == 'iso_scan_progress')
+    # the duplicate and the vanilla match are dropped on their hash alone
+    assert 'PlMsNr.dat' not in materialized
+    parsed = set(materialized) - {'PlFxBu.dat', 'PlFxGr.dat'}
+    assert parsed == {'PlFxRe.dat', 'PlFcGr.dat', 'PlPpNr.dat', 'PlNnNr.dat'}
+    assert len({'PlFxBu.dat', 'PlFxGr.dat'} & set(materialized)) == 1
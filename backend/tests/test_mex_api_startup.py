@@ -0,0 +1,23 @@
+"""
+mex_api.py is re-imported by every spawn()ed process-pool worker (as
+__mp_main__), so importing it must not run the backend's startup: no output
+cleanup, no blueprint registration -- that all waits for init_app().
+"""
+import sys
+
+import core.helpers
+import core.state
+
+
+def test_importing_the_entry_script_starts_nothing(monkeypatch):
+    calls = []
+    monkeypatch.setattr(core.helpers, 'cleanup_output_folder', lambda: calls.append('cleanup'))
+    monkeypatch.setattr(core.state, '_socketio', core.state._socketio)
+    monkeypatch.setattr(sys, 'stdout', sys.stdout)
+    monkeypatch.setattr(sys, 'stderr', sys.stderr)
+    monkeypatch.delitem(sys.modules, 'mex_api', raising=False)
+
+    import mex_api
+
+    assert calls == []
+    assert not mex_api.app.blueprints
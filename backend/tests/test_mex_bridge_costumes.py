@@ -0,0 +1,106 @@
+"""
+Tests for MexManager.get_all_costumes / get_costumes (scripts/tools/mex_bridge.py)
+against tests/fake_mexcli.py (the `mex` fixture is in conftest.py): one MexCLI
+call lists every fighter, the listing is reused until the project changes, and
+an older mexcli without get-all-costumes falls back to one get-costumes per
+fighter -- but a real failure does not.
+"""
+import json
+import os
+
+import pytest
+
+import core.state  # noqa: F401 - puts scripts/tools on sys.path
+import mex_bridge
+from mex_bridge import MexManagerError
+
+pytestmark = pytest.mark.skipif(os.name == 'nt', reason='fake mexcli is a POSIX shell wrapper')
+
+TABLE = {'Mario': ['PlMrNr.dat', 'PlMrYe.dat'], 'Fox': ['PlFxNr.dat'], 'Falco': []}
+
+
+@pytest.fixture
+def oneshot(mex):
+    def make():
+        m = mex(serve=False)
+        data = m.project_path.parent / 'data'
+        data.mkdir(exist_ok=True)
+        (data / 'costumes.json').write_text(json.dumps(TABLE))
+        return m
+    make.commands = lambda: [line.split('\t')[2] for line in _log()]
+    yield make
+    mex_bridge.invalidate_costume_cache()
+
+
+def _log():
+    log = os.environ['FAKE_MEXCLI_LOG']
+    return open(log).read().splitlines() if os.path.exists(log) else []
+
+
+def test_one_call_lists_every_fighter(oneshot):
+    m = oneshot()
+
+    listing = m.get_all_costumes()
+
+    assert [f['fighter'] for f in listing] == list(TABLE)
+    assert [c['fileName'] for c in listing[0]['costumes']] == TABLE['Mario']
+    singles = [m._run_command('get-costumes', str(m.project_path), name) for name in TABLE]
+    assert listing == [{k: v for k, v in s.items() if k != 'success'} for s in singles]
+    assert oneshot.commands().count('get-all-costumes') == 1
+
+
+def test_per_fighter_lookups_share_the_cached_listing(oneshot):
+    m = oneshot()
+
+    mario = m.get_costumes('mario')
+    fox = m.get_costumes('1')
+    m.get_costumes('Falco')
+
+    assert mario['fighter'] == 'Mario' and mario['costumeCount'] == 2
+    assert fox['fighter'] == 'Fox'
+    assert oneshot.commands() == ['get-all-costumes']
+    with pytest.raises(MexManagerError, match='Fighter not found'):
+        m.get_costumes('Sheik')
+
+
+def test_callers_cannot_mutate_the_cache(oneshot):
+    m = oneshot()
+    m.get_costumes('Mario')['costumes'][0]['cspUrl'] = '/assets/x.png'
+
+    assert 'cspUrl' not in m.get_costumes('Mario')['costumes'][0]
+
+
+def test_project_writes_invalidate(oneshot):
+    m = oneshot()
+    m.get_all_costumes()
+
+    m.save_project()                       # through the bridge
+    m.get_all_costumes()
+    data = m.project_path.parent / 'data'
+    (data / 'costumes.json').write_text(json.dumps({**TABLE, 'Fox': []}))
+    os.utime(data / 'costumes.json', ns=(1, 10 ** 19))  # outside edit, newer mtime
+    fox = m.get_costumes('Fox')
+
+    assert fox['costumeCount'] == 0
+    assert oneshot.commands() == ['get-all-costumes', 'save', 'get-all-costumes',
+                                  'get-all-costumes']
+
+
+def test_falls_back_per_fighter_without_get_all_costumes(oneshot, monkeypatch):
+    monkeypatch.setenv('FAKE_MEXCLI_NO_BULK', '1')
+    m = oneshot()
+
+    listing = m.get_all_costumes()
+
+    assert [f['fighter'] for f in listing] == list(TABLE)
+    assert oneshot.commands() == ['get-all-costumes', 'list-fighters'] + ['get-costumes'] * 3
+
+
+def test_a_failing_get_all_costumes_does_not_fall_back(oneshot, monkeypatch):
+    monkeypatch.setenv('FAKE_MEXCLI_OPEN_FAIL', '1')
+    m = oneshot()
+
+    with pytest.raises(MexManagerError, match='Failed to open project'):
+        m.get_all_costumes()
+
+    assert oneshot.commands() == ['get-all-costumes']
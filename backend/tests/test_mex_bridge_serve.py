@@ -0,0 +1,98 @@
+"""
+Tests for the `mexcli serve` client in scripts/tools/mex_bridge.py against
+tests/fake_mexcli.py: one warm process per project, project loaded once,
+stdin passthrough, errors, crash/timeout handling, and one-shot fallback.
+"""
+import os
+import threading
+
+import pytest
+
+import core.state  # noqa: F401 - puts scripts/tools on sys.path
+import mex_bridge
+from mex_bridge import MexManagerError
+
+pytestmark = pytest.mark.skipif(os.name == 'nt', reason='fake mexcli is a POSIX shell wrapper')
+
+
+def test_commands_share_one_server_and_one_project_load(mex):
+    m = mex()
+    first = m.get_info()
+    second = m.open_project()
+    layout = m.set_sss_layout('{"icons": []}')
+
+    assert first['mode'] == second['mode'] == 'serve'
+    assert first['pid'] == second['pid'] == layout['pid']
+    assert second['opens'] == 1
+    assert layout['stdin'] == '{"icons": []}'
+    assert mex.starts() == ['serve']
+
+    # A fresh MexManager (reload_mex_manager) keeps using the warm server.
+    assert mex().get_info()['pid'] == first['pid']
+
+
+def test_error_reply_raises_and_drops_the_loaded_project(mex):
+    m = mex()
+    m.get_info()
+    with pytest.raises(MexManagerError, match='boom'):
+        m._run_command('fail', str(m.project_path))
+    assert m.get_info()['opens'] == 2
+
+
+def test_falls_back_to_one_shot_when_serve_is_unsupported(mex, monkeypatch):
+    monkeypatch.setenv('FAKE_MEXCLI_NO_SERVE', '1')
+    m = mex()
+    assert m.get_info()['mode'] == 'oneshot'
+    assert m.get_info()['mode'] == 'oneshot'
+    # One rejected `serve` start, then back-off: no respawn per command
+    # (the fake logs a rejected `serve` as 'oneshot').
+    assert len(mex.starts()) == 3
+
+
+def test_crash_mid_command_raises_and_respawns(mex):
+    m = mex()
+    pid = m.get_info()['pid']
+    with pytest.raises(MexManagerError, match='exited'):
+        m._run_command('crash')
+    assert m.get_info()['pid'] != pid
+
+
+def test_timeout_kills_the_server(mex):
+    m = mex()
+    server = mex_bridge.get_server(m.cli_path, m.project_path.parent)
+    with pytest.raises(Exception):
+        server.request(['hang'], timeout=0.5)
+    assert not server.alive()
+    assert m.get_info()['mode'] == 'serve'
+
+
+def test_busy_lock_runs_one_shot_instead_of_waiting(mex):
+    lock = threading.RLock()
+    m = mex(lock=lock)
+    assert m.get_info()['mode'] == 'serve'
+
+    held, release = threading.Event(), threading.Event()
+
+    def holder():
+        with lock:
+            held.set()
+            release.wait(5)
+    t = threading.Thread(target=holder)
+    t.start()
+    held.wait(5)
+    try:
+        assert m.get_info()['mode'] == 'oneshot'
+    finally:
+        release.set()
+        t.join()
+    with lock:      # the owning thread re-enters and keeps using the server
+        assert m.get_info()['mode'] == 'serve'
+
+
+def test_serve_disabled_and_close(mex):
+    assert mex(serve=False).get_info()['mode'] == 'oneshot'
+    m = mex()
+    m.get_info()
+    server = mex_bridge.get_server(m.cli_path, m.project_path.parent)
+    m.close()
+    assert not server.alive()
@@ -0,0 +1,99 @@
+"""
+Tests for core.project_overlay: the texture-pack export overlay must present
+the whole project, give the CSPs / project data / regenerated files/ entries
+their own bytes (writes there never reach the live project) and reference
+the read-only disc files instead of copying them.
+"""
+import os
+
+from core import project_overlay
+from core.project_overlay import build_overlay, must_materialize
+
+
+def _project(root):
+    files = {
+        'project.mexproj': b'{}',
+        'data/fighters/Fox.json': b'{"name": "Fox"}',
+        'sys/main.dol': b'dol' * 100,
+        'assets/csp/csp_000.png': b'png0',
+        'assets/csp/csp_000.tex': b'tex0',
+        'assets/icons/ico_000.png': b'icon',
+        'files/MnSlChr.usd': b'css' * 50,
+        'files/PlCo.dat': b'plco',
+        'files/audio/us/smash2.sem': b'sem',
+        'files/audio/us/main.ssm': b'ssm',
+        'files/audio/1_1.hps': b'music' * 1000,
+        'files/PlFxNr.dat': b'fox' * 1000,
+        'files/GrNBa.dat': b'stage' * 1000,
+    }
+    for rel, data in files.items():
+        path = root / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(data)
+    return files
+
+
+def test_overlay_has_every_file(tmp_path):
+    live = tmp_path / 'live'
+    files = _project(live)
+
+    build_overlay(live, tmp_path / 'overlay' / 'live')
+
+    for rel, data in files.items():
+        assert (tmp_path / 'overlay' / 'live' / rel).read_bytes() == data
+
+
+def test_rewritten_files_are_materialized(tmp_path):
+    live = tmp_path / 'live'
+    files = _project(live)
+    overlay = tmp_path / 'overlay'
+
+    stats = build_overlay(live, overlay)
+
+    for rel in files:
+        if must_materialize(rel):
+            # what MexCLI/FSM/placeholders write: truncate-in-place like
+            # File.WriteAllBytes
+            with open(overlay / rel, 'r+b') as f:
+                f.truncate(0)
+                f.write(b'placeholder')
+    assert {rel: (live / rel).read_bytes() for rel in files} == files
+    assert stats['cloned'] + stats['copied'] == sum(map(must_materialize, files))
+
+
+def test_disc_files_are_referenced(tmp_path):
+    live = tmp_path / 'live'
+    _project(live)
+    overlay = tmp_path / 'overlay'
+
+    stats = build_overlay(live, overlay)
+
+    for rel in ('files/PlFxNr.dat', 'files/GrNBa.dat', 'files/audio/1_1.hps',
+                'assets/icons/ico_000.png'):
+        assert os.path.samefile(overlay / rel, live / rel)
+    assert stats['linked'] + stats['symlinked'] == 4
+    assert stats['referenced_bytes'] == 3000 + 5000 + 5000 + 4
+
+
+def test_reference_falls_back_when_links_are_refused(tmp_path, monkeypatch):
+    live = tmp_path / 'live'
+    files = _project(live)
+
+    def refuse(*_a, **_k):
+        raise OSError('not permitted')
+    monkeypatch.setattr(project_overlay.os, 'link', refuse)
+    monkeypatch.setattr(project_overlay.os, 'symlink', refuse)
+
+    stats = build_overlay(live, tmp_path / 'overlay')
+
+    assert stats['linked'] == stats['symlinked'] == 0
+    assert stats['cloned'] + stats['copied'] == len(files)
+    assert (tmp_path / 'overlay' / 'files/PlFxNr.dat').read_bytes() == files['files/PlFxNr.dat']
+
+
+def test_rewrite_set_is_case_insensitive_under_files():
+    assert must_materialize('files/mnslchr.usd')
+    assert must_materialize('files/MxDt.dat')
+    assert not must_materialize('files/PlFxNr.dat')
+    assert not must_materialize('assets/stock/stc_000.png')
+    assert must_materialize('assets/csp/csp_000.png')
@@ -0,0 +1,162 @@
+"""
+Regression test for modellab.rig's weight transfer / smoothing / deform
+passes: a small synthetic humanoid (tube limbs on a 13-joint skeleton) is
+rigged and deformed, written as SMD, and compared with
+fixtures/rig_regression.smd -- the output of the original per-vertex loop
+implementation -- within float tolerance.
+
+Regenerate the fixture (only when the rigging behaviour is meant to change):
+  python tests/test_rig_weights.py --write
+"""
+import math
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+pytest.importorskip("scipy")
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from modellab import rig, smd  # noqa: E402
+
+FIXTURE = Path(__file__).parent / 'fixtures' / 'rig_regression.smd'
+
+# id, parent, local offset, part
+JOINTS = [
+    (0, -1, (0, 0, 0), 'util'),
+    (1, 0, (0, 10, 0), 'torso'),
+    (2, 1, (0, 4, 0), 'torso'),
+    (3, 2, (0, 4, 0), 'head'),
+    (4, 3, (0, 2.5, 0), 'head'),
+    (5, 2, (2, 0, 0), 'l_arm'),
+    (6, 5, (3, -0.5, 0), 'l_arm'),
+    (7, 2, (-2, 0, 0), 'r_arm'),
+    (8, 7, (-3, -0.5, 0), 'r_arm'),
+    (9, 1, (1.5, -1, 0), 'l_leg'),
+    (10, 9, (0, -4.5, 0), 'l_leg'),
+    (11, 1, (-1.5, -1, 0), 'r_leg'),
+    (12, 11, (0, -4.5, 0), 'r_leg'),
+]
+MESH_NODE = 13
+
+
+def _skeleton(scale=1.0):
+    bones = [smd.Bone(j, f'JOBJ_{j}', p, tuple(c * scale for c in off))
+             for j, p, off, _ in JOINTS]
+    bones.append(smd.Bone(MESH_NODE, 'Joint_0_Object_0', -1))
+    return bones
+
+
+def _tubes(bones, around, along, radius, twist, rng):
+    """Triangle-soup tubes along every parent->child joint segment, weighted
+    linearly between the two joints (jittered so smoothing has work to do)."""
+    kit = smd.SMD(bones=bones)
+    world = rig.joint_world_positions(kit)
+    tris = []
+    for j, p, _, _ in JOINTS:
+        if p <= 0:
+            continue
+        a, b = world[p], world[j]
+        axis = (b - a) / np.linalg.norm(b - a)
+        side = np.cross(axis, [0, 0, 1.0])
+        if np.linalg.norm(side) < 1e-6:
+            side = np.cross(axis, [1.0, 0, 0])
+        side /= np.linalg.norm(side)
+        up = np.cross(axis, side)
+
+        def vert(i, k):
+            t = i / along
+            ang = 2 * math.pi * k / around + twist
+            n = math.cos(ang) * side + math.sin(ang) * up
+            pos = a + t * (b - a) + radius * n
+            wp = min(1.0, max(0.0, 1.0 - t + rng.uniform(-0.15, 0.15)))
+            weights = [(p, wp), (j, 1.0 - wp)] if 0 < wp < 1 else [(p if wp else j, 1.0)]
+            return smd.Vertex(tuple(pos), tuple(n), (k / around, t), weights, MESH_NODE)
+
+        for i in range(along):
+            for k in range(around):
+                v00, v01 = vert(i, k), vert(i, (k + 1) % around)
+                v10, v11 = vert(i + 1, k), vert(i + 1, (k + 1) % around)
+                tris.append(smd.Triangle('body', (v00, v10, v11)))
+                tris.append(smd.Triangle('body', (v00, v11, v01)))
+    kit.triangles = tris
+    return kit
+
+
+def _run(tmp_path):
+    rng = np.random.default_rng(7)
+    part_of = {j: part for j, _, _, part in JOINTS}
+    rigkit = _tubes(_skeleton(), 8, 4, 0.8, 0.0, rng)
+    src = _tubes(_skeleton(1.15), 6, 3, 0.95, 0.3, rng)
+    src_path = tmp_path / 'foreign.smd'
+    smd.save(src, src_path)
+
+    foreign = rig.load_foreign_smd(src_path)
+    pts = foreign.tri_pos.reshape(-1, 3)
+    src_world = rig.joint_world_positions(src)
+    tgt_world = rig.joint_world_positions(rigkit)
+    ids = sorted(src_world)
+    nearest = np.array(ids)[np.linalg.norm(
+        pts[:, None] - np.array([src_world[b] for b in ids])[None], axis=2).argmin(1)]
+    vert_parts = [part_of[int(b)] if part_of[int(b)] != 'util' else 'torso' for b in nearest]
+
+    # proximity transfer (weld + anchor vote + part penalty + smoothing + gate)
+    weights = rig.transfer_weights(rigkit, foreign, max_weights=2, part_of=part_of,
+                                   vert_parts=vert_parts)
+
+    # parametric-path smoothing of ragged raw weights
+    raw = [{int(b): float(w) for b, w in zip(rng.choice(ids[1:], 3, replace=False),
+                                             rng.dirichlet([1, 1, 1]))}
+           for _ in range(len(pts))]
+    smoothed = rig.smooth_weights(pts, raw, iterations=10)
+
+    geom = {}
+    for part in set(vert_parts):
+        geom[part] = pts[[vp == part for vp in vert_parts]]
+    tgt_geom = {p: g / 1.15 for p, g in geom.items()}
+    parents = {j: p for j, p, _, _ in JOINTS}
+
+    part_mesh = rig.load_foreign_smd(src_path)
+    rig.part_deform(part_mesh, vert_parts, part_of, src_world, part_of, tgt_world,
+                    src_geom=geom, tgt_geom=tgt_geom, log=lambda *a: None)
+    seg_mesh = rig.load_foreign_smd(src_path)
+    rig.segment_deform(seg_mesh, part_of, parents, src_world, part_of, parents,
+                       tgt_world, src_geom=geom, tgt_geom=tgt_geom,
+                       log=lambda *a: None)
+
+    out = smd.SMD(bones=_skeleton())
+    for mesh, wlist in ((part_mesh, weights),
+                        (seg_mesh, [sorted(d.items(), key=lambda kv: (-kv[1], kv[0]))
+                                    for d in smoothed])):
+        corners = mesh.tri_pos.reshape(-1, 3)
+        for t in range(len(mesh.tri_pos)):
+            verts = tuple(smd.Vertex(tuple(corners[3 * t + c]), (0.0, 1.0, 0.0), (0.0, 0.0),
+                                     list(wlist[3 * t + c]), MESH_NODE)
+                          for c in range(3))
+            out.triangles.append(smd.Triangle('part' if mesh is part_mesh else 'segment', verts))
+    return out
+
+
+def test_rig_passes_match_the_reference_smd(tmp_path):
+    expected = smd.load(FIXTURE)
+    out_path = tmp_path / 'out.smd'
+    smd.save(_run(tmp_path), out_path)
+    actual = smd.load(out_path)
+
+    assert len(actual.triangles) == len(expected.triangles)
+    for ta, te in zip(actual.triangles, expected.triangles):
+        assert ta.material == te.material
+        for va, ve in zip(ta.verts, te.verts):
+            assert np.allclose(va.pos, ve.pos, atol=2e-4)
+            wa, we = dict(va.weights), dict(ve.weights)
+            assert wa.keys() == we.keys()
+            assert all(abs(wa[b] - we[b]) < 1e-4 for b in wa)
+
+
+if __name__ == '__main__' and '--write' in sys.argv:
+    import tempfile
+    with tempfile.TemporaryDirectory() as tmp:
+        FIXTURE.parent.mkdir(exist_ok=True)
+        smd.save(_run(Path(tmp)), FIXTURE)
+    print(f'wrote {FIXTURE}')
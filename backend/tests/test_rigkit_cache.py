@@ -0,0 +1,125 @@
+"""
+Tests for modellab.rigkit_cache: a compiled rig kit must rebuild the same
+SMD the text parser gives, hand the rig functions the same world matrices /
+sane surface / KD-tree they would derive themselves, and recompile when the
+source SMD changes.
+"""
+import numpy as np
+import pytest
+
+pytest.importorskip("scipy")
+
+from modellab import rig, rigkit_cache, smd  # noqa: E402
+from tests.test_rig_weights import _skeleton, _tubes  # noqa: E402
+
+
+def _kit(tmp_path, seed=1):
+    kit = _tubes(_skeleton(), 8, 4, 0.8, 0.0, np.random.default_rng(seed))
+    # a parked alternate assembly on its own mesh node and bone: not part of
+    # the sane surface
+    kit.bones.append(smd.Bone(14, 'JOBJ_14', 0, (0.0, 30.0, 0.0)))
+    kit.bones.append(smd.Bone(15, 'Joint_1_Object_0', -1))
+    parked = smd.Vertex((0.0, 30.0, 0.0), (0.0, 1.0, 0.0), (0.0, 0.0), [(14, 1.0)], 15)
+    kit.triangles.append(smd.Triangle('spare', (parked, parked, parked)))
+    path = tmp_path / 'rigkit.smd'
+    smd.save(kit, path)
+    return path
+
+
+def test_compiled_kit_matches_the_parsed_smd(tmp_path):
+    path = _kit(tmp_path)
+    plain = smd.load(path)
+    rigkit_cache.load(path)
+    assert rigkit_cache.cache_path(path).exists()
+    rigkit_cache.clear_cache()
+
+    kit = rigkit_cache.load(path)      # rebuilt from the archive
+    assert kit.bones == plain.bones
+    assert kit.triangles == plain.triangles
+    assert kit.materials == plain.materials
+    expected = rig.joint_world_matrices(plain)
+    world = rig.joint_world_matrices(kit)
+    assert world.keys() == expected.keys()
+    assert all(np.array_equal(world[j], expected[j]) for j in world)
+    assert rig.sane_surface(kit) == rig.sane_surface(plain)
+    assert len(rig.sane_surface(kit)) == len(plain.triangles) - 1
+
+
+def test_repeated_loads_share_the_built_kit(tmp_path):
+    path = _kit(tmp_path)
+    rigkit_cache.clear_cache()
+
+    first = rigkit_cache.load(path)
+    assert rigkit_cache.load(path) is first
+
+    rigkit_cache.clear_cache()
+    again = rigkit_cache.load(path)
+    assert again is not first and again.triangles == first.triangles
+
+
+def test_members_are_memory_mapped(tmp_path):
+    path = _kit(tmp_path)
+    rigkit_cache.load(path)
+
+    arrays = smd.read_npz(rigkit_cache.cache_path(path))
+
+    assert isinstance(arrays['pos'], np.memmap)
+    assert str(arrays['source_sha1']) == rigkit_cache.source_hash(path)
+
+
+def test_transfer_weights_reuses_the_compiled_tree(tmp_path, monkeypatch):
+    path = _kit(tmp_path)
+    src = _tubes(_skeleton(1.1), 6, 3, 0.9, 0.3, np.random.default_rng(2))
+    src_path = tmp_path / 'foreign.smd'
+    smd.save(src, src_path)
+    foreign = rig.load_foreign_smd(src_path)
+    expected = rig.transfer_weights(smd.load(path), foreign)
+
+    rigkit_cache.load(path)
+    rigkit_cache.clear_cache()
+    kit = rigkit_cache.load(path)
+    import scipy.spatial
+    built = []
+    real = scipy.spatial.cKDTree
+    monkeypatch.setattr(scipy.spatial, 'cKDTree',
+                        lambda data, **kw: built.append(np.asarray(data)) or real(data, **kw))
+
+    assert rig.transfer_weights(kit, foreign) == expected
+    assert built and not any(np.array_equal(d, kit.surface_tree.data) for d in built)
+
+
+def test_source_change_recompiles(tmp_path):
+    path = _kit(tmp_path)
+    rigkit_cache.load(path)
+    before = rigkit_cache.cache_path(path).read_bytes()
+
+    _kit(tmp_path, seed=3)
+    kit = rigkit_cache.load(path)
+
+    assert rigkit_cache.cache_path(path).read_bytes() != before
+    assert kit.triangles == smd.load(path).triangles
+
+
+def test_archive_holds_no_pickles(tmp_path):
+    path = _kit(tmp_path)
+    rigkit_cache.load(path)
+
+    arrays = smd.read_npz(rigkit_cache.cache_path(path))
+
+    assert not any(a.dtype.hasobject for a in arrays.values())
+    assert arrays['surface_points'].shape[1] == 3
+
+
+def test_pickled_members_are_never_loaded(tmp_path):
+    path = _kit(tmp_path)
+    rigkit_cache.load(path)
+    npz = rigkit_cache.cache_path(path)
+    arrays = {k: np.array(v) for k, v in smd.read_npz(npz).items()}
+    arrays['surface_points'] = np.array([object()], dtype=object)
+    smd.write_npz(npz, arrays)       # a tampered archive, e.g. from a restored backup
+    rigkit_cache.clear_cache()
+
+    kit = rigkit_cache.load(path)    # refused and recompiled
+
+    assert kit.surface_tree.data.dtype == float
+    assert not any(a.dtype.hasobject for a in smd.read_npz(npz).values())
@@ -0,0 +1,139 @@
+"""
+Slippi validation verdict cache (services/slippi_cache) and the bulk re-test:
+a DAT seen before never reaches the validator again, auto-fix is served from
+the stored fixed bytes, and a bulk pass validates each distinct DAT once.
+"""
+import io
+import sys
+import threading
+import zipfile
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+TOOLS_DIR = Path(__file__).parent.parent.parent / 'utility' / 'tools'
+sys.path.insert(0, str(TOOLS_DIR / 'processor'))
+sys.path.insert(0, str(TOOLS_DIR / 'services'))
+
+import dat_processor  # noqa: E402
+import slippi_cache  # noqa: E402
+
+
+class _FakeParser:
+    def __init__(self, path):
+        pass
+
+    def read_dat(self):
+        pass
+
+    def get_character_filename(self):
+        return 'PlFxGr'
+
+
+@pytest.fixture
+def validator(tmp_path, monkeypatch):
+    """Fake SlippiCostumeValidator: DATs starting with b'BAD' need a fix (the
+    fix rewrites them in place), b'ERR' makes the validator fail."""
+    calls = []
+
+    def validate_dat_file(path, auto_fix=False, create_backup=True):
+        data = path.read_bytes()
+        calls.append(data)
+        if data.startswith(b'ERR'):
+            return {'is_valid': False, 'needs_fix': False, 'output': 'timed out'}
+        if data.startswith(b'BAD'):
+            path.write_bytes(b'FIXED' + data[3:])
+            return {'is_valid': False, 'needs_fix': True, 'output': 'fixed'}
+        return {'is_valid': True, 'needs_fix': False, 'output': 'ok'}
+
+    monkeypatch.setattr(dat_processor, 'validate_dat_file', validate_dat_file)
+    monkeypatch.setattr(dat_processor, 'DATParser', _FakeParser)
+    monkeypatch.setattr(slippi_cache, 'CACHE_DIR', tmp_path / 'cache')
+    monkeypatch.setattr(slippi_cache, '_validator_id', 'v1')
+    return calls
+
+
+def _dat(tmp_path, name, data):
+    p = tmp_path / name
+    p.write_bytes(data)
+    return p
+
+
+def test_repeat_check_and_autofix_skip_the_validator(tmp_path, validator):
+    first = dat_processor.validate_for_slippi(_dat(tmp_path, 'a.dat', b'BAD-1'))
+    assert first['needs_fix'] and not first['slippi_safe'] and not first['cached']
+    assert len(validator) == 1
+
+    again = _dat(tmp_path, 'b.dat', b'BAD-1')
+    cached = dat_processor.validate_for_slippi(again, auto_fix=True)
+    assert cached['cached'] and cached['fix_applied'] and cached['slippi_safe']
+    assert again.read_bytes() == b'FIXED-1'
+
+    # The fixed output was recorded as safe on the way in.
+    assert dat_processor.validate_for_slippi(again)['slippi_safe']
+    assert len(validator) == 1
+
+
+def test_failed_runs_and_new_validator_are_misses(tmp_path, validator, monkeypatch):
+    dat_processor.validate_for_slippi(_dat(tmp_path, 'e.dat', b'ERR'))
+    dat_processor.validate_for_slippi(_dat(tmp_path, 'e.dat', b'ERR'))
+    assert len(validator) == 2
+
+    dat_processor.validate_for_slippi(_dat(tmp_path, 'ok.dat', b'GOOD'))
+    monkeypatch.setattr(slippi_cache, '_validator_id', 'v2')
+    assert not dat_processor.validate_for_slippi(_dat(tmp_path, 'ok.dat', b'GOOD'))['cached']
+    assert len(validator) == 4
+
+
+def test_bulk_validates_each_distinct_dat_once(tmp_path, validator):
+    paths = [_dat(tmp_path, f'{i}.dat', data)
+             for i, data in enumerate([b'BAD-x', b'GOOD', b'BAD-x', b'ERR'])]
+    seen = []
+
+    results = dat_processor.validate_many_for_slippi(
+        paths, auto_fix=True, workers=3, on_result=lambda i, r: seen.append(i))
+
+    assert sorted(validator) == [b'BAD-x', b'ERR', b'GOOD']
+    assert [r['slippi_safe'] for r in results] == [True, True, True, False]
+    assert paths[0].read_bytes() == paths[2].read_bytes() == b'FIXED-x'
+    assert sorted(seen) == [0, 1, 2, 3]
+
+
+class _SyncThread:
+    def __init__(self, target=None, daemon=None, **kw):
+        self._target = target
+
+    def start(self):
+        self._target()
+
+
+def test_batch_retest_route_updates_vault(vault, validator, monkeypatch):
+    import blueprints.storage_costumes as sc
+    import core.state
+
+    events = []
+    monkeypatch.setattr(core.state, 'get_socketio',
+                        lambda: SimpleNamespace(emit=lambda name, payload: events.append((name, payload))))
+    monkeypatch.setattr(sc, 'threading', SimpleNamespace(Thread=_SyncThread, Lock=threading.Lock))
+    monkeypatch.setattr(sc.hash_index, 'record_vault_zip', lambda *a, **kw: None)
+
+    for sid, data in (('a', b'BAD-a'), ('b', b'GOOD')):
+        buf = io.BytesIO()
+        with zipfile.ZipFile(buf, 'w') as zf:
+            zf.writestr('PlFxGr.dat', data)
+            zf.writestr('csp.png', b'png')
+        vault.touch('Fox', f'{sid}.zip', data=buf.getvalue())
+    vault.write({'characters': {'Fox': {'skins': [
+        {'id': 'a', 'color': 'A'}, {'type': 'folder', 'id': 'folder_1'}, {'id': 'b', 'color': 'B'}]}}})
+
+    client = vault.client(sc, 'storage_costumes_bp')
+    resp = client.post('/api/mex/storage/costumes/retest-slippi-batch', json={'autoFix': True})
+
+    assert resp.status_code == 200
+    assert events[-1] == ('slippi_retest_complete', {'total': 2, 'safe': 2, 'fixed': 1, 'failed': 0})
+    skins = {s['id']: s for s in vault.read()['characters']['Fox']['skins']}
+    assert skins['a']['slippi_safe'] and skins['a']['slippi_tested']
+    with zipfile.ZipFile(vault.storage / 'Fox' / 'a.zip') as zf:
+        assert zf.read('PlFxGr.dat') == b'FIXED-a'
+        assert zf.read('csp.png') == b'png'
@@ -0,0 +1,106 @@
+"""
+Tests for modellab.smd's array reader/writer: the block tokenizer must read
+what the SMD dialect means (CRLF, comments, odd spacing, link-less verts),
+save() must stay byte-for-byte what the per-field writer produced, and the
+binary sidecar must follow the SMD it caches.
+"""
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from modellab import smd
+
+FIXTURE = Path(__file__).parent / 'fixtures' / 'rig_regression.smd'
+
+QUIRKY = (
+    'version 1\r\n'
+    'nodes\r\n'
+    '0 "root" -1\r\n'
+    '1 "JOBJ_1" 0\r\n'
+    'end\r\n'
+    'skeleton\r\n'
+    'time 0\r\n'
+    '0 0 0 0 0 0 0\r\n'
+    '1 1.5 2 3 0.1 0.2 0.3\r\n'
+    'end\r\n'
+    'triangles\r\n'
+    'mat A\r\n'
+    '0 1 2 3 0 1 0 0.5 0.5\r\n'
+    '  1\t1 2 3   0 1 0 0.5 0.5 2 0 0.25 1 0.75\r\n'
+    '// comment\r\n'
+    '\r\n'
+    '1 -1e-3 2 3 0 1 0 0.25 0.5 0\r\n'
+    'matB\r\n'
+    '1 4 5 6 0 0 1 0 1 1 1 1\r\n'
+    '1 4 5 6 0 0 1 0 1 1 1 1\r\n'
+    '1 7 8 9 0 0 1 1 1 1 0 1\r\n'
+    'mat A\r\n'
+    '1 1 2 3 0 1 0 0.5 0.5 1 1 1\r\n'
+    'end\r\n'
+)
+
+
+def test_reader_follows_the_dialect(tmp_path):
+    path = tmp_path / 'quirky.smd'
+    path.write_bytes(QUIRKY.encode())
+
+    m = smd.load(path)
+
+    assert [(b.id, b.name, b.parent) for b in m.bones] == [(0, 'root', -1), (1, 'JOBJ_1', 0)]
+    assert m.bones[1].pos == (1.5, 2.0, 3.0) and m.bones[1].rot == (0.1, 0.2, 0.3)
+    assert [t.material for t in m.triangles] == ['mat A', 'matB']     # partial tri dropped
+    v0, v1, v2 = m.triangles[0].verts
+    assert v0.weights == [(0, 1.0)] and v0.parent == 0                # no link count
+    assert v1.weights == [(0, 0.25), (1, 0.75)] and v1.pos == (1.0, 2.0, 3.0)
+    assert v2.weights == [(1, 1.0)] and v2.pos == (-1e-3, 2.0, 3.0)   # zero links
+    assert m.triangles[1].verts[2].weights == [(0, 1.0)]
+    assert m.materials == ['mat A', 'matB']
+
+
+def test_short_link_list_is_an_error(tmp_path):
+    path = tmp_path / 'bad.smd'
+    path.write_text('triangles\nm\n0 0 0 0 0 1 0 0 0 2 1 0.5\n'
+                    '0 0 0 0 0 1 0 0 0\n0 0 0 0 0 1 0 0 0\nend\n')
+    with pytest.raises(ValueError):
+        smd.load_arrays(path)
+
+
+def test_save_round_trips_byte_for_byte(tmp_path, monkeypatch):
+    monkeypatch.setattr(smd, '_BLOCK_TRIS', 7)    # many reader/writer blocks
+    arrays = smd.load_arrays(FIXTURE)
+    out = tmp_path / 'out.smd'
+
+    smd.save_arrays(arrays, out)
+    assert out.read_bytes() == FIXTURE.read_bytes()
+    smd.save(smd.load(FIXTURE), out)
+    assert out.read_bytes() == FIXTURE.read_bytes()
+
+
+def test_vertex_without_parent_writes_its_first_bone(tmp_path):
+    v = smd.Vertex((0.5, 0.0, 0.0), (0.0, 1.0, 0.0), (0.0, 0.0), [(3, 0.5), (4, 0.5)])
+    m = smd.SMD(bones=[smd.Bone(3, 'JOBJ_3', -1)], triangles=[smd.Triangle('m', (v, v, v))])
+    out = tmp_path / 'out.smd'
+
+    smd.save(m, out)
+
+    assert '\n3 0.5 0 0 0 1 0 0 0 2 3 0.5 4 0.5\n' in out.read_text()
+    assert smd.SMDArrays.from_smd(m).to_smd() == m
+
+
+def test_sidecar_is_reused_until_the_smd_changes(tmp_path):
+    path = tmp_path / 'mesh.smd'
+    path.write_bytes(FIXTURE.read_bytes())
+    expected = smd.load_arrays(path)
+
+    smd.load_arrays(path, sidecar=True)
+    assert smd.sidecar_path(path).exists()
+    cached = smd.load_arrays(path, sidecar=True)
+    assert isinstance(cached.pos, np.memmap)
+    assert np.array_equal(cached.pos, expected.pos)
+    assert cached.corner_weights() == expected.corner_weights()
+
+    path.write_text(QUIRKY)
+    fresh = smd.load_arrays(path, sidecar=True)
+    assert not isinstance(fresh.pos, np.memmap)
+    assert fresh.n_triangles == 2
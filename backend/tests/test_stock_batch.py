@@ -0,0 +1,142 @@
+"""
+Tests for skinlab.stock_gen.generate_stocks: the batch engine must give every
+skin exactly the icon a one-off generate_stock call gives it, while decoding
+each character's vanilla textures once. Runs on synthetic textures (the DAT
+decoder is swapped for a lookup), so no vanilla assets are needed.
+"""
+import functools
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from skinlab import stock_gen, texture_cache
+from skinlab.palette import hsl_to_rgb, rgb_to_hsl
+from tests import fake_stock_decoder
+
+
+def _texture(rng, hues, size=64):
+    """Banded RGBA texture: one hue per horizontal band, lightness ramp
+    across, a few transparent holes."""
+    y, x = np.mgrid[:size, :size]
+    band = (y * len(hues)) // size
+    h = np.array(hues, dtype=np.float64)[band]
+    s = np.full(h.shape, 70.0)
+    l = 25.0 + 50.0 * x / size + rng.uniform(-3, 3, h.shape)
+    rgb = hsl_to_rgb(h.ravel(), s.ravel(), l.ravel()).reshape(size, size, 3)
+    alpha = np.where(rng.random((size, size)) < 0.05, 0, 255)
+    return np.dstack([np.clip(rgb, 0, 255), alpha]).astype(np.uint8)
+
+
+def _shift(tex, dh):
+    h, s, l = rgb_to_hsl(tex[..., :3].reshape(-1, 3).astype(np.float64))
+    rgb = hsl_to_rgb((h + dh) % 360.0, s, l).reshape(tex.shape[:2] + (3,))
+    return np.dstack([np.clip(rgb, 0, 255), tex[..., 3]]).astype(np.uint8)
+
+
+@pytest.fixture
+def vault(tmp_path, monkeypatch):
+    """A vanilla dir with two characters and a handful of modded DATs."""
+    rng = np.random.default_rng(3)
+    vanilla = tmp_path / 'vanilla'
+    textures = {}
+    for character, code, hues in (('Fox', 'PlFxNr', (10, 120, 220)),
+                                  ('Falco', 'PlFcNr', (40, 200, 300))):
+        ref = vanilla / character / code
+        ref.mkdir(parents=True)
+        (ref / f'{code}.dat').write_bytes(b'vanilla')
+        icon = _texture(rng, hues, size=24)
+        icon[..., 3] = np.where(icon[..., 3] > 0, 255, 0)
+        Image.fromarray(icon).save(ref / 'stock.png')
+        textures[f'{code}.dat'] = [_texture(rng, hues), None, _texture(rng, hues[::-1]),
+                                   _texture(rng, hues[1:])]
+
+    jobs = []
+    mods = tmp_path / 'mods'
+    mods.mkdir()
+    for n, (character, code, dh) in enumerate((('Fox', 'PlFxGr', 90), ('Fox', 'PlFxBu', 200),
+                                               ('Falco', 'PlFcRe', 45), ('Fox', 'PlFxLa', 0),
+                                               ('Falco', 'PlFcGr', 150))):
+        van = textures[f'{code[:4]}Nr.dat']
+        mod = [None if t is None else _shift(t, dh) for t in van]
+        if n == 4:
+            mod[2] = mod[3] = np.zeros((8, 8, 4), np.uint8)     # a different model
+        path = mods / f'{n}.dat'
+        path.write_bytes(b'mod')
+        textures[path.name] = mod
+        jobs.append(stock_gen.StockJob(character, code, str(path)))
+
+    decoded = []
+
+    def fake_textures(path):
+        decoded.append(path.name if hasattr(path, 'name') else str(path).rsplit('/', 1)[-1])
+        return textures[decoded[-1]]
+
+    monkeypatch.setattr(stock_gen, '_dat_textures', fake_textures)
+    return vanilla, jobs, decoded
+
+
+def test_batch_matches_single_generation(vault):
+    vanilla, jobs, _ = vault
+    expected = [stock_gen.generate_stock(vanilla, j.character, j.costume_code,
+                                         modded_dat_path=j.modded_dat_path) for j in jobs]
+    assert all(e is not None for e in expected[:4]) and expected[4] is None
+
+    seen = []
+    results = stock_gen.generate_stocks(vanilla, jobs, workers=1,
+                                        on_result=lambda i, r: seen.append(i))
+
+    assert sorted(seen) == list(range(len(jobs)))
+    for res, exp in zip(results[:4], expected):
+        assert (res.png, res.method) == exp
+        assert res.error is None and not res.head_shot
+    assert results[4].png is None and results[4].head_shot
+
+
+def test_vanilla_decoded_once_per_character(vault):
+    vanilla, jobs, decoded = vault
+    stock_gen.generate_stocks(vanilla, jobs, workers=1)
+    assert sorted(d for d in decoded if d.startswith('Pl')) == ['PlFcNr.dat', 'PlFxNr.dat']
+
+
+def test_failed_skin_does_not_stop_the_batch(vault, tmp_path):
+    vanilla, jobs, _ = vault
+    broken = stock_gen.StockJob('Fox', 'PlFxGr', str(tmp_path / 'missing.dat'))
+
+    results = stock_gen.generate_stocks(vanilla, [broken] + jobs[:1], workers=1)
+
+    assert results[0].png is None and results[0].head_shot
+    assert results[1].method == 'texture-diff'
+
+
+@pytest.mark.skipif(multiprocessing.get_start_method() != 'fork',
+                    reason='the swapped decoder only reaches fork()ed workers')
+def test_process_pool_gives_the_same_icons(vault, monkeypatch):
+    vanilla, jobs, _ = vault
+    monkeypatch.setattr(stock_gen, 'STOCK_CHUNK', 3)
+    jobs = [jobs[0], jobs[2]] * 4       # two characters, each split across tasks
+    inline = stock_gen.generate_stocks(vanilla, jobs, workers=1)
+    pooled = stock_gen.generate_stocks(vanilla, jobs, workers=2)
+    assert [r.png for r in pooled] == [r.png for r in inline]
+
+
+def test_process_pool_under_spawn(vault, tmp_path, monkeypatch):
+    # spawn is what the app gets on Windows and in frozen builds: workers
+    # import everything afresh, so their initializer swaps the decoder in
+    vanilla, jobs, _ = vault
+    names = ['PlFxNr.dat', 'PlFcNr.dat'] + [Path(j.modded_dat_path).name for j in jobs]
+    (tmp_path / 'textures').mkdir()
+    fake_stock_decoder.save(tmp_path / 'textures',
+                            {n: stock_gen._dat_textures(n) for n in names})
+    monkeypatch.setattr(stock_gen, 'STOCK_CHUNK', 3)
+    monkeypatch.setattr(stock_gen, 'ProcessPoolExecutor', functools.partial(
+        ProcessPoolExecutor, mp_context=multiprocessing.get_context('spawn'),
+        initializer=fake_stock_decoder.install,
+        initargs=(str(tmp_path / 'textures'), str(texture_cache.CACHE_DIR))))
+    jobs = [jobs[0], jobs[2]] * 4
+    inline = stock_gen.generate_stocks(vanilla, jobs, workers=1)
+    pooled = stock_gen.generate_stocks(vanilla, jobs, workers=2)
+    assert [r.png for r in pooled] == [r.png for r in inline]
@@ -0,0 +1,80 @@
+"""
+Tests for skinlab.texture_cache: decoded DAT textures and palette analyses
+come back from the cache identical to a fresh decode / conversion, keyed by
+content, and the byte budget evicts least-recently-used entries first.
+"""
+import os
+
+import numpy as np
+
+from skinlab import datprobe, palette, texture_cache
+from tests.test_datprobe import _build_dat, _image, _tlut
+
+
+def _dat(tmp_path, seed=0):
+    body = _image(14, 32, 32, seed=seed)
+    eyes = _image(9, 16, 8, seed=seed + 2)
+    bad = _image(10, 8, 8)          # no decoder -> None
+    return _build_dat(tmp_path / f'PlFxNr{seed}.dat',
+                      [(body, None), (eyes, _tlut(2, 256)), (bad, None), (body, None)])
+
+
+def test_dat_textures_round_trip(tmp_path):
+    path = _dat(tmp_path)
+    expected = [t.pixels for t in datprobe.decode_textures(datprobe.DatFile(path))]
+
+    cold = texture_cache.dat_textures(path)
+    assert len(list(texture_cache.CACHE_DIR.glob('dat-*.npz'))) == 1
+    warm = texture_cache.dat_textures(path)
+
+    for got in (cold, warm):
+        assert [t is None for t in got] == [t is None for t in expected]
+        assert all(np.array_equal(g, e) for g, e in zip(got, expected) if e is not None)
+
+
+def test_changed_dat_is_a_new_entry(tmp_path):
+    path = _dat(tmp_path)
+    texture_cache.dat_textures(path)
+    path.write_bytes(_dat(tmp_path, seed=5).read_bytes())
+
+    got = texture_cache.dat_textures(path)
+
+    expected = [t.pixels for t in datprobe.decode_textures(datprobe.DatFile(path))]
+    assert np.array_equal(got[0], expected[0])
+    assert len(list(texture_cache.CACHE_DIR.glob('dat-*.npz'))) == 2
+
+
+def _textures():
+    rng = np.random.default_rng(4)
+    return {i: rng.integers(0, 256, (32, 48, 4), dtype=np.uint8) for i in range(3)}
+
+
+def test_palette_analysis_is_the_same_from_the_cache():
+    textures = _textures()
+    cold_groups, cold_maps = palette.analyze(textures, max_groups=5)
+    hits = texture_cache.cache_stats()['hits']
+
+    warm_groups, warm_maps = palette.analyze(textures, max_groups=5)
+
+    assert texture_cache.cache_stats()['hits'] == hits + len(textures)
+    assert warm_groups == cold_groups
+    assert all(np.array_equal(warm_maps[i], cold_maps[i]) for i in textures)
+    # pixel maps still follow the uncached definition
+    mask, h, _s, _l = palette._valid_mask(textures[0])
+    assert ((warm_maps[0] != 255) <= mask.ravel()).all()
+
+
+def test_budget_evicts_least_recently_used():
+    arrays = {'a': np.random.default_rng(1).integers(0, 256, 4096, dtype=np.uint8)}
+    for i in range(4):
+        texture_cache.put('hsl', f'k{i}', arrays)
+        path = texture_cache.entry_path('hsl', f'k{i}')
+        os.utime(path, (1000 + i, 1000 + i))
+    texture_cache.get('hsl', 'k0')          # k0 becomes the most recent
+    size = texture_cache.entry_path('hsl', 'k0').stat().st_size
+
+    result = texture_cache.enforce_budget(budget=int(size * 2.5))
+
+    assert result['evicted'] == 2
+    left = sorted(p.name for p in texture_cache.CACHE_DIR.glob('*.npz'))
+    assert left == ['hsl-k0.npz', 'hsl-k3.npz']
@@ -0,0 +1,101 @@
+"""
+texture_filename_table batching: missing indices are encoded many-per-MexCLI
+call across a thread pool, saved after every batch, and a MexCLI that only
+understands one PNG per call still works. The real encoder is replaced by a
+fake `placeholder-bytes` that derives bytes from the PNG name, and XXH64 by
+md5 (xxhash is optional here) -- only the plumbing is under test.
+"""
+import hashlib
+import json
+import re
+import sys
+from pathlib import Path
+
+import pytest
+
+BACKEND_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+import texture_filename_table as tft
+
+
+def _fake_line(png_path):
+    index = int(re.search(r'ph(\d+)\.png$', png_path).group(1))
+    img = bytes([index % 256]) * 256
+    pal = index.to_bytes(4, 'big') * 128
+    return json.dumps({'img': img.hex().upper(), 'pal': pal.hex().upper(),
+                       'usedMin': 0, 'usedMax': 3})
+
+
+@pytest.fixture
+def table(tmp_path, monkeypatch):
+    monkeypatch.setattr(tft, 'CACHE_TABLE_PATH', tmp_path / 'table.json')
+    monkeypatch.setattr(tft, 'SEED_TABLE_PATH', tmp_path / 'seed.json')
+    monkeypatch.setattr(tft, 'MEXCLI_PATH', tmp_path)     # "exists"
+    monkeypatch.setattr(tft, '_xxh64_hex',
+                        lambda data: hashlib.md5(data).hexdigest()[:16])
+    (tmp_path / 'seed.json').write_text(json.dumps(
+        {'entries': {'0': {'filename': 'seeded.png'}}}))
+    return tmp_path / 'table.json'
+
+
+def test_missing_indices_are_batched_and_persisted(table, monkeypatch):
+    calls = []
+
+    def fake_run(png_paths):
+        calls.append(len(png_paths))
+        return [_fake_line(p) for p in png_paths]
+
+    monkeypatch.setattr(tft, '_run_placeholder_bytes', fake_run)
+    monkeypatch.setattr(tft, 'BATCH_SIZE', 4)
+    monkeypatch.setattr(tft, 'TABLE_PARALLELISM', 3)
+    progress = []
+
+    entries, computed = tft.ensure_table_covers(
+        range(11), lambda done, total, idx: progress.append((done, total)))
+
+    assert computed == list(range(1, 11))
+    assert sorted(calls) == [2, 4, 4]
+    assert entries['0'] == {'filename': 'seeded.png'}
+    for i in range(1, 11):
+        rec = tft._record(*tft._parse_record(_fake_line(f'ph{i}.png')))
+        assert entries[str(i)] == rec
+    assert [d for d, _ in progress] == sorted(d for d, _ in progress)
+    assert progress[-1] == (10, 10)
+
+    saved = json.loads(table.read_text())
+    assert saved['count'] == 11 and set(saved['entries']) == {str(i) for i in range(11)}
+    # already covered: nothing to compute
+    assert tft.ensure_table_covers(range(11))[1] == []
+
+
+def test_failed_batch_keeps_finished_batches(table, monkeypatch):
+    def fake_run(png_paths):
+        if any(p.endswith('ph7.png') for p in png_paths):
+            raise RuntimeError('boom')
+        return [_fake_line(p) for p in png_paths]
+
+    monkeypatch.setattr(tft, '_run_placeholder_bytes', fake_run)
+    monkeypatch.setattr(tft, 'BATCH_SIZE', 2)
+    monkeypatch.setattr(tft, 'TABLE_PARALLELISM', 1)
+
+    with pytest.raises(RuntimeError):
+        tft.ensure_table_covers(range(1, 9))
+    saved = json.loads(table.read_text())['entries']
+    assert {'1', '2', '3', '4', '5', '6'} <= set(saved)
+    assert '7' not in saved
+
+
+def test_single_file_mexcli_falls_back_per_index(table, monkeypatch):
+    calls = []
+
+    def old_run(png_paths):
+        # pre-batch MexCLI: only args[1] is encoded
+        calls.append(len(png_paths))
+        return [_fake_line(png_paths[0])]
+
+    monkeypatch.setattr(tft, '_run_placeholder_bytes', old_run)
+    entries, computed = tft.ensure_table_covers([5, 6, 7])
+    assert computed == [5, 6, 7]
+    assert calls == [3, 1, 1, 1]
+    assert entries['6'] == tft._record(*tft._parse_record(_fake_line('ph6.png')))
@@ -12,8 +12,10 @@ vault under ``storage/`` is never touched.
 import io
 import json
 import sys
+import threading
 import zipfile
 from pathlib import Path
+from types import SimpleNamespace
 
 import pytest
 from flask import Flask
@@ -68,7 +70,10 @@ def vault_env(tmp_path, monkeypatch):
 
     sock = _RecordingSocket()
     monkeypatch.setattr(vault_backup, 'get_socketio', lambda: sock)
-    monkeypatch.setattr(vault_backup.threading, 'Thread', _SyncThread)
+    # Only the blueprint's own job threads run inline; thread pools elsewhere
+    # (backup_store, zip extraction) keep real threads.
+    monkeypatch.setattr(vault_backup, 'threading', SimpleNamespace(
+        Thread=_SyncThread, Lock=threading.Lock, local=threading.local))
 
     app = Flask(__name__)
     app.register_blueprint(vault_backup.vault_backup_bp)
@@ -88,6 +93,18 @@ def _restore_event(env, name):
     return next((d for e, d in reversed(env.socket.events) if e == name), None)
 
 
+def _backup(env, **body):
+    """POST a backup, check the job started, and return its completion payload."""
+    resp = env.client.post('/api/mex/storage/backup', json=body)
+    assert resp.status_code == 200
+    backup_id = resp.get_json()['backup_id']
+    assert not [d for e, d in env.socket.events if e == 'vault_backup_error']
+    done = [d for e, d in env.socket.events
+            if e == 'vault_backup_complete' and d['backup_id'] == backup_id]
+    assert len(done) == 1
+    return done[0]
+
+
 def _write_metadata(storage_path, metadata):
     (storage_path / 'metadata.json').write_text(json.dumps(metadata), encoding='utf-8')
 
@@ -490,6 +507,40 @@ def test_restore_rejects_zip_without_metadata(vault_env):
     assert 'metadata.json' in resp.get_json()['error']
 
 
+def test_restore_refuses_entries_outside_the_vault(vault_env):
+    _write_metadata(vault_env.storage_path, {'characters': {'Fox': {'skins': [_skin('fox-red')]}}})
+    (vault_env.storage_path / 'Fox').mkdir()
+    (vault_env.storage_path / 'Fox' / 'fox-red.zip').write_bytes(b'current-data')
+    backup = _make_backup_zip({'characters': {}},
+                              extra_files={'Marth/marth.zip': b'm', '../escape.txt': b'x'})
+
+    resp = vault_env.client.post(
+        '/api/mex/storage/restore',
+        data={'mode': 'replace', 'file': (backup, 'backup.zip')},
+        content_type='multipart/form-data',
+    )
+
+    assert resp.status_code == 400
+    assert 'escapes the vault' in resp.get_json()['error']
+    assert not (vault_env.project_root / 'escape.txt').exists()
+    # the current vault was never cleared
+    assert (vault_env.storage_path / 'Fox' / 'fox-red.zip').read_bytes() == b'current-data'
+    assert 'Fox' in _read_metadata(vault_env.storage_path)['characters']
+    assert not (vault_env.storage_path / 'Marth').exists()
+
+
+def test_replace_worker_checks_members_before_clearing(vault_env, tmp_path):
+    _write_metadata(vault_env.storage_path, {'characters': {'Fox': {'skins': [_skin('fox-red')]}}})
+    backup = tmp_path / 'backup.zip'
+    backup.write_bytes(_make_backup_zip({'characters': {}},
+                                        extra_files={'../../escape.txt': b'x'}).getvalue())
+
+    vault_backup.run_vault_restore('r1', str(backup), 'replace')
+
+    assert 'escapes the vault' in _restore_event(vault_env, 'vault_restore_error')['error']
+    assert 'Fox' in _read_metadata(vault_env.storage_path)['characters']
+
+
 def test_restore_merge_leaves_vault_intact_when_backup_invalid(vault_env):
     # An invalid backup must not have already wiped/altered the vault.
     _write_metadata(vault_env.storage_path, {'characters': {'Fox': {'skins': [_skin('fox-red')]}}})
@@ -514,29 +565,58 @@ def test_backup_creates_zip_with_all_files(vault_env):
     (vault_env.storage_path / 'Fox').mkdir()
     (vault_env.storage_path / 'Fox' / 'fox-red.zip').write_bytes(b'fox-data')
 
-    resp = vault_env.client.post('/api/mex/storage/backup')
-
-    assert resp.status_code == 200
-    body = resp.get_json()
-    assert body['success'] is True
+    body = _backup(vault_env)
+    progress = [d['percentage'] for e, d in vault_env.socket.events
+                if e == 'vault_backup_progress']
+    assert progress and progress == sorted(progress)
 
     backup_path = Path(body['path'])
     assert backup_path.exists()
     with zipfile.ZipFile(backup_path, 'r') as zf:
         names = set(zf.namelist())
+        assert zf.testzip() is None
     # Paths are stored relative to STORAGE_PATH (posix separators in zip).
     assert 'metadata.json' in names
     assert 'Fox/fox-red.zip' in names
 
 
+@pytest.mark.parametrize('cache_file', [
+    'hash_index.json',
+    '_slippi_cache/ab/ab12.json',
+    '_texture_cache/cd/cd34.npz',
+    '_extras_offsets/ef56.json',
+    'modellab/rigkits/Fox/rigkit.npz',
+    'modellab/rigkits/Fox/rigkit.smd.npz',
+])
+@pytest.mark.parametrize('mode', ['replace', 'merge'])
+def test_local_caches_stay_out_of_backups_and_restores(vault_env, cache_file, mode):
+    _write_metadata(vault_env.storage_path, {'characters': {}})
+    cache = vault_env.storage_path / cache_file
+    cache.parent.mkdir(parents=True, exist_ok=True)
+    cache.write_bytes(b'local')
+
+    with zipfile.ZipFile(_backup(vault_env, download=True)['path']) as zf:
+        assert cache_file not in zf.namelist()
+
+    cache.unlink()
+    backup = _make_backup_zip({'characters': {}}, extra_files={cache_file: b'foreign'})
+    resp = vault_env.client.post(
+        '/api/mex/storage/restore',
+        data={'mode': mode, 'file': (backup, 'backup.zip')},
+        content_type='multipart/form-data',
+    )
+    assert resp.status_code == 200
+    assert _restore_event(vault_env, 'vault_restore_complete')
+    assert not cache.exists()
+
+
 def test_backup_then_restore_merge_round_trip(vault_env):
     # Build a vault, back it up, mutate, then merge the backup back in.
     _write_metadata(vault_env.storage_path, {'characters': {'Fox': {'skins': [_skin('fox-red')]}}})
     (vault_env.storage_path / 'Fox').mkdir()
     (vault_env.storage_path / 'Fox' / 'fox-red.zip').write_bytes(b'fox-data')
 
-    backup_resp = vault_env.client.post('/api/mex/storage/backup').get_json()
-    backup_path = Path(backup_resp['path'])
+    backup_path = Path(_backup(vault_env)['path'])
 
     # Replace current vault with a different character.
     _write_metadata(vault_env.storage_path, {'characters': {'Marth': {'skins': [_skin('marth-black')]}}})
@@ -557,6 +637,54 @@ def test_backup_then_restore_merge_round_trip(vault_env):
     assert (vault_env.storage_path / 'Fox' / 'fox-red.zip').read_bytes() == b'fox-data'
 
 
+def test_second_backup_only_reads_changed_files(vault_env):
+    _write_metadata(vault_env.storage_path, {'characters': {'Fox': {'skins': [_skin('fox-red')]}}})
+    (vault_env.storage_path / 'Fox').mkdir()
+    (vault_env.storage_path / 'Fox' / 'fox-red.zip').write_bytes(b'fox-data')
+
+    first = _backup(vault_env, download=False)
+    assert 'path' not in first and first['snapshot']['hashed'] == 2
+
+    (vault_env.storage_path / 'Fox' / 'fox-blue.zip').write_bytes(b'blue-data')
+    second = _backup(vault_env)
+    assert second['snapshot']['hashed'] == 1 and second['snapshot']['reused'] == 2
+    with zipfile.ZipFile(second['path']) as zf:
+        assert zf.read('Fox/fox-red.zip') == b'fox-data'
+
+    listed = vault_env.client.get('/api/mex/storage/backup/snapshots').get_json()
+    assert [s['id'] for s in listed['snapshots']] == [second['snapshot']['id'],
+                                                      first['snapshot']['id']]
+
+
+def test_restore_snapshot_replace_and_merge(vault_env):
+    _write_metadata(vault_env.storage_path, {'characters': {'Fox': {'skins': [_skin('fox-red')]}}})
+    (vault_env.storage_path / 'Fox').mkdir()
+    (vault_env.storage_path / 'Fox' / 'fox-red.zip').write_bytes(b'fox-data')
+    snap = _backup(vault_env, download=False)['snapshot']['id']
+
+    _write_metadata(vault_env.storage_path, {'characters': {'Marth': {'skins': [_skin('marth-black')]}}})
+    (vault_env.storage_path / 'Fox' / 'fox-red.zip').unlink()
+
+    resp = vault_env.client.post('/api/mex/storage/restore/snapshot',
+                                 json={'snapshotId': snap, 'mode': 'merge'})
+    assert resp.status_code == 200
+    assert set(_read_metadata(vault_env.storage_path)['characters']) == {'Fox', 'Marth'}
+    assert (vault_env.storage_path / 'Fox' / 'fox-red.zip').read_bytes() == b'fox-data'
+
+    resp = vault_env.client.post('/api/mex/storage/restore/snapshot',
+                                 json={'snapshotId': snap, 'mode': 'replace'})
+    assert resp.status_code == 200
+    assert set(_read_metadata(vault_env.storage_path)['characters']) == {'Fox'}
+    assert _restore_event(vault_env, 'vault_restore_complete')
+    assert not _restore_event(vault_env, 'vault_restore_error')
+
+
+def test_restore_snapshot_rejects_unknown_id(vault_env):
+    resp = vault_env.client.post('/api/mex/storage/restore/snapshot',
+                                 json={'snapshotId': 'nope', 'mode': 'merge'})
+    assert resp.status_code == 404
+
+
 # ---------------------------------------------------------------------------
 # Clear endpoint
 # ---------------------------------------------------------------------------
@@ -607,15 +735,28 @@ def test_backup_excludes_vault_db(vault_env):
     (vault_env.storage_path / 'vault.db').write_bytes(b'SQLITECACHE')
     (vault_env.storage_path / 'vault.db-wal').write_bytes(b'WAL')
 
-    resp = vault_env.client.post('/api/mex/storage/backup')
-
-    assert resp.status_code == 200
-    with zipfile.ZipFile(Path(resp.get_json()['path'])) as zf:
+    with zipfile.ZipFile(Path(_backup(vault_env)['path'])) as zf:
         names = set(zf.namelist())
     assert 'metadata.json' in names
     assert 'vault.db' not in names and 'vault.db-wal' not in names
 
 
+def test_backup_writes_a_deferred_mirror_first(vault_env, monkeypatch):
+    import core.metadata as core_metadata
+    _use_db(monkeypatch, vault_env.storage_path)
+    monkeypatch.setattr(core_config, 'VAULT_DUAL_WRITE', True)
+    monkeypatch.setattr(core_metadata, 'METADATA_FILE', vault_env.storage_path / 'metadata.json')
+    monkeypatch.setattr(core_metadata, 'MIRROR_DELAY_S', 60.0)
+    core_metadata.save_metadata({'characters': {'Fox': {'skins': [_skin('fox-red')]}}})
+    with core_metadata.skin_transaction('Fox', 'fox-red') as skin:
+        skin['color'] = 'Crimson'       # row-level: mirror still pending
+
+    with zipfile.ZipFile(Path(_backup(vault_env)['path'])) as zf:
+        backed_up = json.loads(zf.read('metadata.json'))
+
+    assert backed_up['characters']['Fox']['skins'][0]['color'] == 'Crimson'
+
+
 def test_replace_restore_rebuilds_db(vault_env, monkeypatch):
     _use_db(monkeypatch, vault_env.storage_path)
     backup = _make_backup_zip({'bundles': [{'id': 'restored'}]})
@@ -646,3 +787,26 @@ def test_merge_restore_rebuilds_db(vault_env, monkeypatch):
     rebuilt = vaultmod.db_to_blob(vault_env.storage_path / 'vault.db')
     ids = {s['id'] for s in rebuilt['characters']['Fox']['skins']}
     assert ids == {'fox-red', 'fox-blue'}      # DB reflects the merged catalog
+
+
+def test_hd_csp_cache_stats_and_prune(vault_env, monkeypatch):
+    from skinlab import hd_csp_cache as hc
+    cache = vault_env.storage_path / '_csp_hd_cache'
+    cache.mkdir()
+    monkeypatch.setattr(hc, 'CACHE_DIR', cache)
+    monkeypatch.setattr(hc, 'pinned_hashes', lambda: {'a' * 32})
+    (cache / f"{'a' * 32}_4x.png").write_bytes(b'\0' * 2048)
+    (cache / f"{'b' * 32}_4x.png").write_bytes(b'\0' * 2048)
+
+    stats = vault_env.client.get('/api/mex/storage/hd-csp-cache').get_json()['stats']
+    assert stats['entries'] == 2 and stats['bytes'] == 4096
+    assert stats['pinned_entries'] == 1
+
+    bad = vault_env.client.post('/api/mex/storage/hd-csp-cache/prune',
+                                json={'budgetMb': 'lots'})
+    assert bad.status_code == 400
+
+    # 4 KiB is under any MB budget: nothing to evict
+    out = vault_env.client.post('/api/mex/storage/hd-csp-cache/prune',
+                                json={'budgetMb': 1}).get_json()
+    assert out['success'] and out['evicted'] == 0 and out['stats']['entries'] == 2
@@ -0,0 +1,185 @@
+"""
+Row-level vault writes (core.metadata.skins_transaction / skin_transaction on
+the SQLite backend): a single-skin edit or reorder touches only the affected
+`costumes` rows and never goes through the whole-blob save, while the result
+stays identical to the JSON backend.
+"""
+import json
+import sqlite3
+
+import pytest
+
+import blueprints.storage_costumes as sc
+import core.config as core_config
+import core.metadata as cm
+import core.vault as vaultmod
+
+
+def _skin(sid, **kw):
+    return {'id': sid, 'color': sid.upper(), 'filename': f'{sid}.zip', **kw}
+
+
+def _rows(db, character='Fox'):
+    with sqlite3.connect(str(db)) as conn:
+        return {seq: (order, json.loads(dj)) for seq, order, dj in conn.execute(
+            "SELECT seq, sort_order, data_json FROM costumes WHERE character=?", (character,))}
+
+
+@pytest.fixture
+def db_vault(vault, monkeypatch):
+    monkeypatch.setattr(core_config, 'VAULT_BACKEND', 'db')
+    vault.write({'characters': {'Fox': {'skins': [_skin(s) for s in 'abcde']},
+                                'Falco': {'skins': [_skin('f')]}},
+                 'custom_characters': [{'slug': 'wolf', 'added_skins': [_skin('w')]}]})
+    vault.db = vault.storage / 'vault.db'
+
+    def no_blob_save(*a, **kw):
+        raise AssertionError('row-level write fell back to save_blob')
+    vault.block_blob_save = lambda: monkeypatch.setattr(vaultmod, 'save_blob', no_blob_save)
+    return vault
+
+
+def test_skin_edit_rewrites_only_that_row(db_vault):
+    before = _rows(db_vault.db)
+    db_vault.block_blob_save()
+
+    with cm.skin_transaction('Fox', 'c') as skin:
+        skin['color'] = 'Crimson'
+
+    after = _rows(db_vault.db)
+    changed = [seq for seq in before if before[seq] != after[seq]]
+    assert changed == [2] and after[2][1]['color'] == 'Crimson'
+    assert cm.load_skins('Fox')[2]['color'] == 'Crimson'
+
+
+def test_reorder_updates_sort_order_of_moved_span_only(db_vault):
+    before = _rows(db_vault.db)
+    db_vault.block_blob_save()
+
+    with cm.skins_transaction('Fox') as skins:
+        skins.insert(1, skins.pop(3))              # a b c d e -> a d b c e
+
+    after = _rows(db_vault.db)
+    assert [seq for seq in before if before[seq] != after[seq]] == [1, 2, 3]
+    assert all(before[seq][1] == after[seq][1] for seq in before)   # data untouched
+    assert [s['id'] for s in cm.load_skins('Fox')] == list('adbce')
+    assert [s['id'] for s in cm.load_metadata()['characters']['Fox']['skins']] == list('adbce')
+
+
+def test_insert_delete_and_rollback(db_vault):
+    with cm.skins_transaction('Fox') as skins:
+        del skins[0]
+        skins.append(_skin('z'))
+    assert [s['id'] for s in cm.load_skins('Fox')] == list('bcdez')
+    assert len(_rows(db_vault.db)) == 5
+
+    with pytest.raises(RuntimeError):
+        with cm.skins_transaction('Fox') as skins:
+            skins.clear()
+            raise RuntimeError('boom')
+    assert [s['id'] for s in cm.load_skins('Fox')] == list('bcdez')
+    assert _rows(db_vault.db, 'Falco')              # other characters untouched
+
+
+def test_pseudo_keys_and_new_characters_use_the_blob_path(db_vault):
+    with cm.skin_transaction('custom_characters/wolf/skins', 'w') as skin:
+        skin['color'] = 'Grey'
+    with cm.skins_transaction('Marth', create=True) as skins:
+        skins.append({'type': 'folder', 'id': 'folder_1'})
+    with cm.skins_transaction('Roy') as skins:
+        assert skins is None
+
+    blob = cm.load_metadata()
+    assert blob['custom_characters'][0]['added_skins'][0]['color'] == 'Grey'
+    assert blob['characters']['Marth']['skins'] == [{'type': 'folder', 'id': 'folder_1'}]
+    assert 'Roy' not in blob['characters']
+
+
+def _count_mirror_writes(monkeypatch):
+    writes = []
+    real = cm._save_json
+    monkeypatch.setattr(cm, '_save_json',
+                        lambda data, file: writes.append(file) or real(data, file))
+    return writes
+
+
+def test_row_level_writes_defer_and_coalesce_the_mirror(db_vault, monkeypatch):
+    monkeypatch.setattr(core_config, 'VAULT_DUAL_WRITE', True)
+    monkeypatch.setattr(cm, 'MIRROR_DELAY_S', 60.0)
+    writes = _count_mirror_writes(monkeypatch)
+    for sid in 'abc':
+        with cm.skin_transaction('Fox', sid) as skin:
+            skin['slippi_safe'] = True
+    assert writes == []                 # no whole-vault rewrite per row edit
+
+    cm.flush_mirror()
+
+    assert writes == [db_vault.storage / 'metadata.json']
+    mirror = json.loads((db_vault.storage / 'metadata.json').read_text(encoding='utf-8'))
+    assert mirror == vaultmod.db_to_blob()
+    assert [s.get('slippi_safe') for s in mirror['characters']['Fox']['skins']] == \
+        [True, True, True, None, None]
+    cm.flush_mirror()
+    assert len(writes) == 1             # nothing pending any more
+
+
+def test_mirror_is_written_once_writes_go_quiet(db_vault, monkeypatch):
+    monkeypatch.setattr(core_config, 'VAULT_DUAL_WRITE', True)
+    monkeypatch.setattr(cm, 'MIRROR_DELAY_S', 0.05)
+    with cm.skin_transaction('Fox', 'a') as skin:
+        skin['color'] = 'Teal'
+
+    cm._mirror_timer.join(5)
+
+    mirror = json.loads((db_vault.storage / 'metadata.json').read_text(encoding='utf-8'))
+    assert mirror['characters']['Fox']['skins'][0]['color'] == 'Teal'
+
+
+def test_mirror_is_current_for_json_readers(db_vault, monkeypatch):
+    monkeypatch.setattr(core_config, 'VAULT_DUAL_WRITE', True)
+    monkeypatch.setattr(cm, 'MIRROR_DELAY_S', 60.0)
+    with cm.skin_transaction('Fox', 'b') as skin:
+        skin['color'] = 'Navy'
+
+    raw = cm.load_metadata(path=db_vault.storage / 'metadata.json')
+
+    assert raw['characters']['Fox']['skins'][1]['color'] == 'Navy'
+
+
+@pytest.mark.parametrize('body', [
+    {'fromIndex': 0, 'toIndex': 9},         # rejected inside the transaction
+    {'fromIndex': 2, 'toIndex': 2},         # accepted, changes nothing
+])
+def test_unchanged_transactions_write_nothing(dual_backend, monkeypatch, body):
+    v = dual_backend
+    v.write({'characters': {'Fox': {'skins': [_skin(s) for s in 'abcde']}}})
+    monkeypatch.setattr(core_config, 'VAULT_DUAL_WRITE', True)
+    monkeypatch.setattr(vaultmod, 'save_blob',
+                        lambda *a, **kw: pytest.fail('whole-vault save'))
+    writes = _count_mirror_writes(monkeypatch)
+    client = v.client(sc, 'storage_costumes_bp')
+
+    client.post('/api/mex/storage/costumes/reorder', json={'character': 'Fox', **body})
+
+    assert cm._mirror_timer is None and writes == []
+
+
+@pytest.mark.parametrize('route,body,check', [
+    ('/api/mex/storage/costumes/rename', {'skinId': 'b', 'newName': 'Navy'},
+     lambda skins: skins[1]['color'] == 'Navy'),
+    ('/api/mex/storage/costumes/override-slippi', {'skinId': 'b', 'slippiSafe': True},
+     lambda skins: skins[1]['slippi_manual_override'] is True),
+    ('/api/mex/storage/costumes/move-to-top', {'skinId': 'e'},
+     lambda skins: [s['id'] for s in skins] == list('eabcd')),
+])
+def test_hot_endpoints_write_rows_on_both_backends(dual_backend, route, body, check):
+    v = dual_backend
+    v.write({'characters': {'Fox': {'skins': [_skin(s) for s in 'abcde']}}})
+    client = v.client(sc, 'storage_costumes_bp')
+
+    resp = client.post(route, json={'character': 'Fox', **body})
+
+    assert resp.status_code == 200
+    assert check(v.read()['characters']['Fox']['skins'])
+    missing = client.post(route, json={'character': 'Roy', **body})
+    assert missing.status_code == 404
@@ -22,6 +22,12 @@ This module owns that table for the running app:
           -> tex1_16x16_<texHash>_<tlutHash>_9.png
     Newly computed indices are persisted, so each one is paid for at most once.
 
+Missing indices are encoded in batches -- one `placeholder-bytes` call takes
+many PNGs, so the MexCLI startup (the bulk of each call) is paid once per batch,
+not once per index -- and the batches run on a small thread pool (the work is
+in the child processes). The table is written after every finished batch, so an
+interrupted run keeps everything it already computed.
+
 The endpoint /api/mex/texture-pack/auto-apply uses this to name a build's entire
 texture pack instantly when every index is already cached (the common case), and
 to extend the table on the fly when a build introduces new costume indices.
@@ -32,6 +38,8 @@ import logging
 import os
 import subprocess
 import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 from typing import Callable, Dict, Iterable, List, Optional, Tuple
 
@@ -49,6 +57,26 @@ CACHE_TABLE_PATH = STORAGE_PATH / "texture_filename_table.json"
 _TEX_FMT = "9"
 
 
+def _table_parallelism() -> int:
+    """Concurrent `placeholder-bytes` processes. Each one is a .NET runtime, so
+    the default is the logical CPU count clamped to [1, 8]; overridable via the
+    MEX_TABLE_PARALLELISM env var."""
+    env = os.environ.get("MEX_TABLE_PARALLELISM")
+    if env and env.isdigit():
+        return max(1, min(int(env), 32))
+    return max(1, min(os.cpu_count() or 2, 8))
+
+
+TABLE_PARALLELISM = _table_parallelism()
+
+# Placeholders encoded per MexCLI call. Big enough to amortize the process
+# startup, small enough that progress (and the periodic save) stays granular
+# and the command line stays well under Windows' 32K limit.
+BATCH_SIZE = 64
+
+_save_lock = threading.Lock()
+
+
 def _xxh64_hex(data: bytes) -> str:
     """XXH64(data, seed=0) as 16-char lowercase hex (the way Dolphin formats it)."""
     import xxhash  # imported lazily so the module loads even if xxhash is absent
@@ -87,29 +115,24 @@ def load_table() -> Dict:
 
 
 def _save_table(table: Dict) -> None:
-    table["count"] = len(table.get("entries", {}))
-    try:
-        CACHE_TABLE_PATH.parent.mkdir(parents=True, exist_ok=True)
-        with open(CACHE_TABLE_PATH, "w") as f:
-            json.dump(table, f, indent=2)
-    except Exception as e:
-        logger.warning(f"Could not persist filename table: {e}")
+    """Atomic write (temp + os.replace): the table is saved mid-run, and a crash
+    during the write must not cost the indices already on disk."""
+    with _save_lock:
+        entries = dict(table.get("entries", {}))
+        snapshot = {**table, "entries": entries, "count": len(entries)}
+        table["count"] = len(entries)
+        tmp = CACHE_TABLE_PATH.with_name(CACHE_TABLE_PATH.name + ".tmp")
+        try:
+            CACHE_TABLE_PATH.parent.mkdir(parents=True, exist_ok=True)
+            with open(tmp, "w") as f:
+                json.dump(snapshot, f, indent=2)
+            os.replace(tmp, CACHE_TABLE_PATH)
+        except Exception as e:
+            logger.warning(f"Could not persist filename table: {e}")
 
 
-def _encoded_bytes(index: int, tmpdir: str) -> Tuple[bytes, bytes, int, int]:
-    """Run the real CSP encoder (mexcli placeholder-bytes) on placeholder N.
-    Returns (imageData, paletteData, usedMin, usedMax)."""
-    png_path = os.path.join(tmpdir, f"ph{index}.png")
-    generate_encoded_placeholder(index).save(png_path, format="PNG")
-    out = subprocess.run(
-        [str(MEXCLI_PATH), "placeholder-bytes", png_path],
-        capture_output=True, text=True,
-    )
-    if out.returncode != 0:
-        raise RuntimeError(
-            f"mexcli placeholder-bytes failed for index {index}: {out.stderr[:300]}"
-        )
-    rec = json.loads(out.stdout.strip().splitlines()[-1])
+def _parse_record(line: str) -> Tuple[bytes, bytes, int, int]:
+    rec = json.loads(line)
     return (
         bytes.fromhex(rec["img"]),
         bytes.fromhex(rec["pal"]),
@@ -118,9 +141,48 @@ def _encoded_bytes(index: int, tmpdir: str) -> Tuple[bytes, bytes, int, int]:
     )
 
 
-def compute_record(index: int, tmpdir: str) -> Dict:
-    """Compute the Dolphin filename record for one costume index (no Dolphin/ISO)."""
-    img, pal, used_min, used_max = _encoded_bytes(index, tmpdir)
+def _run_placeholder_bytes(png_paths: List[str]) -> List[str]:
+    """One `mexcli placeholder-bytes` call over `png_paths`; returns its JSON
+    lines (one per PNG, in order)."""
+    out = subprocess.run(
+        [str(MEXCLI_PATH), "placeholder-bytes", *png_paths],
+        capture_output=True, text=True,
+    )
+    if out.returncode != 0:
+        raise RuntimeError(f"mexcli placeholder-bytes failed: {out.stderr[:300]}")
+    return [ln for ln in out.stdout.splitlines() if ln.startswith("{")]
+
+
+def _encoded_batch(indices: List[int], tmpdir: str) -> List[Tuple[bytes, bytes, int, int]]:
+    """Run the real CSP encoder (mexcli placeholder-bytes) on placeholders
+    `indices` in one process. Returns (imageData, paletteData, usedMin, usedMax)
+    per index, in order."""
+    png_paths = []
+    for index in indices:
+        png_path = os.path.join(tmpdir, f"ph{index}.png")
+        generate_encoded_placeholder(index).save(png_path, format="PNG")
+        png_paths.append(png_path)
+    lines = _run_placeholder_bytes(png_paths)
+    if len(lines) != len(png_paths):
+        # A MexCLI built before placeholder-bytes took several PNGs only
+        # encodes the first one -- fall back to one call per index.
+        if len(png_paths) > 1:
+            logger.info("mexcli placeholder-bytes is single-file; encoding one index per call")
+        lines = []
+        for png_path, index in zip(png_paths, indices):
+            got = _run_placeholder_bytes([png_path])
+            if not got:
+                raise RuntimeError(f"mexcli placeholder-bytes printed nothing for index {index}")
+            lines.append(got[-1])
+    return [_parse_record(ln) for ln in lines]
+
+
+def _encoded_bytes(index: int, tmpdir: str) -> Tuple[bytes, bytes, int, int]:
+    """Single-index form of _encoded_batch."""
+    return _encoded_batch([index], tmpdir)[0]
+
+
+def _record(img: bytes, pal: bytes, used_min: int, used_max: int) -> Dict:
     tex_hash = _xxh64_hex(img)
     tlut_hash = _xxh64_hex(pal[2 * used_min: 2 * (used_max + 1)])
     return {
@@ -129,6 +191,16 @@ def compute_record(index: int, tmpdir: str) -> Dict:
     }
 
 
+def compute_record(index: int, tmpdir: str) -> Dict:
+    """Compute the Dolphin filename record for one costume index (no Dolphin/ISO)."""
+    return _record(*_encoded_bytes(index, tmpdir))
+
+
+def compute_records(indices: List[int], tmpdir: str) -> Dict[int, Dict]:
+    """compute_record for a batch of indices with a single MexCLI call."""
+    return {i: _record(*enc) for i, enc in zip(indices, _encoded_batch(indices, tmpdir))}
+
+
 def ensure_table_covers(
     indices: Iterable[int],
     progress_cb: Optional[Callable[[int, int, int], None]] = None,
@@ -136,7 +208,11 @@ def ensure_table_covers(
     """Return (entries, computed_indices) where `entries` covers every requested
     index whose filename could be determined. Missing indices are computed from
     first principles and persisted. `progress_cb(done, total, index)` is called as
-    each missing index is computed (total == number of MISSING indices).
+    each missing index is computed (total == number of MISSING indices); with
+    batching, `done` advances a batch at a time and `index` is the batch's last.
+
+    Batches of BATCH_SIZE run on TABLE_PARALLELISM threads and the table is saved
+    after each one, so an interrupted run resumes where it stopped.
 
     Raises if mexcli is needed but unavailable -- callers should fall back to the
     manual-scroll harvest in that case.
@@ -157,16 +233,28 @@ def ensure_table_covers(
 
     logger.info(f"Computing {len(missing)} new filename-table indices (no Dolphin): "
                 f"{missing[:8]}{'...' if len(missing) > 8 else ''}")
+    batches = [missing[i:i + BATCH_SIZE] for i in range(0, len(missing), BATCH_SIZE)]
     computed: List[int] = []
     with tempfile.TemporaryDirectory() as tmp:
-        for n, index in enumerate(missing):
-            entries[str(index)] = compute_record(index, tmp)
-            computed.append(index)
-            if progress_cb:
-                try:
-                    progress_cb(n + 1, len(missing), index)
-                except Exception:
-                    pass
-    _save_table(table)
+        workers = max(1, min(TABLE_PARALLELISM, len(batches)))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="tex-table") as pool:
+            futures = [pool.submit(compute_records, batch, tmp) for batch in batches]
+            try:
+                for fut in as_completed(futures):
+                    records = fut.result()
+                    for index in sorted(records):
+                        entries[str(index)] = records[index]
+                    computed.extend(sorted(records))
+                    _save_table(table)
+                    if progress_cb:
+                        try:
+                            progress_cb(len(computed), len(missing), max(records))
+                        except Exception:
+                            pass
+            except Exception:
+                for f in futures:
+                    f.cancel()
+                raise
+    computed.sort()
     logger.info(f"Filename table extended by {len(computed)} -> {len(entries)} indices total")
     return entries, computed
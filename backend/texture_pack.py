@@ -449,42 +449,10 @@ class TexturePackWatcher:
         Returns:
             Path to HD CSP if found, None otherwise
         """
-        try:
-            import imagehash
-
-            # Hash the backup CSP
-            backup_img = Image.open(backup_csp_path)
-            backup_hash = imagehash.phash(backup_img)
-
-            # Load metadata to find skins with HD CSPs
-            metadata_file = self.storage_path / 'metadata.json'
-            if not metadata_file.exists():
-                logger.debug("No metadata.json found in storage")
-                return None
-
-            with open(metadata_file, 'r') as f:
-                metadata = json.load(f)
-
-            char_skins = metadata.get('characters', {}).get(character, {}).get('skins', [])
-
-            for skin in char_skins:
-                if skin.get('has_hd_csp') and skin.get('csp_hash'):
-                    stored_hash = imagehash.hex_to_hash(skin['csp_hash'])
-                    distance = backup_hash - stored_hash
-                    if distance < 10:  # Hamming distance threshold
-                        hd_csp = self.storage_path / character / f"{skin['id']}_csp_hd.png"
-                        if hd_csp.exists():
-                            logger.info(f"Hash match found: {skin['id']} (distance={distance})")
-                            return hd_csp
-                        else:
-                            logger.warning(f"Hash matched but HD CSP missing: {hd_csp}")
-
+        hd_csp = find_hd_csp_by_hash(self.storage_path, backup_csp_path, character)
+        if hd_csp is None:
             logger.debug(f"No hash match found for {character} CSP")
-            return None
-
-        except Exception as e:
-            logger.error(f"Error finding HD CSP by hash: {e}", exc_info=True)
-            return None
+        return hd_csp
 
     def get_status(self) -> Dict:
         """Get current watcher status."""
@@ -527,28 +495,127 @@ try:
 except ImportError:
     _imagehash = None
 
+# Hamming distance (of 64-bit phashes) below which a vault CSP is the same portrait
+HASH_MATCH_DISTANCE = 10
+
+
+class _BKTree:
+    """BK-tree over 64-bit perceptual hashes under Hamming distance. Children
+    hang off their parent by distance, so a radius-r query only descends into
+    edges labelled within r of the query's distance to the node (triangle
+    inequality) instead of comparing against every stored hash."""
+
+    def __init__(self):
+        self.root = None    # node: (hash, [items], {distance: child})
+
+    def add(self, h: int, item) -> None:
+        if self.root is None:
+            self.root = (h, [item], {})
+            return
+        node = self.root
+        while True:
+            d = (h ^ node[0]).bit_count()
+            if d == 0:
+                node[1].append(item)
+                return
+            child = node[2].get(d)
+            if child is None:
+                node[2][d] = (h, [item], {})
+                return
+            node = child
+
+    def within(self, h: int, radius: int) -> List[Tuple[int, object]]:
+        """[(distance, item)] for every item whose hash is within radius of h."""
+        out = []
+        stack = [self.root] if self.root is not None else []
+        while stack:
+            node = stack.pop()
+            d = (h ^ node[0]).bit_count()
+            if d <= radius:
+                out.extend((d, item) for item in node[1])
+            for edge, child in node[2].items():
+                if d - radius <= edge <= d + radius:
+                    stack.append(child)
+        return out
+
+
+class CspHashIndex:
+    """The vault's stored CSP phashes (`csp_hash` of skins that have an HD
+    CSP), one BK-tree per character, built from a single metadata.json parse.
+    Get it through csp_hash_index(), which keeps it in sync with the file."""
+
+    def __init__(self, storage_path: Path, metadata: Dict):
+        self.storage_path = Path(storage_path)
+        self.trees: Dict[str, _BKTree] = {}
+        for character, char_data in (metadata.get('characters') or {}).items():
+            for order, skin in enumerate((char_data or {}).get('skins', [])):
+                if not (skin.get('has_hd_csp') and skin.get('csp_hash')):
+                    continue
+                try:
+                    h = int(skin['csp_hash'], 16)
+                except (TypeError, ValueError):
+                    continue
+                self.trees.setdefault(character, _BKTree()).add(h, (order, skin['id']))
+
+    def find(self, character: str, phash: int) -> Optional[Path]:
+        """The HD CSP of the closest stored hash under HASH_MATCH_DISTANCE
+        (ties: metadata order), skipping skins whose HD file is missing."""
+        tree = self.trees.get(character)
+        if tree is None:
+            return None
+        for distance, (_order, skin_id) in sorted(tree.within(phash, HASH_MATCH_DISTANCE - 1)):
+            hd_csp = self.storage_path / character / f"{skin_id}_csp_hd.png"
+            if hd_csp.exists():
+                logger.debug(f"Hash match found: {skin_id} (distance={distance})")
+                return hd_csp
+            logger.warning(f"Hash matched but HD CSP missing: {hd_csp}")
+        return None
+
+
+_hash_index_lock = threading.Lock()
+# metadata.json path -> ((mtime_ns, size), CspHashIndex)
+_hash_indexes: Dict[str, Tuple[Tuple[int, int], CspHashIndex]] = {}
+
+
+def csp_hash_index(storage_path: Path) -> Optional[CspHashIndex]:
+    """The CspHashIndex for a storage folder, or None without a metadata.json.
+    Rebuilt only when metadata.json changes (every CSP update rewrites it), so
+    an export's slots -- looked up concurrently from a thread pool -- share
+    one parse instead of re-reading the vault per slot."""
+    metadata_file = Path(storage_path) / 'metadata.json'
+    try:
+        st = metadata_file.stat()
+    except OSError:
+        logger.debug("No metadata.json found in storage")
+        return None
+    stamp = (st.st_mtime_ns, st.st_size)
+    key = str(metadata_file)
+    with _hash_index_lock:
+        hit = _hash_indexes.get(key)
+        if hit is not None and hit[0] == stamp:
+            return hit[1]
+        with open(metadata_file, 'r') as f:
+            index = CspHashIndex(storage_path, json.load(f))
+        _hash_indexes[key] = (stamp, index)
+        return index
+
+
+def csp_phash(csp_path: str) -> int:
+    """64-bit perceptual hash of a CSP image, as stored in `csp_hash` (hex)."""
+    return int(str(_imagehash.phash(Image.open(csp_path))), 16)
+
 
 def find_hd_csp_by_hash(storage_path: Path, backup_csp_path: str, character: str) -> Optional[Path]:
-    """Module-level twin of TexturePackWatcher._find_hd_csp_by_hash: find an HD
-    CSP in storage whose perceptual hash matches the project's backup CSP. Returns
-    None (no upgrade) if imagehash isn't available."""
+    """Find an HD CSP in storage whose perceptual hash matches the project's
+    backup CSP (shared by the live watcher and the offline/export paths).
+    Returns None (no upgrade) if imagehash isn't available."""
     if _imagehash is None:
         return None
     try:
-        imagehash = _imagehash
-        backup_hash = imagehash.phash(Image.open(backup_csp_path))
-        metadata_file = storage_path / 'metadata.json'
-        if not metadata_file.exists():
+        index = csp_hash_index(storage_path)
+        if index is None:
             return None
-        with open(metadata_file, 'r') as f:
-            metadata = json.load(f)
-        for skin in metadata.get('characters', {}).get(character, {}).get('skins', []):
-            if skin.get('has_hd_csp') and skin.get('csp_hash'):
-                if (backup_hash - imagehash.hex_to_hash(skin['csp_hash'])) < 10:
-                    hd_csp = storage_path / character / f"{skin['id']}_csp_hd.png"
-                    if hd_csp.exists():
-                        return hd_csp
-        return None
+        return index.find(character, csp_phash(backup_csp_path))
     except Exception as e:
         logger.error(f"Error finding HD CSP by hash: {e}", exc_info=True)
         return None
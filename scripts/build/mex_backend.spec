@@ -123,6 +123,7 @@ hiddenimports = [
     'detect_character',
     'validate_costume',
     'dat_processor',
+    'slippi_cache',
 ]
 
 # =============================================================================
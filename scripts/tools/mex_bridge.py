@@ -5,9 +5,13 @@ This module provides a Python interface to MexManager's costume import and ISO e
 functionality through the mexcli command-line interface.
 """
 
+import atexit
+import copy
 import json
 import subprocess
 import os
+import threading
+import time
 from pathlib import Path
 from typing import Dict, List, Optional, Callable
 import logging
@@ -21,6 +25,11 @@ class MexManagerError(Exception):
     pass
 
 
+class MexCommandUnsupportedError(MexManagerError):
+    """The mexcli build does not know this command (an older MexCLI)."""
+    pass
+
+
 def _extract_mexcli_json(stdout: str):
     """Best-effort parse of a MexCLI JSON result from possibly-noisy stdout.
 
@@ -57,6 +66,262 @@ def _extract_mexcli_json(stdout: str):
     return None
 
 
+# `mexcli serve` keeps one MexCLI process (and the loaded project) alive across
+# commands instead of paying .NET startup + a full project parse per call. Set
+# MEX_MEXCLI_SERVE=0 to always spawn one-shot processes.
+SERVE_ENABLED = os.environ.get('MEX_MEXCLI_SERVE', '').strip().lower() not in ('0', 'false', 'no', 'off')
+_SERVE_PROTOCOL = 1
+_SERVE_READY_TIMEOUT = 60.0
+# After a server fails to start (e.g. an older mexcli without `serve`), commands
+# run one-shot for this long before another spawn is attempted.
+_SERVE_BACKOFF_S = 60.0
+_CREATE_NO_WINDOW = 0x08000000
+
+
+class _ServerUnavailable(Exception):
+    """The request never reached a server; running it one-shot is safe."""
+
+
+class MexCliServer:
+    """
+    Client for one long-lived `mexcli serve` process.
+
+    Protocol (see MexCLI Commands/ServeCommand.cs): the server prints
+    {"ready": true, "protocol": 1}, then answers each NDJSON request
+    {"id", "args", "stdin"} with one line {"id", "exitCode", "stdout", "stderr"}
+    -- exactly what a one-shot `mexcli <args...>` would have produced, so the
+    caller parses it the same way. One request is in flight at a time.
+
+    A request that can't be delivered (server won't start, died while idle)
+    raises _ServerUnavailable so the caller can fall back to one-shot. A server
+    that dies or times out AFTER taking a request raises instead: the command
+    may already have saved, so it must not silently run twice.
+    """
+
+    def __init__(self, cli_path: str, cwd: str, lock=None):
+        self.cmd = [str(cli_path), "serve"]
+        self.cwd = str(cwd)
+        self.proc = None
+        self.requests = 0
+        self.restarts = -1
+        self._next_id = 0
+        self._io_lock = threading.Lock()
+        self._lock = lock
+        self._failed_at = None
+        self._timed_out = False
+
+    def alive(self) -> bool:
+        return self.proc is not None and self.proc.poll() is None
+
+    def _spawn(self):
+        if self._failed_at is not None and time.monotonic() - self._failed_at < _SERVE_BACKOFF_S:
+            raise _ServerUnavailable("mexcli serve unavailable (backing off)")
+        flags = _CREATE_NO_WINDOW if os.name == 'nt' else 0
+        try:
+            self.proc = subprocess.Popen(
+                self.cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL, text=True, encoding='utf-8', bufsize=1,
+                cwd=self.cwd, creationflags=flags,
+            )
+            hello = self._read_line(_SERVE_READY_TIMEOUT)
+            if not hello or hello.get('protocol') != _SERVE_PROTOCOL or not hello.get('ready'):
+                raise RuntimeError(f"unexpected greeting: {hello!r}")
+        except Exception as e:
+            self._failed_at = time.monotonic()
+            self._close()
+            logger.warning(f"mexcli serve failed to start, using one-shot MexCLI: {e}")
+            raise _ServerUnavailable(str(e))
+        self._failed_at = None
+        self.restarts += 1
+        logger.info(f"Started mexcli serve (pid {self.proc.pid}) in {self.cwd}")
+
+    def _kill(self):
+        self._timed_out = True
+        try:
+            self.proc.kill()
+        except Exception:
+            pass
+
+    def _read_line(self, timeout: Optional[float]):
+        """Next JSON line from the server, or None if it exited. A `timeout`
+        kills the server (readline would otherwise block forever)."""
+        watchdog = None
+        if timeout:
+            watchdog = threading.Timer(timeout, self._kill)
+            watchdog.daemon = True
+            watchdog.start()
+        try:
+            while True:
+                line = self.proc.stdout.readline()
+                if not line:
+                    return None
+                line = line.strip()
+                if line.startswith('{'):
+                    try:
+                        return json.loads(line)
+                    except json.JSONDecodeError:
+                        pass
+                # ignore any stray non-protocol line
+        finally:
+            if watchdog is not None:
+                watchdog.cancel()
+
+    def request(self, args: List[str], stdin: Optional[str] = None,
+                timeout: Optional[float] = None) -> subprocess.CompletedProcess:
+        """Run one command in the server; returns what subprocess.run would.
+
+        If `lock` is held by another thread (e.g. an ISO export holding the
+        workspace), the request is not queued behind it: it raises
+        _ServerUnavailable and runs one-shot, as it would have without a server.
+        """
+        if self._lock is not None and not self._lock.acquire(blocking=False):
+            raise _ServerUnavailable("project lock busy")
+        try:
+            with self._io_lock:
+                return self._request(args, stdin, timeout)
+        finally:
+            if self._lock is not None:
+                self._lock.release()
+
+    def _request(self, args, stdin, timeout):
+        if not self.alive():
+            self._spawn()
+        self._next_id += 1
+        req_id = self._next_id
+        try:
+            self.proc.stdin.write(json.dumps({'id': req_id, 'args': list(args), 'stdin': stdin}) + "\n")
+            self.proc.stdin.flush()
+        except OSError as e:
+            self._close()
+            raise _ServerUnavailable(f"mexcli serve pipe closed: {e}")
+
+        self._timed_out = False
+        reply = self._read_line(timeout)
+        self.requests += 1
+        if reply is None or reply.get('id') != req_id:
+            timed_out = self._timed_out
+            self._close()
+            if timed_out:
+                raise subprocess.TimeoutExpired(self.cmd + list(args), timeout)
+            raise MexManagerError(f"mexcli serve exited during '{args[0]}'")
+        return subprocess.CompletedProcess(
+            [self.cmd[0]] + list(args), reply.get('exitCode', 1),
+            reply.get('stdout', ''), reply.get('stderr', ''))
+
+    def reset(self):
+        """Drop the server's cached workspace (next command re-parses the project)."""
+        if self.alive():
+            try:
+                self.request(['reset'], timeout=30)
+            except Exception:
+                self.close()
+
+    def close(self):
+        """Stop the server, letting an in-flight command finish first (up to 30s)."""
+        got = self._io_lock.acquire(timeout=30)
+        try:
+            self._close()
+        finally:
+            if got:
+                self._io_lock.release()
+
+    def _close(self):
+        proc, self.proc = self.proc, None
+        if proc is None:
+            return
+        try:
+            if proc.poll() is None:
+                try:
+                    proc.stdin.write(json.dumps({'args': ['quit']}) + "\n")
+                    proc.stdin.flush()
+                except OSError:
+                    pass
+                try:
+                    proc.wait(timeout=5)
+                except subprocess.TimeoutExpired:
+                    proc.kill()
+                    proc.wait(timeout=5)
+        except Exception:
+            pass
+        for stream in (proc.stdin, proc.stdout):
+            try:
+                stream.close()
+            except Exception:
+                pass
+
+
+_servers: Dict[tuple, MexCliServer] = {}
+_servers_lock = threading.Lock()
+
+
+def get_server(cli_path, cwd, lock=None) -> MexCliServer:
+    """The shared server for (cli_path, project dir); created on first use."""
+    key = (str(cli_path), str(cwd))
+    with _servers_lock:
+        server = _servers.get(key)
+        if server is None:
+            server = _servers[key] = MexCliServer(cli_path, cwd, lock=lock)
+        return server
+
+
+def close_server(cli_path, cwd):
+    """Stop the server for one project dir (e.g. a temp copy about to be deleted)."""
+    with _servers_lock:
+        server = _servers.pop((str(cli_path), str(cwd)), None)
+    if server is not None:
+        server.close()
+
+
+def shutdown_servers():
+    """Stop every `mexcli serve` process (project switch, backend exit)."""
+    with _servers_lock:
+        servers = list(_servers.values())
+        _servers.clear()
+    for server in servers:
+        server.close()
+
+
+atexit.register(shutdown_servers)
+
+
+# Costume listings per project: (project path) -> (stamp, {fighter: get-costumes
+# result}). Filled by one `get-all-costumes` call and reused until the project
+# changes: any non-read-only command through the bridge drops it, and the stamp
+# (newest mtime + file count of the .mexproj and data/, what MexCLI loads the
+# project from -- as WorkspaceCache does) catches writes made elsewhere.
+_READ_ONLY_COMMANDS = frozenset({
+    'open', 'info', 'list-fighters', 'get-costumes', 'get-all-costumes',
+    'get-sss-layout', 'get-css-layout', 'get-build',
+})
+_costume_cache: Dict[str, tuple] = {}
+_costume_cache_lock = threading.Lock()
+
+
+def _project_stamp(project_path: Path) -> tuple:
+    try:
+        latest = project_path.stat().st_mtime_ns
+    except OSError:
+        return (0, 0)
+    count = 1
+    for root, _dirs, files in os.walk(project_path.parent / 'data'):
+        for name in files:
+            try:
+                latest = max(latest, os.stat(os.path.join(root, name)).st_mtime_ns)
+            except OSError:
+                continue
+            count += 1
+    return (latest, count)
+
+
+def invalidate_costume_cache(project_path=None):
+    """Forget cached costume listings (one project's, or all of them)."""
+    with _costume_cache_lock:
+        if project_path is None:
+            _costume_cache.clear()
+        else:
+            _costume_cache.pop(str(Path(project_path).resolve()), None)
+
+
 class MexManager:
     """
     Python bridge to MexManager CLI for costume import and ISO export.
@@ -73,16 +338,23 @@ class MexManager:
         mex.export_iso("output/game.iso")
     """
 
-    def __init__(self, cli_path: str, project_path: str):
+    def __init__(self, cli_path: str, project_path: str, lock=None, serve: Optional[bool] = None):
         """
         Initialize MexManager bridge.
 
         Args:
             cli_path: Path to mexcli.exe executable
             project_path: Path to .mexproj project file
+            lock: Optional lock held around each `mexcli serve` request (the
+                backend passes its mexcli_lock so daemon traffic and one-shot
+                workspace writers stay mutually exclusive)
+            serve: Use the shared `mexcli serve` process (default SERVE_ENABLED);
+                False always spawns one-shot processes
         """
         self.cli_path = Path(cli_path).resolve()  # Convert to absolute path
         self.project_path = Path(project_path).resolve()  # Convert to absolute path
+        self.lock = lock
+        self.serve = SERVE_ENABLED if serve is None else serve
 
         if not self.cli_path.exists():
             raise MexManagerError(f"MexCLI executable not found: {self.cli_path}")
@@ -90,6 +362,50 @@ class MexManager:
         if not self.project_path.exists():
             raise MexManagerError(f"MEX project not found: {self.project_path}")
 
+    def close(self):
+        """Stop this project's `mexcli serve` process, if one was started."""
+        close_server(self.cli_path, self.project_path.parent)
+        invalidate_costume_cache(self.project_path)
+
+    def _execute(self, args: List[str], stdin: Optional[str] = None,
+                 timeout: Optional[float] = None) -> subprocess.CompletedProcess:
+        """Run one MexCLI command through the shared `mexcli serve` process,
+        falling back to a one-shot process when the server can't take it.
+        A command that may write the project drops its cached costume
+        listings (before, and again once it has finished)."""
+        if args and args[0] not in _READ_ONLY_COMMANDS:
+            invalidate_costume_cache(self.project_path)
+            try:
+                return self._execute_command(args, stdin, timeout)
+            finally:
+                invalidate_costume_cache(self.project_path)
+        return self._execute_command(args, stdin, timeout)
+
+    def _execute_command(self, args: List[str], stdin: Optional[str],
+                         timeout: Optional[float]) -> subprocess.CompletedProcess:
+        if self.serve:
+            server = get_server(self.cli_path, self.project_path.parent, lock=self.lock)
+            try:
+                return server.request(args, stdin=stdin, timeout=timeout)
+            except _ServerUnavailable:
+                pass
+
+        # Hide CMD window on Windows
+        creation_flags = 0
+        if os.name == 'nt':  # Windows
+            creation_flags = subprocess.CREATE_NO_WINDOW
+
+        return subprocess.run(
+            [str(self.cli_path)] + list(args),
+            capture_output=True,
+            text=True,
+            input=stdin,
+            check=False,
+            cwd=str(self.project_path.parent),
+            creationflags=creation_flags,
+            timeout=timeout
+        )
+
     def _run_command(self, *args) -> Dict:
         """
         Run mexcli command and return parsed JSON output.
@@ -112,24 +428,15 @@ class MexManager:
             # (files/, data/, assets/ directories relative to .mexproj)
             # MexCLI will still find backend resources via AppDomain.CurrentDomain.BaseDirectory
 
-            # Hide CMD window on Windows
-            creation_flags = 0
-            if os.name == 'nt':  # Windows
-                creation_flags = subprocess.CREATE_NO_WINDOW
-
-            result = subprocess.run(
-                cmd,
-                capture_output=True,
-                text=True,
-                check=False,
-                cwd=str(self.project_path.parent),
-                creationflags=creation_flags
-            )
+            result = self._execute(list(args))
 
             logger.debug(f"MexCLI stdout: {result.stdout}")
             logger.debug(f"MexCLI stderr: {result.stderr}")
             logger.debug(f"MexCLI return code: {result.returncode}")
 
+            if result.returncode != 0 and f"Unknown command: {args[0]}" in (result.stderr or ''):
+                raise MexCommandUnsupportedError(f"mexcli does not support '{args[0]}'")
+
             # Try to parse JSON from stdout
             # MexCLI may output progress messages before JSON, so we need to find the JSON
             if result.stdout.strip():
@@ -269,6 +576,52 @@ class MexManager:
                 return fighter
         return None
 
+    def get_all_costumes(self) -> List[Dict]:
+        """
+        Every fighter's costumes, in fighter order, from ONE MexCLI call
+        (get-all-costumes) instead of one get-costumes per fighter. Cached per
+        project until the project changes (see _costume_cache).
+
+        Returns:
+            List of get-costumes results, one per fighter:
+                - fighter: str
+                - fighterInternalId: int
+                - costumeCount: int
+                - costumes: list (index, name, fileName, csp, icon, ...)
+        """
+        key = str(self.project_path)
+        stamp = _project_stamp(self.project_path)
+        with _costume_cache_lock:
+            hit = _costume_cache.get(key)
+        if hit is not None and hit[0] == stamp:
+            return copy.deepcopy(hit[1])
+
+        try:
+            fighters = self._run_command("get-all-costumes", key).get('fighters', [])
+        except MexCommandUnsupportedError as e:
+            # a mexcli built before get-all-costumes: one call per fighter
+            logger.warning(f"get-all-costumes unavailable, listing per fighter: {e}")
+            fighters = [self._run_command("get-costumes", key, str(f['internalId']))
+                        for f in self.list_fighters()]
+        with _costume_cache_lock:
+            _costume_cache[key] = (stamp, fighters)
+        return copy.deepcopy(fighters)
+
+    def get_costumes(self, fighter: str) -> Dict:
+        """
+        One fighter's get-costumes result (name, case-insensitive, or internal
+        id), served from get_all_costumes().
+
+        Raises:
+            MexManagerError: If the fighter is not in the project
+        """
+        fighter = str(fighter)
+        for entry in self.get_all_costumes():
+            if (str(entry.get('fighterInternalId')) == fighter
+                    or entry.get('fighter', '').lower() == fighter.lower()):
+                return {'success': True, **entry}
+        raise MexManagerError(f"MexCLI error: Fighter not found: {fighter}")
+
     def import_costume(self, fighter_name: str, zip_path: str) -> Dict:
         """
         Import costume ZIP file for a character.
@@ -430,6 +783,39 @@ class MexManager:
             str(to_index)
         )
 
+    def reorder_costumes(self, swaps: List[Dict]) -> Dict:
+        """
+        Batch-apply costume swaps, IN ORDER, in a SINGLE workspace Save (vs one
+        recompile per reorder_costume call). Each swap behaves like
+        reorder_costume, Kirby hats and the Ice Climbers pair included.
+
+        Args:
+            swaps: [{"fighter": name_or_id, "from": int, "to": int}, ...]
+
+        Returns:
+            Dict with: success, totalSwapped, totalFailed, perFighter
+        """
+        import tempfile
+        clean = [{"fighter": str(s["fighter"]), "from": int(s["from"]), "to": int(s["to"])}
+                 for s in swaps if int(s["from"]) != int(s["to"])]
+        if not clean:
+            return {"success": True, "totalSwapped": 0, "totalFailed": 0, "perFighter": {}}
+
+        fd, manifest_path = tempfile.mkstemp(suffix=".json", prefix="nucleus_costume_swap_")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(clean, f)
+            return self._run_command(
+                "reorder-costumes",
+                str(self.project_path),
+                manifest_path,
+            )
+        finally:
+            try:
+                os.unlink(manifest_path)
+            except OSError:
+                pass
+
     def save_project(self) -> Dict:
         """
         Save project changes.
@@ -479,6 +865,7 @@ class MexManager:
         """
         cmd = [str(self.cli_path), "export", str(self.project_path), str(output_path),
                str(csp_compression), str(use_color_smash).lower(), str(skip_compression).lower()]
+        invalidate_costume_cache(self.project_path)
 
         try:
             # Run process with streaming output for progress
@@ -535,20 +922,7 @@ class MexManager:
         logger.info(f"Running MexCLI command (with stdin): {' '.join(cmd)}")
 
         try:
-            creation_flags = 0
-            if os.name == 'nt':
-                creation_flags = subprocess.CREATE_NO_WINDOW
-
-            result = subprocess.run(
-                cmd,
-                capture_output=True,
-                text=True,
-                input=stdin_data,
-                check=False,
-                cwd=str(self.project_path.parent),
-                creationflags=creation_flags,
-                timeout=120
-            )
+            result = self._execute(list(args), stdin=stdin_data, timeout=120)
 
             if result.stdout.strip():
                 # Setter commands run workspace.Save(), which prints progress lines
@@ -21,8 +21,9 @@ sys.path.insert(0, str(REPO_ROOT / 'backend'))
 
 POOL = Path('D:/ssbm-backup/uploads/posts')
 
-import mex_api  # noqa: E402  (builds the Flask app at import time)
+import mex_api  # noqa: E402
 
+mex_api.init_app()   # registers the blueprints
 client = mex_api.app.test_client()
 
 PASS, FAIL = [], []
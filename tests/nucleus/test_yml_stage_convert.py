@@ -46,6 +46,7 @@ SAMPLES = [
 import mex_api  # noqa: E402
 from stage_yml_converter import convert_stage_yml_zip  # noqa: E402
 
+mex_api.init_app()
 client = mex_api.app.test_client()
 
 
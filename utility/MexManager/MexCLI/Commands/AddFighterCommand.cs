@@ -375,7 +375,7 @@ namespace MexCLI.Commands
                     return 1;
                 }
 
-                bool success = MexWorkspace.TryOpenWorkspace(projectPath, out MexWorkspace? workspace, out string error, out bool isoMissing);
+                bool success = WorkspaceCache.TryOpen(projectPath, out MexWorkspace? workspace, out string error, out bool isoMissing);
                 if (!success || workspace == null)
                 {
                     Console.WriteLine(JsonSerializer.Serialize(new { success = false, error }, new JsonSerializerOptions { WriteIndented = true }));
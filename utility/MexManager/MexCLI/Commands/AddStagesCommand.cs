@@ -85,7 +85,7 @@ namespace MexCLI.Commands
                 return 1;
             }
 
-            if (!MexWorkspace.TryOpenWorkspace(projectPath, out MexWorkspace? workspace, out string error, out _) || workspace == null)
+            if (!WorkspaceCache.TryOpen(projectPath, out MexWorkspace? workspace, out string error, out _) || workspace == null)
             {
                 Console.WriteLine(JsonSerializer.Serialize(new { success = false, error }));
                 return 1;
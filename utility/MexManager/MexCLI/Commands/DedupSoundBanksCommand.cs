@@ -37,7 +37,7 @@ namespace MexCLI.Commands
                     return Fail("Usage: mexcli dedup-sound-banks <project.mexproj>");
 
                 string projectPath = args[1];
-                bool success = MexWorkspace.TryOpenWorkspace(projectPath, out MexWorkspace? workspace, out string error, out bool isoMissing);
+                bool success = WorkspaceCache.TryOpen(projectPath, out MexWorkspace? workspace, out string error, out bool isoMissing);
                 if (!success || workspace == null)
                     return Fail(error);
 
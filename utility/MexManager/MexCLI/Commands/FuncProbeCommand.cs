@@ -16,7 +16,7 @@ namespace MexCLI.Commands
                 return 1;
             }
 
-            bool success = MexWorkspace.TryOpenWorkspace(args[1], out MexWorkspace? ws, out string error, out bool isoMissing);
+            bool success = WorkspaceCache.TryOpen(args[1], out MexWorkspace? ws, out string error, out bool isoMissing);
             if (!success || ws == null)
             {
                 Console.WriteLine(JsonSerializer.Serialize(new { success = false, error }));
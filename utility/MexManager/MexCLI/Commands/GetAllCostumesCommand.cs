@@ -0,0 +1,82 @@
+using System.Text.Json;
+using mexLib;
+using mexLib.Types;
+
+namespace MexCLI.Commands
+{
+    /// <summary>
+    /// Lists the costumes of EVERY fighter in one call (one project open instead
+    /// of one get-costumes process per fighter). Each entry of "fighters" has the
+    /// same shape as a get-costumes result.
+    /// </summary>
+    public static class GetAllCostumesCommand
+    {
+        public static int Execute(string[] args)
+        {
+            if (args.Length < 2)
+            {
+                Console.Error.WriteLine("Usage: mexcli get-all-costumes <project.mexproj>");
+                return 1;
+            }
+
+            string projectPath = args[1];
+
+            MexWorkspace? workspace;
+            string error;
+            bool isoMissing;
+
+            bool success = WorkspaceCache.TryOpen(projectPath, out workspace, out error, out isoMissing);
+
+            if (!success || workspace == null)
+            {
+                var errorOutput = new
+                {
+                    success = false,
+                    error = error
+                };
+                Console.WriteLine(JsonSerializer.Serialize(errorOutput, new JsonSerializerOptions { WriteIndented = true }));
+                return 1;
+            }
+
+            var fighters = new List<object>();
+            for (int f = 0; f < workspace.Project.Fighters.Count; f++)
+            {
+                MexFighter fighter = workspace.Project.Fighters[f];
+                var costumes = new List<object>();
+                for (int i = 0; i < fighter.Costumes.Count; i++)
+                {
+                    var costume = fighter.Costumes[i];
+                    costumes.Add(new
+                    {
+                        index = i,
+                        name = costume.Name,
+                        fileName = costume.File.FileName,
+                        colorSmashGroup = costume.ColorSmashGroup,
+                        hasCSP = !string.IsNullOrEmpty(costume.CSP),
+                        hasIcon = !string.IsNullOrEmpty(costume.Icon),
+                        csp = costume.CSP,
+                        icon = costume.Icon
+                    });
+                }
+
+                fighters.Add(new
+                {
+                    fighter = fighter.Name,
+                    fighterInternalId = f,
+                    costumeCount = fighter.Costumes.Count,
+                    costumes = costumes
+                });
+            }
+
+            var output = new
+            {
+                success = true,
+                fighterCount = fighters.Count,
+                fighters = fighters
+            };
+
+            Console.WriteLine(JsonSerializer.Serialize(output, new JsonSerializerOptions { WriteIndented = true }));
+            return 0;
+        }
+    }
+}
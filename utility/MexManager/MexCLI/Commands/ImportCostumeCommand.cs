@@ -80,7 +80,7 @@ namespace MexCLI.Commands
             string error;
             bool isoMissing;
 
-            bool success = MexWorkspace.TryOpenWorkspace(projectPath, out workspace, out error, out isoMissing);
+            bool success = WorkspaceCache.TryOpen(projectPath, out workspace, out error, out isoMissing);
 
             if (!success || workspace == null)
             {
@@ -10,20 +10,29 @@ namespace MexCLI.Commands
     // GXTlutFmt.RGB5A3). Used to validate the offline "compute Dolphin's texture
     // filename from the placeholder pixels" route against harvested ground truth.
     //
-    //   mexcli placeholder-bytes <png>
+    //   mexcli placeholder-bytes <png> [<png> ...]
     //
-    // Prints one JSON line: { w, h, imgLen, palLen, usedMin, usedMax, img, pal }
+    // Prints one JSON line per PNG, in argument order:
+    //   { w, h, imgLen, palLen, usedMin, usedMax, img, pal }
     // where img/pal are uppercase hex of the in-.tex ImageData / PaletteData.
+    // Passing many PNGs per call amortizes the process + runtime startup, which
+    // dominates the cost of encoding one 16x16 texture.
     public static class PlaceholderBytesCommand
     {
         public static int Execute(string[] args)
         {
             if (args.Length < 2)
             {
-                Console.Error.WriteLine("usage: placeholder-bytes <png>");
+                Console.Error.WriteLine("usage: placeholder-bytes <png> [<png> ...]");
                 return 1;
             }
-            string pngPath = args[1];
+            for (int i = 1; i < args.Length; i++)
+                Console.WriteLine(Encode(args[i]));
+            return 0;
+        }
+
+        private static string Encode(string pngPath)
+        {
             using FileStream fs = File.OpenRead(pngPath);
             MexImage tex = ImageConverter.FromPNG(fs, 16, 16, GXTexFmt.CI8, GXTlutFmt.RGB5A3);
 
@@ -39,11 +48,10 @@ namespace MexCLI.Commands
 
             string imgHex = Convert.ToHexString(img);
             string palHex = Convert.ToHexString(pal);
-            Console.WriteLine(
+            return
                 $"{{\"w\":{tex.Width},\"h\":{tex.Height},\"imgLen\":{img.Length}," +
                 $"\"palLen\":{pal.Length},\"usedMin\":{usedMin},\"usedMax\":{usedMax}," +
-                $"\"img\":\"{imgHex}\",\"pal\":\"{palHex}\"}}");
-            return 0;
+                $"\"img\":\"{imgHex}\",\"pal\":\"{palHex}\"}}";
         }
     }
 }
@@ -6,6 +6,53 @@ namespace MexCLI.Commands
 {
     public static class ReorderCostumeCommand
     {
+        /// <summary>
+        /// Swap two costumes at already-validated indices, WITHOUT Save(). Shared by
+        /// reorder-costume and the batch reorder-costumes command; keeps Kirby's hat
+        /// tables and the Ice Climbers pair in step, same as the GUI.
+        /// </summary>
+        internal static void SwapCostumesCore(
+            MexWorkspace workspace, MexFighter fighter, int fighterInternalId, int fromIndex, int toIndex)
+        {
+            // Swap costumes (same logic as FighterView.MoveCostume)
+            (fighter.Costumes[fromIndex], fighter.Costumes[toIndex]) = (fighter.Costumes[toIndex], fighter.Costumes[fromIndex]);
+
+            // Special handling for Kirby (fighter index 4) - also reorder Kirby hats
+            if (fighterInternalId == 4)
+            {
+                foreach (MexFighter f in workspace.Project.Fighters)
+                {
+                    if (f.HasKirbyCostumes)
+                    {
+                        (f.KirbyCostumes[fromIndex], f.KirbyCostumes[toIndex]) = (f.KirbyCostumes[toIndex], f.KirbyCostumes[fromIndex]);
+                    }
+                }
+            }
+
+            // Special handling for Ice Climbers - reorder paired fighter's costumes
+            // Ice Climbers (Popo) is at internal index 10, Nana is at index 11.
+            // (Index 9 is Peach -- using it here left Popo's Nana un-reordered so
+            // the pair de-synced, and silently corrupted Nana's order when Peach
+            // was reordered.)
+            if (fighterInternalId == 10 || fighterInternalId == 11)
+            {
+                // Find the paired fighter (if reordering Popo, find Nana; if reordering Nana, find Popo)
+                int pairedFighterId = (fighterInternalId == 10) ? 11 : 10;
+
+                if (pairedFighterId >= 0 && pairedFighterId < workspace.Project.Fighters.Count)
+                {
+                    MexFighter pairedFighter = workspace.Project.Fighters[pairedFighterId];
+
+                    // Only swap if both indices are valid for the paired fighter
+                    if (fromIndex < pairedFighter.Costumes.Count && toIndex < pairedFighter.Costumes.Count)
+                    {
+                        (pairedFighter.Costumes[fromIndex], pairedFighter.Costumes[toIndex]) =
+                            (pairedFighter.Costumes[toIndex], pairedFighter.Costumes[fromIndex]);
+                    }
+                }
+            }
+        }
+
         public static int Execute(string[] args)
         {
             if (args.Length < 5)
@@ -47,7 +94,7 @@ namespace MexCLI.Commands
             string error;
             bool isoMissing;
 
-            bool success = MexWorkspace.TryOpenWorkspace(projectPath, out workspace, out error, out isoMissing);
+            bool success = WorkspaceCache.TryOpen(projectPath, out workspace, out error, out isoMissing);
 
             if (!success || workspace == null)
             {
@@ -138,43 +185,7 @@ namespace MexCLI.Commands
             // Reorder costumes
             try
             {
-                // Swap costumes (same logic as FighterView.MoveCostume)
-                (fighter.Costumes[fromIndex], fighter.Costumes[toIndex]) = (fighter.Costumes[toIndex], fighter.Costumes[fromIndex]);
-
-                // Special handling for Kirby (fighter index 4) - also reorder Kirby hats
-                if (fighterInternalId == 4)
-                {
-                    foreach (MexFighter f in workspace.Project.Fighters)
-                    {
-                        if (f.HasKirbyCostumes)
-                        {
-                            (f.KirbyCostumes[fromIndex], f.KirbyCostumes[toIndex]) = (f.KirbyCostumes[toIndex], f.KirbyCostumes[fromIndex]);
-                        }
-                    }
-                }
-
-                // Special handling for Ice Climbers - reorder paired fighter's costumes
-                // Ice Climbers (Popo) is at internal index 10, Nana is at index 11.
-                // (Index 9 is Peach -- using it here left Popo's Nana un-reordered so
-                // the pair de-synced, and silently corrupted Nana's order when Peach
-                // was reordered.)
-                if (fighterInternalId == 10 || fighterInternalId == 11)
-                {
-                    // Find the paired fighter (if reordering Popo, find Nana; if reordering Nana, find Popo)
-                    int pairedFighterId = (fighterInternalId == 10) ? 11 : 10;
-
-                    if (pairedFighterId >= 0 && pairedFighterId < workspace.Project.Fighters.Count)
-                    {
-                        MexFighter pairedFighter = workspace.Project.Fighters[pairedFighterId];
-
-                        // Only swap if both indices are valid for the paired fighter
-                        if (fromIndex < pairedFighter.Costumes.Count && toIndex < pairedFighter.Costumes.Count)
-                        {
-                            (pairedFighter.Costumes[fromIndex], pairedFighter.Costumes[toIndex]) =
-                                (pairedFighter.Costumes[toIndex], pairedFighter.Costumes[fromIndex]);
-                        }
-                    }
-                }
+                SwapCostumesCore(workspace, fighter, fighterInternalId, fromIndex, toIndex);
 
                 // Save the workspace
                 workspace.Save(null);
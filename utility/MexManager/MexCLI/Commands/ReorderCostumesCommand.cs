@@ -0,0 +1,107 @@
+using System.Text.Json;
+using System.Text.Json.Serialization;
+using mexLib;
+using mexLib.Types;
+
+namespace MexCLI.Commands
+{
+    /// <summary>
+    /// BATCH costume reorder. Opens the workspace ONCE, applies a list of costume
+    /// swaps (across one or more fighters) IN ORDER, then Saves ONCE -- a drag
+    /// across ten tiles is ten adjacent swaps, and reorder-costume would pay the
+    /// full recompile for every one of them.
+    ///
+    /// Each swap behaves exactly like reorder-costume (Kirby hats and the Ice
+    /// Climbers pair follow along), so the result matches N sequential calls.
+    /// Out-of-range swaps are skipped and counted in totalFailed.
+    ///
+    /// Usage: mexcli reorder-costumes &lt;project.mexproj&gt; &lt;manifest.json&gt;
+    ///   manifest.json: [ {"fighter": "Fox", "from": 2, "to": 1}, ... ]
+    ///   (fighter is a name or internal-id)
+    /// </summary>
+    public static class ReorderCostumesCommand
+    {
+        private sealed class Swap
+        {
+            [JsonPropertyName("fighter")] public string? Fighter { get; set; }
+            [JsonPropertyName("from")] public int From { get; set; }
+            [JsonPropertyName("to")] public int To { get; set; }
+        }
+
+        public static int Execute(string[] args)
+        {
+            if (args.Length < 3)
+            {
+                Console.Error.WriteLine("Usage: mexcli reorder-costumes <project.mexproj> <manifest.json>");
+                return 1;
+            }
+            string projectPath = args[1];
+            string manifestPath = args[2];
+
+            if (!File.Exists(manifestPath))
+            {
+                Console.WriteLine(JsonSerializer.Serialize(new { success = false, error = $"Manifest not found: {manifestPath}" }));
+                return 1;
+            }
+
+            List<Swap>? swaps;
+            try
+            {
+                swaps = JsonSerializer.Deserialize<List<Swap>>(File.ReadAllText(manifestPath));
+            }
+            catch (Exception ex)
+            {
+                Console.WriteLine(JsonSerializer.Serialize(new { success = false, error = $"Bad manifest: {ex.Message}" }));
+                return 1;
+            }
+            if (swaps == null || swaps.Count == 0)
+            {
+                Console.WriteLine(JsonSerializer.Serialize(new { success = false, error = "Empty manifest" }));
+                return 1;
+            }
+
+            if (!WorkspaceCache.TryOpen(projectPath, out MexWorkspace? workspace, out string error, out _) || workspace == null)
+            {
+                Console.WriteLine(JsonSerializer.Serialize(new { success = false, error }));
+                return 1;
+            }
+
+            var perFighter = new Dictionary<string, (int swapped, int failed)>();
+            int totalSwapped = 0, totalFailed = 0;
+
+            foreach (Swap swap in swaps)
+            {
+                string key = swap.Fighter ?? "";
+                var (fighter, internalId) = RemoveCostumeCommand.FindFighter(workspace, key);
+                string name = fighter?.Name ?? key;
+                perFighter.TryGetValue(name, out var counts);
+
+                if (fighter == null ||
+                    swap.From < 0 || swap.From >= fighter.Costumes.Count ||
+                    swap.To < 0 || swap.To >= fighter.Costumes.Count)
+                {
+                    counts.failed++; totalFailed++;
+                }
+                else if (swap.From != swap.To)
+                {
+                    ReorderCostumeCommand.SwapCostumesCore(workspace, fighter, internalId, swap.From, swap.To);
+                    counts.swapped++; totalSwapped++;
+                }
+                perFighter[name] = counts;
+            }
+
+            // The single, amortized full recompile + write for the WHOLE batch.
+            if (totalSwapped > 0)
+                workspace.Save(null);
+
+            Console.WriteLine(JsonSerializer.Serialize(new
+            {
+                success = true,
+                totalSwapped,
+                totalFailed,
+                perFighter = perFighter.ToDictionary(kv => kv.Key, kv => new { swapped = kv.Value.swapped, failed = kv.Value.failed }),
+            }, new JsonSerializerOptions { WriteIndented = true }));
+            return 0;
+        }
+    }
+}
@@ -0,0 +1,113 @@
+using System.Text.Json;
+using System.Text.Json.Serialization;
+
+namespace MexCLI.Commands
+{
+    // Long-lived MexCLI: one process (and one loaded project, see
+    // WorkspaceCache) answers command after command, so interactive edits don't
+    // pay .NET startup + a full project parse every time.
+    //
+    //   mexcli serve
+    //
+    // Prints {"ready":true,"protocol":1}, then reads one JSON request per line:
+    //   {"id": 7, "args": ["reorder-costume", "<project>", "Fox", "2", "0"], "stdin": "..."}
+    // runs args exactly like a one-shot `mexcli <args...>` (stdin, when given,
+    // is what the command reads from Console.In) and answers with one line:
+    //   {"id": 7, "exitCode": 0, "stdout": "...", "stderr": "..."}
+    // "reset" drops the cached workspace; "quit" (or closing stdin) exits.
+    public static class ServeCommand
+    {
+        public const int Protocol = 1;
+
+        private sealed class Request
+        {
+            [JsonPropertyName("id")] public long? Id { get; set; }
+            [JsonPropertyName("args")] public string[]? Args { get; set; }
+            [JsonPropertyName("stdin")] public string? Stdin { get; set; }
+        }
+
+        public static int Execute(Func<string[], int> dispatch)
+        {
+            TextWriter realOut = Console.Out;
+            TextWriter realErr = Console.Error;
+            TextReader realIn = Console.In;
+
+            WorkspaceCache.Enabled = true;
+            Respond(realOut, new { ready = true, protocol = Protocol });
+
+            string? line;
+            while ((line = realIn.ReadLine()) != null)
+            {
+                if (string.IsNullOrWhiteSpace(line))
+                    continue;
+
+                Request? request;
+                try
+                {
+                    request = JsonSerializer.Deserialize<Request>(line);
+                }
+                catch (JsonException ex)
+                {
+                    Respond(realOut, new { id = (long?)null, exitCode = 1, stdout = "", stderr = $"Bad request: {ex.Message}" });
+                    continue;
+                }
+
+                if (request?.Args == null || request.Args.Length == 0)
+                {
+                    Respond(realOut, new { id = request?.Id, exitCode = 1, stdout = "", stderr = "Request has no args" });
+                    continue;
+                }
+
+                string command = request.Args[0].ToLower();
+                if (command == "quit")
+                {
+                    Respond(realOut, new { id = request.Id, exitCode = 0, stdout = "", stderr = "" });
+                    return 0;
+                }
+                if (command == "reset")
+                {
+                    WorkspaceCache.Clear();
+                    Respond(realOut, new { id = request.Id, exitCode = 0, stdout = "", stderr = "" });
+                    continue;
+                }
+
+                var stdout = new StringWriter();
+                var stderr = new StringWriter();
+                int exitCode;
+                Console.SetOut(stdout);
+                Console.SetError(stderr);
+                Console.SetIn(new StringReader(request.Stdin ?? ""));
+                try
+                {
+                    exitCode = command == "serve" ? 1 : dispatch(request.Args);
+                }
+                catch (Exception ex)
+                {
+                    stderr.WriteLine(JsonSerializer.Serialize(new { success = false, error = ex.Message, stackTrace = ex.StackTrace },
+                        new JsonSerializerOptions { WriteIndented = true }));
+                    exitCode = 1;
+                }
+                finally
+                {
+                    Console.SetOut(realOut);
+                    Console.SetError(realErr);
+                    Console.SetIn(realIn);
+                }
+
+                if (exitCode == 0)
+                    WorkspaceCache.Touch();
+                else
+                    WorkspaceCache.Clear();
+
+                Respond(realOut, new { id = request.Id, exitCode, stdout = stdout.ToString(), stderr = stderr.ToString() });
+            }
+            return 0;
+        }
+
+        private static void Respond(TextWriter output, object response)
+        {
+            output.WriteLine(JsonSerializer.Serialize(response));
+            output.Flush();
+        }
+    }
+}
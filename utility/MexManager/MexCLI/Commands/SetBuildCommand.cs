@@ -28,7 +28,7 @@ namespace MexCLI.Commands
 
             string projectPath = args[1];
 
-            bool success = MexWorkspace.TryOpenWorkspace(projectPath, out MexWorkspace? workspace, out string error, out bool isoMissing);
+            bool success = WorkspaceCache.TryOpen(projectPath, out MexWorkspace? workspace, out string error, out bool isoMissing);
 
             if (!success || workspace == null)
             {
@@ -140,7 +140,7 @@ namespace MexCLI.Commands
                 if (!System.IO.File.Exists(wavPath))
                     return Fail($"WAV not found: {wavPath}");
 
-                bool success = MexWorkspace.TryOpenWorkspace(projectPath, out MexWorkspace? workspace, out string error, out bool isoMissing);
+                bool success = WorkspaceCache.TryOpen(projectPath, out MexWorkspace? workspace, out string error, out bool isoMissing);
                 if (!success || workspace == null)
                     return Fail(error);
 
@@ -32,7 +32,7 @@ namespace MexCLI.Commands
                 if (!int.TryParse(args[3], out int announcerCall))
                     return Fail($"Invalid announcerCall: {args[3]}");
 
-                bool success = MexWorkspace.TryOpenWorkspace(projectPath, out MexWorkspace? workspace, out string error, out bool isoMissing);
+                bool success = WorkspaceCache.TryOpen(projectPath, out MexWorkspace? workspace, out string error, out bool isoMissing);
                 if (!success || workspace == null)
                     return Fail(error);
 
@@ -0,0 +1,85 @@
+using mexLib;
+
+namespace MexCLI.Commands
+{
+    // Every command opens its project through here instead of calling
+    // MexWorkspace.TryOpenWorkspace directly. One-shot runs just pass through;
+    // under `mexcli serve` the last opened workspace is kept and handed to the
+    // next command for the same project, so the project JSON is parsed once per
+    // session instead of once per command.
+    //
+    // The cached workspace is dropped when a command fails (it may have been
+    // left half-edited) and is reopened when the .mexproj or anything under
+    // data/ was written by someone else since -- a one-shot mexcli, or the app
+    // editing project JSON directly.
+    public static class WorkspaceCache
+    {
+        public static bool Enabled { get; set; }
+
+        private static string? _path;
+        private static MexWorkspace? _workspace;
+        private static (long, int) _stamp;
+
+        public static bool TryOpen(string projectFilePath, out MexWorkspace? workspace, out string error, out bool isomissing)
+        {
+            if (!Enabled)
+                return MexWorkspace.TryOpenWorkspace(projectFilePath, out workspace, out error, out isomissing);
+
+            string fullPath = Path.GetFullPath(projectFilePath);
+            if (_workspace != null && _path == fullPath && Stamp(fullPath) == _stamp)
+            {
+                workspace = _workspace;
+                error = "";
+                isomissing = false;
+                return true;
+            }
+
+            Clear();
+            if (!MexWorkspace.TryOpenWorkspace(projectFilePath, out workspace, out error, out isomissing) || workspace == null)
+                return false;
+
+            _path = fullPath;
+            _workspace = workspace;
+            _stamp = Stamp(fullPath);
+            return true;
+        }
+
+        // Called after a successful command: its own saves are not outside edits.
+        public static void Touch()
+        {
+            if (_workspace != null && _path != null)
+            {
+                _workspace.FileManager.Clear();
+                _stamp = Stamp(_path);
+            }
+        }
+
+        public static void Clear()
+        {
+            _path = null;
+            _workspace = null;
+            _stamp = default;
+        }
+
+        // Newest write time + file count of the .mexproj and data/ -- what
+        // MexProject.LoadFromFile reads (the count catches deletions).
+        private static (long, int) Stamp(string projectFilePath)
+        {
+            if (!File.Exists(projectFilePath))
+                return default;
+
+            long latest = File.GetLastWriteTimeUtc(projectFilePath).Ticks;
+            int count = 1;
+            string dataPath = Path.Combine(Path.GetDirectoryName(projectFilePath) ?? "", "data");
+            if (Directory.Exists(dataPath))
+            {
+                foreach (string file in Directory.EnumerateFiles(dataPath, "*", SearchOption.AllDirectories))
+                {
+                    latest = Math.Max(latest, File.GetLastWriteTimeUtc(file).Ticks);
+                    count++;
+                }
+            }
+            return (latest, count);
+        }
+    }
+}
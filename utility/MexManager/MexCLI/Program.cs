@@ -16,122 +16,10 @@ namespace MexCLI
                     return 1;
                 }
 
-                string command = args[0].ToLower();
+                if (args[0].ToLower() == "serve")
+                    return Commands.ServeCommand.Execute(Dispatch);
 
-                switch (command)
-                {
-                    case "create":
-                        return Commands.CreateCommand.Execute(args);
-                    case "import-iso":
-                        return Commands.ImportIsoCommand.Execute(args);
-                    case "open":
-                        return Commands.OpenCommand.Execute(args);
-                    case "list-fighters":
-                        return Commands.ListFightersCommand.Execute(args);
-                    case "func-probe":
-                        return Commands.FuncProbeCommand.Execute(args);
-                    case "detect-outline":
-                        return Commands.DetectOutlineCommand.Execute(args);
-                    case "convert-outline":
-                        return Commands.ConvertOutlineCommand.Execute(args);
-                    case "copy-root":
-                        return Commands.CopyRootCommand.Execute(args);
-                    case "get-costumes":
-                        return Commands.GetFighterCostumesCommand.Execute(args);
-                    case "import-costume":
-                        return Commands.ImportCostumeCommand.Execute(args);
-                    case "import-costumes":
-                        return Commands.ImportCostumesCommand.Execute(args);
-                    case "remove-costume":
-                        return Commands.RemoveCostumeCommand.Execute(args);
-                    case "remove-costumes":
-                        return Commands.RemoveCostumesCommand.Execute(args);
-                    case "reorder-costume":
-                        return Commands.ReorderCostumeCommand.Execute(args);
-                    case "save":
-                        return Commands.SaveCommand.Execute(args);
-                    case "export":
-                        return Commands.ExportCommand.Execute(args);
-                    case "recompile-csps":
-                        return Commands.RecompileCommand.Execute(args);
-                    case "info":
-                        return Commands.InfoCommand.Execute(args);
-                    case "get-build":
-                        return Commands.GetBuildCommand.Execute(args);
-                    case "set-build":
-                        return Commands.SetBuildCommand.Execute(args);
-                    case "set-css-icon":
-                        return Commands.SetCSSIconCommand.Execute(args);
-                    case "add-code":
-                        return Commands.AddCodeCommand.Execute(args);
-                    case "get-sss-layout":
-                        return Commands.GetSssLayoutCommand.Execute(args);
-                    case "set-sss-layout":
-                        return Commands.SetSssLayoutCommand.Execute(args);
-                    case "get-css-layout":
-                        return Commands.GetCssLayoutCommand.Execute(args);
-                    case "set-css-layout":
-                        return Commands.SetCssLayoutCommand.Execute(args);
-                    case "export-fighter":
-                        return Commands.ExportFighterCommand.Execute(args);
-                    case "export-stage":
-                        return Commands.ExportStageCommand.Execute(args);
-                    case "add-fighter":
-                        return Commands.AddFighterCommand.Execute(args);
-                    case "add-fighters":
-                        return Commands.AddFightersCommand.Execute(args);
-                    case "add-series":
-                        return Commands.AddSeriesCommand.Execute(args);
-                    case "add-music":
-                        return Commands.AddMusicCommand.Execute(args);
-                    case "set-fighter-music":
-                        return Commands.SetFighterMusicCommand.Execute(args);
-                    case "set-fighter-announcer":
-                        return Commands.SetFighterAnnouncerCommand.Execute(args);
-                    case "set-fighter-announcer-id":
-                        return Commands.SetFighterAnnouncerIdCommand.Execute(args);
-                    case "dedup-sound-banks":
-                        return Commands.DedupSoundBanksCommand.Execute(args);
-                    case "set-stage-playlist":
-                        return Commands.SetStagePlaylistCommand.Execute(args);
-                    case "hps-to-wav":
-                        return Commands.AudioCommands.HpsToWav(args);
-                    case "ssm-info":
-                        return Commands.AudioCommands.SsmInfo(args);
-                    case "ssm-to-wav":
-                        return Commands.AudioCommands.SsmToWav(args);
-                    case "ssm-replace":
-                        return Commands.AudioCommands.SsmReplace(args);
-                    case "ssm-copy":
-                        return Commands.AudioCommands.SsmCopy(args);
-                    case "audio-to-hps":
-                        return Commands.AudioCommands.AudioToHps(args);
-                    case "sem-resolve":
-                        return Commands.AudioCommands.SemResolve(args);
-                    case "import-ssm":
-                        return Commands.ImportSsmCommand.Execute(args);
-                    case "remove-fighter":
-                        return Commands.RemoveFighterCommand.Execute(args);
-                    case "add-stage":
-                        return Commands.AddStageCommand.Execute(args);
-                    case "add-stages":
-                        return Commands.AddStagesCommand.Execute(args);
-                    case "placeholder-bytes":
-                        return Commands.PlaceholderBytesCommand.Execute(args);
-                    case "remove-stage":
-                        return Commands.RemoveStageCommand.Execute(args);
-                    case "remove-stages":
-                        return Commands.RemoveStagesCommand.Execute(args);
-                    case "help":
-                    case "--help":
-                    case "-h":
-                        PrintUsage();
-                        return 0;
-                    default:
-                        Console.Error.WriteLine($"Unknown command: {command}");
-                        PrintUsage();
-                        return 1;
-                }
+                return Dispatch(args);
             }
             catch (Exception ex)
             {
@@ -146,6 +34,131 @@ namespace MexCLI
             }
         }
 
+        // Runs one command; shared by one-shot runs and `mexcli serve` requests.
+        static int Dispatch(string[] args)
+        {
+            string command = args[0].ToLower();
+
+            switch (command)
+            {
+                case "create":
+                    return Commands.CreateCommand.Execute(args);
+                case "import-iso":
+                    return Commands.ImportIsoCommand.Execute(args);
+                case "open":
+                    return Commands.OpenCommand.Execute(args);
+                case "list-fighters":
+                    return Commands.ListFightersCommand.Execute(args);
+                case "func-probe":
+                    return Commands.FuncProbeCommand.Execute(args);
+                case "detect-outline":
+                    return Commands.DetectOutlineCommand.Execute(args);
+                case "convert-outline":
+                    return Commands.ConvertOutlineCommand.Execute(args);
+                case "copy-root":
+                    return Commands.CopyRootCommand.Execute(args);
+                case "get-costumes":
+                    return Commands.GetFighterCostumesCommand.Execute(args);
+                case "get-all-costumes":
+                    return Commands.GetAllCostumesCommand.Execute(args);
+                case "import-costume":
+                    return Commands.ImportCostumeCommand.Execute(args);
+                case "import-costumes":
+                    return Commands.ImportCostumesCommand.Execute(args);
+                case "remove-costume":
+                    return Commands.RemoveCostumeCommand.Execute(args);
+                case "remove-costumes":
+                    return Commands.RemoveCostumesCommand.Execute(args);
+                case "reorder-costume":
+                    return Commands.ReorderCostumeCommand.Execute(args);
+                case "reorder-costumes":
+                    return Commands.ReorderCostumesCommand.Execute(args);
+                case "save":
+                    return Commands.SaveCommand.Execute(args);
+                case "export":
+                    return Commands.ExportCommand.Execute(args);
+                case "recompile-csps":
+                    return Commands.RecompileCommand.Execute(args);
+                case "info":
+                    return Commands.InfoCommand.Execute(args);
+                case "get-build":
+                    return Commands.GetBuildCommand.Execute(args);
+                case "set-build":
+                    return Commands.SetBuildCommand.Execute(args);
+                case "set-css-icon":
+                    return Commands.SetCSSIconCommand.Execute(args);
+                case "add-code":
+                    return Commands.AddCodeCommand.Execute(args);
+                case "get-sss-layout":
+                    return Commands.GetSssLayoutCommand.Execute(args);
+                case "set-sss-layout":
+                    return Commands.SetSssLayoutCommand.Execute(args);
+                case "get-css-layout":
+                    return Commands.GetCssLayoutCommand.Execute(args);
+                case "set-css-layout":
+                    return Commands.SetCssLayoutCommand.Execute(args);
+                case "export-fighter":
+                    return Commands.ExportFighterCommand.Execute(args);
+                case "export-stage":
+                    return Commands.ExportStageCommand.Execute(args);
+                case "add-fighter":
+                    return Commands.AddFighterCommand.Execute(args);
+                case "add-fighters":
+                    return Commands.AddFightersCommand.Execute(args);
+                case "add-series":
+                    return Commands.AddSeriesCommand.Execute(args);
+                case "add-music":
+                    return Commands.AddMusicCommand.Execute(args);
+                case "set-fighter-music":
+                    return Commands.SetFighterMusicCommand.Execute(args);
+                case "set-fighter-announcer":
+                    return Commands.SetFighterAnnouncerCommand.Execute(args);
+                case "set-fighter-announcer-id":
+                    return Commands.SetFighterAnnouncerIdCommand.Execute(args);
+                case "dedup-sound-banks":
+                    return Commands.DedupSoundBanksCommand.Execute(args);
+                case "set-stage-playlist":
+                    return Commands.SetStagePlaylistCommand.Execute(args);
+                case "hps-to-wav":
+                    return Commands.AudioCommands.HpsToWav(args);
+                case "ssm-info":
+                    return Commands.AudioCommands.SsmInfo(args);
+                case "ssm-to-wav":
+                    return Commands.AudioCommands.SsmToWav(args);
+                case "ssm-replace":
+                    return Commands.AudioCommands.SsmReplace(args);
+                case "ssm-copy":
+                    return Commands.AudioCommands.SsmCopy(args);
+                case "audio-to-hps":
+                    return Commands.AudioCommands.AudioToHps(args);
+                case "sem-resolve":
+                    return Commands.AudioCommands.SemResolve(args);
+                case "import-ssm":
+                    return Commands.ImportSsmCommand.Execute(args);
+                case "remove-fighter":
+                    return Commands.RemoveFighterCommand.Execute(args);
+                case "add-stage":
+                    return Commands.AddStageCommand.Execute(args);
+                case "add-stages":
+                    return Commands.AddStagesCommand.Execute(args);
+                case "placeholder-bytes":
+                    return Commands.PlaceholderBytesCommand.Execute(args);
+                case "remove-stage":
+                    return Commands.RemoveStageCommand.Execute(args);
+                case "remove-stages":
+                    return Commands.RemoveStagesCommand.Execute(args);
+                case "help":
+                case "--help":
+                case "-h":
+                    PrintUsage();
+                    return 0;
+                default:
+                    Console.Error.WriteLine($"Unknown command: {command}");
+                    PrintUsage();
+                    return 1;
+            }
+        }
+
         static void PrintUsage()
         {
             Console.WriteLine("MexCLI - Command-line interface for MexManager");
@@ -159,6 +172,7 @@ namespace MexCLI
             Console.WriteLine("  open <project.mexproj>                     - Open and validate project");
             Console.WriteLine("  list-fighters <project.mexproj>            - List all fighters");
             Console.WriteLine("  get-costumes <project> <fighter>           - Get costumes for fighter");
+            Console.WriteLine("  get-all-costumes <project.mexproj>         - Get costumes for every fighter (one call)");
             Console.WriteLine("  import-costume <project> <fighter> <zip>   - Import costume ZIP");
             Console.WriteLine("  import-costumes <project> <manifest.json>  - Batch-import costumes (one Save; ~Nx faster)");
             Console.WriteLine("  add-fighters <project> <manifest.json>     - Batch-add custom fighters (one Save; ~Nx faster)");
@@ -167,6 +181,7 @@ namespace MexCLI
             Console.WriteLine("  remove-costumes <project> <manifest.json>  - Batch-remove costumes (one Save; ~Nx faster)");
             Console.WriteLine("  remove-stages <project> <manifest.json>    - Batch-remove custom stages (one Save; ~Nx faster)");
             Console.WriteLine("  reorder-costume <project> <fighter> <from> <to> - Reorder costume");
+            Console.WriteLine("  reorder-costumes <project> <manifest.json> - Batch-apply costume swaps in order (one Save)");
             Console.WriteLine("  save <project.mexproj>                     - Save project changes");
             Console.WriteLine("  export <project.mexproj> <output.iso>      - Export ISO");
             Console.WriteLine("  recompile-csps <project.mexproj>           - Recompile CSPs from PNG sources");
@@ -176,6 +191,7 @@ namespace MexCLI
             Console.WriteLine("  add-code <project> <name> <hex_source>     - Add a Gecko code to project");
             Console.WriteLine("  get-sss-layout <project.mexproj>           - Get SSS layout data as JSON");
             Console.WriteLine("  set-sss-layout <project.mexproj>           - Set SSS layout (reads JSON from stdin)");
+            Console.WriteLine("  serve                                      - Keep running; one JSON request per stdin line");
             Console.WriteLine("  help                                       - Show this help message");
         }
     }
@@ -84,7 +84,7 @@ def main():
     ap.add_argument("--update-goldens", action="store_true")
     ap.add_argument("--exe", help="HSDRawViewer build dir (with HSDRawViewer.exe)")
     ap.add_argument("--pool", type=int, default=0, metavar="N",
-                    help="render via a CspRenderPool of N persistent --csp-server "
+                    help="render via a CspRenderService of N persistent --csp-server "
                          "workers (validates the pooled batch path == one-shot)")
     args = ap.parse_args()
     if args.exe:
@@ -96,10 +96,10 @@ def main():
     pool = None
     if args.pool:
         sys.path.insert(0, os.path.join(HERE, "..", "..", "..", "..", "backend"))
-        from skinlab.csp_pool import CspRenderPool
-        pool = CspRenderPool(generate_csp.HSDRAW_EXE, workers=args.pool)
+        from skinlab.csp_pool import CspRenderService
+        pool = CspRenderService(generate_csp.HSDRAW_EXE, max_workers=args.pool)
         generate_csp.set_active_pool(pool)
-        print(f"[pool] rendering via {pool.size} persistent --csp-server worker(s)")
+        print(f"[pool] rendering via up to {pool.max_workers} persistent --csp-server worker(s)")
 
     passed = failed = warned = 0
     for name, spec in MANIFEST.items():
@@ -9,9 +9,17 @@ import os
 import sys
 
 class DATParser:
-    def __init__(self, filepath):
-        self.filepath = filepath
-        self.data = None
+    def __init__(self, source, name=None):
+        """`source` is a DAT path, or the DAT's bytes (bytes, bytearray or
+        memoryview) when it is already in memory -- e.g. an archive member --
+        so callers don't have to round-trip it through a temp file. `name`
+        stands in for the filename in the color fallback for in-memory DATs."""
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            self.filepath = name or ''
+            self.data = source
+        else:
+            self.filepath = source
+            self.data = None
         self.file_size = 0
         self.data_block_size = 0
         self.relocation_table_count = 0
@@ -21,8 +29,10 @@ class DATParser:
         
     def read_dat(self):
         """Read and parse a DAT file to extract character information"""
-        with open(self.filepath, 'rb') as f:
-            self.data = f.read()
+        if self.data is None:
+            with open(self.filepath, 'rb') as f:
+                self.data = f.read()
+        view = memoryview(self.data)
             
         # DAT file header structure:
         # 0x00: File Size
@@ -36,27 +46,25 @@ class DATParser:
         # 0x20: Start of data
         
         # Read header
-        self.file_size = struct.unpack('>I', self.data[0x00:0x04])[0]
-        self.data_block_size = struct.unpack('>I', self.data[0x04:0x08])[0]
-        self.relocation_table_count = struct.unpack('>I', self.data[0x08:0x0C])[0]
-        self.root_count = struct.unpack('>I', self.data[0x0C:0x10])[0]
+        (self.file_size, self.data_block_size,
+         self.relocation_table_count, self.root_count) = struct.unpack_from('>4I', view, 0)
         
         # Calculate offsets
         data_start = 0x20
         relocation_table_start = data_start + self.data_block_size
         root_node_table_start = relocation_table_start + (self.relocation_table_count * 4)
         string_table_start = root_node_table_start + (self.root_count * 8)
+        # Only the (small) string table is copied out; the rest is read in place.
+        self.string_table = bytes(view[string_table_start:])
         
         # Read root nodes (each is 8 bytes: 4 bytes offset + 4 bytes string offset)
         for i in range(self.root_count):
             offset = root_node_table_start + (i * 8)
-            data_offset = struct.unpack('>I', self.data[offset:offset+4])[0]
-            string_offset = struct.unpack('>I', self.data[offset+4:offset+8])[0]
+            data_offset, string_offset = struct.unpack_from('>II', view, offset)
             
             # Read string from string table
-            string_addr = string_table_start + string_offset
-            string_end = self.data.find(b'\x00', string_addr)
-            symbol_name = self.data[string_addr:string_end].decode('ascii', errors='ignore')
+            string_end = self.string_table.find(b'\x00', string_offset)
+            symbol_name = self.string_table[string_offset:string_end].decode('ascii', errors='ignore')
             
             self.root_nodes.append({
                 'data_offset': data_offset,
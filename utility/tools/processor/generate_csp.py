@@ -55,18 +55,19 @@ def _resolve_hsdraw_dir() -> str:
 HSDRAW_PATH = _resolve_hsdraw_dir()
 HSDRAW_EXE = os.path.join(HSDRAW_PATH, "HSDRawViewer.exe")
 
-# Optional persistent-render pool (backend/skinlab/csp_pool.CspRenderPool). When a
-# batch caller (iso_scanner, texture-pack export) sets this, generate_single_csp_
-# internal routes its render through a reused --csp-server worker instead of
-# spawning a one-shot process, paying process/GL startup once per worker rather
-# than once per costume. Left None for one-off renders (Retake CSP etc.). A pool
-# failure on any single job silently falls back to the one-shot path.
+# Optional persistent-render pool (backend/skinlab/csp_pool.CspRenderService).
+# The backend installs its shared service here at startup (or on the first batch),
+# and generate_single_csp_internal then routes renders through a reused
+# --csp-server worker instead of spawning a one-shot process, paying process/GL
+# startup once per worker rather than once per costume. None when the service is
+# disabled (MEX_CSP_SERVER=0) or outside the backend. A pool failure on any
+# single job silently falls back to the one-shot path.
 _active_pool = None
 
 
 def set_active_pool(pool):
-    """Install (or clear, with None) the process-wide CSP render pool. Batch
-    callers set it around their render loop and clear it in a finally."""
+    """Install (or clear, with None) the process-wide CSP render pool (see
+    skinlab.csp_pool.get_service / shutdown_service)."""
     global _active_pool
     _active_pool = pool
 
@@ -1601,11 +1602,11 @@ def generate_single_csp_internal(dat_filepath, character, anim_file=None, camera
     # the "no_output / return code 3762504530" pattern that shows up under
     # iso_scanner's parallel ThreadPoolExecutor. Force the cwd to the DAT's
     # own folder so each parallel call isolates its debug log.
-    # Fast path: a reused --csp-server worker from the active pool (set by a batch
-    # caller). cmd is [exe, "--csp", dat, output, ...] (or ["wine", exe, ...] on
-    # Linux); the worker wants the argv from "--csp" onward. A failure on this one
-    # costume falls through to the one-shot path below, so a flaky worker or a bad
-    # DAT never blocks the batch.
+    # Fast path: a reused --csp-server worker from the active pool (the backend's
+    # shared render service). cmd is [exe, "--csp", dat, output, ...] (or
+    # ["wine", exe, ...] on Linux); the worker wants the argv from "--csp"
+    # onward. A failure on this one costume falls through to the one-shot path
+    # below, so a flaky worker or a bad DAT never blocks the batch.
     #
     # EXCEPT gun renders (Fox): --gun splices the blaster as an extra child JObj
     # into the render tree. The pool reuses ONE HSDRawViewer host across every
@@ -1,4 +1,5 @@
 """DAT file processing service - wraps existing processor tools."""
+import os
 import sys
 import logging
 from pathlib import Path
@@ -13,6 +14,8 @@ from validate_costume import validate_dat_file
 from generate_csp import generate_csp as generate_csp_internal
 from generate_stock_icon import generate_stock_icon as generate_stock_internal
 
+import slippi_cache
+
 logger = logging.getLogger(__name__)
 
 # Image type detection constants
@@ -57,10 +60,25 @@ def detect_character(file_path):
         return None
 
 
+def _slippi_result(is_valid, needs_fix, fix_applied, output, cached=False):
+    return {
+        'is_valid': is_valid,
+        'needs_fix': needs_fix,
+        'fix_applied': fix_applied,
+        'slippi_safe': is_valid and not needs_fix or fix_applied,
+        'output': output,
+        'cached': cached,
+    }
+
+
 def validate_for_slippi(file_path, auto_fix=False):
     """
     Validate .dat file for Slippi compatibility using copy→test→replace workflow.
 
+    Verdicts are cached by the DAT's md5 (see slippi_cache), so a byte-identical
+    DAT seen before -- re-import, re-scan, re-test -- skips the validator, and
+    an auto-fix copies the stored fixed bytes.
+
     Args:
         file_path: Path to the .dat file
         auto_fix: If True, apply fixes to the original file. If False, only check.
@@ -68,7 +86,7 @@ def validate_for_slippi(file_path, auto_fix=False):
     Returns: dict with validation results
     """
     import shutil
-    import os
+    import tempfile
 
     try:
         import hashlib
@@ -78,6 +96,15 @@ def validate_for_slippi(file_path, auto_fix=False):
         with open(file_path, 'rb') as f:
             original_hash = hashlib.md5(f.read()).hexdigest()
 
+        verdict = slippi_cache.lookup(original_hash)
+        if verdict is not None:
+            if auto_fix and verdict['needs_fix']:
+                shutil.copyfile(slippi_cache.fixed_path(verdict['fixed_hash']), file_path)
+                logger.info(f"Applied cached Slippi fix to {file_path}")
+                return _slippi_result(True, True, True, verdict['output'], cached=True)
+            return _slippi_result(verdict['is_valid'], verdict['needs_fix'], False,
+                                  verdict['output'], cached=True)
+
         # CRITICAL: Validator needs proper Melee character filename (e.g., PlFxGr.dat)
         # Get the proper filename based on detected character + color
         parser = DATParser(str(file_path))
@@ -86,24 +113,16 @@ def validate_for_slippi(file_path, auto_fix=False):
 
         if not proper_filename:
             logger.warning(f"Slippi validation skipped for {file_path}: could not determine character filename")
-            return {
-                'is_valid': False,
-                'needs_fix': False,
-                'fix_applied': False,
-                'slippi_safe': False,
-                'output': 'Could not determine proper character filename for validation'
-            }
-
-        # Always use copy→test workflow with proper character code filename
-        temp_check_file = file_path.parent / f"{proper_filename}.dat"
+            return _slippi_result(False, False, False,
+                                  'Could not determine proper character filename for validation')
 
-        # If file already has proper name, use a temp name to avoid copying to itself
-        if temp_check_file.resolve() == file_path.resolve():
-            temp_check_file = file_path.parent / f"_temp_{proper_filename}.dat"
+        # Always use copy→test workflow with proper character code filename. The
+        # copy gets its own directory so concurrent validations (bulk re-test)
+        # of same-slot costumes can't collide on PlXxYy.dat.
+        with tempfile.TemporaryDirectory(prefix='slippi_check_') as check_dir:
+            temp_check_file = Path(check_dir) / f"{proper_filename}.dat"
+            shutil.copy2(file_path, temp_check_file)
 
-        shutil.copy2(file_path, temp_check_file)
-
-        try:
             # Check the temp file
             result = validate_dat_file(temp_check_file, auto_fix=False, create_backup=False)
 
@@ -116,13 +135,15 @@ def validate_for_slippi(file_path, auto_fix=False):
 
             if original_hash != original_hash_after:
                 logger.error(f"ORIGINAL FILE WAS MODIFIED! Before: {original_hash}, After: {original_hash_after}")
-                return {
-                    'is_valid': False,
-                    'needs_fix': False,
-                    'fix_applied': False,
-                    'slippi_safe': False,
-                    'output': f"ERROR: Original file was modified during validation!\nBefore: {original_hash}\nAfter: {original_hash_after}"
-                }
+                return _slippi_result(
+                    False, False, False,
+                    f"ERROR: Original file was modified during validation!\nBefore: {original_hash}\nAfter: {original_hash_after}")
+
+            # A run that produced a verdict has exactly one of these set; both
+            # False means the validator itself failed -- don't cache that.
+            if is_valid or needs_fix:
+                slippi_cache.record(original_hash, is_valid, needs_fix, result.get('output', ''),
+                                    temp_check_file.read_bytes() if needs_fix else None)
 
             # If auto_fix is True and file needs fixing, apply the fix
             if auto_fix and needs_fix:
@@ -131,37 +152,71 @@ def validate_for_slippi(file_path, auto_fix=False):
                 shutil.copy2(temp_check_file, file_path)
                 logger.info(f"Copied fixed DAT from {temp_check_file} to {file_path}")
 
-                return {
-                    'is_valid': True,  # It's now valid after fixing
-                    'needs_fix': needs_fix,  # It did need fixes
-                    'fix_applied': True,
-                    'slippi_safe': True,
-                    'output': result.get('output', '')
-                }
-            else:
-                # Just return check results without modifying original
-                return {
-                    'is_valid': is_valid,
-                    'needs_fix': needs_fix,
-                    'fix_applied': False,
-                    'slippi_safe': is_valid and not needs_fix,
-                    'output': result.get('output', '')
-                }
-        finally:
-            # Clean up temp check file
-            if temp_check_file.exists():
-                os.remove(temp_check_file)
+                # It's now valid after fixing; it did need fixes
+                return _slippi_result(True, needs_fix, True, result.get('output', ''))
+            # Just return check results without modifying original
+            return _slippi_result(is_valid, needs_fix, False, result.get('output', ''))
 
     except Exception as e:
         import traceback
         logger.error(f"Slippi validation failed for {file_path}: {e}\n{traceback.format_exc()}")
-        return {
-            'is_valid': False,
-            'needs_fix': False,
-            'fix_applied': False,
-            'slippi_safe': False,
-            'output': str(e)
-        }
+        return _slippi_result(False, False, False, str(e))
+
+
+def _slippi_workers():
+    """Validator processes to run at once for a bulk pass: MEX_SLIPPI_PARALLELISM,
+    else the logical CPU count clamped to [1, 8]."""
+    env = os.environ.get('MEX_SLIPPI_PARALLELISM')
+    if env and env.isdigit():
+        return max(1, min(int(env), 32))
+    return max(1, min(os.cpu_count() or 2, 8))
+
+
+def validate_many_for_slippi(file_paths, auto_fix=False, workers=None, on_result=None):
+    """
+    Validate many .dat files in one pooled pass (e.g. a whole-vault re-test).
+
+    Each distinct DAT content runs the validator at most once: the first file
+    per md5 is validated on the pool, and its duplicates are then served from
+    the verdict cache. The validator is a subprocess, so threads are enough.
+
+    Args:
+        file_paths: Paths to the .dat files
+        auto_fix: Passed through to validate_for_slippi for every file
+        workers: Pool size (default MEX_SLIPPI_PARALLELISM / CPU count)
+        on_result: Optional callback(index, result) as each file finishes
+
+    Returns: list of validation result dicts, in `file_paths` order
+    """
+    import hashlib
+    from concurrent.futures import ThreadPoolExecutor
+
+    paths = [Path(p) for p in file_paths]
+    results = [None] * len(paths)
+
+    seen = set()
+    first, rest = [], []
+    for i, p in enumerate(paths):
+        try:
+            with open(p, 'rb') as f:
+                digest = hashlib.md5(f.read()).hexdigest()
+        except OSError:
+            digest = None
+        (rest if digest in seen else first).append(i)
+        if digest is not None:
+            seen.add(digest)
+
+    def run(i):
+        results[i] = validate_for_slippi(paths[i], auto_fix=auto_fix)
+        if on_result is not None:
+            on_result(i, results[i])
+
+    workers = max(1, workers or _slippi_workers())
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='slippi') as pool:
+        list(pool.map(run, first))
+    for i in rest:
+        run(i)
+    return results
 
 
 def generate_csp(file_path):
@@ -0,0 +1,113 @@
+"""
+Persistent Slippi-validation verdicts, keyed by the md5 of the input DAT.
+
+SlippiCostumeValidator.exe is a ~1s subprocess (10s timeout) that runs on every
+import, ISO-scan candidate and vault re-test, yet its verdict depends only on
+the DAT's bytes. So every successful run is recorded here:
+
+    <CACHE_DIR>/<md5[:2]>/<md5>.json    verdict for an input DAT
+    <CACHE_DIR>/<md5[:2]>/<md5>.dat     validator-fixed bytes, keyed by THEIR md5
+
+A DAT that needed fixing points at its fixed bytes (`fixed_hash`), so a repeat
+check is a JSON read and a repeat auto-fix is a file copy. The fixed output is
+itself Slippi-safe, so it gets a verdict of its own on the way in.
+
+Verdicts carry a fingerprint of the validator executable; replacing the exe
+(new Slippi rules) turns every old entry into a miss. Runs that failed (exe
+missing, timeout, crash) are never recorded.
+
+The backend points NUCLEUS_SLIPPI_CACHE_DIR into the vault storage folder (see
+backend/core/config.py); standalone use falls back to a cache/ folder next to
+the tools.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR = Path(os.environ.get('NUCLEUS_SLIPPI_CACHE_DIR')
+                 or Path(__file__).parent.parent / 'cache' / 'slippi')
+
+_validator_id = None
+
+
+def validator_fingerprint():
+    """Size + mtime of the validator exe, computed once per process."""
+    global _validator_id
+    if _validator_id is None:
+        try:
+            import validate_costume
+            exe = (Path(validate_costume.__file__).parent / 'CostumeValidator'
+                   / 'SlippiCostumeValidator.exe')
+            st = exe.stat()
+            _validator_id = f"{st.st_size}-{int(st.st_mtime)}"
+        except (ImportError, OSError):
+            _validator_id = 'missing'
+    return _validator_id
+
+
+def _entry(dat_hash, suffix):
+    return CACHE_DIR / dat_hash[:2] / f"{dat_hash}{suffix}"
+
+
+def _write_atomic(path, data):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix='.tmp-')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def lookup(dat_hash):
+    """Cached verdict for a DAT hash, or None. A verdict whose fixed bytes
+    have gone missing is a miss (auto-fix couldn't be served from it)."""
+    try:
+        verdict = json.loads(_entry(dat_hash, '.json').read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return None
+    if verdict.get('validator') != validator_fingerprint():
+        return None
+    fixed = verdict.get('fixed_hash')
+    if fixed and not _entry(fixed, '.dat').is_file():
+        return None
+    return verdict
+
+
+def fixed_path(fixed_hash):
+    """Path of the stored validator-fixed DAT for `fixed_hash`."""
+    return _entry(fixed_hash, '.dat')
+
+
+def record(dat_hash, is_valid, needs_fix, output, fixed_bytes=None):
+    """Store a validator verdict (and the fixed DAT, when it needed fixing).
+    Cache write failures are logged and swallowed -- the verdict is still good."""
+    try:
+        fixed_hash = None
+        if needs_fix and fixed_bytes is not None:
+            fixed_hash = hashlib.md5(fixed_bytes).hexdigest()
+            if not _entry(fixed_hash, '.dat').is_file():
+                _write_atomic(_entry(fixed_hash, '.dat'), fixed_bytes)
+            if fixed_hash != dat_hash and lookup(fixed_hash) is None:
+                record(fixed_hash, True, False, f"Output of fixing {dat_hash}")
+        verdict = {
+            'validator': validator_fingerprint(),
+            'is_valid': bool(is_valid),
+            'needs_fix': bool(needs_fix),
+            'fixed_hash': fixed_hash,
+            'output': output,
+        }
+        _write_atomic(_entry(dat_hash, '.json'), json.dumps(verdict).encode('utf-8'))
+    except OSError as e:
+        logger.warning(f"Could not cache Slippi verdict for {dat_hash}: {e}")
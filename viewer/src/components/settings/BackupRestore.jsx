@@ -2,7 +2,7 @@
  * BackupRestore - Vault backup and restore functionality
  *
  * Features:
- * - Export vault as backup (downloads .zip)
+ * - Export vault as backup (downloads .zip; snapshot + compress progress via socketio)
  * - Import vault from backup
  * - Replace or merge modes for restore
  * - Live restore progress: upload % (XHR) then extract/merge % (socketio)
@@ -29,6 +29,11 @@ export default function BackupRestore({ API_URL }) {
   const [restoreReport, setRestoreReport] = useState(null) // merge result, shown after finish
   const restoreIdRef = useRef(null)
 
+  // Live backup progress (the snapshot + zip export runs as a background job)
+  const [backupProgress, setBackupProgress] = useState(0)
+  const [backupStatus, setBackupStatus] = useState('')
+  const backupIdRef = useRef(null)
+
   // Subscribe to restore progress events (the slow extract/merge runs server-side
   // in a background thread and streams progress over the socket).
   useEffect(() => {
@@ -63,13 +68,51 @@ export default function BackupRestore({ API_URL }) {
       setBackupMessage({ text: `Restore failed: ${data.error}`, type: 'error' })
     })
 
+    socket.on('vault_backup_progress', (data) => {
+      if (data.backup_id !== backupIdRef.current) return
+      if (typeof data.percentage === 'number') setBackupProgress(data.percentage)
+      if (data.message) setBackupStatus(data.message)
+    })
+
+    socket.on('vault_backup_complete', (data) => {
+      if (data.backup_id !== backupIdRef.current) return
+      backupIdRef.current = null
+      setBackingUp(false)
+      setBackupProgress(100)
+      setBackupMessage({ text: 'Backup created! Downloading...', type: 'success' })
+      playSound('start')
+
+      // Download the backup file
+      const downloadUrl = `${API_URL}/storage/backup/download/${data.filename}`
+      const link = document.createElement('a')
+      link.href = downloadUrl
+      link.download = data.filename
+      document.body.appendChild(link)
+      link.click()
+      document.body.removeChild(link)
+
+      setTimeout(() => {
+        setBackupMessage({ text: '', type: '' })
+      }, 3000)
+    })
+
+    socket.on('vault_backup_error', (data) => {
+      if (data.backup_id !== backupIdRef.current) return
+      backupIdRef.current = null
+      setBackingUp(false)
+      setBackupMessage({ text: `Backup failed: ${data.error}`, type: 'error' })
+    })
+
     return () => socket.disconnect()
-  }, [restoreMode])
+  }, [restoreMode, API_URL])
 
   // Handlers
   const handleBackupVault = async () => {
     setBackingUp(true)
-    setBackupMessage({ text: 'Creating backup...', type: '' })
+    setBackupMessage({ text: '', type: '' })
+    setBackupProgress(0)
+    setBackupStatus('Starting backup…')
+    backupIdRef.current = null
 
     try {
       const response = await fetch(`${API_URL}/storage/backup`, {
@@ -78,29 +121,16 @@ export default function BackupRestore({ API_URL }) {
 
       const data = await response.json()
 
-      if (data.success) {
-        setBackupMessage({ text: 'Backup created! Downloading...', type: 'success' })
-        playSound('start')
-
-        // Download the backup file
-        const downloadUrl = `${API_URL}/storage/backup/download/${data.filename}`
-        const link = document.createElement('a')
-        link.href = downloadUrl
-        link.download = data.filename
-        document.body.appendChild(link)
-        link.click()
-        document.body.removeChild(link)
-
-        setTimeout(() => {
-          setBackupMessage({ text: '', type: '' })
-        }, 3000)
+      if (data.success && data.backup_id) {
+        // The socket events finish the job (progress, then download or error).
+        backupIdRef.current = data.backup_id
       } else {
+        setBackingUp(false)
         setBackupMessage({ text: `Backup failed: ${data.error}`, type: 'error' })
       }
     } catch (err) {
-      setBackupMessage({ text: `Error: ${err.message}`, type: 'error' })
-    } finally {
       setBackingUp(false)
+      setBackupMessage({ text: `Error: ${err.message}`, type: 'error' })
     }
   }
 
@@ -235,6 +265,15 @@ export default function BackupRestore({ API_URL }) {
           </button>
         </div>
 
+        {backingUp && (
+          <ProgressPanel
+            title="Creating backup…"
+            label="Backup progress"
+            progressValue={backupProgress}
+            messageText={backupStatus || 'Working…'}
+          />
+        )}
+
         {restoring && !restoreReport && (
           <ProgressPanel
             title={restoreTitle}
@@ -146,7 +146,7 @@ export default function IsoScanModal({
   useEffect(() => {
     fetch(`${API_URL}/iso-scan/preflight`)
       .then(r => r.json())
-      .then(d => setWitAvailable(!!d.wit_available))
+      .then(d => setWitAvailable(!!(d.scan_available ?? d.wit_available)))
       .catch(() => setWitAvailable(false))
   }, [])
 